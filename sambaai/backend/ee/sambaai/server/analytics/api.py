@@ -19,7 +19,7 @@ from ee.sambaai.db.analytics import fetch_query_analytics
 from ee.sambaai.db.analytics import user_can_view_assistant_stats
 from sambaai.auth.users import current_admin_user
 from sambaai.auth.users import current_user
-from sambaai.db.engine import get_session
+from sambaai.db.engine import get_readonly_session
 from sambaai.db.models import User
 
 router = APIRouter(prefix="/analytics")
@@ -40,7 +40,7 @@ def get_query_analytics(
     start: datetime.datetime | None = None,
     end: datetime.datetime | None = None,
     _: User | None = Depends(current_admin_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> list[QueryAnalyticsResponse]:
     daily_query_usage_info = fetch_query_analytics(
         start=start
@@ -71,7 +71,7 @@ def get_user_analytics(
     start: datetime.datetime | None = None,
     end: datetime.datetime | None = None,
     _: User | None = Depends(current_admin_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> list[UserAnalyticsResponse]:
     daily_query_usage_info_per_user = fetch_per_user_query_analytics(
         start=start
@@ -105,7 +105,7 @@ def get_sambaaibot_analytics(
     start: datetime.datetime | None = None,
     end: datetime.datetime | None = None,
     _: User | None = Depends(current_admin_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> list[SambaAIbotAnalyticsResponse]:
     daily_sambaaibot_info = fetch_sambaaibot_analytics(
         start=start
@@ -141,7 +141,7 @@ def get_persona_messages(
     start: datetime.datetime | None = None,
     end: datetime.datetime | None = None,
     _: User | None = Depends(current_admin_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> list[PersonaMessageAnalyticsResponse]:
     """Fetch daily message counts for a single persona within the given time range."""
     start = start or (
@@ -179,7 +179,7 @@ def get_persona_unique_users(
     start: datetime.datetime,
     end: datetime.datetime,
     _: User | None = Depends(current_admin_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> list[PersonaUniqueUsersResponse]:
     """Get unique users per day for a single persona."""
     unique_user_counts = []
@@ -218,7 +218,7 @@ def get_assistant_stats(
     start: datetime.datetime | None = None,
     end: datetime.datetime | None = None,
     user: User | None = Depends(current_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> AssistantStatsResponse:
     """
     Returns daily message and unique user counts for a user's assistant,
@@ -1,3 +1,5 @@
+from typing import cast
+
 from langchain_core.runnables.config import RunnableConfig
 
 from sambaai.agents.agent_search.deep_search.shared.expanded_retrieval.states import (
@@ -6,6 +8,12 @@ from sambaai.agents.agent_search.deep_search.shared.expanded_retrieval.states im
 from sambaai.agents.agent_search.deep_search.shared.expanded_retrieval.states import (
     QueryExpansionUpdate,
 )
+from sambaai.agents.agent_search.models import GraphConfig
+from sambaai.context.search.retrieval.search_runner import get_query_embeddings
+from sambaai.db.engine import get_session_context_manager
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
 
 
 def format_queries(
@@ -13,7 +21,27 @@ def format_queries(
 ) -> QueryExpansionUpdate:
     """
     LangGraph node to format the expanded queries into a list of strings.
+    Also embeds all of the queries about to be retrieved in a single batch, so that
+    the parallel retrievals don't each call the model server.
     """
+    graph_config = cast(GraphConfig, config["metadata"]["config"])
+    question = (
+        state.question
+        if state.question
+        else graph_config.inputs.prompt_builder.raw_user_query
+    )
+    queries = [query for query in state.expanded_queries + [question] if query.strip()]
+
+    try:
+        with get_session_context_manager() as db_session:
+            graph_config.retrieval_cache.embed_queries(
+                queries,
+                lambda missing: get_query_embeddings(missing, db_session),
+            )
+    except Exception:
+        # not fatal, each retrieval embeds its own query
+        logger.exception("Failed to batch embed expanded queries")
+
     return QueryExpansionUpdate(
         expanded_queries=state.expanded_queries,
     )
@@ -15,6 +15,12 @@ from sambaai.agents.agent_search.deep_search.shared.expanded_retrieval.states im
 from sambaai.agents.agent_search.models import GraphConfig
 from sambaai.agents.agent_search.shared_graph_utils.calculations import get_fit_scores
 from sambaai.agents.agent_search.shared_graph_utils.models import QueryRetrievalResult
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    CachedRetrieval,
+)
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    make_retrieval_cache_key,
+)
 from sambaai.agents.agent_search.shared_graph_utils.utils import (
     get_langgraph_node_log_string,
 )
@@ -28,6 +34,7 @@ from sambaai.tools.tool_implementations.search.search_tool import (
     SEARCH_RESPONSE_SUMMARY_ID,
 )
 from sambaai.tools.tool_implementations.search.search_tool import SearchResponseSummary
+from sambaai.tools.tool_implementations.search.search_tool import SearchTool
 from sambaai.utils.timing import log_function_time
 
 
@@ -43,7 +50,6 @@ def retrieve_documents(
     graph_config = cast(GraphConfig, config["metadata"]["config"])
     search_tool = graph_config.tooling.search_tool
 
-    retrieved_docs: list[InferenceSection] = []
     if not query_to_retrieve.strip():
         logger.warning("Empty query, skipping retrieval")
 
@@ -60,40 +66,59 @@ def retrieve_documents(
             ],
         )
 
-    query_info = None
     if search_tool is None:
         raise ValueError("search_tool must be provided for agentic search")
 
-    callback_container: list[list[InferenceSection]] = []
+    def _retrieve(search_tool: SearchTool) -> CachedRetrieval:
+        retrieved_docs: list[InferenceSection] = []
+        query_info = None
+        callback_container: list[list[InferenceSection]] = []
 
-    # new db session to avoid concurrency issues
-    with get_session_context_manager() as db_session:
-        for tool_response in search_tool.run(
-            query=query_to_retrieve,
-            override_kwargs=SearchToolOverrideKwargs(
-                force_no_rerank=True,
-                alternate_db_session=db_session,
-                retrieved_sections_callback=callback_container.append,
-                skip_query_analysis=not state.base_search,
-            ),
-        ):
-            # get retrieved docs to send to the rest of the graph
-            if tool_response.id == SEARCH_RESPONSE_SUMMARY_ID:
-                response = cast(SearchResponseSummary, tool_response.response)
-                retrieved_docs = response.top_sections
-                query_info = SearchQueryInfo(
-                    predicted_search=response.predicted_search,
-                    final_filters=response.final_filters,
-                    recency_bias_multiplier=response.recency_bias_multiplier,
-                )
-                break
+        # new db session to avoid concurrency issues
+        with get_session_context_manager() as db_session:
+            for tool_response in search_tool.run(
+                query=query_to_retrieve,
+                override_kwargs=SearchToolOverrideKwargs(
+                    force_no_rerank=True,
+                    alternate_db_session=db_session,
+                    retrieved_sections_callback=callback_container.append,
+                    skip_query_analysis=not state.base_search,
+                    precomputed_query_embedding=retrieval_cache.get_embedding(
+                        query_to_retrieve
+                    ),
+                ),
+            ):
+                # get retrieved docs to send to the rest of the graph
+                if tool_response.id == SEARCH_RESPONSE_SUMMARY_ID:
+                    response = cast(SearchResponseSummary, tool_response.response)
+                    retrieved_docs = response.top_sections
+                    query_info = SearchQueryInfo(
+                        predicted_search=response.predicted_search,
+                        final_filters=response.final_filters,
+                        recency_bias_multiplier=response.recency_bias_multiplier,
+                    )
+                    break
 
-    retrieved_docs = retrieved_docs[:AGENT_MAX_QUERY_RETRIEVAL_RESULTS]
+        return CachedRetrieval(
+            retrieved_documents=retrieved_docs[:AGENT_MAX_QUERY_RETRIEVAL_RESULTS],
+            pre_rerank_documents=callback_container[0] if callback_container else [],
+            query_info=query_info,
+        )
+
+    # rephrased queries of different sub-questions often overlap, only search once
+    retrieval_cache = graph_config.retrieval_cache
+    retrieval = retrieval_cache.get_or_retrieve(
+        make_retrieval_cache_key(
+            query_to_retrieve, state.base_search, search_tool.retrieval_options
+        ),
+        lambda: _retrieve(search_tool),
+    )
+    retrieved_docs = retrieval.retrieved_documents
+    query_info = retrieval.query_info
 
     if AGENT_RETRIEVAL_STATS:
-        pre_rerank_docs = callback_container[0] if callback_container else []
         fit_scores = get_fit_scores(
-            pre_rerank_docs,
+            retrieval.pre_rerank_documents,
             retrieved_docs,
         )
     else:
@@ -1,9 +1,13 @@
 from uuid import UUID
 
 from pydantic import BaseModel
+from pydantic import Field
 from pydantic import model_validator
 from sqlalchemy.orm import Session
 
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    AgentRetrievalCache,
+)
 from sambaai.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
 from sambaai.context.search.models import RerankingDetails
 from sambaai.db.models import Persona
@@ -82,6 +86,8 @@ class GraphConfig(BaseModel):
     behavior: GraphSearchConfig
     # Only needed for agentic search
     persistence: GraphPersistence
+    # Request scoped, shared by all sub-questions of the run
+    retrieval_cache: AgentRetrievalCache = Field(default_factory=AgentRetrievalCache)
 
     @model_validator(mode="after")
     def validate_search_tool(self) -> "GraphConfig":
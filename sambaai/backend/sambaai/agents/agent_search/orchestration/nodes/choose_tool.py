@@ -19,6 +19,7 @@ from sambaai.chat.tool_handling.tool_response_handler import (
     get_tool_call_for_non_tool_calling_llm_impl,
 )
 from sambaai.configs.chat_configs import USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH
+from sambaai.context.search.enums import SearchStage
 from sambaai.context.search.preprocessing.preprocessing import query_analysis
 from sambaai.context.search.retrieval.search_runner import get_query_embedding
 from sambaai.llm.factory import get_default_llms
@@ -126,17 +127,22 @@ def choose_tool(
         )
     ):
         # Run in a background thread to avoid blocking the main thread
-        embedding_thread = run_in_background(
-            get_query_embedding,
-            agent_config.inputs.prompt_builder.raw_user_query,
-            agent_config.persistence.db_session,
-        )
+        if override_kwargs.precomputed_query_embedding is None:
+            embedding_thread = run_in_background(
+                get_query_embedding,
+                agent_config.inputs.prompt_builder.raw_user_query,
+                agent_config.persistence.db_session,
+            )
         keyword_thread = run_in_background(
             query_analysis,
             agent_config.inputs.prompt_builder.raw_user_query,
         )
 
-        if USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH:
+        search_deadline = agent_config.tooling.search_tool.deadline
+        if USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH and (
+            search_deadline is None
+            or search_deadline.allows(SearchStage.QUERY_EXPANSION)
+        ):
 
             expanded_keyword_thread = run_in_background(
                 _expand_query,
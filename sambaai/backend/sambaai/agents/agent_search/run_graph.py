@@ -1,3 +1,4 @@
+import time
 from collections.abc import Iterable
 from datetime import datetime
 from typing import cast
@@ -19,6 +20,9 @@ from sambaai.agents.agent_search.deep_search.main.states import (
     MainInput as MainInput,
 )
 from sambaai.agents.agent_search.models import GraphConfig
+from sambaai.agents.agent_search.shared_graph_utils.node_timing import (
+    NodeTimingCallbackHandler,
+)
 from sambaai.agents.agent_search.shared_graph_utils.utils import get_test_config
 from sambaai.chat.models import AgentAnswerPiece
 from sambaai.chat.models import AnswerPacket
@@ -30,6 +34,7 @@ from sambaai.chat.models import StreamStopInfo
 from sambaai.chat.models import SubQueryPiece
 from sambaai.chat.models import SubQuestionPiece
 from sambaai.chat.models import ToolResponse
+from sambaai.configs.agent_configs import AGENT_MAX_CONCURRENCY
 from sambaai.context.search.models import SearchRequest
 from sambaai.db.engine import get_session_context_manager
 from sambaai.llm.factory import get_default_llms
@@ -91,12 +96,28 @@ def manage_sync_streaming(
     graph_input: BasicInput | MainInput | DCMainInput,
 ) -> Iterable[StreamEvent]:
     message_id = config.persistence.message_id if config.persistence else None
-    for event in compiled_graph.stream(
-        stream_mode="custom",
-        input=graph_input,
-        config={"metadata": {"config": config, "thread_id": str(message_id)}},
-    ):
-        yield cast(CustomStreamEvent, event)
+    node_timer = NodeTimingCallbackHandler()
+    start_time = time.monotonic()
+    try:
+        for event in compiled_graph.stream(
+            stream_mode="custom",
+            input=graph_input,
+            config={
+                "metadata": {"config": config, "thread_id": str(message_id)},
+                "callbacks": [node_timer],
+                "max_concurrency": AGENT_MAX_CONCURRENCY,
+            },
+        ):
+            yield cast(CustomStreamEvent, event)
+    finally:
+        retrieval_cache = config.retrieval_cache
+        logger.info(
+            f"Graph run finished in {time.monotonic() - start_time:.2f}s: "
+            f"message_id={message_id} "
+            f"retrieval_cache_hits={retrieval_cache.hits} "
+            f"retrieval_cache_misses={retrieval_cache.misses} "
+            f"nodes=[{node_timer.summary()}]"
+        )
 
 
 def run_graph(
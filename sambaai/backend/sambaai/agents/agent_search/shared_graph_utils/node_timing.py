@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pydantic import BaseModel
+
+
+class NodeTiming(BaseModel):
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class NodeTimingCallbackHandler(BaseCallbackHandler):
+    """Records how often and for how long each LangGraph node ran during a graph
+    run. Nodes of the same name in different subgraphs are aggregated.
+
+    LangGraph reports every runnable inside a node with the node's metadata, only
+    the run named after the node itself is the node. Internal nodes (__start__,
+    ...) are skipped."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._start_times: dict[UUID, tuple[str, float]] = {}
+        self.timings: dict[str, NodeTiming] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or node.startswith("__") or kwargs.get("name") != node:
+            return
+        with self._lock:
+            self._start_times[run_id] = (node, time.monotonic())
+
+    def _record(self, run_id: UUID) -> None:
+        with self._lock:
+            started = self._start_times.pop(run_id, None)
+            if started is None:
+                return
+            node, start_time = started
+            elapsed = time.monotonic() - start_time
+
+            timing = self.timings.setdefault(node, NodeTiming())
+            timing.calls += 1
+            timing.total_seconds += elapsed
+            timing.max_seconds = max(timing.max_seconds, elapsed)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._record(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._record(run_id)
+
+    def summary(self) -> str:
+        """Slowest nodes (by total time) first"""
+        return ", ".join(
+            f"{node}: calls={timing.calls} total={timing.total_seconds:.2f}s "
+            f"max={timing.max_seconds:.2f}s"
+            for node, timing in sorted(
+                self.timings.items(), key=lambda item: -item[1].total_seconds
+            )
+        )
@@ -0,0 +1,108 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+
+from pydantic import BaseModel
+
+from sambaai.context.search.models import InferenceSection
+from sambaai.context.search.models import RetrievalDetails
+from sambaai.tools.models import SearchQueryInfo
+from sambaai.utils.logger import setup_logger
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# (normalized query, base search, serialized retrieval options)
+RetrievalCacheKey = tuple[str, bool, str]
+
+
+class CachedRetrieval(BaseModel):
+    retrieved_documents: list[InferenceSection]
+    # what the search returned before any reranking, used for the fit score stats
+    pre_rerank_documents: list[InferenceSection]
+    query_info: SearchQueryInfo | None
+
+
+def normalize_query(query: str) -> str:
+    """Rephrased queries often only differ in case, whitespace or trailing
+    punctuation, none of which changes what the search returns in a meaningful way."""
+    return " ".join(query.lower().split()).strip(" ?.!")
+
+
+def make_retrieval_cache_key(
+    query: str,
+    base_search: bool,
+    retrieval_options: RetrievalDetails | None,
+) -> RetrievalCacheKey:
+    return (
+        normalize_query(query),
+        base_search,
+        retrieval_options.model_dump_json() if retrieval_options else "",
+    )
+
+
+class AgentRetrievalCache:
+    """Request scoped cache of search results and query embeddings, shared by all
+    sub-questions (and their expanded queries) of one agent search run.
+
+    Concurrent lookups of the same key are collapsed into a single retrieval: the
+    first caller runs it and everyone else waits for its result. A failed retrieval
+    is not cached so that a later caller can try again. Every caller gets its own
+    copy of the result since downstream nodes modify the sections (e.g. scores)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._results: dict[RetrievalCacheKey, Future[CachedRetrieval]] = {}
+        self._embeddings: dict[str, Embedding] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_retrieve(
+        self,
+        key: RetrievalCacheKey,
+        retrieve: Callable[[], CachedRetrieval],
+    ) -> CachedRetrieval:
+        with self._lock:
+            future = self._results.get(key)
+            is_owner = future is None
+            if future is None:
+                future = Future()
+                self._results[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_owner:
+            try:
+                future.set_result(retrieve())
+            except Exception as e:
+                with self._lock:
+                    del self._results[key]
+                future.set_exception(e)
+                raise
+
+        return future.result().model_copy(deep=True)
+
+    def get_embedding(self, query: str) -> Embedding | None:
+        with self._lock:
+            return self._embeddings.get(query)
+
+    def embed_queries(
+        self,
+        queries: list[str],
+        embed: Callable[[list[str]], list[Embedding]],
+    ) -> None:
+        """Embeds the queries which are not embedded yet with a single call to
+        `embed`. Embeddings are keyed by the exact query text, unlike results."""
+        with self._lock:
+            missing = list(
+                dict.fromkeys(
+                    query for query in queries if query not in self._embeddings
+                )
+            )
+        if not missing:
+            return
+
+        embeddings = embed(missing)
+        with self._lock:
+            self._embeddings.update(zip(missing, embeddings))
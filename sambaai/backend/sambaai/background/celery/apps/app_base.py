@@ -22,6 +22,8 @@ from sqlalchemy.orm import Session
 from sambaai.background.celery.apps.task_formatters import CeleryTaskColoredFormatter
 from sambaai.background.celery.apps.task_formatters import CeleryTaskPlainFormatter
 from sambaai.background.celery.celery_utils import celery_is_worker_primary
+from sambaai.configs.app_configs import DOCUMENT_INDEX_TYPE
+from sambaai.configs.constants import DocumentIndexType
 from sambaai.configs.constants import ONYX_CLOUD_CELERY_TASK_PREFIX
 from sambaai.configs.constants import SambaAIRedisLocks
 from sambaai.db.engine import get_sqlalchemy_engine
@@ -479,6 +481,10 @@ def wait_for_vespa_or_shutdown(sender: Any, **kwargs: Any) -> None:
     """Waits for Vespa to become ready subject to a timeout.
     Raises WorkerShutdown if the timeout is reached."""
 
+    if DOCUMENT_INDEX_TYPE == DocumentIndexType.EMBEDDED.value:
+        # the index lives in the worker processes, there is nothing to wait for
+        return
+
     if not wait_for_vespa_with_timeout():
         msg = "Vespa: Readiness probe did not succeed within the timeout. Exiting..."
         logger.error(msg)
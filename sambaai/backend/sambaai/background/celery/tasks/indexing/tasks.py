@@ -1248,6 +1248,8 @@ def connector_indexing_proxy_task(
             )
         )
 
+        # the job isn't a daemon, it doesn't go away with the watchdog
+        job.release()
         redis_connector_index.set_watchdog(False)
         raise RuntimeError(f"Exception encountered: traceback={result.exception_str}")
 
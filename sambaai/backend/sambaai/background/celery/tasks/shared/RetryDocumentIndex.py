@@ -42,6 +42,19 @@ class RetryDocumentIndex:
             chunk_count=chunk_count,
         )
 
+    @retry(
+        retry=retry_if_exception_type(httpx.ReadTimeout),
+        wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
+        stop=stop_after_delay(STOP_AFTER),
+    )
+    def delete_multiple(
+        self,
+        doc_id_to_chunk_count: dict[str, int | None],
+        *,
+        tenant_id: str,
+    ) -> int:
+        return self.index.delete_multiple(doc_id_to_chunk_count, tenant_id=tenant_id)
+
     @retry(
         retry=retry_if_exception_type(httpx.ReadTimeout),
         wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
@@ -7,6 +7,7 @@ from celery import shared_task
 from celery import Task
 from celery.exceptions import SoftTimeLimitExceeded
 from redis import Redis
+from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from sambaai.access.access import get_access_for_document
@@ -17,8 +18,10 @@ from sambaai.configs.constants import SambaAICeleryTask
 from sambaai.db.document import delete_document_by_connector_credential_pair__no_commit
 from sambaai.db.document import delete_documents_complete__no_commit
 from sambaai.db.document import fetch_chunk_count_for_document
+from sambaai.db.document import fetch_chunk_counts_for_documents
 from sambaai.db.document import get_document
 from sambaai.db.document import get_document_connector_count
+from sambaai.db.document import get_document_connector_counts
 from sambaai.db.document import mark_document_as_modified
 from sambaai.db.document import mark_document_as_synced
 from sambaai.db.document_set import fetch_document_sets_for_document
@@ -37,6 +40,10 @@ DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES = 3
 LIGHT_SOFT_TIME_LIMIT = 105
 LIGHT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT + 15
 
+# a batch falls back to deleting and updating its documents one at a time
+BATCH_SOFT_TIME_LIMIT = 900
+BATCH_TIME_LIMIT = BATCH_SOFT_TIME_LIMIT + 15
+
 
 class SambaAICeleryTaskCompletionStatus(str, Enum):
     """The different statuses the watchdog can finish with.
@@ -56,6 +63,58 @@ class SambaAICeleryTaskCompletionStatus(str, Enum):
     RETRYABLE_EXCEPTION = "retryable_exception"
 
 
+def _remove_cc_pair_from_document(
+    document_id: str,
+    connector_id: int,
+    credential_id: int,
+    tenant_id: str,
+    retry_index: RetryDocumentIndex,
+    db_session: Session,
+) -> int | None:
+    """Removes the access the cc_pair grants from a document other cc_pairs still
+    reference. Returns the number of chunks updated, None if the document is gone."""
+    doc = get_document(document_id, db_session)
+    if not doc:
+        return None
+
+    # the below functions do not include cc_pairs being deleted.
+    # i.e. they will correctly omit access for the current cc_pair
+    doc_access = get_access_for_document(document_id=document_id, db_session=db_session)
+
+    doc_sets = fetch_document_sets_for_document(document_id, db_session)
+    update_doc_sets: set[str] = set(doc_sets)
+
+    fields = VespaDocumentFields(
+        document_sets=update_doc_sets,
+        access=doc_access,
+        boost=doc.boost,
+        hidden=doc.hidden,
+    )
+
+    # update Vespa. OK if doc doesn't exist. Raises exception otherwise.
+    chunks_affected = retry_index.update_single(
+        document_id,
+        tenant_id=tenant_id,
+        chunk_count=doc.chunk_count,
+        fields=fields,
+        user_fields=None,
+    )
+
+    # there are still other cc_pair references to the doc, so just resync to Vespa
+    delete_document_by_connector_credential_pair__no_commit(
+        db_session=db_session,
+        document_id=document_id,
+        connector_credential_pair_identifier=ConnectorCredentialPairIdentifier(
+            connector_id=connector_id,
+            credential_id=credential_id,
+        ),
+    )
+
+    mark_document_as_synced(document_id, db_session)
+    db_session.commit()
+    return chunks_affected
+
+
 @shared_task(
     name=SambaAICeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
     soft_time_limit=LIGHT_SOFT_TIME_LIMIT,
@@ -130,47 +189,17 @@ def document_by_cc_pair_cleanup_task(
                 action = "update"
 
                 # count > 1 means the document still has cc_pair references
-                doc = get_document(document_id, db_session)
-                if not doc:
-                    return False
-
-                # the below functions do not include cc_pairs being deleted.
-                # i.e. they will correctly omit access for the current cc_pair
-                doc_access = get_access_for_document(
-                    document_id=document_id, db_session=db_session
-                )
-
-                doc_sets = fetch_document_sets_for_document(document_id, db_session)
-                update_doc_sets: set[str] = set(doc_sets)
-
-                fields = VespaDocumentFields(
-                    document_sets=update_doc_sets,
-                    access=doc_access,
-                    boost=doc.boost,
-                    hidden=doc.hidden,
-                )
-
-                # update Vespa. OK if doc doesn't exist. Raises exception otherwise.
-                chunks_affected = retry_index.update_single(
-                    document_id,
+                doc_chunks_affected = _remove_cc_pair_from_document(
+                    document_id=document_id,
+                    connector_id=connector_id,
+                    credential_id=credential_id,
                     tenant_id=tenant_id,
-                    chunk_count=doc.chunk_count,
-                    fields=fields,
-                    user_fields=None,
-                )
-
-                # there are still other cc_pair references to the doc, so just resync to Vespa
-                delete_document_by_connector_credential_pair__no_commit(
+                    retry_index=retry_index,
                     db_session=db_session,
-                    document_id=document_id,
-                    connector_credential_pair_identifier=ConnectorCredentialPairIdentifier(
-                        connector_id=connector_id,
-                        credential_id=credential_id,
-                    ),
                 )
-
-                mark_document_as_synced(document_id, db_session)
-                db_session.commit()
+                if doc_chunks_affected is None:
+                    return False
+                chunks_affected = doc_chunks_affected
 
                 completion_status = SambaAICeleryTaskCompletionStatus.SUCCEEDED
             else:
@@ -262,7 +291,146 @@ def document_by_cc_pair_cleanup_task(
     return True
 
 
-@shared_task(name=SambaAICeleryTask.CELERY_BEAT_HEARTBEAT, ignore_result=True, bind=True)
+@shared_task(
+    name=SambaAICeleryTask.DOCUMENTS_BY_CC_PAIR_CLEANUP_TASK,
+    soft_time_limit=BATCH_SOFT_TIME_LIMIT,
+    time_limit=BATCH_TIME_LIMIT,
+    max_retries=DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES,
+    bind=True,
+)
+def documents_by_cc_pair_cleanup_task(
+    self: Task,
+    document_ids: list[str],
+    connector_id: int,
+    credential_id: int,
+    tenant_id: str,
+) -> bool:
+    """document_by_cc_pair_cleanup_task for a batch of documents, created by connector
+    deletion. The documents only this cc_pair references are deleted from the document
+    index together, which lets Vespa delete them with a single selection delete.
+
+    Safe to retry, documents already cleaned up are skipped."""
+    task_logger.debug(f"Task start: docs={len(document_ids)}")
+
+    start = time.monotonic()
+
+    completion_status = SambaAICeleryTaskCompletionStatus.UNDEFINED
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            chunks_affected = 0
+
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                active_search_settings.primary,
+                active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            counts = dict(get_document_connector_counts(db_session, document_ids))
+            doc_ids_to_delete = [
+                document_id
+                for document_id in document_ids
+                if counts.get(document_id) == 1
+            ]
+            doc_ids_to_update = [
+                document_id
+                for document_id in document_ids
+                if counts.get(document_id, 0) > 1
+            ]
+
+            if doc_ids_to_delete:
+                # this is the only remaining cc_pair reference to these docs, delete
+                # them from vespa and the db
+                chunks_affected += retry_index.delete_multiple(
+                    dict(
+                        fetch_chunk_counts_for_documents(doc_ids_to_delete, db_session)
+                    ),
+                    tenant_id=tenant_id,
+                )
+
+                delete_documents_complete__no_commit(
+                    db_session=db_session,
+                    document_ids=doc_ids_to_delete,
+                )
+                db_session.commit()
+
+            for document_id in doc_ids_to_update:
+                chunks_affected += (
+                    _remove_cc_pair_from_document(
+                        document_id=document_id,
+                        connector_id=connector_id,
+                        credential_id=credential_id,
+                        tenant_id=tenant_id,
+                        retry_index=retry_index,
+                        db_session=db_session,
+                    )
+                    or 0
+                )
+
+            completion_status = SambaAICeleryTaskCompletionStatus.SUCCEEDED
+
+            elapsed = time.monotonic() - start
+            task_logger.info(
+                f"docs={len(document_ids)} "
+                f"deleted={len(doc_ids_to_delete)} "
+                f"updated={len(doc_ids_to_update)} "
+                f"chunks={chunks_affected} "
+                f"elapsed={elapsed:.2f}"
+            )
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. docs={len(document_ids)}")
+        completion_status = SambaAICeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as e:
+        task_logger.exception(
+            f"documents_by_cc_pair_cleanup_task exceptioned: docs={len(document_ids)}"
+        )
+
+        if self.max_retries is not None and self.request.retries >= self.max_retries:
+            # This is the last attempt! mark the remaining documents as dirty in the db
+            # so that they eventually get fixed out of band via stale document
+            # reconciliation
+            task_logger.warning(
+                f"Max celery task retries reached. Marking docs as dirty for "
+                f"reconciliation: docs={len(document_ids)}"
+            )
+            with get_session_with_current_tenant() as db_session:
+                for document_id, _ in get_document_connector_counts(
+                    db_session, document_ids
+                ):
+                    # delete the cc pair relationship now and let reconciliation
+                    # clean it up in vespa
+                    delete_document_by_connector_credential_pair__no_commit(
+                        db_session=db_session,
+                        document_id=document_id,
+                        connector_credential_pair_identifier=ConnectorCredentialPairIdentifier(
+                            connector_id=connector_id,
+                            credential_id=credential_id,
+                        ),
+                    )
+                    mark_document_as_modified(document_id, db_session)
+            completion_status = (
+                SambaAICeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+            )
+        else:
+            completion_status = SambaAICeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+            # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+            countdown = 2 ** (self.request.retries + 4)
+            self.retry(exc=e, countdown=countdown)  # this will raise a celery exception
+    finally:
+        task_logger.info(
+            f"documents_by_cc_pair_cleanup_task completed: "
+            f"status={completion_status.value} docs={len(document_ids)}"
+        )
+
+    return completion_status == SambaAICeleryTaskCompletionStatus.SUCCEEDED
+
+
+@shared_task(
+    name=SambaAICeleryTask.CELERY_BEAT_HEARTBEAT, ignore_result=True, bind=True
+)
 def celery_beat_heartbeat(self: Task, *, tenant_id: str) -> None:
     """When this task runs, it writes a key to Redis with a TTL.
 
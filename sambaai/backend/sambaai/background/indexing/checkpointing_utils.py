@@ -64,6 +64,36 @@ def load_checkpoint(
     return ConnectorCheckpoint.model_validate_json(checkpoint_data)
 
 
+def get_checkpoint_after_successful_attempt(
+    db_session: Session,
+    successful_attempt: IndexAttempt,
+    connector: BaseConnector,
+) -> ConnectorCheckpoint:
+    """Get the starting checkpoint for a run following a successful attempt.
+    Connectors start from scratch unless they opt into carrying state over from
+    the final checkpoint of the successful attempt."""
+    if not isinstance(connector, CheckpointedConnector):
+        return connector.build_dummy_checkpoint()
+
+    def _load_previous_checkpoint() -> ConnectorCheckpoint | None:
+        if successful_attempt.checkpoint_pointer is None:
+            return None
+        try:
+            return load_checkpoint(
+                db_session=db_session,
+                index_attempt_id=successful_attempt.id,
+                connector=connector,
+            )
+        except Exception:
+            logger.exception(
+                f"Failed to load checkpoint from previous successful attempt with ID "
+                f"{successful_attempt.id}. Starting from scratch."
+            )
+            return None
+
+    return connector.build_checkpoint_from_previous_run(_load_previous_checkpoint)
+
+
 def get_latest_valid_checkpoint(
     db_session: Session,
     cc_pair_id: int,
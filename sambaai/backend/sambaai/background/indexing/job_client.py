@@ -6,6 +6,8 @@ NOTE: cannot use Celery directly due to
 https://github.com/celery/celery/issues/7007#issuecomment-1740139367"""
 
 import multiprocessing as mp
+import os
+import signal
 import sys
 import traceback
 from collections.abc import Callable
@@ -57,6 +59,10 @@ def _initializer(
     if kwargs is None:
         kwargs = {}
 
+    # lead a process group of our own, so that releasing the job also terminates
+    # any processes the job started (e.g. chunking workers)
+    os.setpgrp()
+
     logger.info("Initializing spawned worker child process.")
     # 1. Get tenant_id from args or fallback to default
     tenant_id = POSTGRES_DEFAULT_SCHEMA
@@ -120,8 +126,16 @@ class SimpleJob:
         return self.release()
 
     def release(self) -> bool:
-        if self.process is not None and self.process.is_alive():
-            self.process.terminate()
+        if (
+            self.process is not None
+            and self.process.pid is not None
+            and self.process.is_alive()
+        ):
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                # the process hasn't set up its process group yet
+                self.process.terminate()
             return True
         return False
 
@@ -192,8 +206,10 @@ class SimpleJobClient:
         # get_start_method's current setting
         ctx = mp.get_context("spawn")
         queue = ctx.Queue()
+        # not a daemon, daemons can't start processes of their own. Instead the job
+        # and everything it started are terminated together by SimpleJob.release
         process = ctx.Process(
-            target=_run_in_process, args=(func, queue, args), daemon=True
+            target=_run_in_process, args=(func, queue, args), daemon=False
         )
         job = SimpleJob(id=job_id, process=process, queue=queue)
         process.start()
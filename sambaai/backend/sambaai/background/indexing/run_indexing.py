@@ -9,10 +9,14 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from sambaai.background.indexing.checkpointing_utils import check_checkpoint_size
+from sambaai.background.indexing.checkpointing_utils import (
+    get_checkpoint_after_successful_attempt,
+)
 from sambaai.background.indexing.checkpointing_utils import get_latest_valid_checkpoint
 from sambaai.background.indexing.checkpointing_utils import save_checkpoint
 from sambaai.background.indexing.memory_tracer import MemoryTracer
 from sambaai.configs.app_configs import INDEX_BATCH_SIZE
+from sambaai.configs.app_configs import INDEXING_CHUNKER_PROCESSES
 from sambaai.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
 from sambaai.configs.app_configs import INDEXING_TRACER_INTERVAL
 from sambaai.configs.app_configs import INTEGRATION_TESTS_MODE
@@ -52,6 +56,7 @@ from sambaai.document_index.factory import get_default_document_index
 from sambaai.httpx.httpx_pool import HttpxPool
 from sambaai.indexing.embedder import DefaultIndexingEmbedder
 from sambaai.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from sambaai.indexing.indexing_pipeline import build_chunker
 from sambaai.indexing.indexing_pipeline import build_indexing_pipeline
 from sambaai.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
@@ -360,6 +365,13 @@ def _run_indexing(
         httpx_client=HttpxPool.get("vespa"),
     )
 
+    # built here rather than by the pipeline so its worker processes can be shut down
+    chunker = build_chunker(
+        embedder=embedding_model,
+        db_session=db_session,
+        callback=callback,
+        num_processes=INDEXING_CHUNKER_PROCESSES,
+    )
     indexing_pipeline = build_indexing_pipeline(
         embedder=embedding_model,
         information_content_classification_model=information_content_classification_model,
@@ -371,6 +383,7 @@ def _run_indexing(
         db_session=db_session,
         tenant_id=tenant_id,
         callback=callback,
+        chunker=chunker,
     )
 
     # Initialize memory tracer. NOTE: won't actually do anything if
@@ -407,12 +420,16 @@ def _run_indexing(
             # don't use a checkpoint if we're explicitly indexing from
             # the beginning in order to avoid weird interactions between
             # checkpointing / failure handling
-            # OR
-            # if the last attempt was successful
-            if index_attempt.from_beginning or (
-                most_recent_attempt and most_recent_attempt.status.is_successful()
-            ):
+            if index_attempt.from_beginning:
                 checkpoint = connector_runner.connector.build_dummy_checkpoint()
+            # if the last attempt was successful, only carry over whatever
+            # state the connector explicitly asks for (e.g. change feed cursors)
+            elif most_recent_attempt and most_recent_attempt.status.is_successful():
+                checkpoint = get_checkpoint_after_successful_attempt(
+                    db_session=db_session_temp,
+                    successful_attempt=most_recent_attempt,
+                    connector=connector_runner.connector,
+                )
             else:
                 checkpoint = get_latest_valid_checkpoint(
                     db_session=db_session_temp,
@@ -632,6 +649,7 @@ def _run_indexing(
                 "total_chunks": chunk_count,
                 "time_elapsed_seconds": time.monotonic() - start_time,
                 "source": ctx.source.value,
+                **connector_runner.doc_buffer.stats.model_dump(),
             },
             tenant_id=tenant_id,
         )
@@ -733,9 +751,21 @@ def _run_indexing(
 
             memory_tracer.stop()
             raise e
+    finally:
+        chunker.close()
 
     memory_tracer.stop()
 
+    buffer_stats = connector_runner.doc_buffer.stats
+    logger.info(
+        f"Connector document buffer: "
+        f"peak_memory_bytes={buffer_stats.peak_memory_bytes} "
+        f"largest_document_bytes={buffer_stats.largest_document_bytes} "
+        f"spilled_documents={buffer_stats.spilled_documents} "
+        f"spilled_memory_bytes={buffer_stats.spilled_memory_bytes} "
+        f"spilled_disk_bytes={buffer_stats.spilled_disk_bytes}"
+    )
+
     elapsed_time = time.monotonic() - start_time
     with get_session_with_current_tenant() as db_session_temp:
         # resolve entity-based errors
@@ -0,0 +1,257 @@
+import base64
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime
+from datetime import timezone
+from typing import cast
+
+import numpy as np
+from pydantic import BaseModel
+from redis import Redis
+from sqlalchemy.orm import Session
+
+from sambaai.access.access import get_acl_for_user
+from sambaai.chat.models import ChatSambaAIBotResponse
+from sambaai.configs.chat_configs import ANSWER_CACHE_MAX_ENTRIES
+from sambaai.configs.chat_configs import ANSWER_CACHE_PERSONA_IDS
+from sambaai.configs.chat_configs import ANSWER_CACHE_SIMILARITY_THRESHOLD
+from sambaai.configs.chat_configs import ANSWER_CACHE_TTL
+from sambaai.db.document import get_documents_last_modified
+from sambaai.db.models import User
+from sambaai.redis.redis_pool import get_redis_client
+from sambaai.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_INDEX_KEY_PREFIX = "answer_cache_index"
+_ENTRY_KEY_PREFIX = "answer_cache_entry"
+
+
+class _IndexEntry(BaseModel):
+    entry_id: str
+    # base64 encoded float32 query embedding, normalized
+    embedding: str
+    created_at: float
+
+
+class _CachedAnswer(BaseModel):
+    answer: ChatSambaAIBotResponse
+    # the documents the answer is based on, if any of them is re-indexed (or
+    # deleted) after the answer was cached, the answer is dropped
+    document_ids: list[str]
+    created_at: float
+
+
+def _encode_embedding(embedding: Embedding) -> tuple[str, np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return base64.b64encode(vector.tobytes()).decode(), vector
+
+
+def _decode_embedding(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def _answer_document_ids(answer: ChatSambaAIBotResponse) -> list[str]:
+    document_ids = {citation.document_id for citation in answer.citations or []}
+    if answer.docs:
+        document_ids.update(doc.document_id for doc in answer.docs.top_documents)
+    return sorted(document_ids)
+
+
+class AnswerCache:
+    """Semantic cache of answers for one scope (persona, document sets, access).
+
+    A question is answered from the cache if a question with a query embedding at
+    least `similarity_threshold` (cosine) similar was answered within the last
+    `ttl` seconds, and none of the documents that answer was based on has been
+    modified since. Modified documents are detected through Document.last_modified,
+    which indexing bumps, so nothing needs to be invalidated explicitly.
+
+    Stored in Redis as a small hash of embeddings per scope plus one key per
+    answer, so a lookup only reads the answer it is going to use. Replayed answers
+    have no chat message, so they carry no feedback buttons. Redis failures
+    are logged and treated as misses."""
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        scope_key: str,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl: int = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.redis_client = redis_client
+        self.scope_key = scope_key
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @property
+    def _index_key(self) -> str:
+        return f"{_INDEX_KEY_PREFIX}:{self.scope_key}"
+
+    def _entry_key(self, entry_id: str) -> str:
+        return f"{_ENTRY_KEY_PREFIX}:{self.scope_key}:{entry_id}"
+
+    def _load_index(self) -> list[_IndexEntry]:
+        """The live entries of the index, oldest first. Expired entries and the
+        oldest ones over `max_entries` are removed from it."""
+        raw_index = cast(dict[bytes, bytes], self.redis_client.hgetall(self._index_key))
+        index = sorted(
+            (
+                _IndexEntry.model_validate_json(raw_entry)
+                for raw_entry in raw_index.values()
+            ),
+            key=lambda entry: entry.created_at,
+        )
+
+        oldest_allowed = time.time() - self.ttl
+        live_index = [entry for entry in index if entry.created_at >= oldest_allowed][
+            -self.max_entries :
+        ]
+        if len(live_index) < len(index):
+            live_ids = {entry.entry_id for entry in live_index}
+            self._drop_from_index(
+                [entry.entry_id for entry in index if entry.entry_id not in live_ids]
+            )
+        return live_index
+
+    def _drop_from_index(self, entry_ids: list[str]) -> None:
+        if entry_ids:
+            self.redis_client.hdel(self._index_key, *entry_ids)
+
+    def _add_to_index(self, entry: _IndexEntry) -> None:
+        # one field per entry, so concurrent puts never overwrite each other
+        self.redis_client.hset(self._index_key, entry.entry_id, entry.model_dump_json())
+        self.redis_client.expire(self._index_key, self.ttl)
+
+    def _is_stale(self, cached: _CachedAnswer, db_session: Session) -> bool:
+        if not cached.document_ids:
+            return False
+
+        last_modified = get_documents_last_modified(db_session, cached.document_ids)
+        if len(last_modified) < len(cached.document_ids):
+            return True
+
+        created_at = datetime.fromtimestamp(cached.created_at, tz=timezone.utc)
+        return any(
+            modified is None or modified > created_at
+            for modified in last_modified.values()
+        )
+
+    def get(
+        self, query_embedding: Embedding, db_session: Session
+    ) -> ChatSambaAIBotResponse | None:
+        try:
+            index = self._load_index()
+            if not index:
+                return None
+
+            _, query_vector = _encode_embedding(query_embedding)
+            similarities = (
+                np.stack([_decode_embedding(entry.embedding) for entry in index])
+                @ query_vector
+            )
+
+            dropped: set[str] = set()
+            answer = None
+            for position in np.argsort(-similarities):
+                if similarities[position] < self.similarity_threshold:
+                    break
+
+                entry = index[position]
+                raw_answer = cast(
+                    bytes | None,
+                    self.redis_client.get(self._entry_key(entry.entry_id)),
+                )
+                if raw_answer is None:
+                    dropped.add(entry.entry_id)
+                    continue
+
+                cached = _CachedAnswer.model_validate_json(raw_answer)
+                if self._is_stale(cached, db_session):
+                    logger.debug(
+                        f"Dropping cached answer, its documents were modified: "
+                        f"scope={self.scope_key} entry={entry.entry_id}"
+                    )
+                    self.redis_client.delete(self._entry_key(entry.entry_id))
+                    dropped.add(entry.entry_id)
+                    continue
+
+                logger.info(
+                    f"Answer cache hit: scope={self.scope_key} "
+                    f"similarity={similarities[position]:.3f}"
+                )
+                answer = cached.answer
+                break
+
+            self._drop_from_index(sorted(dropped))
+            return answer
+        except Exception:
+            logger.exception(f"Failed to read answer cache: scope={self.scope_key}")
+            return None
+
+    def put(self, query_embedding: Embedding, answer: ChatSambaAIBotResponse) -> None:
+        if not answer.answer or not answer.answer_valid or answer.error_msg:
+            return
+
+        now = time.time()
+        entry_id = uuid.uuid4().hex
+        encoded_embedding, _ = _encode_embedding(query_embedding)
+        try:
+            self.redis_client.set(
+                self._entry_key(entry_id),
+                _CachedAnswer(
+                    # the chat message belongs to whoever asked first, feedback on a
+                    # replayed answer must not be attached to it
+                    answer=answer.model_copy(update={"chat_message_id": None}),
+                    document_ids=_answer_document_ids(answer),
+                    created_at=now,
+                ).model_dump_json(),
+                ex=self.ttl,
+            )
+            self._add_to_index(
+                _IndexEntry(
+                    entry_id=entry_id, embedding=encoded_embedding, created_at=now
+                )
+            )
+            # drops what this entry pushed over max_entries
+            self._load_index()
+        except Exception:
+            logger.exception(f"Failed to write answer cache: scope={self.scope_key}")
+
+
+def get_answer_cache(
+    persona_id: int,
+    document_sets: list[str] | None,
+    enable_auto_detect_filters: bool | None,
+    user: User | None,
+    db_session: Session,
+) -> AnswerCache | None:
+    """Returns the answer cache for answers to `user` (None for public documents
+    only) with the given persona and search scope, or None if the persona has not
+    opted in."""
+    if persona_id not in ANSWER_CACHE_PERSONA_IDS:
+        return None
+
+    # users with the same access share answers, e.g. everyone in a public channel
+    acl_fingerprint = sorted(get_acl_for_user(user, db_session))
+    scope = json.dumps(
+        [
+            persona_id,
+            sorted(document_sets or []),
+            bool(enable_auto_detect_filters),
+            acl_fingerprint,
+        ]
+    )
+    return AnswerCache(
+        redis_client=get_redis_client(tenant_id=get_current_tenant_id()),
+        scope_key=hashlib.sha256(scope.encode()).hexdigest(),
+    )
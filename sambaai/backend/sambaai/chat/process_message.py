@@ -41,7 +41,9 @@ from sambaai.chat.models import StreamStopReason
 from sambaai.chat.models import SubQuestionKey
 from sambaai.chat.models import UserKnowledgeFilePacket
 from sambaai.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
-from sambaai.chat.prompt_builder.answer_prompt_builder import default_build_system_message
+from sambaai.chat.prompt_builder.answer_prompt_builder import (
+    default_build_system_message,
+)
 from sambaai.chat.prompt_builder.answer_prompt_builder import default_build_user_message
 from sambaai.configs.chat_configs import CHAT_TARGET_CHUNK_PERCENTAGE
 from sambaai.configs.chat_configs import DISABLE_LLM_CHOOSE_SEARCH
@@ -52,6 +54,7 @@ from sambaai.configs.constants import BASIC_KEY
 from sambaai.configs.constants import MessageType
 from sambaai.configs.constants import MilestoneRecordType
 from sambaai.configs.constants import NO_AUTH_USER_ID
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
 from sambaai.context.search.enums import OptionalSearchSetting
 from sambaai.context.search.enums import QueryFlow
@@ -347,6 +350,16 @@ def _get_force_search_settings(
             user_folder_ids=user_folder_ids,
         )
 
+    if (
+        new_msg_req.precomputed_query_embedding is not None
+        and tool_name == SearchTool._NAME
+        and not new_msg_req.query_override
+    ):
+        override_kwargs = override_kwargs or SearchToolOverrideKwargs()
+        override_kwargs.precomputed_query_embedding = (
+            new_msg_req.precomputed_query_embedding
+        )
+
     if new_msg_req.file_descriptors:
         # If user has uploaded files they're using, don't run any of the search tools
         return ForceUseTool(force_use=False, tool_name=tool_name)
@@ -645,6 +658,9 @@ def stream_chat_message_objects(
     # messages.
     # NOTE: is not stored in the database at all.
     single_message_history: str | None = None,
+    # time budget of the searches run for this message, optional search stages are
+    # skipped when it runs low
+    search_deadline: SearchDeadline | None = None,
 ) -> ChatPacketStream:
     """Streams in order:
     1. [conditional] Retrieved documents if a search needs to be run
@@ -1067,6 +1083,7 @@ def stream_chat_message_objects(
                 full_doc=new_msg_req.full_doc,
                 latest_query_files=latest_query_files,
                 bypass_acl=bypass_acl,
+                deadline=search_deadline,
             ),
             internet_search_tool_config=InternetSearchToolConfig(
                 answer_style_config=answer_style_config,
@@ -1124,6 +1141,7 @@ def stream_chat_message_objects(
                             else LLMEvaluationType.SKIP
                         ),
                         bypass_acl=bypass_acl,
+                        deadline=search_deadline,
                     )
 
                     # Add the search tool to the tools list
@@ -1,6 +1,5 @@
 import json
 from collections import defaultdict
-from copy import deepcopy
 from typing import TypeVar
 
 from pydantic import BaseModel
@@ -144,7 +143,9 @@ def _apply_pruning(
         provider_type=llm_config.model_provider,
         model_name=llm_config.model_name,
     )
-    sections = deepcopy(sections)  # don't modify in place
+    # don't modify in place, only combined_content gets trimmed so the chunks are
+    # shared instead of deep copied with every section
+    sections = [section.model_copy() for section in sections]
 
     # re-order docs with all the "relevant" docs at the front
     sections = reorder_sections(
@@ -349,7 +350,8 @@ def _merge_doc_chunks(chunks: list[InferenceChunk]) -> tuple[InferenceSection, i
     combined_content = "".join(merged_content)
 
     return (
-        InferenceSection(
+        # the chunks are validated already, only the container is new
+        InferenceSection.model_construct(
             center_chunk=center_chunk,
             chunks=sorted_chunks,
             combined_content=combined_content,
@@ -379,4 +379,11 @@ AGENT_MAX_TOKENS_HISTORY_SUMMARY = int(
     or AGENT_DEFAULT_MAX_TOKENS_HISTORY_SUMMARY
 )
 
+# Max number of graph nodes run at once per (sub)graph step, e.g. the parallel
+# retrievals of all expanded queries or the answers to all sub-questions
+AGENT_DEFAULT_MAX_CONCURRENCY = 8
+AGENT_MAX_CONCURRENCY = int(
+    os.environ.get("AGENT_MAX_CONCURRENCY") or AGENT_DEFAULT_MAX_CONCURRENCY
+)
+
 GRAPH_VERSION_NAME: str = "a"
@@ -142,6 +142,9 @@ DOCUMENT_INDEX_NAME = "sambaai_index"
 DOCUMENT_INDEX_TYPE = os.environ.get(
     "DOCUMENT_INDEX_TYPE", DocumentIndexType.COMBINED.value
 )
+# Where the in-process index keeps its files when DOCUMENT_INDEX_TYPE is "embedded",
+# must be on a volume shared by all processes that index or search
+EMBEDDED_INDEX_DIR = os.environ.get("EMBEDDED_INDEX_DIR") or "/var/lib/sambaai/index"
 VESPA_HOST = os.environ.get("VESPA_HOST") or "localhost"
 # NOTE: this is used if and only if the vespa config server is accessible via a
 # different host than the main vespa application
@@ -163,6 +166,11 @@ VESPA_CLOUD_KEY_PATH = os.environ.get("VESPA_CLOUD_KEY_PATH")
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE") or 16)
 
+# How long (in seconds) indexing waits for a document locked by another job (e.g.
+# another connector indexing the same document) before giving up and retrying.
+# Contended documents are first deferred to the end of their batch.
+DOCUMENT_LOCK_TIMEOUT = int(os.environ.get("DOCUMENT_LOCK_TIMEOUT") or 30)
+
 MAX_DRIVE_WORKERS = int(os.environ.get("MAX_DRIVE_WORKERS", 4))
 
 # Below are intended to match the env variables names used by the official postgres docker image
@@ -177,13 +185,29 @@ POSTGRES_PORT = os.environ.get("POSTGRES_PORT") or "5432"
 POSTGRES_DB = os.environ.get("POSTGRES_DB") or "postgres"
 AWS_REGION_NAME = os.environ.get("AWS_REGION_NAME") or "us-east-2"
 
+# If not set, the pools of the API server are sized from the number of requests it
+# handles at a time (the size of the thread pool sync endpoints run in)
 POSTGRES_API_SERVER_POOL_SIZE = int(
-    os.environ.get("POSTGRES_API_SERVER_POOL_SIZE") or 40
+    os.environ.get("POSTGRES_API_SERVER_POOL_SIZE") or 0
 )
 POSTGRES_API_SERVER_POOL_OVERFLOW = int(
     os.environ.get("POSTGRES_API_SERVER_POOL_OVERFLOW") or 10
 )
 
+# Optional streaming replica serving read-only endpoints (chat history, persona
+# listing, analytics, ...). Reads from it may lag behind the primary by the
+# replication delay.
+POSTGRES_READ_REPLICA_HOST = os.environ.get("POSTGRES_READ_REPLICA_HOST") or ""
+POSTGRES_READ_REPLICA_PORT = (
+    os.environ.get("POSTGRES_READ_REPLICA_PORT") or POSTGRES_PORT
+)
+
+# Number of prepared statements the async (asyncpg) engine keeps per connection.
+# Set to 0 when connecting through pgbouncer in transaction pooling mode.
+POSTGRES_ASYNC_PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.environ.get("POSTGRES_ASYNC_PREPARED_STATEMENT_CACHE_SIZE", 500)
+)
+
 # defaults to False
 # generally should only be used for
 POSTGRES_USE_NULL_POOL = os.environ.get("POSTGRES_USE_NULL_POOL", "").lower() == "true"
@@ -434,6 +458,13 @@ GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD = int(
     os.environ.get("GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD", 10 * 1024 * 1024)
 )
 
+# If set, the Google Drive connector records Drive Changes API page tokens during
+# full runs and uses them on subsequent polls to only fetch files that changed,
+# instead of re-listing every user and shared drive by modified time.
+GOOGLE_DRIVE_USE_CHANGES_API = (
+    os.environ.get("GOOGLE_DRIVE_USE_CHANGES_API", "").lower() == "true"
+)
+
 JIRA_CONNECTOR_LABELS_TO_SKIP = [
     ignored_tag
     for ignored_tag in os.environ.get("JIRA_CONNECTOR_LABELS_TO_SKIP", "").split(",")
@@ -444,9 +475,23 @@ JIRA_CONNECTOR_MAX_TICKET_SIZE = int(
     os.environ.get("JIRA_CONNECTOR_MAX_TICKET_SIZE", 100 * 1024)
 )
 
+# Number of Salesforce object types bulk exported concurrently. Each export
+# streams to its own csv, so raising this mostly costs memory and API quota.
+SALESFORCE_BULK_QUERY_MAX_WORKERS = int(
+    os.environ.get("SALESFORCE_BULK_QUERY_MAX_WORKERS", 4)
+)
+
 GONG_CONNECTOR_START_TIME = os.environ.get("GONG_CONNECTOR_START_TIME")
 
 GITHUB_CONNECTOR_BASE_URL = os.environ.get("GITHUB_CONNECTOR_BASE_URL") or None
+# If set, the GitHub connector fetches PRs and issues with batched GraphQL queries
+# across many repos instead of paging the REST api repo by repo
+GITHUB_CONNECTOR_USE_GRAPHQL = (
+    os.environ.get("GITHUB_CONNECTOR_USE_GRAPHQL", "").lower() == "true"
+)
+GITHUB_GRAPHQL_REPOS_PER_QUERY = int(
+    os.environ.get("GITHUB_GRAPHQL_REPOS_PER_QUERY", 10)
+)
 
 GITLAB_CONNECTOR_INCLUDE_CODE_FILES = (
     os.environ.get("GITLAB_CONNECTOR_INCLUDE_CODE_FILES", "").lower() == "true"
@@ -465,6 +510,8 @@ LINEAR_CLIENT_SECRET = os.getenv("LINEAR_CLIENT_SECRET")
 
 # Slack specific configs
 SLACK_NUM_THREADS = int(os.getenv("SLACK_NUM_THREADS") or 8)
+# number of channels the Slack connector indexes at the same time
+SLACK_CHANNEL_CONCURRENCY = int(os.getenv("SLACK_CHANNEL_CONCURRENCY") or 4)
 
 DASK_JOB_CLIENT_ENABLED = (
     os.environ.get("DASK_JOB_CLIENT_ENABLED", "").lower() == "true"
@@ -519,6 +566,20 @@ ENABLE_CONTEXTUAL_RAG = os.environ.get("ENABLE_CONTEXTUAL_RAG", "").lower() == "
 
 DEFAULT_CONTEXTUAL_RAG_LLM_NAME = "gpt-4o-mini"
 DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER = "DevEnvPresetOpenAI"
+# How long (in seconds) generated document summaries and chunk contexts are cached
+# for, so re-indexing unchanged documents doesn't call the LLM again. 0 disables caching
+CONTEXTUAL_RAG_CACHE_TTL = int(
+    os.environ.get("CONTEXTUAL_RAG_CACHE_TTL") or 24 * 60 * 60
+)
+# The cache lives in the tenant's Redis next to Celery and the locks, so it is bounded
+# to MAX_ENTRIES * MAX_ENTRY_BYTES per tenant (64MB by default). The oldest entries are
+# evicted first, larger entries (documents with many chunks) are not cached
+CONTEXTUAL_RAG_CACHE_MAX_ENTRIES = int(
+    os.environ.get("CONTEXTUAL_RAG_CACHE_MAX_ENTRIES") or 2000
+)
+CONTEXTUAL_RAG_CACHE_MAX_ENTRY_BYTES = int(
+    os.environ.get("CONTEXTUAL_RAG_CACHE_MAX_ENTRY_BYTES") or 32 * 1024
+)
 # Finer grained chunking for more detail retention
 # Slightly larger since the sentence aware split is a max cutoff so most minichunks will be under MINI_CHUNK_SIZE
 # tokens. But we need it to be at least as big as 1/4th chunk size to avoid having a tiny mini-chunk at the end
@@ -540,6 +601,13 @@ INDEXING_SIZE_WARNING_THRESHOLD = int(
     os.environ.get("INDEXING_SIZE_WARNING_THRESHOLD") or 100 * 1024 * 1024
 )
 
+# Upper bound (in bytes, as estimated by Document.__sizeof__) on the connector output
+# held in memory by an indexing attempt at once. Documents beyond this are spilled
+# to a temp file and handed to the pipeline in smaller batches.
+INDEXING_DOC_BUFFER_MAX_BYTES = int(
+    os.environ.get("INDEXING_DOC_BUFFER_MAX_BYTES") or 256 * 1024 * 1024
+)
+
 # during indexing, will log verbose memory diff stats every x batches and at the end.
 # 0 disables this behavior and is the default.
 INDEXING_TRACER_INTERVAL = int(os.environ.get("INDEXING_TRACER_INTERVAL") or 0)
@@ -550,6 +618,11 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 1
 )
 
+# Number of worker processes background indexing jobs chunk the documents of a batch
+# in. 0 or 1 chunks them in the indexing process itself, where the CPU bound chunking
+# holds the GIL.
+INDEXING_CHUNKER_PROCESSES = int(os.environ.get("INDEXING_CHUNKER_PROCESSES") or 0)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -616,6 +689,25 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
+# Documents (or batches of documents, connector deletion deletes documents in batches)
+# with at least this many chunks are deleted from Vespa with a single selection-based
+# delete (a visit over the document_id attribute) instead of one DELETE per chunk. A
+# visit scans the whole index, so this only pays off for enough chunks.
+# 0 disables it. Tenant cleanup always deletes by selection.
+VESPA_SELECTION_DELETE_MIN_CHUNKS = int(
+    os.environ.get("VESPA_SELECTION_DELETE_MIN_CHUNKS") or 100
+)
+# Number of slices a selection-based delete is split into, the slices are visited
+# concurrently
+VESPA_SELECTION_DELETE_SLICES = int(
+    os.environ.get("VESPA_SELECTION_DELETE_SLICES") or 4
+)
+# Number of documents each connector deletion task cleans up, the documents of a task
+# are deleted from the document index together
+CONNECTOR_DELETION_DOCUMENT_BATCH_SIZE = int(
+    os.environ.get("CONNECTOR_DELETION_DOCUMENT_BATCH_SIZE") or 50
+)
+
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
@@ -635,6 +727,29 @@ try:
 except json.JSONDecodeError:
     pass
 
+# Budgets for LLM calls made while indexing (contextual RAG, image summarization)
+# shared by all threads of a process, per provider / model. 0 means unlimited.
+INDEXING_LLM_REQUESTS_PER_MINUTE = int(
+    os.environ.get("INDEXING_LLM_REQUESTS_PER_MINUTE") or 0
+)
+INDEXING_LLM_TOKENS_PER_MINUTE = int(
+    os.environ.get("INDEXING_LLM_TOKENS_PER_MINUTE") or 0
+)
+# per model overrides of the above, keyed by "<provider>/<model>", e.g.
+# {"openai/gpt-4o-mini": {"requests_per_minute": 500, "tokens_per_minute": 200000}}
+_INDEXING_LLM_RATE_LIMITS = os.environ.get("INDEXING_LLM_RATE_LIMITS", "")
+INDEXING_LLM_RATE_LIMITS: dict[str, dict[str, int]] = {}
+try:
+    INDEXING_LLM_RATE_LIMITS = cast(
+        dict[str, dict[str, int]], json.loads(_INDEXING_LLM_RATE_LIMITS)
+    )
+except json.JSONDecodeError:
+    pass
+# Max concurrent requests to a single model per process
+INDEXING_LLM_MAX_IN_FLIGHT = int(os.environ.get("INDEXING_LLM_MAX_IN_FLIGHT") or 8)
+# Retries (with exponential backoff) for rate limited / timed out LLM calls
+INDEXING_LLM_MAX_RETRIES = int(os.environ.get("INDEXING_LLM_MAX_RETRIES") or 5)
+
 # LLM Model Update API endpoint
 LLM_MODEL_UPDATE_API_URL = os.environ.get("LLM_MODEL_UPDATE_API_URL")
 
@@ -46,6 +46,16 @@ HYBRID_ALPHA = max(0, min(1, float(os.environ.get("HYBRID_ALPHA") or 0.5)))
 HYBRID_ALPHA_KEYWORD = max(
     0, min(1, float(os.environ.get("HYBRID_ALPHA_KEYWORD") or 0.4))
 )
+# How the result lists of the query expansions / rephrasings are merged, see
+# FusionMethod: "max_score" keeps the best score of each chunk, "rrf" is reciprocal
+# rank fusion and "weighted" sums the min-max normalized scores of the lists
+RETRIEVAL_FUSION_METHOD = os.environ.get("RETRIEVAL_FUSION_METHOD") or "max_score"
+# rank offset of reciprocal rank fusion, higher values flatten the top ranks
+RRF_K = int(os.environ.get("RRF_K") or 60)
+# Max number of chunks of a single document kept after merging, 0 for no limit
+RETRIEVAL_MAX_CHUNKS_PER_DOCUMENT = int(
+    os.environ.get("RETRIEVAL_MAX_CHUNKS_PER_DOCUMENT") or 0
+)
 # Weighting factor between Title and Content of documents during search, 1 for completely
 # Title based. Default heavily favors Content because Title is also included at the top of
 # Content. This is to avoid cases where the Content is very relevant but it may not be clear
@@ -102,3 +112,20 @@ USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH = (
     os.environ.get("USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH", "false").lower()
     == "true"
 )
+
+# Semantic answer cache, reuses the answer to a (near) identical question asked
+# recently with the same persona, document sets and access. Opt-in per persona,
+# comma separated persona ids. Only used by the Slack bot for now.
+ANSWER_CACHE_PERSONA_IDS = {
+    int(persona_id)
+    for persona_id in (os.environ.get("ANSWER_CACHE_PERSONA_IDS") or "").split(",")
+    if persona_id.strip()
+}
+# cosine similarity between the query embeddings for a cached answer to be reused
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD") or 0.95
+)
+# seconds
+ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL") or 60 * 60)
+# max number of answers kept per persona / document sets / access scope
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES") or 32)
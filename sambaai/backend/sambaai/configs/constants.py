@@ -210,6 +210,7 @@ class BlobType(str, Enum):
 class DocumentIndexType(str, Enum):
     COMBINED = "combined"  # Vespa
     SPLIT = "split"  # Typesense + Qdrant
+    EMBEDDED = "embedded"  # in-process index on local disk
 
 
 class AuthType(str, Enum):
@@ -352,6 +353,8 @@ class SambaAIRedisLocks:
 
     SLACK_BOT_LOCK = "da_lock:slack_bot"
     SLACK_BOT_HEARTBEAT_PREFIX = "da_heartbeat:slack_bot"
+    SLACK_BOT_POD_LOAD_PREFIX = "da_metadata:slack_bot_pod_load"
+    SLACK_BOT_TENANT_LOAD = "da_metadata:slack_bot_tenant_load"
     ANONYMOUS_USER_ENABLED = "anonymous_user_enabled"
 
     CLOUD_BEAT_TASK_GENERATOR_LOCK = "da_lock:cloud_beat_task_generator"
@@ -445,6 +448,7 @@ class SambaAICeleryTask:
     CONNECTOR_INDEXING_PROXY_TASK = "connector_indexing_proxy_task"
     CONNECTOR_PRUNING_GENERATOR_TASK = "connector_pruning_generator_task"
     DOCUMENT_BY_CC_PAIR_CLEANUP_TASK = "document_by_cc_pair_cleanup_task"
+    DOCUMENTS_BY_CC_PAIR_CLEANUP_TASK = "documents_by_cc_pair_cleanup_task"
     VESPA_METADATA_SYNC_TASK = "vespa_metadata_sync_task"
 
     # chat retention
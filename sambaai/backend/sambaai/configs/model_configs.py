@@ -49,6 +49,15 @@ BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES = EMBEDDING_BATCH_SIZE or 51
 # For score display purposes, only way is to know the expected ranges
 CROSS_ENCODER_RANGE_MAX = 1
 CROSS_ENCODER_RANGE_MIN = 0
+# Cross-encoder scores are cached per (model, query, chunk) in each process, so chunks
+# that come back for the same query (agent sub-questions, chat turns) are scored once
+RERANK_SCORE_CACHE_SIZE = int(os.environ.get("RERANK_SCORE_CACHE_SIZE") or 20_000)
+# If set, passages are sent to the reranker in batches of this size in retrieval order
+# and reranking stops once a batch no longer changes the top RERANK_EARLY_CUTOFF_TOP_K
+RERANK_PROGRESSIVE_BATCH_SIZE = int(
+    os.environ.get("RERANK_PROGRESSIVE_BATCH_SIZE") or 0
+)
+RERANK_EARLY_CUTOFF_TOP_K = int(os.environ.get("RERANK_EARLY_CUTOFF_TOP_K") or 10)
 
 
 #####
@@ -133,6 +142,22 @@ if _LITELLM_EXTRA_BODY_RAW:
     except Exception:
         pass
 
+# Long lived HTTP connection pools used for LLM calls, one per provider / API base.
+# Set LLM_HTTP_CLIENT_POOLING to false to let LiteLLM manage its own clients.
+LLM_HTTP_CLIENT_POOLING = (
+    os.environ.get("LLM_HTTP_CLIENT_POOLING") or "true"
+).lower() == "true"
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS") or 100)
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS") or 20
+)
+# seconds an idle connection is kept open
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_HTTP_KEEPALIVE_EXPIRY") or 60)
+# only used if the h2 package is installed and the server negotiates it
+LLM_HTTP2_ENABLED = (os.environ.get("LLM_HTTP2_ENABLED") or "true").lower() == "true"
+# max number of distinct LLM configurations kept in the LLM factory cache
+LLM_FACTORY_CACHE_SIZE = int(os.environ.get("LLM_FACTORY_CACHE_SIZE") or 64)
+
 # Whether and how to lower scores for short chunks w/o relevant context
 # Evaluated via custom ML model
 
@@ -49,6 +49,12 @@ SAMBAAI_BOT_RESPOND_EVERY_CHANNEL = (
 SAMBAAI_BOT_MAX_QPM = int(os.environ.get("SAMBAAI_BOT_MAX_QPM") or 0) or None
 # Maximum time to wait when a question is queued
 SAMBAAI_BOT_MAX_WAIT_TIME = int(os.environ.get("SAMBAAI_BOT_MAX_WAIT_TIME") or 180)
+# Time budget (in seconds) for the search part of an answer. Optional search stages
+# (query analysis, query expansion, surrounding context, rerank, LLM relevance filter)
+# are skipped once they would not fit in what is left. Set to 0 to disable (default)
+SAMBAAI_BOT_SEARCH_TIME_BUDGET = float(
+    os.environ.get("SAMBAAI_BOT_SEARCH_TIME_BUDGET") or 0
+)
 
 # Time (in minutes) after which a Slack message is sent to the user to remind him to give feedback.
 # Set to 0 to disable it (default)
@@ -71,3 +77,43 @@ SAMBAAI_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD = int(
 SAMBAAI_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS = int(
     os.environ.get("SAMBAAI_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS", "86400")
 )
+
+# How long (in seconds) Slack workspace metadata (channel info, user profiles, user
+# groups and thread history) is cached by the bot. Slack events invalidate entries
+# earlier where the app is subscribed to them. Set to 0 to disable the cache.
+SAMBAAI_BOT_WORKSPACE_CACHE_TTL = int(
+    os.environ.get("SAMBAAI_BOT_WORKSPACE_CACHE_TTL") or 600
+)
+# Maximum number of entries per kind (channels, users, ...) cached per Slack bot
+SAMBAAI_BOT_WORKSPACE_CACHE_MAX_ENTRIES = int(
+    os.environ.get("SAMBAAI_BOT_WORKSPACE_CACHE_MAX_ENTRIES") or 5000
+)
+
+# Load aware placement of tenants on Slack bot pods. The load of a tenant is its
+# message rate (per minute) plus the number of answers being generated for it.
+# Window (in seconds) over which the message rate is measured
+SAMBAAI_BOT_TENANT_LOAD_WINDOW = int(
+    os.environ.get("SAMBAAI_BOT_TENANT_LOAD_WINDOW") or 300
+)
+# Answers generated concurrently for one tenant, further messages of the tenant wait
+# so that one busy workspace can't starve the other tenants on the same pod
+SAMBAAI_BOT_MAX_CONCURRENT_ANSWERS_PER_TENANT = int(
+    os.environ.get("SAMBAAI_BOT_MAX_CONCURRENT_ANSWERS_PER_TENANT") or 4
+)
+# A pod hands a tenant over to another pod once its load is this much (relative)
+# above the average load of all pods
+SAMBAAI_BOT_TENANT_REBALANCE_THRESHOLD = float(
+    os.environ.get("SAMBAAI_BOT_TENANT_REBALANCE_THRESHOLD") or 0.25
+)
+# Pod loads below this are never rebalanced
+SAMBAAI_BOT_TENANT_REBALANCE_MIN_LOAD = float(
+    os.environ.get("SAMBAAI_BOT_TENANT_REBALANCE_MIN_LOAD") or 5
+)
+# How long (in seconds) a pod won't hand over a tenant again after handing it over
+SAMBAAI_BOT_TENANT_REBALANCE_COOLDOWN = int(
+    os.environ.get("SAMBAAI_BOT_TENANT_REBALANCE_COOLDOWN") or 600
+)
+# How long (in seconds) answers in flight get to finish when a tenant is released
+SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT = int(
+    os.environ.get("SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT") or 60
+)
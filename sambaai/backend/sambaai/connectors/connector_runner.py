@@ -5,6 +5,8 @@ from datetime import datetime
 from typing import Generic
 from typing import TypeVar
 
+from sambaai.configs.app_configs import INDEXING_DOC_BUFFER_MAX_BYTES
+from sambaai.connectors.document_buffer import DocumentBatchBuffer
 from sambaai.connectors.interfaces import BaseConnector
 from sambaai.connectors.interfaces import CheckpointedConnector
 from sambaai.connectors.interfaces import CheckpointOutput
@@ -71,7 +73,8 @@ class CheckpointOutputWrapper(Generic[CT]):
 class ConnectorRunner(Generic[CT]):
     """
     Handles:
-        - Batching
+        - Batching, bounded by both document count and (estimated) memory use.
+          Documents over the memory budget are spilled to disk, see DocumentBatchBuffer
         - Additional exception logging
         - Combining different connector types to a single interface
     """
@@ -81,12 +84,25 @@ class ConnectorRunner(Generic[CT]):
         connector: BaseConnector,
         batch_size: int,
         time_range: TimeRange | None = None,
+        max_memory_bytes: int = INDEXING_DOC_BUFFER_MAX_BYTES,
     ):
         self.connector = connector
         self.time_range = time_range
         self.batch_size = batch_size
 
-        self.doc_batch: list[Document] = []
+        # lives for the whole runner so that stats cover the entire attempt
+        self.doc_buffer = DocumentBatchBuffer(
+            batch_size=batch_size, max_memory_bytes=max_memory_bytes
+        )
+
+    def _rebatch(
+        self, document_batch: list[Document]
+    ) -> Generator[list[Document], None, None]:
+        # the list belongs to the connector, which may still use it once resumed, so
+        # it is only read here and never modified
+        for document in document_batch:
+            self.doc_buffer.add(document)
+        yield from self.doc_buffer.drain()
 
     def run(self, checkpoint: CT) -> Generator[
         tuple[list[Document] | None, ConnectorFailure | None, CT | None],
@@ -111,19 +127,18 @@ class ConnectorRunner(Generic[CT]):
                     checkpoint_connector_generator
                 ):
                     if document is not None:
-                        self.doc_batch.append(document)
+                        self.doc_buffer.add(document)
 
                     if failure is not None:
                         yield None, failure, None
 
-                    if len(self.doc_batch) >= self.batch_size:
-                        yield self.doc_batch, None, None
-                        self.doc_batch = []
+                    if self.doc_buffer.is_full():
+                        for doc_batch in self.doc_buffer.drain():
+                            yield doc_batch, None, None
 
                 # yield remaining documents
-                if len(self.doc_batch) > 0:
-                    yield self.doc_batch, None, None
-                    self.doc_batch = []
+                for doc_batch in self.doc_buffer.drain():
+                    yield doc_batch, None, None
 
                 yield None, None, next_checkpoint
 
@@ -143,12 +158,14 @@ class ConnectorRunner(Generic[CT]):
                         start=self.time_range[0].timestamp(),
                         end=self.time_range[1].timestamp(),
                     ):
-                        yield document_batch, None, None
+                        for doc_batch in self._rebatch(document_batch):
+                            yield doc_batch, None, None
 
                     yield None, None, finished_checkpoint
                 elif isinstance(self.connector, LoadConnector):
                     for document_batch in self.connector.load_from_state():
-                        yield document_batch, None, None
+                        for doc_batch in self._rebatch(document_batch):
+                            yield doc_batch, None, None
 
                     yield None, None, finished_checkpoint
                 else:
@@ -175,3 +192,6 @@ class ConnectorRunner(Generic[CT]):
                 f"local_vars below -> \n{local_vars_str[:1024]}"
             )
             raise
+        finally:
+            # only does anything if the run was abandoned mid batch
+            self.doc_buffer.close()
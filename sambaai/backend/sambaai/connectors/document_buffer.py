@@ -0,0 +1,139 @@
+import pickle
+import struct
+import sys
+import tempfile
+import zlib
+from collections.abc import Generator
+from typing import IO
+
+from pydantic import BaseModel
+
+from sambaai.connectors.models import Document
+
+# each spilled document is stored as a 4 byte big-endian length followed by
+# the zlib compressed pickle of the document
+_RECORD_HEADER = struct.Struct(">I")
+# favour speed over ratio, the spill file is short lived
+_SPILL_COMPRESSION_LEVEL = 1
+
+
+class DocumentBufferStats(BaseModel):
+    """Memory usage of a DocumentBatchBuffer over its lifetime (i.e. one index attempt)"""
+
+    peak_memory_bytes: int = 0
+    largest_document_bytes: int = 0
+    spilled_documents: int = 0
+    # raw (in memory) size of everything that was spilled
+    spilled_memory_bytes: int = 0
+    # compressed size actually written to disk
+    spilled_disk_bytes: int = 0
+
+
+class DocumentBatchBuffer:
+    """Accumulates documents produced by a connector into batches while keeping at
+    most `max_memory_bytes` of documents in memory.
+
+    Documents are sized with `sys.getsizeof`, which uses `Document.__sizeof__`. Once
+    the in-memory budget is used up, further documents are spilled to an anonymous
+    temp file. Draining the buffer yields the in-memory documents first and then
+    reads the spilled ones back, again in batches that respect the budget. A single
+    document larger than the budget is still yielded (on its own).
+
+    Not thread safe - meant to be owned by a single ConnectorRunner."""
+
+    def __init__(self, batch_size: int, max_memory_bytes: int) -> None:
+        self.batch_size = batch_size
+        self.max_memory_bytes = max_memory_bytes
+        self.stats = DocumentBufferStats()
+
+        self._docs: list[Document] = []
+        self._memory_bytes = 0
+        self._spill_file: IO[bytes] | None = None
+        # (offset, length, in memory size) of each record in the spill file
+        self._spilled: list[tuple[int, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._docs) + len(self._spilled)
+
+    def is_full(self) -> bool:
+        return len(self) >= self.batch_size
+
+    def add(self, document: Document) -> None:
+        size = sys.getsizeof(document)
+        self.stats.largest_document_bytes = max(self.stats.largest_document_bytes, size)
+
+        # documents are kept in order, so once something has been spilled
+        # everything after it is spilled as well
+        if self._spilled or (
+            self._docs and self._memory_bytes + size > self.max_memory_bytes
+        ):
+            self._spill(document, size)
+            return
+
+        self._docs.append(document)
+        self._memory_bytes += size
+        self.stats.peak_memory_bytes = max(
+            self.stats.peak_memory_bytes, self._memory_bytes
+        )
+
+    def _spill(self, document: Document, size: int) -> None:
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="sambaai_doc_buffer_")
+
+        payload = zlib.compress(
+            pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL),
+            _SPILL_COMPRESSION_LEVEL,
+        )
+        self._spill_file.seek(0, 2)
+        offset = self._spill_file.tell()
+        self._spill_file.write(_RECORD_HEADER.pack(len(payload)))
+        self._spill_file.write(payload)
+        self._spilled.append((offset, len(payload), size))
+
+        self.stats.spilled_documents += 1
+        self.stats.spilled_memory_bytes += size
+        self.stats.spilled_disk_bytes += _RECORD_HEADER.size + len(payload)
+
+    def _read_spilled(self, offset: int, length: int) -> Document:
+        if self._spill_file is None:
+            raise RuntimeError("No spill file to read from")
+
+        self._spill_file.seek(offset + _RECORD_HEADER.size)
+        return pickle.loads(zlib.decompress(self._spill_file.read(length)))
+
+    def drain(self) -> Generator[list[Document], None, None]:
+        """Yields everything currently buffered as one or more batches and leaves the
+        buffer empty. The caller is expected to be done with a batch before asking
+        for the next one."""
+        if self._docs:
+            batch = self._docs
+            self._docs = []
+            self._memory_bytes = 0
+            yield batch
+
+        spilled = self._spilled
+        self._spilled = []
+        batch = []
+        batch_bytes = 0
+        for offset, length, size in spilled:
+            if batch and batch_bytes + size > self.max_memory_bytes:
+                yield batch
+                batch = []
+                batch_bytes = 0
+
+            batch.append(self._read_spilled(offset, length))
+            batch_bytes += size
+            self.stats.peak_memory_bytes = max(
+                self.stats.peak_memory_bytes, batch_bytes
+            )
+
+        if batch:
+            yield batch
+
+        self.close()
+
+    def close(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._spilled = []
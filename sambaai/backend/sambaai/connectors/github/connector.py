@@ -21,11 +21,19 @@ from pydantic import BaseModel
 from typing_extensions import override
 
 from sambaai.configs.app_configs import GITHUB_CONNECTOR_BASE_URL
+from sambaai.configs.app_configs import GITHUB_CONNECTOR_USE_GRAPHQL
+from sambaai.configs.app_configs import GITHUB_GRAPHQL_REPOS_PER_QUERY
 from sambaai.configs.constants import DocumentSource
 from sambaai.connectors.exceptions import ConnectorValidationError
 from sambaai.connectors.exceptions import CredentialExpiredError
 from sambaai.connectors.exceptions import InsufficientPermissionsError
 from sambaai.connectors.exceptions import UnexpectedValidationError
+from sambaai.connectors.github.graphql import build_repos_query
+from sambaai.connectors.github.graphql import convert_graphql_issue_to_document
+from sambaai.connectors.github.graphql import convert_graphql_pr_to_document
+from sambaai.connectors.github.graphql import GithubGraphQLRepoCursor
+from sambaai.connectors.github.graphql import parse_graphql_datetime
+from sambaai.connectors.github.graphql import repo_alias
 from sambaai.connectors.interfaces import CheckpointedConnector
 from sambaai.connectors.interfaces import CheckpointOutput
 from sambaai.connectors.interfaces import ConnectorCheckpoint
@@ -47,10 +55,12 @@ _MAX_NUM_RATE_LIMIT_RETRIES = 5
 ONE_DAY = timedelta(days=1)
 
 
-def _sleep_after_rate_limit_exception(github_client: Github) -> None:
-    sleep_time = github_client.get_rate_limit().core.reset.replace(
-        tzinfo=timezone.utc
-    ) - datetime.now(tz=timezone.utc)
+def _sleep_after_rate_limit_exception(
+    github_client: Github, graphql: bool = False
+) -> None:
+    rate_limit = github_client.get_rate_limit()
+    reset = rate_limit.graphql.reset if graphql else rate_limit.core.reset
+    sleep_time = reset.replace(tzinfo=timezone.utc) - datetime.now(tz=timezone.utc)
     sleep_time += timedelta(minutes=1)  # add an extra minute just to be safe
     logger.notice(f"Ran into Github rate-limit. Sleeping {sleep_time.seconds} seconds.")
     time.sleep(sleep_time.seconds)
@@ -181,12 +191,11 @@ def _get_batch_rate_limited(
                 git_objs, cursor_url, prev_num_objs, cursor_url_callback
             )
             return
+        # materialize the page here to capture the rate limit exception (if one occurs).
+        # NOTE: objects from list responses are not "complete". Touching raw_data or an
+        # attribute missing from the list payload makes PyGithub fetch each object
+        # individually, so document conversion only reads attributes in the list payload.
         objs = list(git_objs().get_page(page_num))
-        # fetch all data here to disable lazy loading later
-        # this is needed to capture the rate limit exception here (if one occurs)
-        for obj in objs:
-            if hasattr(obj, "raw_data"):
-                getattr(obj, "raw_data")
         yield from objs
     except RateLimitExceededException:
         _sleep_after_rate_limit_exception(github_client)
@@ -236,12 +245,32 @@ def _convert_pr_to_document(pull_request: PullRequest) -> Document:
             else None
         ),
         metadata={
-            "merged": str(pull_request.merged),
+            # merged_at is part of the list payload, merged is not
+            "merged": str(pull_request.merged_at is not None),
             "state": pull_request.state,
         },
     )
 
 
+def _is_pull_request(issue: Issue) -> bool:
+    # issues from a list response only have a pull_request key when they are PRs.
+    # Reading issue.pull_request when the key is absent completes the object with an
+    # extra request per issue, so look at the raw payload instead.
+    raw_data = getattr(issue, "_rawData", None)
+    if isinstance(raw_data, dict):
+        return raw_data.get("pull_request") is not None
+    return issue.pull_request is not None
+
+
+def _get_requester(github_client: Github) -> Requester | None:
+    # different PyGithub versions may use different attribute names
+    if hasattr(github_client, "_requester"):
+        return github_client._requester
+    if hasattr(github_client, "_Github__requester"):
+        return github_client._Github__requester
+    return None
+
+
 def _fetch_issue_comments(issue: Issue) -> str:
     comments = issue.get_comments()
     return "\nComment: ".join(comment.body for comment in comments)
@@ -290,6 +319,16 @@ class GithubConnectorCheckpoint(ConnectorCheckpoint):
     num_retrieved: int
     cursor_url: str | None = None
 
+    # ETag of the first page of PRs / issues per repo, keyed by "<full_name>:<stage>".
+    # Carried over from the previous successful run so that repos without changes
+    # are skipped with a conditional request, which doesn't count against the rate limit.
+    repo_etags: dict[str, str] = {}
+
+    # GraphQL mode: repos that haven't been started yet (None until listed) and
+    # the repos currently being paged, each with its own cursors
+    graphql_pending_repos: list[str] | None = None
+    graphql_active_repos: list[GithubGraphQLRepoCursor] = []
+
     def reset(self) -> None:
         """
         Resets curr_page, num_retrieved, and cursor_url to their initial values (0, 0, None)
@@ -299,6 +338,10 @@ class GithubConnectorCheckpoint(ConnectorCheckpoint):
         self.cursor_url = None
 
 
+def _repo_etag_key(repo_full_name: str, stage: GithubConnectorStage) -> str:
+    return f"{repo_full_name}:{stage.value}"
+
+
 def make_cursor_url_callback(
     checkpoint: GithubConnectorCheckpoint,
 ) -> Callable[[str | None, int], None]:
@@ -320,12 +363,14 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
         state_filter: str = "all",
         include_prs: bool = True,
         include_issues: bool = False,
+        use_graphql: bool = GITHUB_CONNECTOR_USE_GRAPHQL,
     ) -> None:
         self.repo_owner = repo_owner
         self.repositories = repositories
         self.state_filter = state_filter
         self.include_prs = include_prs
         self.include_issues = include_issues
+        self.use_graphql = use_graphql
         self.github_client: Github | None = None
 
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
@@ -408,6 +453,64 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
             _sleep_after_rate_limit_exception(github_client)
             return self._get_all_repos(github_client, attempt_num + 1)
 
+    def _get_repos(self, github_client: Github) -> list[Repository.Repository]:
+        if self.repositories:
+            if "," in self.repositories:
+                # Multiple repositories specified
+                return self._get_github_repos(github_client)
+            # Single repository (backward compatibility)
+            return [self._get_github_repo(github_client)]
+        # All repositories
+        return self._get_all_repos(github_client)
+
+    def _is_unchanged_since_last_run(
+        self,
+        checkpoint: GithubConnectorCheckpoint,
+        requester: Requester | None,
+        repo_full_name: str,
+        stage: GithubConnectorStage,
+    ) -> bool:
+        """Checks with a conditional request whether the repo's PRs / issues changed
+        since the ETag recorded by the previous run, and records the current ETag.
+
+        Lists are sorted by last update, so any change alters the first item and
+        therefore the ETag. A 304 response doesn't count against the rate limit.
+        Items skipped for being updated after the run's end drop the ETag again,
+        otherwise the next run would never see them."""
+        if requester is None:
+            return False
+
+        key = _repo_etag_key(repo_full_name, stage)
+        previous_etag = checkpoint.repo_etags.get(key)
+        endpoint = "pulls" if stage == GithubConnectorStage.PRS else "issues"
+        try:
+            status, response_headers, _ = requester.requestJson(
+                "GET",
+                f"/repos/{repo_full_name}/{endpoint}",
+                parameters={
+                    "state": self.state_filter,
+                    "sort": "updated",
+                    "direction": "desc",
+                    "per_page": 1,
+                },
+                headers={"If-None-Match": previous_etag} if previous_etag else {},
+            )
+        except Exception as e:
+            logger.warning(f"Conditional request failed for {key}: {e}")
+            return False
+
+        if status == 304:
+            return True
+
+        etag = next(
+            (v for k, v in response_headers.items() if k.lower() == "etag"), None
+        )
+        if status == 200 and etag:
+            checkpoint.repo_etags[key] = etag
+        else:
+            checkpoint.repo_etags.pop(key, None)
+        return False
+
     def _pull_requests_func(
         self, repo: Repository.Repository
     ) -> Callable[[], PaginatedList[PullRequest]]:
@@ -433,19 +536,12 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
 
         checkpoint = copy.deepcopy(checkpoint)
 
+        if self.use_graphql:
+            return (yield from self._fetch_from_github_graphql(checkpoint, start, end))
+
         # First run of the connector, fetch all repos and store in checkpoint
         if checkpoint.cached_repo_ids is None:
-            repos = []
-            if self.repositories:
-                if "," in self.repositories:
-                    # Multiple repositories specified
-                    repos = self._get_github_repos(self.github_client)
-                else:
-                    # Single repository (backward compatibility)
-                    repos = [self._get_github_repo(self.github_client)]
-            else:
-                # All repositories
-                repos = self._get_all_repos(self.github_client)
+            repos = self._get_repos(self.github_client)
             if not repos:
                 checkpoint.has_more = False
                 return checkpoint
@@ -466,13 +562,9 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
             raise ValueError("No repo saved in checkpoint")
 
         # Try to access the requester - different PyGithub versions may use different attribute names
+        requester = _get_requester(self.github_client)
         try:
-            # Try direct access to a known attribute name first
-            if hasattr(self.github_client, "_requester"):
-                requester = self.github_client._requester
-            elif hasattr(self.github_client, "_Github__requester"):
-                requester = self.github_client._Github__requester
-            else:
+            if requester is None:
                 # If we can't find the requester attribute, we need to fall back to recreating the repo
                 raise AttributeError("Could not find requester attribute")
 
@@ -487,6 +579,20 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
 
         cursor_url_callback = make_cursor_url_callback(checkpoint)
 
+        # only check for changes before the first page of a stage
+        at_stage_start = checkpoint.curr_page == 0 and checkpoint.cursor_url is None
+
+        if (
+            self.include_prs
+            and checkpoint.stage == GithubConnectorStage.PRS
+            and at_stage_start
+            and self._is_unchanged_since_last_run(
+                checkpoint, requester, repo.full_name, GithubConnectorStage.PRS
+            )
+        ):
+            logger.info(f"PRs unchanged since the previous run for repo: {repo.name}")
+            checkpoint.stage = GithubConnectorStage.ISSUES
+
         if self.include_prs and checkpoint.stage == GithubConnectorStage.PRS:
             logger.info(f"Fetching PRs for repo: {repo.name}")
 
@@ -513,12 +619,15 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
                 ):
                     done_with_prs = True
                     break
-                # Skip PRs updated after the end date
+                # Skip PRs updated after the end date, the next run has to fetch them
                 if (
                     end is not None
                     and pr.updated_at
                     and pr.updated_at.replace(tzinfo=timezone.utc) > end
                 ):
+                    checkpoint.repo_etags.pop(
+                        _repo_etag_key(repo.full_name, GithubConnectorStage.PRS), None
+                    )
                     continue
                 try:
                     yield _convert_pr_to_document(cast(PullRequest, pr))
@@ -558,7 +667,18 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
 
         checkpoint.stage = GithubConnectorStage.ISSUES
 
-        if self.include_issues and checkpoint.stage == GithubConnectorStage.ISSUES:
+        if (
+            self.include_issues
+            and checkpoint.curr_page == 0
+            and checkpoint.cursor_url is None
+            and self._is_unchanged_since_last_run(
+                checkpoint, requester, repo.full_name, GithubConnectorStage.ISSUES
+            )
+        ):
+            logger.info(
+                f"Issues unchanged since the previous run for repo: {repo.name}"
+            )
+        elif self.include_issues and checkpoint.stage == GithubConnectorStage.ISSUES:
             logger.info(f"Fetching issues for repo: {repo.name}")
 
             issue_batch = list(
@@ -584,14 +704,18 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
                 ):
                     done_with_issues = True
                     break
-                # Skip PRs updated after the end date
+                # Skip issues updated after the end date, the next run has to fetch them
                 if (
                     end is not None
                     and issue.updated_at.replace(tzinfo=timezone.utc) > end
                 ):
+                    checkpoint.repo_etags.pop(
+                        _repo_etag_key(repo.full_name, GithubConnectorStage.ISSUES),
+                        None,
+                    )
                     continue
 
-                if issue.pull_request is not None:
+                if _is_pull_request(issue):
                     # PRs are handled separately
                     continue
 
@@ -637,6 +761,174 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
 
         return checkpoint
 
+    def _run_graphql_query(
+        self,
+        requester: Requester,
+        query: str,
+        variables: dict[str, Any],
+        attempt_num: int = 0,
+    ) -> dict[str, Any]:
+        """Runs a query and returns its data. Unlike Requester.graphql_query, partial
+        results are kept when some repos fail (e.g. a repo is not found)."""
+        if self.github_client is None:
+            raise ConnectorMissingCredentialError("GitHub")
+
+        if attempt_num > _MAX_NUM_RATE_LIMIT_RETRIES:
+            raise RuntimeError(
+                "Re-tried GraphQL query too many times. Something is going wrong with fetching objects from Github"
+            )
+
+        try:
+            _, response = requester.requestJsonAndCheck(
+                "POST",
+                requester.graphql_url,
+                input={"query": query, "variables": variables},
+            )
+        except RateLimitExceededException:
+            _sleep_after_rate_limit_exception(self.github_client, graphql=True)
+            return self._run_graphql_query(requester, query, variables, attempt_num + 1)
+
+        errors = response.get("errors") or []
+        if any(error.get("type") == "RATE_LIMITED" for error in errors):
+            _sleep_after_rate_limit_exception(self.github_client, graphql=True)
+            return self._run_graphql_query(requester, query, variables, attempt_num + 1)
+
+        for error in errors:
+            logger.warning(f"GitHub GraphQL error: {error}")
+        return response.get("data") or {}
+
+    def _process_graphql_connection(
+        self,
+        checkpoint: GithubConnectorCheckpoint,
+        etag_key: str,
+        connection: dict[str, Any],
+        convert: Callable[[dict[str, Any]], Document],
+        start: datetime | None,
+        end: datetime | None,
+    ) -> Generator[Document | ConnectorFailure, None, str | None]:
+        """Yields the documents of one page of PRs or issues. Returns the cursor of
+        the next page, or None if the repo is done with this connection."""
+        for node in connection["nodes"]:
+            updated_at = parse_graphql_datetime(node["updatedAt"])
+            # we iterate backwards in time, so at this point we stop processing
+            if start is not None and updated_at < start:
+                return None
+            # Skip items updated after the end date, the next run has to fetch them
+            if end is not None and updated_at > end:
+                checkpoint.repo_etags.pop(etag_key, None)
+                continue
+            try:
+                yield convert(node)
+            except Exception as e:
+                error_msg = f"Error converting GraphQL node to document: {e}"
+                logger.exception(error_msg)
+                yield ConnectorFailure(
+                    failed_document=DocumentFailure(
+                        document_id=str(node.get("databaseId")),
+                        document_link=node.get("url"),
+                    ),
+                    failure_message=error_msg,
+                    exception=e,
+                )
+
+        page_info = connection["pageInfo"]
+        return page_info["endCursor"] if page_info["hasNextPage"] else None
+
+    def _fetch_from_github_graphql(
+        self,
+        checkpoint: GithubConnectorCheckpoint,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Generator[Document | ConnectorFailure, None, GithubConnectorCheckpoint]:
+        """Pages PRs and issues of up to GITHUB_GRAPHQL_REPOS_PER_QUERY repos with a
+        single GraphQL query per call. Each repo keeps its own cursors in the checkpoint,
+        finished repos are replaced by repos that haven't been started yet."""
+        if self.github_client is None:
+            raise ConnectorMissingCredentialError("GitHub")
+
+        requester = _get_requester(self.github_client)
+        if requester is None:
+            raise RuntimeError("Could not find requester attribute for GraphQL mode")
+
+        # First run of the connector, fetch all repos and store in checkpoint
+        if checkpoint.graphql_pending_repos is None:
+            repos = self._get_repos(self.github_client)
+            checkpoint.graphql_pending_repos = [repo.full_name for repo in repos]
+            checkpoint.has_more = len(repos) > 0
+            return checkpoint
+
+        active_repos = checkpoint.graphql_active_repos
+        while (
+            len(active_repos) < GITHUB_GRAPHQL_REPOS_PER_QUERY
+            and checkpoint.graphql_pending_repos
+        ):
+            full_name = checkpoint.graphql_pending_repos.pop(0)
+            repo_cursor = GithubGraphQLRepoCursor(
+                full_name=full_name,
+                prs_done=not self.include_prs
+                or self._is_unchanged_since_last_run(
+                    checkpoint, requester, full_name, GithubConnectorStage.PRS
+                ),
+                issues_done=not self.include_issues
+                or self._is_unchanged_since_last_run(
+                    checkpoint, requester, full_name, GithubConnectorStage.ISSUES
+                ),
+            )
+            if repo_cursor.done:
+                logger.info(f"Nothing to fetch since the previous run for: {full_name}")
+                continue
+            active_repos.append(repo_cursor)
+
+        if not active_repos:
+            checkpoint.has_more = False
+            return checkpoint
+
+        query, variables = build_repos_query(active_repos, self.state_filter)
+        data = self._run_graphql_query(requester, query, variables)
+
+        for i, repo_cursor in enumerate(active_repos):
+            repo_data = data.get(repo_alias(i))
+            if repo_data is None:
+                # errors are logged with the query, don't block the other repos
+                logger.warning(f"No GraphQL data for repo: {repo_cursor.full_name}")
+                repo_cursor.prs_done = True
+                repo_cursor.issues_done = True
+                continue
+
+            if not repo_cursor.prs_done:
+                repo_cursor.pr_cursor = yield from self._process_graphql_connection(
+                    checkpoint,
+                    _repo_etag_key(repo_cursor.full_name, GithubConnectorStage.PRS),
+                    repo_data["pullRequests"],
+                    convert_graphql_pr_to_document,
+                    start,
+                    end,
+                )
+                repo_cursor.prs_done = repo_cursor.pr_cursor is None
+
+            if not repo_cursor.issues_done:
+                repo_cursor.issue_cursor = yield from self._process_graphql_connection(
+                    checkpoint,
+                    _repo_etag_key(repo_cursor.full_name, GithubConnectorStage.ISSUES),
+                    repo_data["issues"],
+                    convert_graphql_issue_to_document,
+                    start,
+                    end,
+                )
+                repo_cursor.issues_done = repo_cursor.issue_cursor is None
+
+        checkpoint.graphql_active_repos = [
+            repo_cursor for repo_cursor in active_repos if not repo_cursor.done
+        ]
+        logger.info(
+            f"Fetched PRs and issues for {len(active_repos)} repos, "
+            f"{len(checkpoint.graphql_pending_repos)} repos remaining"
+        )
+        checkpoint.has_more = bool(
+            checkpoint.graphql_active_repos or checkpoint.graphql_pending_repos
+        )
+        return checkpoint
+
     @override
     def load_from_checkpoint(
         self,
@@ -796,6 +1088,17 @@ class GithubConnector(CheckpointedConnector[GithubConnectorCheckpoint]):
             stage=GithubConnectorStage.PRS, curr_page=0, has_more=True, num_retrieved=0
         )
 
+    @override
+    def build_checkpoint_from_previous_run(
+        self,
+        load_previous_checkpoint: Callable[[], GithubConnectorCheckpoint | None],
+    ) -> GithubConnectorCheckpoint:
+        checkpoint = self.build_dummy_checkpoint()
+        previous_checkpoint = load_previous_checkpoint()
+        if previous_checkpoint is not None:
+            checkpoint.repo_etags = previous_checkpoint.repo_etags
+        return checkpoint
+
 
 if __name__ == "__main__":
     import os
@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import TextSection
+
+# PRs / issues requested per repo per query. Bodies are included, so this is
+# kept below GitHub's maximum of 100 to bound the response size.
+GRAPHQL_ITEMS_PER_PAGE = 50
+
+_PR_FIELDS = "databaseId url title body updatedAt state merged"
+_ISSUE_FIELDS = "databaseId url title body updatedAt state"
+
+# maps the REST state filter to the GraphQL states of each connection
+_PR_STATES = {
+    "open": "[OPEN]",
+    "closed": "[CLOSED, MERGED]",
+}
+_ISSUE_STATES = {
+    "open": "[OPEN]",
+    "closed": "[CLOSED]",
+}
+
+
+class GithubGraphQLRepoCursor(BaseModel):
+    """Progress of a single repo in GraphQL mode. Each repo is paged independently,
+    newest updates first."""
+
+    full_name: str
+    pr_cursor: str | None = None
+    issue_cursor: str | None = None
+    prs_done: bool = False
+    issues_done: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.prs_done and self.issues_done
+
+
+def repo_alias(index: int) -> str:
+    return f"r{index}"
+
+
+def _connection_query(
+    connection: str, fields: str, cursor_var: str, states: str | None
+) -> str:
+    states_arg = f", states: {states}" if states else ""
+    return (
+        f"{connection}(first: {GRAPHQL_ITEMS_PER_PAGE}, after: ${cursor_var}, "
+        f"orderBy: {{field: UPDATED_AT, direction: DESC}}{states_arg}) {{ "
+        "pageInfo { hasNextPage endCursor } "
+        f"nodes {{ {fields} }} }}"
+    )
+
+
+def build_repos_query(
+    repo_cursors: list[GithubGraphQLRepoCursor], state_filter: str
+) -> tuple[str, dict[str, Any]]:
+    """Builds one query that fetches the next page of PRs and issues for every repo,
+    using an alias per repo. Values are passed as variables rather than inlined.
+    Returns (query, variables)."""
+    variable_defs: list[str] = []
+    selections: list[str] = []
+    variables: dict[str, Any] = {}
+    for i, repo_cursor in enumerate(repo_cursors):
+        owner, name = repo_cursor.full_name.split("/", 1)
+        variable_defs += [f"$owner{i}: String!", f"$name{i}: String!"]
+        variables[f"owner{i}"] = owner
+        variables[f"name{i}"] = name
+
+        connections: list[str] = []
+        if not repo_cursor.prs_done:
+            variable_defs.append(f"$prCursor{i}: String")
+            variables[f"prCursor{i}"] = repo_cursor.pr_cursor
+            connections.append(
+                _connection_query(
+                    "pullRequests",
+                    _PR_FIELDS,
+                    f"prCursor{i}",
+                    _PR_STATES.get(state_filter),
+                )
+            )
+        if not repo_cursor.issues_done:
+            variable_defs.append(f"$issueCursor{i}: String")
+            variables[f"issueCursor{i}"] = repo_cursor.issue_cursor
+            connections.append(
+                _connection_query(
+                    "issues",
+                    _ISSUE_FIELDS,
+                    f"issueCursor{i}",
+                    _ISSUE_STATES.get(state_filter),
+                )
+            )
+
+        selections.append(
+            f"{repo_alias(i)}: repository(owner: $owner{i}, name: $name{i}) "
+            f"{{ {' '.join(connections)} }}"
+        )
+
+    query = f"query({', '.join(variable_defs)}) {{ {' '.join(selections)} }}"
+    return query, variables
+
+
+def parse_graphql_datetime(value: str) -> datetime:
+    # GitHub returns UTC timestamps like 2023-01-01T00:00:00Z
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def convert_graphql_pr_to_document(node: dict[str, Any]) -> Document:
+    """Mirrors _convert_pr_to_document so both fetch modes produce identical docs."""
+    return Document(
+        id=node["url"],
+        sections=[TextSection(link=node["url"], text=node.get("body") or "")],
+        source=DocumentSource.GITHUB,
+        semantic_identifier=node["title"],
+        doc_updated_at=parse_graphql_datetime(node["updatedAt"]),
+        metadata={
+            "merged": str(bool(node.get("merged"))),
+            # REST reports merged PRs as closed
+            "state": "open" if node["state"] == "OPEN" else "closed",
+        },
+    )
+
+
+def convert_graphql_issue_to_document(node: dict[str, Any]) -> Document:
+    """Mirrors _convert_issue_to_document so both fetch modes produce identical docs."""
+    return Document(
+        id=node["url"],
+        sections=[TextSection(link=node["url"], text=node.get("body") or "")],
+        source=DocumentSource.GITHUB,
+        semantic_identifier=node["title"],
+        doc_updated_at=parse_graphql_datetime(node["updatedAt"]),
+        metadata={
+            "state": node["state"].lower(),
+        },
+    )
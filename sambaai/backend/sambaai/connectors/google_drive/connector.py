@@ -17,6 +17,7 @@ from googleapiclient.errors import HttpError  # type: ignore
 from typing_extensions import override
 
 from sambaai.configs.app_configs import GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD
+from sambaai.configs.app_configs import GOOGLE_DRIVE_USE_CHANGES_API
 from sambaai.configs.app_configs import INDEX_BATCH_SIZE
 from sambaai.configs.app_configs import MAX_DRIVE_WORKERS
 from sambaai.configs.constants import DocumentSource
@@ -32,11 +33,17 @@ from sambaai.connectors.google_drive.file_retrieval import get_all_files_for_oau
 from sambaai.connectors.google_drive.file_retrieval import (
     get_all_files_in_my_drive_and_shared,
 )
+from sambaai.connectors.google_drive.file_retrieval import get_changed_files
 from sambaai.connectors.google_drive.file_retrieval import get_files_in_shared_drive
 from sambaai.connectors.google_drive.file_retrieval import get_root_folder_id
+from sambaai.connectors.google_drive.file_retrieval import get_start_page_token
+from sambaai.connectors.google_drive.models import build_change_feed_key
+from sambaai.connectors.google_drive.models import ChangeFeedCursor
+from sambaai.connectors.google_drive.models import ChangeFeedKeyType
 from sambaai.connectors.google_drive.models import DriveRetrievalStage
 from sambaai.connectors.google_drive.models import GoogleDriveCheckpoint
 from sambaai.connectors.google_drive.models import GoogleDriveFileType
+from sambaai.connectors.google_drive.models import parse_change_feed_key
 from sambaai.connectors.google_drive.models import RetrievedDriveFile
 from sambaai.connectors.google_drive.models import StageCompletion
 from sambaai.connectors.google_utils.google_auth import get_google_creds
@@ -80,6 +87,12 @@ DRIVE_BATCH_SIZE = 80
 SHARED_DRIVES_PER_CHECKPOINT = 1
 FOLDERS_PER_CHECKPOINT = 1
 
+# Change feeds are usually (nearly) empty, so drain many of them per checkpoint
+CHANGE_FEEDS_PER_CHECKPOINT = 100
+
+# Status codes returned by the Changes API for page tokens it no longer accepts
+EXPIRED_PAGE_TOKEN_STATUS_CODES = {400, 404, 410}
+
 
 def _extract_str_list_from_comma_str(string: str | None) -> list[str]:
     if not string:
@@ -228,6 +241,8 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
 
         self.size_threshold = GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD
 
+        self.use_changes_api = GOOGLE_DRIVE_USE_CHANGES_API
+
     def set_allow_images(self, value: bool) -> None:
         self.allow_images = value
 
@@ -445,6 +460,9 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
                 # mark this user as done so we don't try to retrieve anything for them
                 # again
                 curr_stage.stage = DriveRetrievalStage.DONE
+                checkpoint.change_feed_skipped_keys.add(
+                    build_change_feed_key(ChangeFeedKeyType.USER, user_email)
+                )
                 return
             raise
         except RefreshError as e:
@@ -453,6 +471,9 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
             )
             # mark this user as done so we don't try to retrieve anything for them
             # again
+            checkpoint.change_feed_skipped_keys.add(
+                build_change_feed_key(ChangeFeedKeyType.USER, user_email)
+            )
             yield RetrievedDriveFile(
                 completion_stage=DriveRetrievalStage.DONE,
                 drive_file={},
@@ -466,7 +487,14 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
         # - include_my_drives is true
         # - the current user's email is in the requested emails
         if curr_stage.stage == DriveRetrievalStage.MY_DRIVE_FILES:
-            if self.include_my_drives or user_email in self._requested_my_drive_emails:
+            if self._should_retrieve_my_drive(user_email):
+                if not is_slim:
+                    self._record_change_feed_cursor(
+                        checkpoint=checkpoint,
+                        drive_service=drive_service,
+                        key=build_change_feed_key(ChangeFeedKeyType.USER, user_email),
+                        user_email=user_email,
+                    )
                 logger.info(
                     f"Getting all files in my drive as '{user_email}. Resuming: {resuming}"
                 )
@@ -531,6 +559,14 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
                 curr_stage.current_folder_or_drive_id = drive_id
                 if num_completed_drives >= SHARED_DRIVES_PER_CHECKPOINT:
                     return  # resume from this drive on the next run
+                if not is_slim:
+                    self._record_change_feed_cursor(
+                        checkpoint=checkpoint,
+                        drive_service=drive_service,
+                        key=build_change_feed_key(ChangeFeedKeyType.DRIVE, drive_id),
+                        user_email=user_email,
+                        drive_id=drive_id,
+                    )
                 yield from _yield_from_drive(drive_id, start)
             curr_stage.stage = DriveRetrievalStage.FOLDER_FILES
             curr_stage.current_folder_or_drive_id = None
@@ -824,6 +860,14 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
             logger.info(
                 f"Getting files in shared drive '{drive_id}' as '{self.primary_admin_email}'"
             )
+            if not is_slim:
+                self._record_change_feed_cursor(
+                    checkpoint=checkpoint,
+                    drive_service=drive_service,
+                    key=build_change_feed_key(ChangeFeedKeyType.DRIVE, drive_id),
+                    user_email=self.primary_admin_email,
+                    drive_id=drive_id,
+                )
             yield from _yield_from_drive(drive_id, start)
 
     def _oauth_retrieval_folders(
@@ -892,6 +936,227 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
                 f"Some folders/drives were not retrieved. IDs: {remaining_folders}"
             )
 
+    def _should_retrieve_my_drive(self, user_email: str) -> bool:
+        return self.include_my_drives or user_email in self._requested_my_drive_emails
+
+    def _record_change_feed_cursor(
+        self,
+        checkpoint: GoogleDriveCheckpoint,
+        drive_service: GoogleDriveService,
+        key: str,
+        user_email: str,
+        drive_id: str | None = None,
+    ) -> None:
+        """
+        Captures the current Changes API position for a user or shared drive.
+        This must happen before listing its files so that anything modified
+        during the listing is picked up again by the next change feed run. The
+        listing itself is not bounded by the run's `end`, see _fetch_drive_items.
+        """
+        if not self.use_changes_api or key in checkpoint.change_feed_cursors:
+            return
+        try:
+            page_token = get_start_page_token(drive_service, drive_id=drive_id)
+        except HttpError as e:
+            # without a cursor the next run falls back to a full listing
+            logger.warning(f"Failed to get start page token for '{key}': {e}")
+            return
+        checkpoint.change_feed_cursors[key] = ChangeFeedCursor(
+            page_token=page_token, user_email=user_email
+        )
+
+    def _get_change_feed_keys(self) -> list[str] | None:
+        """
+        Returns the change feed keys that together cover everything this connector
+        indexes, or None if the configuration can't be served by change feeds.
+        """
+        # The Changes API can't be scoped to a folder, so folder crawls always
+        # need a full listing.
+        if self._requested_folder_ids:
+            return None
+
+        is_service_account = isinstance(self.creds, ServiceAccountCredentials)
+        all_requested = (
+            self.include_files_shared_with_me
+            and self.include_my_drives
+            and self.include_shared_drives
+        )
+
+        drive_ids: list[str] = []
+        if self._requested_shared_drive_ids:
+            drive_ids, folder_ids = _clean_requested_drive_ids(
+                requested_drive_ids=self._requested_shared_drive_ids,
+                requested_folder_ids=set(),
+                all_drive_ids_available=self.get_all_drive_ids(),
+            )
+            if folder_ids:
+                return None
+        elif self.include_shared_drives and (is_service_account or not all_requested):
+            drive_ids = sorted(self.get_all_drive_ids())
+
+        user_emails: list[str] = []
+        if is_service_account:
+            user_emails = [
+                email
+                for email in self._get_all_user_emails()
+                if self._should_retrieve_my_drive(email)
+            ]
+        elif self.include_files_shared_with_me or self.include_my_drives:
+            user_emails = [self.primary_admin_email]
+
+        return [
+            build_change_feed_key(ChangeFeedKeyType.USER, email)
+            for email in user_emails
+        ] + [
+            build_change_feed_key(ChangeFeedKeyType.DRIVE, drive_id)
+            for drive_id in drive_ids
+        ]
+
+    def _can_use_change_feed(self, checkpoint: GoogleDriveCheckpoint) -> bool:
+        """
+        Decides whether this run can drain change feeds instead of doing a full
+        listing, and if so sets up the checkpoint for the CHANGES stage.
+        """
+        if not self.use_changes_api or not checkpoint.change_feed_cursors:
+            return False
+
+        change_feed_keys = self._get_change_feed_keys()
+        if change_feed_keys is None:
+            logger.info("Drive configuration is not supported by the change feed")
+            return False
+
+        missing_keys = (
+            set(change_feed_keys)
+            - set(checkpoint.change_feed_cursors)
+            - checkpoint.change_feed_skipped_keys
+        )
+        if missing_keys:
+            # e.g. new users or shared drives since the last full run
+            logger.info(
+                f"Missing change feed cursors for {len(missing_keys)} users/drives, "
+                "falling back to a full listing"
+            )
+            logger.debug(f"Missing change feed cursors: {missing_keys}")
+            return False
+
+        # drop cursors for users/drives that are no longer retrieved
+        checkpoint.change_feed_cursors = {
+            key: cursor
+            for key, cursor in checkpoint.change_feed_cursors.items()
+            if key in change_feed_keys
+        }
+        checkpoint.change_feed_keys_to_retrieve = [
+            key for key in change_feed_keys if key in checkpoint.change_feed_cursors
+        ]
+        return True
+
+    def _drain_change_feed(
+        self,
+        checkpoint: GoogleDriveCheckpoint,
+        key: str,
+        expired_keys: set[str],
+        inaccessible_keys: set[str],
+    ) -> Iterator[RetrievedDriveFile]:
+        cursor = checkpoint.change_feed_cursors[key]
+        key_type, key_id = parse_change_feed_key(key)
+        drive_id = key_id if key_type == ChangeFeedKeyType.DRIVE else None
+
+        is_oauth = isinstance(self.creds, OAuthCredentials)
+        all_requested = (
+            self.include_files_shared_with_me
+            and self.include_my_drives
+            and self.include_shared_drives
+        )
+        include_shared_with_me = self.include_files_shared_with_me
+        include_owned = True
+        if is_oauth and not all_requested:
+            # mirror the ownership filters used by get_all_files_for_oauth
+            include_owned = self.include_my_drives
+
+        drive_service = get_drive_service(self.creds, cursor.user_email)
+        try:
+            for changed_files, resume_token in get_changed_files(
+                service=drive_service,
+                page_token=cursor.page_token,
+                drive_id=drive_id,
+                include_items_from_all_drives=is_oauth and all_requested,
+                restrict_to_my_drive=drive_id is None and not include_shared_with_me,
+            ):
+                for file in changed_files:
+                    if drive_id is None and not (is_oauth and all_requested):
+                        is_owned = cursor.user_email in get_file_owners(file)
+                        if (is_owned and not include_owned) or (
+                            not is_owned and not include_shared_with_me
+                        ):
+                            continue
+                    yield RetrievedDriveFile(
+                        completion_stage=DriveRetrievalStage.CHANGES,
+                        drive_file=file,
+                        user_email=cursor.user_email,
+                        parent_id=drive_id,
+                    )
+                # only advance once everything in the page has been yielded
+                checkpoint.change_feed_cursors[key] = ChangeFeedCursor(
+                    page_token=resume_token, user_email=cursor.user_email
+                )
+        except HttpError as e:
+            if e.resp.status in EXPIRED_PAGE_TOKEN_STATUS_CODES:
+                logger.warning(f"Change feed page token expired for '{key}': {e}")
+                expired_keys.add(key)
+            elif e.resp.status in (401, 403):
+                # e.g. the user was suspended or lost access to the drive APIs
+                logger.warning(f"Lost access to change feed for '{key}': {e}")
+                inaccessible_keys.add(key)
+            else:
+                raise
+
+    def _change_feed_retrieval(
+        self,
+        checkpoint: GoogleDriveCheckpoint,
+    ) -> Iterator[RetrievedDriveFile]:
+        """
+        Drains the change feeds of up to CHANGE_FEEDS_PER_CHECKPOINT users/drives
+        in parallel. If any page token has expired, falls back to a full listing
+        (which captures fresh cursors) in the next checkpoint.
+        """
+        keys_to_retrieve = checkpoint.change_feed_keys_to_retrieve or []
+        keys_this_checkpoint = keys_to_retrieve[:CHANGE_FEEDS_PER_CHECKPOINT]
+        logger.info(
+            f"Draining {len(keys_this_checkpoint)} of {len(keys_to_retrieve)} "
+            "remaining Drive change feeds"
+        )
+
+        expired_keys: set[str] = set()
+        inaccessible_keys: set[str] = set()
+        change_feed_gens = [
+            self._drain_change_feed(checkpoint, key, expired_keys, inaccessible_keys)
+            for key in keys_this_checkpoint
+        ]
+        for file in parallel_yield(change_feed_gens, max_workers=MAX_DRIVE_WORKERS):
+            if file.drive_file["id"] not in checkpoint.all_retrieved_file_ids:
+                checkpoint.all_retrieved_file_ids.add(file.drive_file["id"])
+                yield file
+
+        if expired_keys:
+            logger.warning(
+                f"{len(expired_keys)} Drive change feeds could not be read, "
+                "falling back to a full listing"
+            )
+            checkpoint.change_feed_cursors = {}
+            checkpoint.change_feed_keys_to_retrieve = None
+            checkpoint.completion_stage = DriveRetrievalStage.START
+            return
+
+        for key in inaccessible_keys:
+            checkpoint.change_feed_cursors.pop(key, None)
+            checkpoint.change_feed_skipped_keys.add(key)
+
+        checkpoint.change_feed_keys_to_retrieve = keys_to_retrieve[
+            CHANGE_FEEDS_PER_CHECKPOINT:
+        ]
+        if not checkpoint.change_feed_keys_to_retrieve:
+            checkpoint.completion_stage = DriveRetrievalStage.DONE
+
     def _checkpointed_retrieval(
         self,
         retrieval_method: CredentialedRetrievalMethod,
@@ -946,6 +1211,17 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
             # if resuming from a checkpoint
             if completion.stage == DriveRetrievalStage.OAUTH_FILES:
                 all_files_start = completion.completed_until
+            elif not is_slim and (
+                self.include_files_shared_with_me or self.include_my_drives
+            ):
+                self._record_change_feed_cursor(
+                    checkpoint=checkpoint,
+                    drive_service=drive_service,
+                    key=build_change_feed_key(
+                        ChangeFeedKeyType.USER, self.primary_admin_email
+                    ),
+                    user_email=self.primary_admin_email,
+                )
 
             yield from self._oauth_retrieval_all_files(
                 drive_service=drive_service,
@@ -1001,6 +1277,23 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
         start: SecondsSinceUnixEpoch | None = None,
         end: SecondsSinceUnixEpoch | None = None,
     ) -> Iterator[RetrievedDriveFile]:
+        if checkpoint.completion_stage == DriveRetrievalStage.START:
+            if not is_slim and self._can_use_change_feed(checkpoint):
+                checkpoint.completion_stage = DriveRetrievalStage.CHANGES
+            else:
+                # a full run captures fresh cursors for everything it lists
+                checkpoint.change_feed_cursors = {}
+                checkpoint.change_feed_skipped_keys = set()
+
+        if checkpoint.completion_stage == DriveRetrievalStage.CHANGES:
+            return self._change_feed_retrieval(checkpoint)
+
+        if not is_slim and self.use_changes_api:
+            # The cursors are captured while listing, i.e. after `end`. A file
+            # modified between `end` and its cursor would be in neither the
+            # listing nor the change feed, so the listing must not stop at `end`.
+            end = None
+
         retrieval_method = (
             self._manage_service_account_retrieval
             if isinstance(self.creds, ServiceAccountCredentials)
@@ -1251,3 +1544,20 @@ class GoogleDriveConnector(SlimConnector, CheckpointedConnector[GoogleDriveCheck
     @override
     def validate_checkpoint_json(self, checkpoint_json: str) -> GoogleDriveCheckpoint:
         return GoogleDriveCheckpoint.model_validate_json(checkpoint_json)
+
+    @override
+    def build_checkpoint_from_previous_run(
+        self,
+        load_previous_checkpoint: Callable[[], GoogleDriveCheckpoint | None],
+    ) -> GoogleDriveCheckpoint:
+        checkpoint = self.build_dummy_checkpoint()
+        if not self.use_changes_api:
+            return checkpoint
+
+        previous_checkpoint = load_previous_checkpoint()
+        if previous_checkpoint is not None:
+            checkpoint.change_feed_cursors = previous_checkpoint.change_feed_cursors
+            checkpoint.change_feed_skipped_keys = (
+                previous_checkpoint.change_feed_skipped_keys
+            )
+        return checkpoint
@@ -2,6 +2,7 @@ from collections.abc import Callable
 from collections.abc import Iterator
 from datetime import datetime
 from datetime import timezone
+from typing import Any
 
 from googleapiclient.discovery import Resource  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
@@ -11,8 +12,11 @@ from sambaai.connectors.google_drive.constants import DRIVE_SHORTCUT_TYPE
 from sambaai.connectors.google_drive.models import DriveRetrievalStage
 from sambaai.connectors.google_drive.models import GoogleDriveFileType
 from sambaai.connectors.google_drive.models import RetrievedDriveFile
+from sambaai.connectors.google_utils.google_utils import add_retries
 from sambaai.connectors.google_utils.google_utils import execute_paginated_retrieval
 from sambaai.connectors.google_utils.google_utils import GoogleFields
+from sambaai.connectors.google_utils.google_utils import NEW_START_PAGE_TOKEN_KEY
+from sambaai.connectors.google_utils.google_utils import NEXT_PAGE_TOKEN_KEY
 from sambaai.connectors.google_utils.google_utils import ORDER_BY_KEY
 from sambaai.connectors.google_utils.resources import GoogleDriveService
 from sambaai.connectors.interfaces import SecondsSinceUnixEpoch
@@ -24,14 +28,19 @@ logger = setup_logger()
 PERMISSION_FULL_DESCRIPTION = (
     "permissions(id, emailAddress, type, domain, permissionDetails)"
 )
-FILE_FIELDS = (
-    "nextPageToken, files(mimeType, id, name, permissions, modifiedTime, webViewLink, "
-    "shortcutDetails, owners(emailAddress), size)"
+FILE_FIELD_LIST = (
+    "mimeType, id, name, permissions, modifiedTime, webViewLink, "
+    "shortcutDetails, owners(emailAddress), size"
 )
+FILE_FIELDS = f"nextPageToken, files({FILE_FIELD_LIST})"
 SLIM_FILE_FIELDS = (
     f"nextPageToken, files(mimeType, driveId, id, name, {PERMISSION_FULL_DESCRIPTION}, "
     "permissionIds, webViewLink, owners(emailAddress), modifiedTime)"
 )
+CHANGE_FIELDS = (
+    "nextPageToken, newStartPageToken, "
+    f"changes(fileId, removed, file({FILE_FIELD_LIST}, trashed))"
+)
 FOLDER_FIELDS = "nextPageToken, files(id, name, permissions, modifiedTime, webViewLink, shortcutDetails)"
 
 
@@ -321,6 +330,69 @@ def get_all_files_for_oauth(
     )
 
 
+def get_start_page_token(
+    service: GoogleDriveService,
+    drive_id: str | None = None,
+) -> str:
+    """
+    Returns the Changes API page token for the current state of the user's
+    files (or of the given shared drive). Changes made after this call will be
+    returned when listing changes starting from this token.
+    """
+    kwargs: dict[str, str | bool] = {"supportsAllDrives": True}
+    if drive_id:
+        kwargs["driveId"] = drive_id
+    return add_retries(
+        lambda: service.changes().getStartPageToken(**kwargs).execute()
+    )()["startPageToken"]
+
+
+def get_changed_files(
+    service: GoogleDriveService,
+    page_token: str,
+    drive_id: str | None = None,
+    include_items_from_all_drives: bool = False,
+    restrict_to_my_drive: bool = False,
+) -> Iterator[tuple[list[GoogleDriveFileType], str]]:
+    """
+    Pages through the Changes API starting at page_token. For each page, yields
+    the (non-removed, non-trashed, non-folder) files that changed along with the
+    token to resume from once the page has been processed. The token yielded
+    with the last page is the newStartPageToken to use for the next run.
+
+    An expired or invalid page_token surfaces as an HttpError from the API.
+    """
+    kwargs: dict[str, Any] = {
+        "supportsAllDrives": True,
+        "includeItemsFromAllDrives": include_items_from_all_drives or bool(drive_id),
+        "restrictToMyDrive": restrict_to_my_drive,
+    }
+    if drive_id:
+        kwargs["driveId"] = drive_id
+
+    for page in execute_paginated_retrieval(
+        retrieval_function=service.changes().list,
+        list_key=None,
+        fields=CHANGE_FIELDS,
+        pageToken=page_token,
+        **kwargs,
+    ):
+        changed_files = [
+            change["file"]
+            for change in page.get("changes", [])
+            if not change.get("removed")
+            and change.get("file")
+            and not change["file"].get("trashed")
+            and change["file"].get("mimeType") != DRIVE_FOLDER_TYPE
+        ]
+        resume_token = page.get(NEXT_PAGE_TOKEN_KEY) or page.get(
+            NEW_START_PAGE_TOKEN_KEY
+        )
+        if resume_token is None:
+            raise RuntimeError("Changes API page missing both page tokens")
+        yield changed_files, resume_token
+
+
 # Just in case we need to get the root folder id
 def get_root_folder_id(service: Resource) -> str:
     # we dont paginate here because there is only one root folder per user
@@ -64,6 +64,11 @@ class DriveRetrievalStage(str, Enum):
     SHARED_DRIVE_FILES = "shared_drive_files"
     FOLDER_FILES = "folder_files"
 
+    # Incremental (change feed) retrieval via the Drive Changes API. Only
+    # entered when a previous successful run left behind a page token for
+    # every user/drive that needs to be retrieved.
+    CHANGES = "changes"
+
 
 class StageCompletion(BaseModel):
     """
@@ -92,6 +97,31 @@ class StageCompletion(BaseModel):
         self.current_folder_or_drive_id = current_folder_or_drive_id
 
 
+class ChangeFeedKeyType(str, Enum):
+    USER = "user"
+    DRIVE = "drive"
+
+
+def build_change_feed_key(key_type: ChangeFeedKeyType, key_id: str) -> str:
+    return f"{key_type.value}:{key_id}"
+
+
+def parse_change_feed_key(key: str) -> tuple[ChangeFeedKeyType, str]:
+    key_type, _, key_id = key.partition(":")
+    return ChangeFeedKeyType(key_type), key_id
+
+
+class ChangeFeedCursor(BaseModel):
+    """
+    Position in the Drive Changes API feed of a single user or shared drive.
+    user_email is the user that was impersonated when the token was obtained,
+    and is impersonated again when listing changes from it.
+    """
+
+    page_token: str
+    user_email: str
+
+
 class RetrievedDriveFile(BaseModel):
     """
     Describes a file that has been retrieved from google drive.
@@ -145,6 +175,19 @@ class GoogleDriveCheckpoint(ConnectorCheckpoint):
     # cached user emails
     user_emails: list[str] | None = None
 
+    # Drive Changes API cursors keyed by change feed key (see build_change_feed_key).
+    # Captured before listing each user/drive during a full run and advanced
+    # during change feed runs. These are carried over to the next run so that
+    # polls only fetch files that actually changed.
+    change_feed_cursors: dict[str, ChangeFeedCursor] = {}
+
+    # change feed keys of users/drives that can't be retrieved (e.g. users without
+    # access to the drive APIs). These don't need a cursor to use the change feed.
+    change_feed_skipped_keys: set[str] = set()
+
+    # change feed keys that still need to be drained during the CHANGES stage
+    change_feed_keys_to_retrieve: list[str] | None = None
+
     @field_serializer("completion_map")
     def serialize_completion_map(
         self, completion_map: ThreadSafeDict[str, StageCompletion], _info: Any
@@ -25,6 +25,7 @@ logger = setup_logger()
 add_retries = retry_builder(tries=5, max_delay=10)
 
 NEXT_PAGE_TOKEN_KEY = "nextPageToken"
+NEW_START_PAGE_TOKEN_KEY = "newStartPageToken"
 PAGE_TOKEN_KEY = "pageToken"
 ORDER_BY_KEY = "orderBy"
 
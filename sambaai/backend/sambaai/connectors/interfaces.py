@@ -1,4 +1,5 @@
 import abc
+from collections.abc import Callable
 from collections.abc import Generator
 from collections.abc import Iterator
 from types import TracebackType
@@ -238,3 +239,13 @@ class CheckpointedConnector(BaseConnector[CT]):
     def validate_checkpoint_json(self, checkpoint_json: str) -> CT:
         """Validate the checkpoint json and return the checkpoint object"""
         raise NotImplementedError
+
+    def build_checkpoint_from_previous_run(
+        self, load_previous_checkpoint: Callable[[], CT | None]
+    ) -> CT:
+        """Build the starting checkpoint for a run that follows a successful run.
+
+        load_previous_checkpoint lazily loads the final checkpoint of that run
+        (None if it is unavailable). Override this to carry state such as change
+        feed cursors across runs. By default, every run starts from scratch."""
+        return self.build_dummy_checkpoint()
@@ -21,8 +21,10 @@ from sambaai.connectors.models import SlimDocument
 from sambaai.connectors.models import TextSection
 from sambaai.connectors.salesforce.doc_conversion import convert_sf_object_to_doc
 from sambaai.connectors.salesforce.doc_conversion import ID_PREFIX
-from sambaai.connectors.salesforce.salesforce_calls import fetch_all_csvs_in_parallel
 from sambaai.connectors.salesforce.salesforce_calls import get_all_children_of_sf_type
+from sambaai.connectors.salesforce.salesforce_calls import (
+    stream_all_csvs_in_parallel,
+)
 from sambaai.connectors.salesforce.sqlite_functions import SambaAISalesforceSQLite
 from sambaai.connectors.salesforce.utils import BASE_DATA_PATH
 from sambaai.connectors.salesforce.utils import get_sqlite_db_path
@@ -110,47 +112,38 @@ class SalesforceConnector(LoadConnector, PollConnector, SlimConnector):
         return dict(object_types)
 
     @staticmethod
-    def _download_object_csvs(
-        all_types_to_filter: dict[str, bool],
-        directory: str,
-        sf_client: Salesforce,
-        start: SecondsSinceUnixEpoch | None = None,
-        end: SecondsSinceUnixEpoch | None = None,
-    ) -> None:
-        # checkpoint - we've found all object types, now time to fetch the data
-        logger.info("Fetching CSVs for all object types")
-
-        # This takes like 30 minutes first time and <2 minutes for updates
-        object_type_to_csv_path = fetch_all_csvs_in_parallel(
-            sf_client=sf_client,
-            all_types_to_filter=all_types_to_filter,
-            start=start,
-            end=end,
-            target_dir=directory,
-        )
+    def _load_csvs_to_db(
+        sf_db: SambaAISalesforceSQLite,
+        object_type: str,
+        csv_paths: list[str] | None,
+        updated_ids: set[str],
+    ) -> GenerateDocumentsOutput:
+        """Loads the CSV's of one object type into the db, adding the loaded ids to
+        updated_ids. Yields an empty list per CSV to keep the connector alive."""
+        # If path is None, it means it failed to fetch the csv
+        if csv_paths is None:
+            return
+
+        # Go through each csv path and use it to update the db
+        for csv_path in csv_paths:
+            logger.info(
+                f"CSV download: object_type={object_type} "
+                f"path={csv_path} "
+                f"bytes={Path(csv_path).stat().st_size}"
+            )
 
-        # print useful information
-        num_csvs = 0
-        num_bytes = 0
-        for object_type, csv_paths in object_type_to_csv_path.items():
-            if not csv_paths:
-                continue
-
-            for csv_path in csv_paths:
-                if not csv_path:
-                    continue
-
-                file_path = Path(csv_path)
-                file_size = file_path.stat().st_size
-                num_csvs += 1
-                num_bytes += file_size
-                logger.info(
-                    f"CSV download: object_type={object_type} path={csv_path} bytes={file_size}"
-                )
+            # yield an empty list to keep the connector alive
+            yield []
 
-        logger.info(
-            f"CSV download total: total_csvs={num_csvs} total_bytes={num_bytes}"
-        )
+            new_ids = sf_db.update_from_csv(
+                object_type=object_type,
+                csv_download_path=csv_path,
+            )
+            updated_ids.update(new_ids)
+            logger.debug(f"Added {len(new_ids)} new/updated records for {object_type}")
+
+            os.remove(csv_path)
+            gc.collect()
 
     @staticmethod
     def _get_all_types(parent_types: list[str], sf_client: Salesforce) -> set[str]:
@@ -212,50 +205,31 @@ class SalesforceConnector(LoadConnector, PollConnector, SlimConnector):
                 else:
                     all_types_to_filter[sf_type] = False
 
-            # Step 1.2 - bulk download the CSV for each object type
-            SalesforceConnector._download_object_csvs(
-                all_types_to_filter, temp_dir, self._sf_client, start, end
-            )
-            gc.collect()
-
-            # Step 2 - load CSV's to sqlite
-            object_type_to_csv_paths = SalesforceConnector.reconstruct_object_types(
-                temp_dir
-            )
-
-            total_types = len(object_type_to_csv_paths)
-            logger.info(f"Starting to process {total_types} object types")
+            # Step 1.2 - load any CSV's left over from a previous run
+            leftover_csv_paths = SalesforceConnector.reconstruct_object_types(temp_dir)
+            for object_type, csv_paths in leftover_csv_paths.items():
+                yield from SalesforceConnector._load_csvs_to_db(
+                    sf_db, object_type, csv_paths, updated_ids
+                )
 
+            # Step 2 - bulk download the CSV for each object type in parallel and
+            # load each type to sqlite as soon as its download finishes
+            logger.info("Fetching CSVs for all object types")
+            total_types = len(all_types_to_filter)
             for i, (object_type, csv_paths) in enumerate(
-                object_type_to_csv_paths.items(), 1
+                stream_all_csvs_in_parallel(
+                    sf_client=self._sf_client,
+                    all_types_to_filter=all_types_to_filter,
+                    start=start,
+                    end=end,
+                    target_dir=temp_dir,
+                ),
+                1,
             ):
                 logger.info(f"Processing object type {object_type} ({i}/{total_types})")
-                # If path is None, it means it failed to fetch the csv
-                if csv_paths is None:
-                    continue
-
-                # Go through each csv path and use it to update the db
-                for csv_path in csv_paths:
-                    logger.debug(
-                        f"Processing CSV: object_type={object_type} "
-                        f"csv={csv_path} "
-                        f"len={Path(csv_path).stat().st_size}"
-                    )
-
-                    # yield an empty list to keep the connector alive
-                    yield docs_to_yield
-
-                    new_ids = sf_db.update_from_csv(
-                        object_type=object_type,
-                        csv_download_path=csv_path,
-                    )
-                    updated_ids.update(new_ids)
-                    logger.debug(
-                        f"Added {len(new_ids)} new/updated records for {object_type}"
-                    )
-
-                    os.remove(csv_path)
-                    gc.collect()
+                yield from SalesforceConnector._load_csvs_to_db(
+                    sf_db, object_type, csv_paths, updated_ids
+                )
 
             gc.collect()
 
@@ -281,8 +255,9 @@ class SalesforceConnector(LoadConnector, PollConnector, SlimConnector):
                     f"processed={docs_processed} "
                     f"remaining={len(updated_ids) - docs_processed}"
                 )
+                parent_objects = sf_db.get_records(parent_id_batch, parent_type)
                 for parent_id in parent_id_batch:
-                    parent_object = sf_db.get_record(parent_id, parent_type)
+                    parent_object = parent_objects.get(parent_id)
                     if not parent_object:
                         logger.warning(
                             f"Failed to get parent object {parent_id} for {parent_type}"
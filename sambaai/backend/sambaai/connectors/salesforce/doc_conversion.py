@@ -171,9 +171,7 @@ def convert_sf_object_to_doc(
     extracted_semantic_identifier = object_dict.get("Name", "Unknown Object")
 
     sections = [_extract_section(sf_object, base_url)]
-    for id in sf_db.get_child_ids(sf_object.id):
-        if not (child_object := sf_db.get_record(id)):
-            continue
+    for child_object in sf_db.get_child_records(sf_object.id):
         sections.append(_extract_section(child_object, base_url))
 
     doc = Document(
@@ -1,5 +1,7 @@
 import gc
 import os
+from collections.abc import Iterator
+from concurrent.futures import as_completed
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
@@ -10,6 +12,7 @@ from simple_salesforce import SFType
 from simple_salesforce.bulk2 import SFBulk2Handler
 from simple_salesforce.bulk2 import SFBulk2Type
 
+from sambaai.configs.app_configs import SALESFORCE_BULK_QUERY_MAX_WORKERS
 from sambaai.connectors.interfaces import SecondsSinceUnixEpoch
 from sambaai.utils.logger import setup_logger
 
@@ -199,16 +202,18 @@ def _bulk_retrieve_from_salesforce(
     return sf_type, all_download_paths
 
 
-def fetch_all_csvs_in_parallel(
+def stream_all_csvs_in_parallel(
     sf_client: Salesforce,
     all_types_to_filter: dict[str, bool],
     start: SecondsSinceUnixEpoch | None,
     end: SecondsSinceUnixEpoch | None,
     target_dir: str,
-) -> dict[str, list[str] | None]:
+    max_workers: int = SALESFORCE_BULK_QUERY_MAX_WORKERS,
+) -> Iterator[tuple[str, list[str] | None]]:
     """
-    Fetches all the csvs in parallel for the given object types
-    Returns a dict of (sf_type, full_download_path)
+    Runs one bulk query per object type in parallel and yields
+    (sf_type, full_download_paths) as each object type finishes downloading,
+    so callers can load finished types while the others are still downloading.
     """
 
     # these types don't query properly and need looking at
@@ -246,15 +251,17 @@ def fetch_all_csvs_in_parallel(
             time_filter_for_each_object_type[sf_type] = last_modified_time_filter
 
     # Run the bulk retrieve in parallel
-    # limit to 4 to help with memory usage
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        results = executor.map(
-            lambda object_type: _bulk_retrieve_from_salesforce(
+    # the default of 4 is to help with memory usage
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _bulk_retrieve_from_salesforce,
                 sf_client=sf_client,
                 sf_type=object_type,
                 time_filter=time_filter_for_each_object_type[object_type],
                 target_dir=target_dir,
-            ),
-            all_types_to_filter.keys(),
-        )
-        return dict(results)
+            )
+            for object_type in all_types_to_filter
+        ]
+        for future in as_completed(futures):
+            yield future.result()
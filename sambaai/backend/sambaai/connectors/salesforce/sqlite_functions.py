@@ -3,6 +3,7 @@ import json
 import os
 import sqlite3
 import time
+from collections.abc import Iterable
 from collections.abc import Iterator
 from pathlib import Path
 
@@ -25,6 +26,13 @@ class SambaAISalesforceSQLite:
     # might be appropriate here.
     NULL_ID_STRING = "N/A"
 
+    # number of csv rows parsed and written per executemany round trip. Also the
+    # commit interval, so this bounds how much uncommitted data sits in memory.
+    BULK_LOAD_BATCH_SIZE = 5000
+
+    # SQLite typically has a limit of 999 variables
+    MAX_QUERY_VARIABLES = 900
+
     def __init__(self, filename: str, isolation_level: str | None = None):
         self.filename = filename
         self.isolation_level = isolation_level
@@ -48,8 +56,24 @@ class SambaAISalesforceSQLite:
         if self.isolation_level is not None:
             conn.isolation_level = self.isolation_level
 
+        SambaAISalesforceSQLite._apply_pragmas(conn)
         self._conn = conn
 
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection) -> None:
+        """Tune the connection for bulk loading. Most of these are per connection
+        and must be reapplied every time we connect, not just when the db is created.
+        """
+        # WAL for better concurrent access and write performance. This one is
+        # persisted in the db file.
+        conn.execute("PRAGMA journal_mode=WAL")
+        # don't let the WAL grow past 64MB once it has been checkpointed
+        conn.execute("PRAGMA journal_size_limit=67108864")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-2000000")  # Use 2GB memory for cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256MB memory mapped reads
+
     def close(self) -> None:
         if self._conn is None:
             return
@@ -80,14 +104,6 @@ class SambaAISalesforceSQLite:
                 file_path = Path(self.filename)
                 file_size = file_path.stat().st_size
                 logger.info(f"init_db - found existing sqlite db: len={file_size}")
-            else:
-                # NOTE(rkuo): why is this only if the db doesn't exist?
-
-                # Enable WAL mode for better concurrent access and write performance
-                cursor.execute("PRAGMA journal_mode=WAL")
-                cursor.execute("PRAGMA synchronous=NORMAL")
-                cursor.execute("PRAGMA temp_store=MEMORY")
-                cursor.execute("PRAGMA cache_size=-2000000")  # Use 2GB memory for cache
 
             # Main table for storing Salesforce objects
             cursor.execute(
@@ -268,58 +284,51 @@ class SambaAISalesforceSQLite:
         batch_size: int = 500,
     ) -> Iterator[tuple[str, set[str]]]:
         """Get IDs of objects that are of the specified parent types and are either in the
-        updated_ids or have children in the updated_ids. Yields tuples of (parent_type, affected_ids).
+        updated_ids or have children in the updated_ids. Yields tuples of (parent_type, affected_ids),
+        with at most batch_size ids per tuple.
+
+        The updated ids are staged into a temp table once so that each parent type
+        is resolved with a single set based query instead of one query per batch of ids.
         """
         if self._conn is None:
             raise RuntimeError("Database connection is closed")
 
-        # SQLite typically has a limit of 999 variables
-        updated_ids_batches = batch_list(updated_ids, batch_size)
         updated_parent_ids: set[str] = set()
 
         with self._conn:
             cursor = self._conn.cursor()
+            SambaAISalesforceSQLite._stage_ids(
+                cursor, "staged_updated_ids", updated_ids
+            )
 
-            for batch_ids in updated_ids_batches:
-                batch_ids = list(set(batch_ids) - updated_parent_ids)
-                if not batch_ids:
-                    continue
-                id_placeholders = ",".join(["?" for _ in batch_ids])
-
-                for parent_type in parent_types:
-                    affected_ids: set[str] = set()
-
-                    # Get directly updated objects of parent types - using index on object_type
-                    cursor.execute(
-                        f"""
-                        SELECT id FROM salesforce_objects
-                        WHERE id IN ({id_placeholders})
-                        AND object_type = ?
-                        """,
-                        batch_ids + [parent_type],
-                    )
-                    affected_ids.update(row[0] for row in cursor.fetchall())
-
-                    # Get parent objects of updated objects - using optimized relationship_types table
-                    cursor.execute(
-                        f"""
-                        SELECT DISTINCT parent_id
-                        FROM relationship_types
-                        INDEXED BY idx_relationship_types_lookup
-                        WHERE parent_type = ?
-                        AND child_id IN ({id_placeholders})
-                        """,
-                        [parent_type] + batch_ids,
-                    )
-                    affected_ids.update(row[0] for row in cursor.fetchall())
-
-                    # Remove any parent IDs that have already been processed
-                    new_affected_ids = affected_ids - updated_parent_ids
-                    # Add the new affected IDs to the set of updated parent IDs
-                    updated_parent_ids.update(new_affected_ids)
-
-                    if new_affected_ids:
-                        yield parent_type, new_affected_ids
+            for parent_type in parent_types:
+                # directly updated objects of the parent type, plus the parents of
+                # updated objects via the relationship_types primary key
+                cursor.execute(
+                    """
+                    SELECT o.id
+                    FROM temp.staged_updated_ids AS u
+                    JOIN salesforce_objects AS o ON o.id = u.id
+                    WHERE o.object_type = ?
+                    UNION
+                    SELECT rt.parent_id
+                    FROM temp.staged_updated_ids AS u
+                    JOIN relationship_types AS rt ON rt.child_id = u.id
+                    WHERE rt.parent_type = ?
+                    """,
+                    (parent_type, parent_type),
+                )
+                # Remove any parent IDs that have already been processed
+                new_affected_ids = [
+                    row[0]
+                    for row in cursor.fetchall()
+                    if row[0] not in updated_parent_ids
+                ]
+                # Add the new affected IDs to the set of updated parent IDs
+                updated_parent_ids.update(new_affected_ids)
+
+                for affected_id_batch in batch_list(new_affected_ids, batch_size):
+                    yield parent_type, set(affected_id_batch)
 
     def has_at_least_one_object_of_type(self, object_type: str) -> bool:
         """Check if there is at least one object of the specified type in the database.
@@ -347,25 +356,27 @@ class SambaAISalesforceSQLite:
         object_type: str,
         csv_download_path: str,
     ) -> list[str]:
-        """Update the SF DB with a CSV file using SQLite storage."""
+        """Update the SF DB with a CSV file using SQLite storage.
+
+        Rows are written in batches of BULK_LOAD_BATCH_SIZE with executemany and the
+        relationship tables are updated once per batch with set based statements.
+        """
         if self._conn is None:
             raise RuntimeError("Database connection is closed")
 
         # some customers need this to be larger than the default 128KB, go with 16MB
         csv.field_size_limit(16 * 1024 * 1024)
 
-        updated_ids = []
+        updated_ids: list[str] = []
 
         with self._conn:
             cursor = self._conn.cursor()
 
             with open(csv_download_path, "r", newline="", encoding="utf-8") as f:
                 reader = csv.DictReader(f)
-                uncommitted_rows = 0
+                object_rows: list[tuple[str, str, str]] = []
+                relationship_rows: list[tuple[str, str]] = []
                 for row in reader:
-                    parent_ids = set()
-                    field_to_remove: set[str] = set()
-
                     if "Id" not in row:
                         logger.warning(
                             f"Row {row} does not have an Id field in {csv_download_path}"
@@ -373,56 +384,58 @@ class SambaAISalesforceSQLite:
                         continue
 
                     id = row["Id"]
+                    parent_ids = SambaAISalesforceSQLite._extract_parent_ids(row)
 
-                    # Process relationships and clean data
-                    # NOTE(rkuo): it looks like we just assume any field that
-                    # is a valid salesforce id references a parent
-                    for field, value in row.items():
-                        # remove empty fields
-                        if not value:
-                            field_to_remove.add(field)
-                            continue
-
-                        # remove salesforce id's (and add to parent id set)
-                        if validate_salesforce_id(value) and field != "Id":
-                            parent_ids.add(value)
-                            field_to_remove.add(field)
-                            continue
-
-                        # this field is real data, leave it alone
-
-                    # Remove unwanted fields
-                    for field in field_to_remove:
-                        if field != "LastModifiedById":
-                            del row[field]
-
-                    # Update main object data
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
-                        VALUES (?, ?, ?)
-                        """,
-                        (id, object_type, json.dumps(row)),
-                    )
-
-                    # Update relationships using the same connection
-                    SambaAISalesforceSQLite._update_relationship_tables(
-                        cursor, id, parent_ids
+                    object_rows.append((id, object_type, json.dumps(row)))
+                    relationship_rows.extend(
+                        (id, parent_id) for parent_id in parent_ids
                     )
                     updated_ids.append(id)
 
-                    # periodically commit or else memory will balloon
-                    uncommitted_rows += 1
-                    if uncommitted_rows >= 1024:
+                    # periodically flush and commit or else memory will balloon
+                    if len(object_rows) >= self.BULK_LOAD_BATCH_SIZE:
+                        SambaAISalesforceSQLite._bulk_write_objects(
+                            cursor, object_type, object_rows, relationship_rows
+                        )
                         self._conn.commit()
-                        uncommitted_rows = 0
+                        object_rows = []
+                        relationship_rows = []
+
+                if object_rows:
+                    SambaAISalesforceSQLite._bulk_write_objects(
+                        cursor, object_type, object_rows, relationship_rows
+                    )
 
             # If we're updating User objects, update the email map
             if object_type == "User":
                 SambaAISalesforceSQLite._update_user_email_map(cursor)
 
+        # fold the WAL back into the db file so it doesn't grow across csv's
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
         return updated_ids
 
+    def get_child_records(self, parent_id: str) -> list[SalesforceObject]:
+        """Get all child records for a given parent ID with a single join."""
+        if self._conn is None:
+            raise RuntimeError("Database connection is closed")
+
+        with self._conn:
+            cursor = self._conn.cursor()
+            cursor.execute(
+                """
+                SELECT o.id, o.object_type, o.data
+                FROM relationships AS r INDEXED BY idx_parent_id
+                JOIN salesforce_objects AS o ON o.id = r.child_id
+                WHERE r.parent_id = ?
+                """,
+                (parent_id,),
+            )
+            return [
+                SalesforceObject(id=row[0], type=row[1], data=json.loads(row[2]))
+                for row in cursor.fetchall()
+            ]
+
     def get_child_ids(self, parent_id: str) -> set[str]:
         """Get all child IDs for a given parent ID."""
         if self._conn is None:
@@ -462,23 +475,47 @@ class SambaAISalesforceSQLite:
         if self._conn is None:
             raise RuntimeError("Database connection is closed")
 
-        if object_type is None:
-            object_type = self.get_type_from_id(object_id)
-            if not object_type:
-                return None
-
         with self._conn:
             cursor = self._conn.cursor()
             cursor.execute(
-                "SELECT data FROM salesforce_objects WHERE id = ?", (object_id,)
+                "SELECT object_type, data FROM salesforce_objects WHERE id = ?",
+                (object_id,),
             )
             result = cursor.fetchone()
             if not result:
                 logger.warning(f"Object ID {object_id} not found")
                 return None
 
-            data = json.loads(result[0])
-            return SalesforceObject(id=object_id, type=object_type, data=data)
+            data = json.loads(result[1])
+            return SalesforceObject(
+                id=object_id, type=object_type or result[0], data=data
+            )
+
+    def get_records(
+        self, object_ids: Iterable[str], object_type: str | None = None
+    ) -> dict[str, SalesforceObject]:
+        """Retrieve many records at once. Returns a dict of id -> SalesforceObject.
+        IDs that are not found are omitted from the result."""
+        if self._conn is None:
+            raise RuntimeError("Database connection is closed")
+
+        records: dict[str, SalesforceObject] = {}
+        with self._conn:
+            cursor = self._conn.cursor()
+            for batch_ids in batch_list(list(object_ids), self.MAX_QUERY_VARIABLES):
+                id_placeholders = ",".join(["?" for _ in batch_ids])
+                cursor.execute(
+                    f"""
+                    SELECT id, object_type, data FROM salesforce_objects
+                    WHERE id IN ({id_placeholders})
+                    """,
+                    batch_ids,
+                )
+                for id, row_type, data in cursor.fetchall():
+                    records[id] = SalesforceObject(
+                        id=id, type=object_type or row_type, data=json.loads(data)
+                    )
+        return records
 
     def find_ids_by_type(self, object_type: str) -> list[str]:
         """Find all object IDs for rows of the specified type."""
@@ -493,70 +530,156 @@ class SambaAISalesforceSQLite:
             )
             return [row[0] for row in cursor.fetchall()]
 
+    @staticmethod
+    def _extract_parent_ids(row: dict[str, str]) -> set[str]:
+        """Cleans a csv row in place and returns the parent id's it references.
+
+        NOTE(rkuo): it looks like we just assume any field that
+        is a valid salesforce id references a parent
+        """
+        parent_ids: set[str] = set()
+        field_to_remove: set[str] = set()
+        for field, value in row.items():
+            # remove empty fields
+            if not value:
+                field_to_remove.add(field)
+                continue
+
+            # remove salesforce id's (and add to parent id set)
+            if validate_salesforce_id(value) and field != "Id":
+                parent_ids.add(value)
+                field_to_remove.add(field)
+                continue
+
+            # this field is real data, leave it alone
+
+        # Remove unwanted fields
+        for field in field_to_remove:
+            if field != "LastModifiedById":
+                del row[field]
+
+        return parent_ids
+
+    @staticmethod
+    def _stage_ids(cursor: sqlite3.Cursor, table_name: str, ids: Iterable[str]) -> None:
+        """(Re)fills a temp table of ids so they can be joined against instead of
+        being passed as bound variables."""
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {table_name} "
+            "(id TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        cursor.execute(f"DELETE FROM temp.{table_name}")
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO temp.{table_name} (id) VALUES (?)",
+            ((id,) for id in ids),
+        )
+
+    @staticmethod
+    def _bulk_write_objects(
+        cursor: sqlite3.Cursor,
+        object_type: str,
+        object_rows: list[tuple[str, str, str]],
+        relationship_rows: list[tuple[str, str]],
+    ) -> None:
+        """Writes a batch of (id, object_type, data) rows and their
+        (child_id, parent_id) relationships in one pass."""
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
+            VALUES (?, ?, ?)
+            """,
+            object_rows,
+        )
+        SambaAISalesforceSQLite._update_relationship_tables(
+            cursor, object_type, [row[0] for row in object_rows], relationship_rows
+        )
+
     @staticmethod
     def _update_relationship_tables(
-        cursor: sqlite3.Cursor, child_id: str, parent_ids: set[str]
+        cursor: sqlite3.Cursor,
+        object_type: str,
+        child_ids: list[str],
+        relationship_rows: list[tuple[str, str]],
     ) -> None:
-        """Given a child id and a set of parent id's, updates the
-        relationships of the child to the parents in the db and removes old relationships.
+        """Given a batch of child id's and the complete set of their (child_id, parent_id)
+        relationships, updates the relationships of the children in the db and
+        removes old relationships.
 
         Args:
-            conn: The database connection to use (must be in a transaction)
-            child_id: The ID of the child record
-            parent_ids: Set of parent IDs to link to
+            cursor: The cursor to use (must be in a transaction)
+            object_type: The object type of the child records
+            child_ids: The IDs of the child records in this batch
+            relationship_rows: (child_id, parent_id) pairs to link
         """
 
         try:
-            # Get existing parent IDs
+            SambaAISalesforceSQLite._stage_ids(cursor, "staged_child_ids", child_ids)
             cursor.execute(
-                "SELECT parent_id FROM relationships WHERE child_id = ?", (child_id,)
+                """
+                CREATE TEMP TABLE IF NOT EXISTS staged_relationships (
+                    child_id TEXT NOT NULL,
+                    parent_id TEXT NOT NULL,
+                    PRIMARY KEY (child_id, parent_id)
+                ) WITHOUT ROWID
+                """
+            )
+            cursor.execute("DELETE FROM temp.staged_relationships")
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO temp.staged_relationships (child_id, parent_id)
+                VALUES (?, ?)
+                """,
+                relationship_rows,
             )
-            old_parent_ids = {row[0] for row in cursor.fetchall()}
-
-            # Calculate differences
-            parent_ids_to_remove = old_parent_ids - parent_ids
-            parent_ids_to_add = parent_ids - old_parent_ids
 
-            # Remove old relationships
-            if parent_ids_to_remove:
-                cursor.executemany(
-                    "DELETE FROM relationships WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
-                )
-                # Also remove from relationship_types
-                cursor.executemany(
-                    "DELETE FROM relationship_types WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
+            # Remove old relationships of the staged children
+            for table in ("relationships", "relationship_types"):
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE child_id IN (SELECT id FROM temp.staged_child_ids)
+                    AND NOT EXISTS (
+                        SELECT 1 FROM temp.staged_relationships AS s
+                        WHERE s.child_id = {table}.child_id
+                        AND s.parent_id = {table}.parent_id
+                    )
+                    """
                 )
 
             # Add new relationships
-            if parent_ids_to_add:
-                # First add to relationships table
-                cursor.executemany(
-                    "INSERT INTO relationships (child_id, parent_id) VALUES (?, ?)",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_add],
-                )
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO relationships (child_id, parent_id)
+                SELECT child_id, parent_id FROM temp.staged_relationships
+                """
+            )
 
-                # Then get the types of the parent objects and add to relationship_types
-                for parent_id in parent_ids_to_add:
-                    cursor.execute(
-                        "SELECT object_type FROM salesforce_objects WHERE id = ?",
-                        (parent_id,),
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        parent_type = result[0]
-                        cursor.execute(
-                            """
-                            INSERT INTO relationship_types (child_id, parent_id, parent_type)
-                            VALUES (?, ?, ?)
-                            """,
-                            (child_id, parent_id, parent_type),
-                        )
+            # resolve the types of all parents with a single join
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO relationship_types (child_id, parent_id, parent_type)
+                SELECT s.child_id, s.parent_id, o.object_type
+                FROM temp.staged_relationships AS s
+                JOIN salesforce_objects AS o ON o.id = s.parent_id
+                """
+            )
+
+            # children that were loaded before this batch of parents couldn't
+            # resolve the parent type at the time, so backfill them now
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO relationship_types (child_id, parent_id, parent_type)
+                SELECT r.child_id, r.parent_id, ?
+                FROM temp.staged_child_ids AS c
+                JOIN relationships AS r INDEXED BY idx_parent_id ON r.parent_id = c.id
+                """,
+                (object_type,),
+            )
 
         except Exception:
             logger.exception(
-                f"Error updating relationship tables: child_id={child_id} parent_ids={parent_ids}"
+                f"Error updating relationship tables: "
+                f"object_type={object_type} num_children={len(child_ids)}"
             )
             raise
 
@@ -4,6 +4,7 @@ import itertools
 import re
 from collections.abc import Callable
 from collections.abc import Generator
+from collections.abc import MutableMapping
 from concurrent.futures import as_completed
 from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
@@ -22,6 +23,7 @@ from typing_extensions import override
 
 from sambaai.configs.app_configs import ENABLE_EXPENSIVE_EXPERT_CALLS
 from sambaai.configs.app_configs import INDEX_BATCH_SIZE
+from sambaai.configs.app_configs import SLACK_CHANNEL_CONCURRENCY
 from sambaai.configs.app_configs import SLACK_NUM_THREADS
 from sambaai.configs.constants import DocumentSource
 from sambaai.connectors.exceptions import ConnectorValidationError
@@ -47,12 +49,15 @@ from sambaai.connectors.models import TextSection
 from sambaai.connectors.slack.sambaai_retry_handler import SambaAIRedisSlackRetryHandler
 from sambaai.connectors.slack.utils import expert_info_from_slack_id
 from sambaai.connectors.slack.utils import get_message_link
+from sambaai.connectors.slack.utils import get_slack_rate_limiter
 from sambaai.connectors.slack.utils import make_paginated_slack_api_call_w_retries
 from sambaai.connectors.slack.utils import make_slack_api_call_w_retries
+from sambaai.connectors.slack.utils import RateLimitedWebClient
 from sambaai.connectors.slack.utils import SlackTextCleaner
 from sambaai.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from sambaai.redis.redis_pool import get_redis_client
 from sambaai.utils.logger import setup_logger
+from sambaai.utils.lru_cache import ThreadSafeLRUCache
 
 logger = setup_logger()
 
@@ -67,9 +72,14 @@ ThreadType = list[MessageType]
 
 class SlackCheckpoint(ConnectorCheckpoint):
     channel_ids: list[str] | None
+    # per channel cursor: the oldest message ts processed so far. Channels advance
+    # independently, a channel is started once it has an entry here.
     channel_completion_map: dict[str, str]
+    # only set by older checkpoints, superseded by active_channels
     current_channel: ChannelType | None
     seen_thread_ts: list[str]
+    # channels currently being indexed in parallel
+    active_channels: list[ChannelType] = []
 
 
 def _collect_paginated_channels(
@@ -156,13 +166,27 @@ def get_channel_messages(
         yield cast(list[MessageType], result["messages"])
 
 
-def get_thread(client: WebClient, channel_id: str, thread_id: str) -> ThreadType:
+def get_thread(
+    client: WebClient,
+    channel_id: str,
+    thread_id: str,
+    thread_cache: MutableMapping[tuple[str, str], ThreadType] | None = None,
+) -> ThreadType:
     """Get all messages in a thread"""
+    cache_key = (channel_id, thread_id)
+    if thread_cache is not None:
+        cached_thread = thread_cache.get(cache_key)
+        if cached_thread is not None:
+            return cached_thread
+
     threads: list[MessageType] = []
     for result in make_paginated_slack_api_call_w_retries(
         client.conversations_replies, channel=channel_id, ts=thread_id
     ):
         threads.extend(result["messages"])
+
+    if thread_cache is not None:
+        thread_cache[cache_key] = threads
     return threads
 
 
@@ -180,7 +204,7 @@ def thread_to_doc(
     thread: ThreadType,
     slack_cleaner: SlackTextCleaner,
     client: WebClient,
-    user_cache: dict[str, BasicExpertInfo | None],
+    user_cache: MutableMapping[str, BasicExpertInfo | None],
 ) -> Document:
     channel_id = channel["id"]
 
@@ -372,9 +396,10 @@ def _message_to_doc(
     client: WebClient,
     channel: ChannelType,
     slack_cleaner: SlackTextCleaner,
-    user_cache: dict[str, BasicExpertInfo | None],
+    user_cache: MutableMapping[str, BasicExpertInfo | None],
     seen_thread_ts: set[str],
     msg_filter_func: Callable[[MessageType], bool] = default_msg_filter,
+    thread_cache: MutableMapping[tuple[str, str], ThreadType] | None = None,
 ) -> Document | None:
     filtered_thread: ThreadType | None = None
     thread_ts = message.get("thread_ts")
@@ -385,7 +410,10 @@ def _message_to_doc(
             return None
 
         thread = get_thread(
-            client=client, channel_id=channel["id"], thread_id=thread_ts
+            client=client,
+            channel_id=channel["id"],
+            thread_id=thread_ts,
+            thread_cache=thread_cache,
         )
         filtered_thread = [
             message for message in thread if not msg_filter_func(message)
@@ -468,9 +496,10 @@ def _process_message(
     client: WebClient,
     channel: ChannelType,
     slack_cleaner: SlackTextCleaner,
-    user_cache: dict[str, BasicExpertInfo | None],
+    user_cache: MutableMapping[str, BasicExpertInfo | None],
     seen_thread_ts: set[str],
     msg_filter_func: Callable[[MessageType], bool] = default_msg_filter,
+    thread_cache: MutableMapping[tuple[str, str], ThreadType] | None = None,
 ) -> ProcessedSlackMessage:
     thread_ts = message.get("thread_ts")
     thread_or_message_ts = thread_ts or message["ts"]
@@ -488,6 +517,7 @@ def _process_message(
             user_cache=user_cache,
             seen_thread_ts=seen_thread_ts,
             msg_filter_func=msg_filter_func,
+            thread_cache=thread_cache,
         )
         return ProcessedSlackMessage(
             doc=doc, thread_or_message_ts=thread_or_message_ts, failure=None
@@ -519,6 +549,10 @@ class SlackConnector(
 
     MAX_CHANNELS_TO_LOG = 50
 
+    # bounds for the caches kept across the whole run
+    USER_CACHE_SIZE = 20_000
+    THREAD_CACHE_SIZE = 2_000
+
     def __init__(
         self,
         channels: list[str] | None = None,
@@ -527,16 +561,25 @@ class SlackConnector(
         channel_regex_enabled: bool = False,
         batch_size: int = INDEX_BATCH_SIZE,
         num_threads: int = SLACK_NUM_THREADS,
+        channel_concurrency: int = SLACK_CHANNEL_CONCURRENCY,
     ) -> None:
         self.channels = channels
         self.channel_regex_enabled = channel_regex_enabled
         self.batch_size = batch_size
         self.num_threads = num_threads
+        self.channel_concurrency = channel_concurrency
         self.client: WebClient | None = None
         self.fast_client: WebClient | None = None
         # just used for efficiency
         self.text_cleaner: SlackTextCleaner | None = None
-        self.user_cache: dict[str, BasicExpertInfo | None] = {}
+        self.user_cache: MutableMapping[str, BasicExpertInfo | None] = (
+            ThreadSafeLRUCache(SlackConnector.USER_CACHE_SIZE)
+        )
+        # threads can be reached from several messages (e.g. replies also sent
+        # to the channel), so keep recently fetched replies around
+        self.thread_cache: MutableMapping[tuple[str, str], ThreadType] = (
+            ThreadSafeLRUCache(SlackConnector.THREAD_CACHE_SIZE)
+        )
         self.credentials_provider: CredentialsProviderInterface | None = None
         self.credential_prefix: str | None = None
         # self.delay_lock: str | None = None  # the redis key for the shared lock
@@ -575,7 +618,13 @@ class SlackConnector(
             sambaai_rate_limit_error_retry_handler,
         ]
 
-        client = WebClient(token=token, retry_handlers=custom_retry_handlers)
+        # proactively pace calls per Slack rate limit tier. The limiter is shared
+        # by every client in this process that uses the same credential.
+        client = RateLimitedWebClient(
+            rate_limiter=get_slack_rate_limiter(prefix),
+            token=token,
+            retry_handlers=custom_retry_handlers,
+        )
         return client
 
     @property
@@ -614,7 +663,10 @@ class SlackConnector(
         self.fast_client = WebClient(
             token=bot_token, timeout=SlackConnector.FAST_TIMEOUT
         )
-        self.text_cleaner = SlackTextCleaner(client=self.client)
+        self.text_cleaner = SlackTextCleaner(
+            client=self.client,
+            id_to_name_map=ThreadSafeLRUCache(SlackConnector.USER_CACHE_SIZE),
+        )
         self.credentials_provider = credentials_provider
 
     def retrieve_all_slim_documents(
@@ -642,14 +694,15 @@ class SlackConnector(
         """Rough outline:
 
         Step 1: Get all channels, yield back Checkpoint.
-        Step 2: Loop through each channel. For each channel:
-            Step 2.1: Get messages within the time range.
+        Step 2: Index up to channel_concurrency channels at a time. On each call:
+            Step 2.1: Get the next page of messages within the time range for every
+                      active channel in parallel.
             Step 2.2: Process messages in parallel, yield back docs.
-            Step 2.3: Update checkpoint with new_latest, seen_thread_ts, and current_channel.
+            Step 2.3: Update checkpoint with each channel's new_latest and seen_thread_ts.
                       Slack returns messages from newest to oldest, so we need to keep track of
                       the latest message we've seen in each channel.
-            Step 2.4: If there are no more messages in the channel, switch the current
-                      channel to the next channel.
+            Step 2.4: Channels with no more messages are replaced by channels that
+                      haven't been started yet.
         """
         if self.client is None or self.text_cleaner is None:
             raise ConnectorMissingCredentialError("Slack")
@@ -672,39 +725,72 @@ class SlackConnector(
                 checkpoint.has_more = False
                 return checkpoint
 
-            checkpoint.current_channel = filtered_channels[0]
+            checkpoint.active_channels = filtered_channels[: self.channel_concurrency]
             checkpoint.has_more = True
             return checkpoint
 
         final_channel_ids = checkpoint.channel_ids
-        channel = checkpoint.current_channel
-        if channel is None:
-            raise ValueError("current_channel key not set in checkpoint")
 
-        channel_id = channel["id"]
-        if channel_id not in final_channel_ids:
-            raise ValueError(f"Channel {channel_id} not found in checkpoint")
+        # migrate checkpoints written before channels were indexed in parallel
+        if not checkpoint.active_channels and checkpoint.current_channel:
+            checkpoint.active_channels = [checkpoint.current_channel]
+        checkpoint.current_channel = None
+
+        active_channels = checkpoint.active_channels
+        if not active_channels:
+            raise ValueError("active_channels not set in checkpoint")
+
+        for channel in active_channels:
+            if channel["id"] not in final_channel_ids:
+                raise ValueError(f"Channel {channel['id']} not found in checkpoint")
 
         oldest = str(start) if start else None
-        latest = checkpoint.channel_completion_map.get(channel_id, str(end))
         seen_thread_ts = set(checkpoint.seen_thread_ts)
-        try:
-            logger.debug(
-                f"Getting messages for channel {channel} within range {oldest} - {latest}"
-            )
-            message_batch, has_more_in_channel = _get_messages(
-                channel, self.client, oldest, latest
-            )
-            new_latest = message_batch[-1]["ts"] if message_batch else latest
+        num_threads_start = len(seen_thread_ts)
+
+        # channel id -> (new_latest, has_more_in_channel) for channels that succeeded
+        channel_progress: dict[str, tuple[str, bool]] = {}
+
+        # Pages and messages share one pool, message processing for a channel
+        # starts as soon as its page arrives
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            page_futures: dict[
+                Future[tuple[list[MessageType], bool]], tuple[ChannelType, str]
+            ] = {}
+            for channel in active_channels:
+                latest = checkpoint.channel_completion_map.get(channel["id"], str(end))
+                logger.debug(
+                    f"Getting messages for channel {channel} within range {oldest} - {latest}"
+                )
+                # Capture the current context so that the thread gets the current tenant ID
+                current_context = contextvars.copy_context()
+                page_futures[
+                    executor.submit(
+                        current_context.run,
+                        _get_messages,
+                        channel,
+                        self.client,
+                        oldest,
+                        latest,
+                    )
+                ] = (channel, latest)
+
+            message_futures: list[Future[ProcessedSlackMessage]] = []
+            for page_future in as_completed(page_futures):
+                channel, latest = page_futures[page_future]
+                try:
+                    message_batch, has_more_in_channel = page_future.result()
+                except Exception as e:
+                    logger.exception(f"Error processing channel {channel['name']}")
+                    yield self._channel_failure(channel["id"], start, end, e)
+                    continue
+
+                new_latest = message_batch[-1]["ts"] if message_batch else latest
+                channel_progress[channel["id"]] = (new_latest, has_more_in_channel)
 
-            num_threads_start = len(seen_thread_ts)
-            # Process messages in parallel using ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-                futures: list[Future[ProcessedSlackMessage]] = []
                 for message in message_batch:
-                    # Capture the current context so that the thread gets the current tenant ID
                     current_context = contextvars.copy_context()
-                    futures.append(
+                    message_futures.append(
                         executor.submit(
                             current_context.run,
                             _process_message,
@@ -714,66 +800,109 @@ class SlackConnector(
                             slack_cleaner=self.text_cleaner,
                             user_cache=self.user_cache,
                             seen_thread_ts=seen_thread_ts,
+                            thread_cache=self.thread_cache,
                         )
                     )
 
-                for future in as_completed(futures):
-                    processed_slack_message = future.result()
-                    doc = processed_slack_message.doc
-                    thread_or_message_ts = processed_slack_message.thread_or_message_ts
-                    failure = processed_slack_message.failure
-                    if doc:
-                        # handle race conditions here since this is single
-                        # threaded. Multi-threaded _process_message reads from this
-                        # but since this is single threaded, we won't run into simul
-                        # writes. At worst, we can duplicate a thread, which will be
-                        # deduped later on.
-                        if thread_or_message_ts not in seen_thread_ts:
-                            yield doc
-
-                        seen_thread_ts.add(thread_or_message_ts)
-                    elif failure:
-                        yield failure
-
-            num_threads_processed = len(seen_thread_ts) - num_threads_start
-            logger.info(f"Processed {num_threads_processed} threads.")
-
-            checkpoint.seen_thread_ts = list(seen_thread_ts)
+            for future in as_completed(message_futures):
+                processed_slack_message = future.result()
+                doc = processed_slack_message.doc
+                thread_or_message_ts = processed_slack_message.thread_or_message_ts
+                failure = processed_slack_message.failure
+                if doc:
+                    # handle race conditions here since this is single
+                    # threaded. Multi-threaded _process_message reads from this
+                    # but since this is single threaded, we won't run into simul
+                    # writes. At worst, we can duplicate a thread, which will be
+                    # deduped later on.
+                    if thread_or_message_ts not in seen_thread_ts:
+                        yield doc
+
+                    seen_thread_ts.add(thread_or_message_ts)
+                elif failure:
+                    yield failure
+
+        num_threads_processed = len(seen_thread_ts) - num_threads_start
+        logger.info(
+            f"Processed {num_threads_processed} threads "
+            f"across {len(channel_progress)} channels."
+        )
+
+        checkpoint.seen_thread_ts = list(seen_thread_ts)
+
+        # channels that failed stay active and are retried on the next call
+        still_active: list[ChannelType] = []
+        for channel in active_channels:
+            progress = channel_progress.get(channel["id"])
+            if progress is None:
+                still_active.append(channel)
+                continue
+
+            new_latest, has_more_in_channel = progress
             checkpoint.channel_completion_map[channel["id"]] = new_latest
             if has_more_in_channel:
-                checkpoint.current_channel = channel
-            else:
-                new_channel_id = next(
-                    (
-                        channel_id
-                        for channel_id in final_channel_ids
-                        if channel_id not in checkpoint.channel_completion_map
-                    ),
-                    None,
-                )
-                if new_channel_id:
-                    new_channel = _get_channel_by_id(self.client, new_channel_id)
-                    checkpoint.current_channel = new_channel
-                else:
-                    checkpoint.current_channel = None
+                still_active.append(channel)
 
-            checkpoint.has_more = checkpoint.current_channel is not None
-            return checkpoint
+        yield from self._fill_active_channels(checkpoint, still_active, start, end)
 
-        except Exception as e:
-            logger.exception(f"Error processing channel {channel['name']}")
-            yield ConnectorFailure(
-                failed_entity=EntityFailure(
-                    entity_id=channel["id"],
-                    missed_time_range=(
-                        datetime.fromtimestamp(start, tz=timezone.utc),
-                        datetime.fromtimestamp(end, tz=timezone.utc),
-                    ),
+        checkpoint.has_more = len(checkpoint.active_channels) > 0
+        return checkpoint
+
+    def _fill_active_channels(
+        self,
+        checkpoint: SlackCheckpoint,
+        active_channels: list[ChannelType],
+        start: SecondsSinceUnixEpoch,
+        end: SecondsSinceUnixEpoch,
+    ) -> Generator[ConnectorFailure, None, None]:
+        """Tops active_channels up to channel_concurrency with channels that haven't
+        been started yet and stores the result on the checkpoint."""
+        if self.client is None:
+            raise ConnectorMissingCredentialError("Slack")
+
+        active_channel_ids = {channel["id"] for channel in active_channels}
+        for channel_id in checkpoint.channel_ids or []:
+            if len(active_channels) >= self.channel_concurrency:
+                break
+
+            if (
+                channel_id in checkpoint.channel_completion_map
+                or channel_id in active_channel_ids
+            ):
+                continue
+
+            try:
+                new_channel = _get_channel_by_id(self.client, channel_id)
+            except Exception as e:
+                # record the channel as done so a deleted channel can't stall the run
+                logger.exception(f"Error fetching channel {channel_id}")
+                checkpoint.channel_completion_map[channel_id] = str(end)
+                yield self._channel_failure(channel_id, start, end, e)
+                continue
+
+            active_channels.append(new_channel)
+            active_channel_ids.add(channel_id)
+
+        checkpoint.active_channels = active_channels
+
+    @staticmethod
+    def _channel_failure(
+        channel_id: str,
+        start: SecondsSinceUnixEpoch,
+        end: SecondsSinceUnixEpoch,
+        e: Exception,
+    ) -> ConnectorFailure:
+        return ConnectorFailure(
+            failed_entity=EntityFailure(
+                entity_id=channel_id,
+                missed_time_range=(
+                    datetime.fromtimestamp(start, tz=timezone.utc),
+                    datetime.fromtimestamp(end, tz=timezone.utc),
                 ),
-                failure_message=str(e),
-                exception=e,
-            )
-            return checkpoint
+            ),
+            failure_message=str(e),
+            exception=e,
+        )
 
     def validate_connector_settings(self) -> None:
         """
@@ -876,6 +1005,7 @@ class SlackConnector(
             channel_completion_map={},
             current_channel=None,
             seen_thread_ts=[],
+            active_channels=[],
             has_more=True,
         )
 
@@ -1,6 +1,9 @@
 import re
+import threading
+import time
 from collections.abc import Callable
 from collections.abc import Generator
+from collections.abc import MutableMapping
 from functools import lru_cache
 from functools import wraps
 from typing import Any
@@ -21,6 +24,29 @@ basic_retry_wrapper = retry_builder(tries=7)
 # number of messages we request per page when fetching paginated slack messages
 _SLACK_LIMIT = 900
 
+# requests per minute allowed for each of Slack's rate limit tiers
+# see https://api.slack.com/apis/rate-limits
+SLACK_TIER_REQUESTS_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+
+# the tier of each web api method we call. Unlisted methods are treated as tier 3.
+SLACK_METHOD_TIERS = {
+    "auth.test": 4,
+    "conversations.history": 3,
+    "conversations.info": 3,
+    "conversations.join": 3,
+    "conversations.list": 2,
+    "conversations.members": 4,
+    "conversations.replies": 3,
+    "usergroups.list": 2,
+    "usergroups.users.list": 2,
+    "users.info": 4,
+    "users.list": 2,
+    "users.lookupByEmail": 3,
+}
+_DEFAULT_SLACK_TIER = 3
+
+_missing = object()
+
 
 @lru_cache()
 def get_base_url(token: str) -> str:
@@ -120,6 +146,75 @@ def _make_slack_api_call_paginated(
 #     return rate_limited_call
 
 
+class SlackTierRateLimiter:
+    """Paces calls to the Slack web api so we stay under each method's tier limit
+    instead of relying on 429's and retries.
+
+    Slack applies limits per method, per workspace, per app, so there is one token
+    bucket per method. Buckets start full to allow a short burst. Thread safe."""
+
+    def __init__(
+        self,
+        tier_requests_per_minute: dict[int, int] = SLACK_TIER_REQUESTS_PER_MINUTE,
+    ) -> None:
+        self._tier_requests_per_minute = tier_requests_per_minute
+        self._lock = threading.Lock()
+        # api method -> (available tokens, last refill time)
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def _requests_per_minute(self, api_method: str) -> int:
+        tier = SLACK_METHOD_TIERS.get(api_method, _DEFAULT_SLACK_TIER)
+        return self._tier_requests_per_minute[tier]
+
+    def acquire(self, api_method: str) -> float:
+        """Blocks until a call to api_method is allowed. Returns the seconds waited."""
+        capacity = float(self._requests_per_minute(api_method))
+        refill_per_second = capacity / 60.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last_refill = self._buckets.get(api_method, (capacity, now))
+                tokens = min(capacity, tokens + (now - last_refill) * refill_per_second)
+                if tokens >= 1.0:
+                    self._buckets[api_method] = (tokens - 1.0, now)
+                    return waited
+
+                self._buckets[api_method] = (tokens, now)
+                wait = (1.0 - tokens) / refill_per_second
+
+            time.sleep(wait)
+            waited += wait
+
+
+_rate_limiters: dict[str, SlackTierRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_slack_rate_limiter(key: str) -> SlackTierRateLimiter:
+    """Returns the process wide rate limiter for a credential, so that every client
+    and thread using the same Slack app shares one budget."""
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = SlackTierRateLimiter()
+        return _rate_limiters[key]
+
+
+class RateLimitedWebClient(WebClient):
+    """WebClient that waits on a SlackTierRateLimiter before every api call."""
+
+    def __init__(self, rate_limiter: SlackTierRateLimiter, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter
+
+    def api_call(self, api_method: str, **kwargs: Any) -> SlackResponse:  # type: ignore[override]
+        waited = self.rate_limiter.acquire(api_method)
+        if waited > 1.0:
+            logger.debug(f"Waited {waited:.2f}s for Slack rate limit: {api_method}")
+        return super().api_call(api_method, **kwargs)
+
+
 def make_slack_api_call_w_retries(
     call: Callable[..., SlackResponse], **kwargs: Any
 ) -> SlackResponse:
@@ -135,13 +230,15 @@ def make_paginated_slack_api_call_w_retries(
 def expert_info_from_slack_id(
     user_id: str | None,
     client: WebClient,
-    user_cache: dict[str, BasicExpertInfo | None],
+    user_cache: MutableMapping[str, BasicExpertInfo | None],
 ) -> BasicExpertInfo | None:
     if not user_id:
         return None
 
-    if user_id in user_cache:
-        return user_cache[user_id]
+    # single lookup, since a bounded cache may evict between a check and a read
+    cached = user_cache.get(user_id, _missing)
+    if cached is not _missing:
+        return cast(BasicExpertInfo | None, cached)
 
     response = client.users_info(user=user_id)
 
@@ -169,26 +266,35 @@ class SlackTextCleaner:
     Handles caching, so the same request is not made multiple times
     for the same user ID"""
 
-    def __init__(self, client: WebClient) -> None:
+    def __init__(
+        self,
+        client: WebClient,
+        id_to_name_map: MutableMapping[str, str] | None = None,
+    ) -> None:
         self._client = client
-        self._id_to_name_map: dict[str, str] = {}
+        self._id_to_name_map: MutableMapping[str, str] = (
+            id_to_name_map if id_to_name_map is not None else {}
+        )
 
     def _get_slack_name(self, user_id: str) -> str:
-        if user_id not in self._id_to_name_map:
+        user_name = self._id_to_name_map.get(user_id)
+        if user_name is None:
             try:
                 response = self._client.users_info(user=user_id)
                 # prefer display name if set, since that is what is shown in Slack
-                self._id_to_name_map[user_id] = (
+                user_name = cast(
+                    str,
                     response["user"]["profile"]["display_name"]
-                    or response["user"]["profile"]["real_name"]
+                    or response["user"]["profile"]["real_name"],
                 )
+                self._id_to_name_map[user_id] = user_name
             except SlackApiError as e:
                 logger.exception(
                     f"Error fetching data for user {user_id}: {e.response['error']}"
                 )
                 raise
 
-        return self._id_to_name_map[user_id]
+        return user_name
 
     def _replace_user_ids_with_names(self, message: str) -> str:
         # Find user IDs in the message
@@ -197,10 +303,7 @@ class SlackTextCleaner:
         # Iterate over each user ID found
         for user_id in user_ids:
             try:
-                if user_id in self._id_to_name_map:
-                    user_name = self._id_to_name_map[user_id]
-                else:
-                    user_name = self._get_slack_name(user_id)
+                user_name = self._get_slack_name(user_id)
 
                 # Replace the user ID with the username in the message
                 message = message.replace(f"<@{user_id}>", f"@{user_name}")
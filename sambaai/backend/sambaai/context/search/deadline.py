@@ -0,0 +1,70 @@
+import threading
+import time
+
+from sambaai.context.search.enums import SearchStage
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Seconds that must be left for an optional stage to still be started, roughly its
+# p99 latency. The stages that call an LLM need the most.
+DEFAULT_STAGE_MIN_SECONDS: dict[SearchStage, float] = {
+    SearchStage.QUERY_ANALYSIS: 2.0,
+    SearchStage.QUERY_EXPANSION: 3.0,
+    SearchStage.SECTION_EXPANSION: 0.5,
+    SearchStage.RERANK: 1.0,
+    SearchStage.LLM_FILTER: 3.0,
+}
+
+
+class SearchDeadline:
+    """
+    Time budget of a request that runs a search. It is handed down to every stage of
+    the search, optional stages that would not finish in the remaining time are
+    skipped (or cut short) and recorded in `skipped_stages` so the caller can report
+    what the answer was built without. Retrieval itself always runs.
+
+    Thread safe, the stages run in parallel threads.
+    """
+
+    def __init__(
+        self,
+        budget_seconds: float,
+        stage_min_seconds: dict[SearchStage, float] | None = None,
+    ) -> None:
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.stage_min_seconds = stage_min_seconds or DEFAULT_STAGE_MIN_SECONDS
+        self._skipped_stages: dict[SearchStage, str] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def skip(self, stage: SearchStage, reason: str) -> None:
+        with self._lock:
+            self._skipped_stages[stage] = reason
+        logger.info(f"Search deadline: skipped {stage.value}, {reason}")
+
+    def allows(self, stage: SearchStage) -> bool:
+        """Whether there is enough time left to start the stage, if not the stage is
+        recorded as skipped"""
+        remaining = self.remaining()
+        min_seconds = self.stage_min_seconds.get(stage, 0.0)
+        if remaining >= min_seconds:
+            return True
+
+        self.skip(
+            stage,
+            f"{remaining:.2f}s of {self.budget_seconds:.2f}s left, "
+            f"needs {min_seconds:.2f}s",
+        )
+        return False
+
+    @property
+    def skipped_stages(self) -> dict[SearchStage, str]:
+        with self._lock:
+            return dict(self._skipped_stages)
@@ -25,6 +25,12 @@ class SearchType(str, Enum):
     SEMANTIC = "semantic"
 
 
+class FusionMethod(str, Enum):
+    MAX_SCORE = "max_score"  # each chunk keeps its best score
+    RECIPROCAL_RANK = "rrf"
+    WEIGHTED_SCORE = "weighted"  # weighted sum of the min-max normalized scores
+
+
 class LLMEvaluationType(str, Enum):
     AGENTIC = "agentic"  # applies agentic evaluation
     BASIC = "basic"  # applies boolean evaluation
@@ -32,6 +38,16 @@ class LLMEvaluationType(str, Enum):
     UNSPECIFIED = "unspecified"  # reverts to default
 
 
+class SearchStage(str, Enum):
+    """Optional search stages, skipped when a request runs out of time"""
+
+    QUERY_ANALYSIS = "query_analysis"  # filter extraction and keyword detection
+    QUERY_EXPANSION = "query_expansion"
+    SECTION_EXPANSION = "section_expansion"  # surrounding chunks / full documents
+    RERANK = "rerank"
+    LLM_FILTER = "llm_filter"
+
+
 class QueryFlow(str, Enum):
     SEARCH = "search"
     QUESTION_ANSWER = "question-answer"
@@ -296,15 +296,12 @@ class InferenceChunkUncleaned(InferenceChunk):
     metadata_suffix: str | None
 
     def to_inference_chunk(self) -> InferenceChunk:
-        # Create a dict of all fields except 'metadata_suffix'
-        # Assumes the cleaning has already been applied and just needs to translate to the right type
-        inference_chunk_data = {
-            k: v
-            for k, v in self.model_dump().items()
-            if k
-            not in ["metadata_suffix"]  # May be other fields to throw out in the future
-        }
-        return InferenceChunk(**inference_chunk_data)
+        # Assumes the cleaning has already been applied and just needs to translate to the right type.
+        # The values are validated already, so they are handed over as they are instead of
+        # being dumped and validated again for every retrieved chunk
+        return InferenceChunk.model_construct(
+            **{name: getattr(self, name) for name in InferenceChunk.model_fields}
+        )
 
 
 class InferenceSection(BaseModel):
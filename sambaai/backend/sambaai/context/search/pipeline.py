@@ -13,8 +13,10 @@ from sambaai.chat.prune_and_merge import ChunkRange
 from sambaai.chat.prune_and_merge import merge_chunk_intervals
 from sambaai.chat.prune_and_merge import prune_and_merge_sections
 from sambaai.configs.chat_configs import DISABLE_LLM_DOC_RELEVANCE
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
 from sambaai.context.search.enums import QueryFlow
+from sambaai.context.search.enums import SearchStage
 from sambaai.context.search.enums import SearchType
 from sambaai.context.search.models import IndexFilters
 from sambaai.context.search.models import InferenceChunk
@@ -65,6 +67,8 @@ class SearchPipeline:
         rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
         prompt_config: PromptConfig | None = None,
         contextual_pruning_config: ContextualPruningConfig | None = None,
+        # optional stages are skipped when the request is running out of time
+        deadline: SearchDeadline | None = None,
     ):
         # NOTE: The Search Request contains a lot of fields that are overrides, many of them can be None
         # and typically are None. The preprocessing will fetch default values to replace these empty overrides.
@@ -77,6 +81,7 @@ class SearchPipeline:
         self.bypass_acl = bypass_acl
         self.retrieval_metrics_callback = retrieval_metrics_callback
         self.rerank_metrics_callback = rerank_metrics_callback
+        self.deadline = deadline
 
         self.search_settings = get_current_search_settings(db_session)
         self.document_index = get_default_document_index(self.search_settings, None)
@@ -120,6 +125,7 @@ class SearchPipeline:
             skip_query_analysis=self.skip_query_analysis,
             db_session=self.db_session,
             bypass_acl=self.bypass_acl,
+            deadline=self.deadline,
         )
         self._search_query = final_search_query
         self._predicted_search_type = final_search_query.search_type
@@ -161,6 +167,7 @@ class SearchPipeline:
             document_index=self.document_index,
             db_session=self.db_session,
             retrieval_metrics_callback=self.retrieval_metrics_callback,
+            deadline=self.deadline,
         )
 
         return cast(list[InferenceChunk], self._retrieved_chunks)
@@ -239,13 +246,22 @@ class SearchPipeline:
 
         above = self.search_query.chunks_above
         below = self.search_query.chunks_below
+        full_doc = self.search_query.full_doc
+        if (
+            (full_doc or above or below)
+            and self.deadline is not None
+            and not self.deadline.allows(SearchStage.SECTION_EXPANSION)
+        ):
+            # the sections are just the retrieved chunks
+            full_doc = False
+            above = below = 0
 
         expanded_inference_sections = []
         inference_chunks: list[InferenceChunk] = []
         chunk_requests: list[VespaChunkRequest] = []
 
         # Full doc setting takes priority
-        if self.search_query.full_doc:
+        if full_doc:
             seen_document_ids = set()
 
             # This preserves the ordering since the chunks are retrieved in score order
@@ -414,6 +430,7 @@ class SearchPipeline:
             retrieved_sections=retrieved_sections,
             llm=self.fast_llm,
             rerank_metrics_callback=self.rerank_metrics_callback,
+            deadline=self.deadline,
         )
 
         self._reranked_sections = cast(
@@ -471,6 +488,11 @@ class SearchPipeline:
             )
 
         if self.search_query.evaluation_type == LLMEvaluationType.AGENTIC:
+            if self.deadline is not None and not self.deadline.allows(
+                SearchStage.LLM_FILTER
+            ):
+                return None
+
             sections = self.final_context_sections
             functions = [
                 FunctionCall(
@@ -16,7 +16,12 @@ from sambaai.configs.constants import RETURN_SEPARATOR
 from sambaai.configs.llm_configs import get_search_time_image_analysis_enabled
 from sambaai.configs.model_configs import CROSS_ENCODER_RANGE_MAX
 from sambaai.configs.model_configs import CROSS_ENCODER_RANGE_MIN
+from sambaai.configs.model_configs import RERANK_EARLY_CUTOFF_TOP_K
+from sambaai.configs.model_configs import RERANK_PROGRESSIVE_BATCH_SIZE
+from sambaai.configs.model_configs import RERANK_SCORE_CACHE_SIZE
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
+from sambaai.context.search.enums import SearchStage
 from sambaai.context.search.models import ChunkMetric
 from sambaai.context.search.models import InferenceChunk
 from sambaai.context.search.models import InferenceChunkUncleaned
@@ -35,6 +40,7 @@ from sambaai.llm.utils import message_to_string
 from sambaai.natural_language_processing.search_nlp_models import RerankingModel
 from sambaai.secondary_llm_flows.chunk_usefulness import llm_batch_eval_sections
 from sambaai.utils.logger import setup_logger
+from sambaai.utils.lru_cache import ThreadSafeLRUCache
 from sambaai.utils.threadpool_concurrency import FunctionCall
 from sambaai.utils.threadpool_concurrency import run_functions_in_parallel
 from sambaai.utils.timing import log_function_time
@@ -218,6 +224,76 @@ def cleanup_chunks(chunks: list[InferenceChunkUncleaned]) -> list[InferenceChunk
     return [chunk.to_inference_chunk() for chunk in chunks]
 
 
+# (model name, query, chunk unique id, hash of the passage) -> raw cross-encoder score
+# the passage hash keeps scores of re-indexed chunks from being reused
+RerankScoreCacheKey = tuple[str, str, str, int]
+
+_rerank_score_cache: ThreadSafeLRUCache[RerankScoreCacheKey, float] = (
+    ThreadSafeLRUCache(RERANK_SCORE_CACHE_SIZE)
+)
+
+
+def _get_rerank_scores(
+    query_str: str,
+    rerank_settings: RerankingDetails,
+    chunks: list[InferenceChunk],
+    get_cross_encoder: Callable[[], RerankingModel],
+) -> list[float]:
+    """Raw cross-encoder scores of the chunks, only the passages without a cached
+    score are sent to the model"""
+    passages = [
+        f"{chunk.semantic_identifier or chunk.title or ''}\n{chunk.content}"
+        for chunk in chunks
+    ]
+    keys = [
+        (
+            cast(str, rerank_settings.rerank_model_name),
+            query_str,
+            chunk.unique_id,
+            hash(passage),
+        )
+        for chunk, passage in zip(chunks, passages)
+    ]
+    scores = [_rerank_score_cache.get(key) for key in keys]
+
+    missing = [ind for ind, score in enumerate(scores) if score is None]
+    if missing:
+        predicted = get_cross_encoder().predict(
+            query=query_str, passages=[passages[ind] for ind in missing]
+        )
+        for ind, score in zip(missing, predicted):
+            scores[ind] = score
+            _rerank_score_cache[keys[ind]] = score
+
+    logger.debug(
+        f"Rerank scores: cached={len(chunks) - len(missing)} predicted={len(missing)}"
+    )
+    return cast(list[float], scores)
+
+
+def _boost_rerank_scores(
+    raw_scores: numpy.ndarray,
+    chunks: list[InferenceChunk],
+    model_min: int,
+    model_max: int,
+) -> numpy.ndarray:
+    """Applies the document boosts and recency bias to the cross-encoder scores and
+    maps them to the [0, 1] display range"""
+    cross_models_min = raw_scores.min()
+    boosts = numpy.fromiter(
+        (translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks),
+        dtype=numpy.float64,
+        count=len(chunks),
+    )
+    recency_multiplier = numpy.fromiter(
+        (chunk.recency_bias for chunk in chunks),
+        dtype=numpy.float64,
+        count=len(chunks),
+    )
+    boosted_sim_scores = (raw_scores - cross_models_min) * boosts * recency_multiplier
+    return (boosted_sim_scores + cross_models_min - model_min) / (model_max - model_min)
+
+
 @log_function_time(print_only=True)
 def semantic_reranking(
     query_str: str,
@@ -226,10 +302,19 @@ def semantic_reranking(
     model_min: int = CROSS_ENCODER_RANGE_MIN,
     model_max: int = CROSS_ENCODER_RANGE_MAX,
     rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    batch_size: int = RERANK_PROGRESSIVE_BATCH_SIZE,
+    early_cutoff_top_k: int = RERANK_EARLY_CUTOFF_TOP_K,
+    deadline: SearchDeadline | None = None,
 ) -> tuple[list[InferenceChunk], list[int]]:
     """Reranks chunks based on cross-encoder models. Additionally provides the original indices
     of the chunks in their new sorted order.
 
+    With a `batch_size`, the chunks are scored in batches in their retrieval order and
+    reranking stops early once a whole batch failed to make it into the top
+    `early_cutoff_top_k`, the lower ranked chunks are assumed to not make it either.
+    Reranking also stops after the batch during which the `deadline` passed. Only the
+    scored chunks (a prefix of `chunks`) are returned.
+
     Note: this updates the chunks in place, it updates the chunk scores which came from retrieval
     """
     assert (
@@ -237,55 +322,83 @@ def semantic_reranking(
     ), "Reranking flow cannot run without a specific model"
 
     chunks_to_rerank = chunks[: rerank_settings.num_rerank]
+    if not chunks_to_rerank:
+        return [], []
+
+    cross_encoder: RerankingModel | None = None
+
+    def _get_cross_encoder() -> RerankingModel:
+        nonlocal cross_encoder
+        if cross_encoder is None:
+            cross_encoder = RerankingModel(
+                model_name=cast(str, rerank_settings.rerank_model_name),
+                provider_type=rerank_settings.rerank_provider_type,
+                api_key=rerank_settings.rerank_api_key,
+                api_url=rerank_settings.rerank_api_url,
+            )
+        return cross_encoder
+
+    batch_size = batch_size or len(chunks_to_rerank)
+    raw_score_list: list[float] = []
+    for batch_start in range(0, len(chunks_to_rerank), batch_size):
+        raw_score_list.extend(
+            _get_rerank_scores(
+                query_str,
+                rerank_settings,
+                chunks_to_rerank[batch_start : batch_start + batch_size],
+                _get_cross_encoder,
+            )
+        )
+        if (
+            deadline is not None
+            and deadline.expired()
+            and len(raw_score_list) < len(chunks_to_rerank)
+        ):
+            deadline.skip(
+                SearchStage.RERANK,
+                f"stopped after {len(raw_score_list)} of {len(chunks_to_rerank)} chunks",
+            )
+            break
+        if (
+            batch_start == 0
+            or early_cutoff_top_k <= 0
+            or len(raw_score_list) <= early_cutoff_top_k
+        ):
+            continue
+
+        scores = _boost_rerank_scores(
+            numpy.asarray(raw_score_list),
+            chunks_to_rerank[: len(raw_score_list)],
+            model_min,
+            model_max,
+        )
+        top_k = numpy.argpartition(-scores, early_cutoff_top_k - 1)[:early_cutoff_top_k]
+        if (top_k < batch_start).all():
+            logger.debug(
+                f"Rerank early cutoff after {len(raw_score_list)} of "
+                f"{len(chunks_to_rerank)} chunks"
+            )
+            break
 
-    cross_encoder = RerankingModel(
-        model_name=rerank_settings.rerank_model_name,
-        provider_type=rerank_settings.rerank_provider_type,
-        api_key=rerank_settings.rerank_api_key,
-        api_url=rerank_settings.rerank_api_url,
+    chunks_to_rerank = chunks_to_rerank[: len(raw_score_list)]
+    raw_sim_scores = numpy.asarray(raw_score_list, dtype=numpy.float64)
+    normalized_b_s_scores = _boost_rerank_scores(
+        raw_sim_scores, chunks_to_rerank, model_min, model_max
     )
 
-    passages = [
-        f"{chunk.semantic_identifier or chunk.title or ''}\n{chunk.content}"
-        for chunk in chunks_to_rerank
-    ]
-    sim_scores_floats = cross_encoder.predict(query=query_str, passages=passages)
-
-    # Old logic to handle multiple cross-encoders preserved but not used
-    sim_scores = [numpy.array(sim_scores_floats)]
-
-    raw_sim_scores = cast(numpy.ndarray, sum(sim_scores) / len(sim_scores))
-
-    cross_models_min = numpy.min(sim_scores)
-
-    shifted_sim_scores = sum(
-        [enc_n_scores - cross_models_min for enc_n_scores in sim_scores]
-    ) / len(sim_scores)
-
-    boosts = [
-        translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks_to_rerank
-    ]
-    recency_multiplier = [chunk.recency_bias for chunk in chunks_to_rerank]
-    boosted_sim_scores = shifted_sim_scores * boosts * recency_multiplier
-    normalized_b_s_scores = (boosted_sim_scores + cross_models_min - model_min) / (
-        model_max - model_min
-    )
-    orig_indices = [i for i in range(len(normalized_b_s_scores))]
-    scored_results = list(
-        zip(normalized_b_s_scores, raw_sim_scores, chunks_to_rerank, orig_indices)
-    )
-    scored_results.sort(key=lambda x: x[0], reverse=True)
-    ranked_sim_scores, ranked_raw_scores, ranked_chunks, ranked_indices = zip(
-        *scored_results
-    )
+    # stable, so ties keep the retrieval order
+    ranked_indices = numpy.argsort(-normalized_b_s_scores, kind="stable").tolist()
+    ranked_chunks = [chunks_to_rerank[ind] for ind in ranked_indices]
+    ranked_sim_scores = normalized_b_s_scores[ranked_indices].tolist()
+    ranked_raw_scores = raw_sim_scores[ranked_indices].tolist()
 
     logger.debug(
         f"Reranked (Boosted + Time Weighted) similarity scores: {ranked_sim_scores}"
     )
 
     # Assign new chunk scores based on reranking
-    for ind, chunk in enumerate(ranked_chunks):
-        chunk.score = ranked_sim_scores[ind]
+    for chunk, score in zip(ranked_chunks, ranked_sim_scores):
+        chunk.score = score
 
     if rerank_metrics_callback is not None:
         chunk_metrics = [
@@ -300,11 +413,11 @@ def semantic_reranking(
 
         rerank_metrics_callback(
             RerankMetricsContainer(
-                metrics=chunk_metrics, raw_similarity_scores=ranked_raw_scores  # type: ignore
+                metrics=chunk_metrics, raw_similarity_scores=ranked_raw_scores
             )
         )
 
-    return list(ranked_chunks), list(ranked_indices)
+    return ranked_chunks, ranked_indices
 
 
 def should_rerank(rerank_settings: RerankingDetails | None) -> bool:
@@ -323,6 +436,7 @@ def rerank_sections(
     rerank_settings: RerankingDetails,
     sections_to_rerank: list[InferenceSection],
     rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    deadline: SearchDeadline | None = None,
 ) -> list[InferenceSection]:
     """Chunks are reranked rather than the containing sections, this is because of speed
     implications, if reranking models have lower latency for long inputs in the future
@@ -340,8 +454,10 @@ def rerank_sections(
         rerank_settings=rerank_settings,
         chunks=chunks_to_rerank,
         rerank_metrics_callback=rerank_metrics_callback,
+        deadline=deadline,
     )
-    lower_chunks = chunks_to_rerank[rerank_settings.num_rerank :]
+    # chunks past num_rerank, or past the early cutoff, keep their retrieval order
+    lower_chunks = chunks_to_rerank[len(ranked_chunks) :]
 
     # Scores from rerank cannot be meaningfully combined with scores without rerank
     # However the ordering is still important
@@ -363,6 +479,7 @@ def filter_sections(
     llm: LLM,
     # For cost saving, we may turn this on
     use_chunk: bool = False,
+    deadline: SearchDeadline | None = None,
 ) -> list[InferenceSection]:
     """Filters sections based on whether the LLM thought they were relevant to the query.
     This applies on the section which has more context than the chunk. Hopefully this yields more accurate LLM evaluations.
@@ -393,6 +510,7 @@ def filter_sections(
         llm=llm,
         titles=titles,
         metadata_list=metadata_list,
+        deadline=deadline,
     )
 
     return [
@@ -407,6 +525,7 @@ def search_postprocessing(
     retrieved_sections: list[InferenceSection],
     llm: LLM,
     rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    deadline: SearchDeadline | None = None,
 ) -> Iterator[list[InferenceSection] | list[SectionRelevancePiece]]:
     # Fast path for ordering-only: detect it by checking if evaluation_type is SKIP
     if search_query.evaluation_type == LLMEvaluationType.SKIP:
@@ -428,7 +547,9 @@ def search_postprocessing(
 
     rerank_task_id = None
     sections_yielded = False
-    if should_rerank(search_query.rerank_settings):
+    if should_rerank(search_query.rerank_settings) and (
+        deadline is None or deadline.allows(SearchStage.RERANK)
+    ):
         post_processing_tasks.append(
             FunctionCall(
                 rerank_sections,
@@ -437,6 +558,7 @@ def search_postprocessing(
                     search_query.rerank_settings,  # Cannot be None here
                     retrieved_sections,
                     rerank_metrics_callback,
+                    deadline,
                 ),
             )
         )
@@ -455,10 +577,15 @@ def search_postprocessing(
 
     llm_filter_task_id = None
     # Only add LLM filtering if not in SKIP mode and if LLM doc relevance is not disabled
-    if not DISABLE_LLM_DOC_RELEVANCE and search_query.evaluation_type in [
-        LLMEvaluationType.BASIC,
-        LLMEvaluationType.UNSPECIFIED,
-    ]:
+    if (
+        not DISABLE_LLM_DOC_RELEVANCE
+        and search_query.evaluation_type
+        in [
+            LLMEvaluationType.BASIC,
+            LLMEvaluationType.UNSPECIFIED,
+        ]
+        and (deadline is None or deadline.allows(SearchStage.LLM_FILTER))
+    ):
         logger.info("Adding LLM filtering task for document relevance evaluation")
         post_processing_tasks.append(
             FunctionCall(
@@ -468,6 +595,7 @@ def search_postprocessing(
                     retrieved_sections[: search_query.max_llm_filter_sections],
                     llm,
                 ),
+                {"deadline": deadline},
             )
         )
         llm_filter_task_id = post_processing_tasks[-1].result_id
@@ -9,8 +9,10 @@ from sambaai.configs.chat_configs import HYBRID_ALPHA
 from sambaai.configs.chat_configs import HYBRID_ALPHA_KEYWORD
 from sambaai.configs.chat_configs import NUM_POSTPROCESSED_RESULTS
 from sambaai.configs.chat_configs import NUM_RETURNED_HITS
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
 from sambaai.context.search.enums import RecencyBiasSetting
+from sambaai.context.search.enums import SearchStage
 from sambaai.context.search.enums import SearchType
 from sambaai.context.search.models import BaseFilters
 from sambaai.context.search.models import IndexFilters
@@ -54,6 +56,7 @@ def retrieval_preprocessing(
     favor_recent_decay_multiplier: float = FAVOR_RECENT_DECAY_MULTIPLIER,
     base_recency_decay: float = BASE_RECENCY_DECAY,
     bypass_acl: bool = False,
+    deadline: SearchDeadline | None = None,
 ) -> SearchQuery:
     """Logic is as follows:
     Any global disables apply first
@@ -101,6 +104,21 @@ def retrieval_preprocessing(
         logger.debug("Not extract source filter - already provided")
         auto_detect_source_filter = False
 
+    if (
+        (
+            auto_detect_time_filter
+            or auto_detect_source_filter
+            or not (
+                skip_query_analysis or search_request.precomputed_is_keyword is not None
+            )
+        )
+        and deadline is not None
+        and not deadline.allows(SearchStage.QUERY_ANALYSIS)
+    ):
+        auto_detect_time_filter = False
+        auto_detect_source_filter = False
+        skip_query_analysis = True
+
     # Based on the query figure out if we should apply any hard time filters /
     # if we should bias more recent docs even more strongly
     run_time_filters = (
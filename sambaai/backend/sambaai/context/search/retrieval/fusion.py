@@ -0,0 +1,138 @@
+from collections.abc import Sequence
+from typing import TypeVar
+
+import numpy as np
+
+from sambaai.configs.chat_configs import RETRIEVAL_FUSION_METHOD
+from sambaai.configs.chat_configs import RETRIEVAL_MAX_CHUNKS_PER_DOCUMENT
+from sambaai.configs.chat_configs import RRF_K
+from sambaai.context.search.enums import FusionMethod
+from sambaai.context.search.models import InferenceChunk
+
+ChunkT = TypeVar("ChunkT", bound=InferenceChunk)
+
+
+def _rank_within_groups(groups: np.ndarray) -> np.ndarray:
+    """For each element, how many elements of the same group come before it"""
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    is_group_start = np.ones(len(groups), dtype=bool)
+    is_group_start[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    group_starts = np.maximum.accumulate(
+        np.where(is_group_start, np.arange(len(groups)), 0)
+    )
+
+    ranks = np.empty(len(groups), dtype=np.int64)
+    ranks[order] = np.arange(len(groups)) - group_starts
+    return ranks
+
+
+def _min_max_normalize(scores: np.ndarray, list_ids: np.ndarray) -> np.ndarray:
+    num_lists = int(list_ids.max()) + 1
+    list_min = np.full(num_lists, np.inf)
+    list_max = np.full(num_lists, -np.inf)
+    np.minimum.at(list_min, list_ids, scores)
+    np.maximum.at(list_max, list_ids, scores)
+
+    score_range = (list_max - list_min)[list_ids]
+    # a list with a single distinct score counts as fully relevant
+    return np.divide(
+        scores - list_min[list_ids],
+        score_range,
+        out=np.ones_like(scores),
+        where=score_range > 0,
+    )
+
+
+def fuse_chunk_lists(
+    chunk_lists: Sequence[Sequence[ChunkT]],
+    method: FusionMethod | None = None,
+    weights: Sequence[float] | None = None,
+    rrf_k: int = RRF_K,
+    max_chunks_per_document: int = RETRIEVAL_MAX_CHUNKS_PER_DOCUMENT,
+) -> list[ChunkT]:
+    """Merges ranked chunk lists (e.g. the results of several query rewrites) into one
+    list of unique chunks, best fused score first.
+
+    Each chunk is represented by its highest scoring occurrence, which gets the fused
+    score. The chunk objects are reused, not copied. The lists are expected to be
+    ordered best first, `weights` weigh the lists for rrf and weighted fusion. A single
+    list is only deduped, its scores are kept. `method` defaults to
+    RETRIEVAL_FUSION_METHOD."""
+    if method is None:
+        method = FusionMethod(RETRIEVAL_FUSION_METHOD)
+    if len(chunk_lists) == 1:
+        method = FusionMethod.MAX_SCORE
+
+    num_chunks = sum(len(chunk_list) for chunk_list in chunk_lists)
+    if not num_chunks:
+        return []
+
+    chunks = [chunk for chunk_list in chunk_lists for chunk in chunk_list]
+    # dense ids of the unique chunks, in order of first appearance
+    key_to_position: dict[tuple[str, int], int] = {}
+    chunk_positions: list[int] = []
+    for chunk in chunks:
+        key = (chunk.document_id, chunk.chunk_id)
+        position = key_to_position.get(key)
+        if position is None:
+            position = key_to_position[key] = len(key_to_position)
+        chunk_positions.append(position)
+
+    unique_chunk_ids = np.asarray(chunk_positions, dtype=np.int64)
+    scores = np.fromiter(
+        (chunk.score or 0 for chunk in chunks), dtype=np.float64, count=num_chunks
+    )
+
+    # the highest scoring occurrence of each chunk, the first one on ties
+    by_chunk = np.lexsort((-scores, unique_chunk_ids))
+    sorted_chunk_ids = unique_chunk_ids[by_chunk]
+    is_first = np.ones(num_chunks, dtype=bool)
+    is_first[1:] = sorted_chunk_ids[1:] != sorted_chunk_ids[:-1]
+    representatives = by_chunk[is_first]
+
+    if method == FusionMethod.MAX_SCORE:
+        fused_scores = scores[representatives]
+    else:
+        list_lengths = [len(chunk_list) for chunk_list in chunk_lists]
+        list_ids = np.repeat(np.arange(len(chunk_lists)), list_lengths)
+        list_weights = np.asarray(
+            weights if weights is not None else [1.0] * len(chunk_lists),
+            dtype=np.float64,
+        )[list_ids]
+        if method == FusionMethod.RECIPROCAL_RANK:
+            ranks = np.concatenate([np.arange(length) for length in list_lengths])
+            contributions = list_weights / (rrf_k + ranks + 1)
+        else:
+            contributions = list_weights * _min_max_normalize(scores, list_ids)
+        fused_scores = np.bincount(unique_chunk_ids, weights=contributions)
+
+    # unique ids are in order of first appearance, so ties keep that order
+    order = np.argsort(-fused_scores, kind="stable")
+    representative_chunks = [chunks[ind] for ind in representatives[order].tolist()]
+    if max_chunks_per_document > 0:
+        document_to_position: dict[str, int] = {}
+        document_ids = np.fromiter(
+            (
+                document_to_position.setdefault(
+                    chunk.document_id, len(document_to_position)
+                )
+                for chunk in representative_chunks
+            ),
+            dtype=np.int64,
+            count=len(representative_chunks),
+        )
+        within_cap = _rank_within_groups(document_ids) < max_chunks_per_document
+        representative_chunks = [
+            chunk
+            for chunk, keep in zip(representative_chunks, within_cap.tolist())
+            if keep
+        ]
+        order = order[within_cap]
+
+    if method != FusionMethod.MAX_SCORE:
+        for chunk, fused_score in zip(
+            representative_chunks, fused_scores[order].tolist()
+        ):
+            chunk.score = fused_score
+    return representative_chunks
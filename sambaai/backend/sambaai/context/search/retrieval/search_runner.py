@@ -5,6 +5,9 @@ import nltk  # type:ignore
 from sqlalchemy.orm import Session
 
 from sambaai.agents.agent_search.shared_graph_utils.models import QueryExpansionType
+from sambaai.context.search.deadline import SearchDeadline
+from sambaai.context.search.enums import FusionMethod
+from sambaai.context.search.enums import SearchStage
 from sambaai.context.search.enums import SearchType
 from sambaai.context.search.models import ChunkMetric
 from sambaai.context.search.models import IndexFilters
@@ -17,6 +20,7 @@ from sambaai.context.search.models import SearchQuery
 from sambaai.context.search.postprocessing.postprocessing import cleanup_chunks
 from sambaai.context.search.preprocessing.preprocessing import HYBRID_ALPHA
 from sambaai.context.search.preprocessing.preprocessing import HYBRID_ALPHA_KEYWORD
+from sambaai.context.search.retrieval.fusion import fuse_chunk_lists
 from sambaai.context.search.utils import inference_section_from_chunks
 from sambaai.db.search_settings import get_current_search_settings
 from sambaai.db.search_settings import get_multilingual_expansion
@@ -41,23 +45,6 @@ from shared_configs.model_server_models import Embedding
 logger = setup_logger()
 
 
-def _dedupe_chunks(
-    chunks: list[InferenceChunkUncleaned],
-) -> list[InferenceChunkUncleaned]:
-    used_chunks: dict[tuple[str, int], InferenceChunkUncleaned] = {}
-    for chunk in chunks:
-        key = (chunk.document_id, chunk.chunk_id)
-        if key not in used_chunks:
-            used_chunks[key] = chunk
-        else:
-            stored_chunk_score = used_chunks[key].score or 0
-            this_chunk_score = chunk.score or 0
-            if stored_chunk_score < this_chunk_score:
-                used_chunks[key] = chunk
-
-    return list(used_chunks.values())
-
-
 def download_nltk_data() -> None:
     resources = {
         "stopwords": "corpora/stopwords",
@@ -94,25 +81,7 @@ def lemmatize_text(keywords: list[str]) -> list[str]:
 def combine_retrieval_results(
     chunk_sets: list[list[InferenceChunk]],
 ) -> list[InferenceChunk]:
-    all_chunks = [chunk for chunk_set in chunk_sets for chunk in chunk_set]
-
-    unique_chunks: dict[tuple[str, int], InferenceChunk] = {}
-    for chunk in all_chunks:
-        key = (chunk.document_id, chunk.chunk_id)
-        if key not in unique_chunks:
-            unique_chunks[key] = chunk
-            continue
-
-        stored_chunk_score = unique_chunks[key].score or 0
-        this_chunk_score = chunk.score or 0
-        if stored_chunk_score < this_chunk_score:
-            unique_chunks[key] = chunk
-
-    sorted_chunks = sorted(
-        unique_chunks.values(), key=lambda x: x.score or 0, reverse=True
-    )
-
-    return sorted_chunks
+    return fuse_chunk_lists(chunk_sets)
 
 
 def get_query_embedding(query: str, db_session: Session) -> Embedding:
@@ -255,15 +224,19 @@ def doc_index_retrieval(
             assert top_semantic_chunks_thread is not None
             top_semantic_chunks = wait_on_background(top_semantic_chunks_thread)
 
-        all_top_chunks = top_base_chunks_standard_ranking + top_keyword_chunks
+        all_top_chunks = [top_base_chunks_standard_ranking, top_keyword_chunks]
 
         # use all three retrieval methods to retrieve top chunks
 
         if query.search_type == SearchType.SEMANTIC and top_semantic_chunks is not None:
 
-            all_top_chunks += top_semantic_chunks
+            all_top_chunks.append(top_semantic_chunks)
 
-        top_chunks = _dedupe_chunks(all_top_chunks)
+        # the lists of one query are only deduped, the results of the query
+        # rephrasings are fused once in combine_retrieval_results
+        top_chunks = fuse_chunk_lists(
+            all_top_chunks, method=FusionMethod.MAX_SCORE, max_chunks_per_document=0
+        )
 
     else:
 
@@ -271,7 +244,11 @@ def doc_index_retrieval(
             top_base_chunks_standard_ranking_thread
         )
 
-        top_chunks = _dedupe_chunks(top_base_chunks_standard_ranking)
+        top_chunks = fuse_chunk_lists(
+            [top_base_chunks_standard_ranking],
+            method=FusionMethod.MAX_SCORE,
+            max_chunks_per_document=0,
+        )
 
     logger.info(f"Overall number of top initial retrieval chunks: {len(top_chunks)}")
 
@@ -355,12 +332,18 @@ def retrieve_chunks(
     retrieval_metrics_callback: (
         Callable[[RetrievalMetricsContainer], None] | None
     ) = None,
+    deadline: SearchDeadline | None = None,
 ) -> list[InferenceChunk]:
     """Returns a list of the best chunks from an initial keyword/semantic/ hybrid search."""
 
     multilingual_expansion = get_multilingual_expansion(db_session)
     # Don't do query expansion on complex queries, rephrasings likely would not work well
-    if not multilingual_expansion or "\n" in query.query or "\r" in query.query:
+    if (
+        not multilingual_expansion
+        or "\n" in query.query
+        or "\r" in query.query
+        or (deadline is not None and not deadline.allows(SearchStage.QUERY_EXPANSION))
+    ):
         top_chunks = doc_index_retrieval(
             query=query, document_index=document_index, db_session=db_session
         )
@@ -104,7 +104,7 @@ def inference_section_from_chunks(
 
     combined_content = "\n".join([chunk.content for chunk in chunks])
 
-    return InferenceSection(
+    return InferenceSection.model_construct(
         center_chunk=center_chunk,
         chunks=chunks,
         combined_content=combined_content,
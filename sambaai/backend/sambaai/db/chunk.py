@@ -2,9 +2,18 @@ from datetime import datetime
 from datetime import timezone
 
 from sqlalchemy import delete
+from sqlalchemy import exists
+from sqlalchemy import Float
+from sqlalchemy import Integer
+from sqlalchemy import literal
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from sambaai.db.models import ChunkStats
+from sambaai.db.utils import unnest_rows
 from sambaai.indexing.models import UpdatableChunkData
 
 
@@ -21,37 +30,65 @@ def update_chunk_boost_components__no_commit(
     if not chunk_data:
         return
 
+    # keyed by chunk stats ID, if a chunk is in the batch twice the last one wins
+    id_to_chunk_data: dict[str, tuple[UpdatableChunkData, int]] = {}
     for data in chunk_data:
         chunk_in_doc_id = int(data.chunk_id)
         if chunk_in_doc_id < 0:
             raise ValueError(f"Chunk ID is empty for chunk {data}")
 
         chunk_document_id = f"{data.document_id}" f"__{chunk_in_doc_id}"
-        chunk_stats = (
-            db_session.query(ChunkStats)
-            .filter(
-                ChunkStats.id == chunk_document_id,
-            )
-            .first()
-        )
+        id_to_chunk_data[chunk_document_id] = (data, chunk_in_doc_id)
 
-        score = data.boost_score
-
-        if chunk_stats:
-            chunk_stats.information_content_boost = score
-            chunk_stats.last_modified = datetime.now(timezone.utc)
-            db_session.add(chunk_stats)
-        else:
-            # do not save new chunks with a neutral boost score
-            if score == 1.0:
-                continue
-            # Create new record
-            chunk_stats = ChunkStats(
-                document_id=data.document_id,
-                chunk_in_doc_id=chunk_in_doc_id,
-                information_content_boost=score,
+    batch = unnest_rows(
+        "batch",
+        {
+            "id": (list(id_to_chunk_data.keys()), String),
+            "document_id": (
+                [data.document_id for data, _ in id_to_chunk_data.values()],
+                String,
+            ),
+            "chunk_in_doc_id": (
+                [chunk_in_doc_id for _, chunk_in_doc_id in id_to_chunk_data.values()],
+                Integer,
+            ),
+            "information_content_boost": (
+                [data.boost_score for data, _ in id_to_chunk_data.values()],
+                Float,
+            ),
+        },
+    )
+    insert_stmt = insert(ChunkStats).from_select(
+        [
+            "id",
+            "document_id",
+            "chunk_in_doc_id",
+            "information_content_boost",
+            "last_modified",
+        ],
+        select(
+            batch.c.id,
+            batch.c.document_id,
+            batch.c.chunk_in_doc_id,
+            batch.c.information_content_boost,
+            literal(datetime.now(timezone.utc)),
+        ).where(
+            or_(
+                # do not save new chunks with a neutral boost score
+                batch.c.information_content_boost != 1.0,
+                exists().where(ChunkStats.id == batch.c.id),
             )
-            db_session.add(chunk_stats)
+        ),
+    )
+    db_session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "information_content_boost": insert_stmt.excluded.information_content_boost,
+                "last_modified": insert_stmt.excluded.last_modified,
+            },
+        )
+    )
 
 
 def delete_chunk_stats_by_connector_credential_pair__no_commit(
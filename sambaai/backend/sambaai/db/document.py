@@ -6,21 +6,30 @@ from collections.abc import Sequence
 from datetime import datetime
 from datetime import timezone
 
+from pydantic import BaseModel
 from sqlalchemy import and_
+from sqlalchemy import any_
+from sqlalchemy import DateTime
 from sqlalchemy import delete
 from sqlalchemy import exists
+from sqlalchemy import false
 from sqlalchemy import func
 from sqlalchemy import or_
+from sqlalchemy import Integer
+from sqlalchemy import literal
 from sqlalchemy import Select
 from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy import text
 from sqlalchemy import tuple_
+from sqlalchemy import Update
 from sqlalchemy import update
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.engine.util import TransactionalContext
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import null
 
+from sambaai.configs.app_configs import DOCUMENT_LOCK_TIMEOUT
 from sambaai.configs.constants import DEFAULT_BOOST
 from sambaai.configs.constants import DocumentSource
 from sambaai.db.chunk import delete_chunk_stats_by_connector_credential_pair__no_commit
@@ -36,7 +45,9 @@ from sambaai.db.models import Document as DbDocument
 from sambaai.db.models import DocumentByConnectorCredentialPair
 from sambaai.db.models import User
 from sambaai.db.tag import delete_document_tags_for_documents__no_commit
+from sambaai.db.utils import array_param
 from sambaai.db.utils import model_to_dict
+from sambaai.db.utils import unnest_rows
 from sambaai.document_index.interfaces import DocumentMetadata
 from sambaai.server.documents.models import ConnectorCredentialPairIdentifier
 from sambaai.utils.logger import setup_logger
@@ -221,6 +232,20 @@ def get_documents_by_ids(
     return list(documents)
 
 
+def get_documents_last_modified(
+    db_session: Session,
+    document_ids: list[str],
+) -> dict[str, datetime | None]:
+    """Documents that don't exist (anymore) are not included"""
+    stmt = select(DbDocument.id, DbDocument.last_modified).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: last_modified
+        for document_id, last_modified in db_session.execute(stmt).all()
+    }
+
+
 def get_document_connector_count(
     db_session: Session,
     document_id: str,
@@ -424,18 +449,10 @@ def upsert_document_by_connector_credential_pair(
         logger.info("`document_ids` is empty. Skipping.")
         return
 
-    insert_stmt = insert(DocumentByConnectorCredentialPair).values(
-        [
-            model_to_dict(
-                DocumentByConnectorCredentialPair(
-                    id=doc_id,
-                    connector_id=connector_id,
-                    credential_id=credential_id,
-                    has_been_indexed=False,
-                )
-            )
-            for doc_id in document_ids
-        ]
+    batch = unnest_rows("batch", {"id": (document_ids, String)})
+    insert_stmt = insert(DocumentByConnectorCredentialPair).from_select(
+        ["id", "connector_id", "credential_id", "has_been_indexed"],
+        select(batch.c.id, literal(connector_id), literal(credential_id), false()),
     )
     # this must be `on_conflict_do_nothing` rather than `on_conflict_do_update`
     # since we don't want to update the `has_been_indexed` field for documents
@@ -453,54 +470,83 @@ def mark_document_as_indexed_for_cc_pair__no_commit(
 ) -> None:
     """Should be called only after a successful index operation for a batch."""
     db_session.execute(
+        _mark_document_as_indexed_for_cc_pair_stmt(
+            connector_id, credential_id, document_ids
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def _mark_document_as_indexed_for_cc_pair_stmt(
+    connector_id: int, credential_id: int, document_ids: Iterable[str]
+) -> Update:
+    return (
         update(DocumentByConnectorCredentialPair)
         .where(
             and_(
                 DocumentByConnectorCredentialPair.connector_id == connector_id,
                 DocumentByConnectorCredentialPair.credential_id == credential_id,
-                DocumentByConnectorCredentialPair.id.in_(document_ids),
+                DocumentByConnectorCredentialPair.id
+                == any_(array_param(list(document_ids), String)),
             )
         )
         .values(has_been_indexed=True)
     )
 
 
-def update_docs_updated_at__no_commit(
+def _update_indexed_docs_stmt(
+    doc_id_to_chunk_count: dict[str, int],
     ids_to_new_updated_at: dict[str, datetime],
-    db_session: Session,
-) -> None:
-    doc_ids = list(ids_to_new_updated_at.keys())
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(doc_ids)).all()
+) -> Update:
+    """Sets chunk_count and last_modified of each document in `doc_id_to_chunk_count`
+    and doc_updated_at where the source provided one, in a single statement."""
+    doc_ids = list(doc_id_to_chunk_count.keys())
+    batch = unnest_rows(
+        "batch",
+        {
+            "id": (doc_ids, String),
+            "chunk_count": ([doc_id_to_chunk_count[id] for id in doc_ids], Integer),
+            "doc_updated_at": (
+                [ids_to_new_updated_at.get(id) for id in doc_ids],
+                DateTime(timezone=True),
+            ),
+        },
     )
-
-    for document in documents_to_update:
-        document.doc_updated_at = ids_to_new_updated_at[document.id]
-
-
-def update_docs_last_modified__no_commit(
-    document_ids: list[str],
-    db_session: Session,
-) -> None:
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)).all()
+    return (
+        update(DbDocument)
+        .where(DbDocument.id == batch.c.id)
+        .values(
+            chunk_count=batch.c.chunk_count,
+            last_modified=datetime.now(timezone.utc),
+            doc_updated_at=func.coalesce(
+                batch.c.doc_updated_at, DbDocument.doc_updated_at
+            ),
+        )
     )
 
-    now = datetime.now(timezone.utc)
-    for doc in documents_to_update:
-        doc.last_modified = now
-
 
-def update_docs_chunk_count__no_commit(
-    document_ids: list[str],
-    doc_id_to_chunk_count: dict[str, int],
+def update_docs_indexing_status__no_commit(
     db_session: Session,
+    connector_id: int,
+    credential_id: int,
+    doc_id_to_chunk_count: dict[str, int],
+    ids_to_new_updated_at: dict[str, datetime],
+    indexed_document_ids: Iterable[str],
 ) -> None:
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)).all()
+    """Writes all bookkeeping of a successfully indexed batch in one round trip:
+    chunk_count, last_modified and (if given) doc_updated_at of the documents that
+    were (re)indexed, and has_been_indexed of the cc pair links of
+    `indexed_document_ids`, which includes documents skipped as up to date."""
+    update_docs_stmt = _update_indexed_docs_stmt(
+        doc_id_to_chunk_count, ids_to_new_updated_at
+    ).cte("updated_documents")
+    # Postgres always runs data modifying CTEs, even if they are not referenced
+    db_session.execute(
+        _mark_document_as_indexed_for_cc_pair_stmt(
+            connector_id, credential_id, indexed_document_ids
+        ).add_cte(update_docs_stmt),
+        execution_options={"synchronize_session": False},
     )
-    for doc in documents_to_update:
-        doc.chunk_count = doc_id_to_chunk_count[doc.id]
 
 
 def mark_document_as_modified(
@@ -666,29 +712,112 @@ def delete_all_documents_for_connector_credential_pair(
             raise RuntimeError("Timeout reached while deleting documents")
 
 
-def acquire_document_locks(db_session: Session, document_ids: list[str]) -> bool:
-    """Acquire locks for the specified documents. Ideally this shouldn't be
-    called with large list of document_ids (an exception could be made if the
-    length of holding the lock is very short).
+_DOCUMENT_LOCK_CHUNK_SIZE = 100
 
-    Will simply raise an exception if any of the documents are already locked.
-    This prevents deadlocks (assuming that the caller passes in all required
-    document IDs in a single call).
-    """
-    stmt = (
-        select(DbDocument.id)
-        .where(DbDocument.id.in_(document_ids))
-        .with_for_update(nowait=True)
+
+class DocumentLocks(BaseModel):
+    # locked by the current transaction
+    locked_ids: list[str] = []
+    # locked by another transaction, only in skip_locked mode
+    skipped_ids: list[str] = []
+    # not in the document table
+    missing_ids: list[str] = []
+    # time spent waiting on each lock statement (one per chunk of sorted IDs)
+    wait_seconds: list[float] = []
+
+
+def _set_lock_timeouts(
+    db_session: Session, lock_timeout: str, statement_timeout: str
+) -> None:
+    db_session.execute(
+        text(
+            "SELECT set_config('lock_timeout', :lock_timeout, true), "
+            "set_config('statement_timeout', :statement_timeout, true)"
+        ),
+        {"lock_timeout": lock_timeout, "statement_timeout": statement_timeout},
     )
-    # will raise exception if any of the documents are already locked
-    documents = db_session.scalars(stmt).all()
 
-    # make sure we found every document
-    if len(documents) != len(set(document_ids)):
-        logger.warning("Didn't find row for all specified document IDs. Aborting.")
-        return False
 
-    return True
+def lock_documents(
+    db_session: Session,
+    document_ids: Iterable[str],
+    skip_locked: bool = False,
+    lock_timeout: int = DOCUMENT_LOCK_TIMEOUT,
+) -> DocumentLocks:
+    """Locks the rows of the specified documents until the end of the current
+    transaction.
+
+    Locks are taken in sorted document ID order (byte order, in chunks), so jobs
+    locking overlapping sets of documents never deadlock and can safely wait for each
+    other. Waiting longer than `lock_timeout` seconds in total, over all chunks, raises
+    an OperationalError. The timeouts this sets are reset once the locks are held, so
+    they don't apply to the rest of the transaction.
+
+    With `skip_locked`, documents locked by another transaction are not waited for
+    but reported in `skipped_ids`, so that the caller can defer them.
+    """
+    sorted_ids = sorted(set(document_ids))
+    locks = DocumentLocks()
+    deadline = time.monotonic() + lock_timeout
+    previous_timeouts: tuple[str, str] | None = None
+    if not skip_locked:
+        previous_lock_timeout, previous_statement_timeout = db_session.execute(
+            text(
+                "SELECT current_setting('lock_timeout'), "
+                "current_setting('statement_timeout')"
+            )
+        ).one()
+        previous_timeouts = (previous_lock_timeout, previous_statement_timeout)
+
+    for start in range(0, len(sorted_ids), _DOCUMENT_LOCK_CHUNK_SIZE):
+        chunk_ids = sorted_ids[start : start + _DOCUMENT_LOCK_CHUNK_SIZE]
+        if previous_timeouts is not None:
+            # lock_timeout bounds each lock wait, statement_timeout the statement.
+            # Both get what is left of the overall `lock_timeout`
+            remaining = f"{max(1, int((deadline - time.monotonic()) * 1000))}ms"
+            _set_lock_timeouts(db_session, remaining, remaining)
+        stmt = (
+            select(DbDocument.id)
+            .where(DbDocument.id == any_(array_param(chunk_ids, String)))
+            # rows are locked in the order they are returned, "C" to match the
+            # (codepoint) order the chunks were built in
+            .order_by(DbDocument.id.collate("C"))
+            .with_for_update(skip_locked=skip_locked)
+        )
+        wait_start = time.monotonic()
+        chunk_locked_ids = set(db_session.scalars(stmt).all())
+        locks.wait_seconds.append(time.monotonic() - wait_start)
+
+        not_locked_ids = []
+        for document_id in chunk_ids:
+            if document_id in chunk_locked_ids:
+                locks.locked_ids.append(document_id)
+            else:
+                not_locked_ids.append(document_id)
+        if not not_locked_ids:
+            continue
+
+        existing_ids = (
+            set(
+                db_session.scalars(
+                    select(DbDocument.id).where(
+                        DbDocument.id == any_(array_param(not_locked_ids, String))
+                    )
+                ).all()
+            )
+            if skip_locked
+            else set()
+        )
+        for document_id in not_locked_ids:
+            if document_id in existing_ids:
+                locks.skipped_ids.append(document_id)
+            else:
+                locks.missing_ids.append(document_id)
+
+    if previous_timeouts is not None:
+        _set_lock_timeouts(db_session, *previous_timeouts)
+
+    return locks
 
 
 _NUM_LOCK_ATTEMPTS = 10
@@ -697,13 +826,20 @@ _LOCK_RETRY_DELAY = 10
 
 @contextlib.contextmanager
 def prepare_to_modify_documents(
-    db_session: Session, document_ids: list[str], retry_delay: int = _LOCK_RETRY_DELAY
-) -> Generator[TransactionalContext, None, None]:
+    db_session: Session,
+    document_ids: list[str],
+    retry_delay: int = _LOCK_RETRY_DELAY,
+    skip_locked: bool = False,
+) -> Generator[DocumentLocks, None, None]:
     """Try and acquire locks for the documents to prevent other jobs from
     modifying them at the same time (e.g. avoid race conditions). This should be
     called ahead of any modification to Vespa. Locks should be released by the
     caller as soon as updates are complete by finishing the transaction.
 
+    With `skip_locked`, documents currently locked by other jobs are not waited for.
+    They are listed in the yielded DocumentLocks' `skipped_ids` and must not be
+    modified, e.g. retry them afterwards.
+
     NOTE: only one commit is allowed within the context manager returned by this function.
     Multiple commits will result in a sqlalchemy.exc.InvalidRequestError.
     NOTE: this function will commit any existing transaction.
@@ -711,28 +847,51 @@ def prepare_to_modify_documents(
 
     db_session.commit()  # ensure that we're not in a transaction
 
-    lock_acquired = False
     for i in range(_NUM_LOCK_ATTEMPTS):
+        transaction = db_session.begin()
         try:
-            with db_session.begin() as transaction:
-                lock_acquired = acquire_document_locks(
-                    db_session=db_session, document_ids=document_ids
-                )
-                if lock_acquired:
-                    yield transaction
-                    break
+            locks = lock_documents(
+                db_session=db_session,
+                document_ids=document_ids,
+                skip_locked=skip_locked,
+            )
         except OperationalError as e:
+            transaction.rollback()
             logger.warning(
                 f"Failed to acquire locks for documents on attempt {i}, retrying. Error: {e}"
             )
+            time.sleep(retry_delay)
+            continue
 
-        time.sleep(retry_delay)
+        if locks.missing_ids:
+            transaction.rollback()
+            logger.warning(
+                f"Didn't find row for all specified document IDs on attempt {i}, "
+                f"retrying. Missing: {locks.missing_ids}"
+            )
+            time.sleep(retry_delay)
+            continue
+
+        total_wait = sum(locks.wait_seconds)
+        if total_wait >= 1:
+            logger.info(
+                f"Waited {total_wait:.2f}s for locks on {len(locks.locked_ids)} "
+                f"documents, slowest lock statement: {max(locks.wait_seconds):.2f}s"
+            )
+        if locks.skipped_ids:
+            logger.info(
+                f"Skipped {len(locks.skipped_ids)} documents locked by other jobs: "
+                f"{locks.skipped_ids[:10]}"
+            )
 
-    if not lock_acquired:
-        raise RuntimeError(
-            f"Failed to acquire locks after {_NUM_LOCK_ATTEMPTS} attempts "
-            f"for documents: {document_ids}"
-        )
+        with transaction:
+            yield locks
+        return
+
+    raise RuntimeError(
+        f"Failed to acquire locks after {_NUM_LOCK_ATTEMPTS} attempts "
+        f"for documents: {document_ids}"
+    )
 
 
 def get_ingestion_documents(
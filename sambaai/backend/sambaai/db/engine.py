@@ -12,6 +12,7 @@ from datetime import datetime
 from typing import Any
 from typing import AsyncContextManager
 
+import anyio
 import asyncpg  # type: ignore
 import boto3
 from fastapi import HTTPException
@@ -27,6 +28,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 
 from sambaai.configs.app_configs import AWS_REGION_NAME
+from sambaai.configs.app_configs import POSTGRES_ASYNC_PREPARED_STATEMENT_CACHE_SIZE
 from sambaai.configs.app_configs import LOG_POSTGRES_CONN_COUNTS
 from sambaai.configs.app_configs import LOG_POSTGRES_LATENCY
 from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_OVERFLOW
@@ -38,10 +40,17 @@ from sambaai.configs.app_configs import POSTGRES_PASSWORD
 from sambaai.configs.app_configs import POSTGRES_POOL_PRE_PING
 from sambaai.configs.app_configs import POSTGRES_POOL_RECYCLE
 from sambaai.configs.app_configs import POSTGRES_PORT
+from sambaai.configs.app_configs import POSTGRES_READ_REPLICA_HOST
+from sambaai.configs.app_configs import POSTGRES_READ_REPLICA_PORT
 from sambaai.configs.app_configs import POSTGRES_USE_NULL_POOL
 from sambaai.configs.app_configs import POSTGRES_USER
 from sambaai.configs.constants import POSTGRES_UNKNOWN_APP_NAME
 from sambaai.configs.constants import SSL_CERT_FILE
+from sambaai.db.pool_metrics import MeteredAsyncAdaptedQueuePool
+from sambaai.db.tenant_pool import bind_search_path
+from sambaai.db.tenant_pool import get_requested_schema
+from sambaai.db.tenant_pool import request_schema
+from sambaai.db.tenant_pool import TenantAffineQueuePool
 from sambaai.server.utils import BasicAuthenticationError
 from sambaai.utils.logger import setup_logger
 from shared_configs.configs import MULTI_TENANT
@@ -61,6 +70,9 @@ USE_IAM_AUTH = os.getenv("USE_IAM_AUTH", "False").lower() == "true"
 
 SCHEMA_NAME_REGEX = re.compile(r"^[a-zA-Z0-9_-]+$")
 
+# anyio's default, the number of sync endpoints FastAPI runs at a time
+_DEFAULT_API_SERVER_CONCURRENCY = 40
+
 
 # Global so we don't create more than one engine per process
 _ASYNC_ENGINE: AsyncEngine | None = None
@@ -185,8 +197,31 @@ def is_valid_schema_name(name: str) -> bool:
     return SCHEMA_NAME_REGEX.match(name) is not None
 
 
+def get_pool_size_for_concurrency(concurrency: int) -> tuple[int, int]:
+    """pool_size and max_overflow for a process that runs `concurrency` units of work
+    at a time, each holding at most one connection per engine. The overflow absorbs
+    short-lived extra connections, e.g. from background threads."""
+    return concurrency, max(2, concurrency // 4)
+
+
+def get_api_server_pool_size() -> tuple[int, int]:
+    """pool_size and max_overflow of the API server, POSTGRES_API_SERVER_POOL_SIZE if
+    set, otherwise sized from the thread pool sync endpoints run in"""
+    if POSTGRES_API_SERVER_POOL_SIZE:
+        return POSTGRES_API_SERVER_POOL_SIZE, POSTGRES_API_SERVER_POOL_OVERFLOW
+
+    try:
+        concurrency = int(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    except RuntimeError:
+        # not called from within the event loop
+        concurrency = _DEFAULT_API_SERVER_CONCURRENCY
+    return get_pool_size_for_concurrency(concurrency)
+
+
 class SqlEngine:
     _engine: Engine | None = None
+    # engine connected to the read replica, if one is configured
+    _readonly_engine: Engine | None = None
     _lock: threading.Lock = threading.Lock()
     _app_name: str = POSTGRES_UNKNOWN_APP_NAME
 
@@ -207,12 +242,15 @@ class SqlEngine:
         limit / using too many connections and overwhelming the database.
 
         Specifying connection_string directly will cause some of the other parameters
-        to be ignored.
+        to be ignored, and no engine is created for the read replica.
         """
         with cls._lock:
             if cls._engine:
                 return
 
+            use_read_replica = (
+                bool(POSTGRES_READ_REPLICA_HOST) and not connection_string
+            )
             if not connection_string:
                 connection_string = build_connection_string(
                     db_api=db_api,
@@ -235,6 +273,8 @@ class SqlEngine:
                 if "max_overflow" in final_engine_kwargs:
                     del final_engine_kwargs["max_overflow"]
             else:
+                final_engine_kwargs["poolclass"] = TenantAffineQueuePool
+                final_engine_kwargs["pool_logging_name"] = "sync"
                 final_engine_kwargs["pool_size"] = pool_size
                 final_engine_kwargs["max_overflow"] = max_overflow
                 final_engine_kwargs["pool_pre_ping"] = POSTGRES_POOL_PRE_PING
@@ -246,18 +286,44 @@ class SqlEngine:
             logger.info(f"Creating engine with kwargs: {final_engine_kwargs}")
             # echo=True here for inspecting all emitted db queries
             engine = create_engine(connection_string, **final_engine_kwargs)
+            _register_session_setup_listeners(engine)
 
             if use_iam:
                 event.listen(engine, "do_connect", provide_iam_token)
 
             cls._engine = engine
 
+            if use_read_replica:
+                readonly_engine_kwargs = dict(final_engine_kwargs)
+                if not POSTGRES_USE_NULL_POOL:
+                    readonly_engine_kwargs["pool_logging_name"] = "sync_readonly"
+                readonly_engine = create_engine(
+                    build_connection_string(
+                        db_api=db_api,
+                        host=POSTGRES_READ_REPLICA_HOST,
+                        port=POSTGRES_READ_REPLICA_PORT,
+                        app_name=cls._app_name + "_sync_readonly",
+                        use_iam_auth=use_iam,
+                    ),
+                    **readonly_engine_kwargs,
+                )
+                _register_session_setup_listeners(readonly_engine)
+                if use_iam:
+                    event.listen(readonly_engine, "do_connect", provide_iam_token)
+
+                cls._readonly_engine = readonly_engine
+
     @classmethod
     def get_engine(cls) -> Engine:
         if not cls._engine:
             raise RuntimeError("Engine not initialized. Must call init_engine first.")
         return cls._engine
 
+    @classmethod
+    def get_readonly_engine(cls) -> Engine:
+        """The read replica's engine, the primary's if no replica is configured"""
+        return cls._readonly_engine or cls.get_engine()
+
     @classmethod
     def set_app_name(cls, app_name: str) -> None:
         cls._app_name = app_name
@@ -274,6 +340,9 @@ class SqlEngine:
             if cls._engine:
                 cls._engine.dispose()
                 cls._engine = None
+            if cls._readonly_engine:
+                cls._readonly_engine.dispose()
+                cls._readonly_engine = None
 
 
 def get_all_tenant_ids() -> list[str]:
@@ -337,6 +406,16 @@ def get_sqlalchemy_async_engine() -> AsyncEngine:
             connect_args["server_settings"] = {"application_name": app_name}
 
         connect_args["ssl"] = ssl_context
+        # statements are prepared server side once per connection and reused. Plans
+        # are invalidated by postgres when the search_path (tenant) changes. Both
+        # SQLAlchemy's cache and asyncpg's own one keep prepared statements, so both
+        # have to be off behind pgbouncer
+        connect_args["prepared_statement_cache_size"] = (
+            POSTGRES_ASYNC_PREPARED_STATEMENT_CACHE_SIZE
+        )
+        connect_args["statement_cache_size"] = (
+            POSTGRES_ASYNC_PREPARED_STATEMENT_CACHE_SIZE
+        )
 
         engine_kwargs = {
             "connect_args": connect_args,
@@ -347,8 +426,11 @@ def get_sqlalchemy_async_engine() -> AsyncEngine:
         if POSTGRES_USE_NULL_POOL:
             engine_kwargs["poolclass"] = pool.NullPool
         else:
-            engine_kwargs["pool_size"] = POSTGRES_API_SERVER_POOL_SIZE
-            engine_kwargs["max_overflow"] = POSTGRES_API_SERVER_POOL_OVERFLOW
+            pool_size, max_overflow = get_api_server_pool_size()
+            engine_kwargs["poolclass"] = MeteredAsyncAdaptedQueuePool
+            engine_kwargs["pool_logging_name"] = "async"
+            engine_kwargs["pool_size"] = pool_size
+            engine_kwargs["max_overflow"] = max_overflow
 
         _ASYNC_ENGINE = create_async_engine(
             connection_string,
@@ -381,10 +463,12 @@ AsyncSessionLocal = sessionmaker(  # type: ignore
 
 
 @contextmanager
-def get_session_with_current_tenant() -> Generator[Session, None, None]:
+def get_session_with_current_tenant(
+    readonly: bool = False,
+) -> Generator[Session, None, None]:
     tenant_id = get_current_tenant_id()
 
-    with get_session_with_tenant(tenant_id=tenant_id) as session:
+    with get_session_with_tenant(tenant_id=tenant_id, readonly=readonly) as session:
         yield session
 
 
@@ -400,53 +484,68 @@ def get_session_with_shared_schema() -> Generator[Session, None, None]:
 def _set_search_path_on_checkout__listener(
     dbapi_conn: Any, connection_record: Any, connection_proxy: Any
 ) -> None:
-    """Listener to make sure we ALWAYS set the search path on checkout."""
-    tenant_id = get_current_tenant_id()
-    if tenant_id and is_valid_schema_name(tenant_id):
-        with dbapi_conn.cursor() as cursor:
-            cursor.execute(f'SET search_path TO "{tenant_id}"')
+    """Listener to make sure we ALWAYS set the search path on checkout. Connections
+    that are already bound to the requested schema are left as they are."""
+    schema = get_requested_schema()
+    if schema and not is_valid_schema_name(schema):
+        schema = None
+    bind_search_path(dbapi_conn, connection_record.info, schema)
+
+
+def _set_session_timeouts_on_connect__listener(
+    dbapi_conn: Any, connection_record: Any
+) -> None:
+    if not POSTGRES_IDLE_SESSIONS_TIMEOUT:
+        return
+
+    with dbapi_conn.cursor() as cursor:
+        cursor.execute(
+            "SET SESSION idle_in_transaction_session_timeout = "
+            f"{POSTGRES_IDLE_SESSIONS_TIMEOUT}"
+        )
+    dbapi_conn.commit()
+
+
+def _register_session_setup_listeners(engine: Engine) -> None:
+    """Session settings are kept per DBAPI connection: the timeouts are set once when
+    the connection is opened and the search_path only when the connection moves to
+    another tenant."""
+    event.listen(engine, "connect", _set_session_timeouts_on_connect__listener)
+    event.listen(engine, "checkout", _set_search_path_on_checkout__listener)
 
 
 @contextmanager
-def get_session_with_tenant(*, tenant_id: str) -> Generator[Session, None, None]:
+def get_session_with_tenant(
+    *, tenant_id: str, readonly: bool = False
+) -> Generator[Session, None, None]:
     """
     Generate a database session for a specific tenant.
-    """
-    engine = get_sqlalchemy_engine()
 
-    event.listen(engine, "checkout", _set_search_path_on_checkout__listener)
+    With `readonly`, the session is served by the read replica if one is configured.
+    Only use it for reads that tolerate replication lag.
+    """
+    engine = SqlEngine.get_readonly_engine() if readonly else get_sqlalchemy_engine()
 
     if not is_valid_schema_name(tenant_id):
         raise HTTPException(status_code=400, detail="Invalid tenant ID")
 
-    with engine.connect() as connection:
+    # the pool prefers connections already bound to the tenant's schema, the checkout
+    # listener binds the others. Only scoped to the checkout, the session may be closed
+    # from another context (e.g. FastAPI dependencies)
+    with request_schema(tenant_id):
+        connection = engine.connect()
+
+    with connection:
         dbapi_connection = connection.connection
-        cursor = dbapi_connection.cursor()
         try:
-            cursor.execute(f'SET search_path = "{tenant_id}"')
-            if POSTGRES_IDLE_SESSIONS_TIMEOUT:
-                cursor.execute(
-                    text(
-                        f"SET SESSION idle_in_transaction_session_timeout = {POSTGRES_IDLE_SESSIONS_TIMEOUT}"
-                    )
-                )
+            # no-op unless the engine was created without our listeners
+            bind_search_path(dbapi_connection, dbapi_connection.info, tenant_id)
         except Exception:
             raise RuntimeError(f"search_path not set for {tenant_id}")
-        finally:
-            cursor.close()
 
-        try:
-            # automatically rollback or close
-            with Session(bind=connection, expire_on_commit=False) as session:
-                yield session
-        finally:
-            # always reset the search path on exit
-            if MULTI_TENANT:
-                cursor = dbapi_connection.cursor()
-                try:
-                    cursor.execute('SET search_path TO "$user", public')
-                finally:
-                    cursor.close()
+        # automatically rollback or close
+        with Session(bind=connection, expire_on_commit=False) as session:
+            yield session
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -465,11 +564,28 @@ def get_session() -> Generator[Session, None, None]:
         yield db_session
 
 
+def get_readonly_session() -> Generator[Session, None, None]:
+    """get_session for read-only endpoints, served by the read replica if one is
+    configured. The data may lag behind the primary by the replication delay, so
+    don't use it to read back what the user just changed."""
+    tenant_id = get_current_tenant_id()
+    if tenant_id == POSTGRES_DEFAULT_SCHEMA and MULTI_TENANT:
+        raise BasicAuthenticationError(detail="User must authenticate")
+
+    if not is_valid_schema_name(tenant_id):
+        raise HTTPException(status_code=400, detail="Invalid tenant ID")
+
+    with get_session_context_manager(readonly=True) as db_session:
+        yield db_session
+
+
 @contextlib.contextmanager
-def get_session_context_manager() -> Generator[Session, None, None]:
+def get_session_context_manager(
+    readonly: bool = False,
+) -> Generator[Session, None, None]:
     """Context manager for database sessions."""
     tenant_id = get_current_tenant_id()
-    with get_session_with_tenant(tenant_id=tenant_id) as session:
+    with get_session_with_tenant(tenant_id=tenant_id, readonly=readonly) as session:
         yield session
 
 
@@ -556,8 +672,9 @@ async def warm_up_connections(
 
 def provide_iam_token(dialect: Any, conn_rec: Any, cargs: Any, cparams: Any) -> None:
     if USE_IAM_AUTH:
-        host = POSTGRES_HOST
-        port = POSTGRES_PORT
+        # tokens are issued per host, the read replica's differs from the primary's
+        host = cparams.get("host") or POSTGRES_HOST
+        port = str(cparams.get("port") or POSTGRES_PORT)
         user = POSTGRES_USER
         region = os.getenv("AWS_REGION_NAME", "us-east-2")
         # Configure for psycopg2 with IAM token
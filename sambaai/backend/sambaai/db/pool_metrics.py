@@ -0,0 +1,63 @@
+import time
+from typing import Any
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import ConnectionPoolEntry
+from sqlalchemy.pool import QueuePool
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "sambaai_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from a Postgres connection pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "sambaai_db_pool_checkout_timeouts",
+    "Checkouts that gave up waiting for a connection",
+    ["pool"],
+)
+POOL_CHECKED_OUT = Gauge(
+    "sambaai_db_pool_checked_out_connections",
+    "Connections currently checked out of a Postgres connection pool",
+    ["pool"],
+)
+
+
+class _MeteredPoolMixin(QueuePool):
+    """Reports checkout wait times and connection usage of the pool, labeled with the
+    pool's logging name (the `pool_logging_name` engine argument)"""
+
+    @property
+    def _metrics_label(self) -> str:
+        return self.logging_name or "default"
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.monotonic()
+        try:
+            connection_record = super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self._metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self._metrics_label).observe(
+                time.monotonic() - start
+            )
+
+        POOL_CHECKED_OUT.labels(self._metrics_label).set(self.checkedout())
+        return connection_record
+
+    def _do_return_conn(self, record: Any) -> None:
+        super()._do_return_conn(record)
+        POOL_CHECKED_OUT.labels(self._metrics_label).set(self.checkedout())
+
+
+class MeteredQueuePool(_MeteredPoolMixin):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
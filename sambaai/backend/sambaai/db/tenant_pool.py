@@ -0,0 +1,114 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from typing import cast
+
+from prometheus_client import Counter
+from sqlalchemy.pool import ConnectionPoolEntry
+from sqlalchemy.util.queue import Queue
+
+from sambaai.db.pool_metrics import MeteredQueuePool
+from sambaai.db.pool_metrics import POOL_CHECKED_OUT
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+# key in the pool's per-connection `info` dict, sqlalchemy clears it whenever the
+# DBAPI connection is replaced (invalidation, recycling)
+SEARCH_PATH_INFO_KEY = "sambaai_search_path"
+
+# what we bind connections to when no tenant is requested
+DEFAULT_SEARCH_PATH = '"$user", public'
+
+TENANT_POOL_CHECKOUTS = Counter(
+    "sambaai_db_tenant_pool_checkouts",
+    "Checkouts from a tenant-affine connection pool. `affine` connections were "
+    "already bound to the tenant's schema, `rebound` ones need a new search_path, "
+    "`new` ones were just opened",
+    ["pool", "tenant", "outcome"],
+)
+
+_REQUESTED_SCHEMA: ContextVar[str | None] = ContextVar("requested_schema", default=None)
+
+
+@contextmanager
+def request_schema(schema: str) -> Iterator[None]:
+    """Checkouts within this block prefer, and are bound to, the given schema instead
+    of the current tenant's"""
+    token = _REQUESTED_SCHEMA.set(schema)
+    try:
+        yield
+    finally:
+        _REQUESTED_SCHEMA.reset(token)
+
+
+def get_requested_schema() -> str | None:
+    return _REQUESTED_SCHEMA.get() or CURRENT_TENANT_ID_CONTEXTVAR.get()
+
+
+def search_path_for_schema(schema: str | None) -> str:
+    return f'"{schema}"' if schema else DEFAULT_SEARCH_PATH
+
+
+def bind_search_path(
+    dbapi_connection: Any, connection_info: dict[Any, Any], schema: str | None
+) -> bool:
+    """Sets the search_path of the connection to the schema, unless the connection is
+    already bound to it. Returns whether a SET was issued.
+
+    The SET is committed right away so a rollback of the following transaction does
+    not revert it, the tracked value would be stale otherwise. Code that changes the
+    search_path by itself must not commit it."""
+    search_path = search_path_for_schema(schema)
+    if connection_info.get(SEARCH_PATH_INFO_KEY) == search_path:
+        return False
+
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET search_path TO {search_path}")
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+    connection_info[SEARCH_PATH_INFO_KEY] = search_path
+    return True
+
+
+class TenantAffineQueuePool(MeteredQueuePool):
+    """Prefers handing out idle connections whose search_path is already the requested
+    schema's (see `get_requested_schema`), so the search_path only changes when a
+    connection moves between tenants. Binding the connection is left to a checkout
+    listener calling `bind_search_path`."""
+
+    def _take_bound_connection(self, search_path: str) -> ConnectionPoolEntry | None:
+        idle = cast(Queue[ConnectionPoolEntry], self._pool)
+        with idle.mutex:
+            # same order as the queue would hand the connections out
+            candidates = reversed(idle.queue) if idle.use_lifo else iter(idle.queue)
+            for connection_record in candidates:
+                if connection_record.info.get(SEARCH_PATH_INFO_KEY) == search_path:
+                    idle.queue.remove(connection_record)
+                    idle.not_full.notify()
+                    return connection_record
+        return None
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        schema = get_requested_schema()
+        search_path = search_path_for_schema(schema)
+
+        connection_record = self._take_bound_connection(search_path)
+        if connection_record is None:
+            connection_record = super()._do_get()
+        else:
+            POOL_CHECKED_OUT.labels(self._metrics_label).set(self.checkedout())
+
+        bound_search_path = connection_record.info.get(SEARCH_PATH_INFO_KEY)
+        if bound_search_path == search_path:
+            outcome = "affine"
+        elif bound_search_path is None:
+            outcome = "new"
+        else:
+            outcome = "rebound"
+        TENANT_POOL_CHECKOUTS.labels(
+            self._metrics_label, schema or "default", outcome
+        ).inc()
+        return connection_record
@@ -1,8 +1,16 @@
+from collections.abc import Sequence
 from typing import Any
 
 from psycopg2 import errorcodes
 from psycopg2 import OperationalError
+from sqlalchemy import cast
+from sqlalchemy import ColumnElement
+from sqlalchemy import func
 from sqlalchemy import inspect
+from sqlalchemy import literal
+from sqlalchemy import TableValuedAlias
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import TypeEngine
 
 from sambaai.db.models import Base
 
@@ -11,6 +19,31 @@ def model_to_dict(model: Base) -> dict[str, Any]:
     return {c.key: getattr(model, c.key) for c in inspect(model).mapper.column_attrs}  # type: ignore
 
 
+def array_param(
+    values: Sequence[Any], item_type: TypeEngine | type[TypeEngine]
+) -> ColumnElement:
+    """Binds `values` as a single typed Postgres array, e.g. for `= ANY(...)`, so that
+    the number of statement parameters doesn't grow with the number of values."""
+    return cast(literal(list(values), ARRAY(item_type)), ARRAY(item_type))
+
+
+def unnest_rows(
+    name: str,
+    columns: dict[str, tuple[Sequence[Any], TypeEngine | type[TypeEngine]]],
+) -> TableValuedAlias:
+    """`unnest(:col_1, :col_2, ...) AS name(col_1, col_2, ...)`, a batch of rows
+    passed as one array parameter per column (all of the same length). Statements
+    selecting from it have the same few parameters whatever the batch size.
+    NOTE: Postgres specific."""
+    return (
+        func.unnest(
+            *(array_param(values, item_type) for values, item_type in columns.values())
+        )
+        .table_valued(*columns.keys())
+        .render_derived(name=name)
+    )
+
+
 RETRYABLE_PG_CODES = {
     errorcodes.SERIALIZATION_FAILURE,  # '40001'
     errorcodes.DEADLOCK_DETECTED,  # '40P01'
@@ -0,0 +1,607 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import timezone
+from typing import Any
+
+import numpy as np
+
+from sambaai.connectors.cross_connector_utils.miscellaneous_utils import (
+    get_experts_stores_representations,
+)
+from sambaai.document_index.embedded.keyword_index import BM25Index
+from sambaai.document_index.embedded.vector_store import IVFIndex
+from sambaai.document_index.embedded.vector_store import VectorStore
+from sambaai.document_index.vespa_constants import ACCESS_CONTROL_LIST
+from sambaai.document_index.vespa_constants import AGGREGATED_CHUNK_BOOST_FACTOR
+from sambaai.document_index.vespa_constants import BLURB
+from sambaai.document_index.vespa_constants import BOOST
+from sambaai.document_index.vespa_constants import CHUNK_CONTEXT
+from sambaai.document_index.vespa_constants import CHUNK_ID
+from sambaai.document_index.vespa_constants import CONTENT
+from sambaai.document_index.vespa_constants import CONTENT_SUMMARY
+from sambaai.document_index.vespa_constants import DOC_SUMMARY
+from sambaai.document_index.vespa_constants import DOC_UPDATED_AT
+from sambaai.document_index.vespa_constants import DOCUMENT_ID
+from sambaai.document_index.vespa_constants import DOCUMENT_SETS
+from sambaai.document_index.vespa_constants import HIDDEN
+from sambaai.document_index.vespa_constants import IMAGE_FILE_NAME
+from sambaai.document_index.vespa_constants import LARGE_CHUNK_REFERENCE_IDS
+from sambaai.document_index.vespa_constants import METADATA
+from sambaai.document_index.vespa_constants import METADATA_LIST
+from sambaai.document_index.vespa_constants import METADATA_SUFFIX
+from sambaai.document_index.vespa_constants import PRIMARY_OWNERS
+from sambaai.document_index.vespa_constants import SECONDARY_OWNERS
+from sambaai.document_index.vespa_constants import SECTION_CONTINUATION
+from sambaai.document_index.vespa_constants import SEMANTIC_IDENTIFIER
+from sambaai.document_index.vespa_constants import SKIP_TITLE_EMBEDDING
+from sambaai.document_index.vespa_constants import SOURCE_LINKS
+from sambaai.document_index.vespa_constants import SOURCE_TYPE
+from sambaai.document_index.vespa_constants import TITLE
+from sambaai.document_index.vespa_constants import USER_FILE
+from sambaai.document_index.vespa_constants import USER_FOLDER
+from sambaai.indexing.models import DocMetadataAwareIndexChunk
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    UNIQUE (tenant_id, document_id, chunk_id)
+);
+CREATE TABLE IF NOT EXISTS embedding_slots (
+    slot INTEGER PRIMARY KEY,
+    chunk_rowid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embedding_slots_chunk ON embedding_slots (chunk_rowid);
+CREATE TABLE IF NOT EXISTS free_slots (
+    kind TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    PRIMARY KEY (kind, slot)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    generation INTEGER NOT NULL,
+    tenant_id TEXT NOT NULL,
+    document_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_generation ON changes (generation);
+"""
+
+# Writes whose changed documents are kept in the change log. A process that fell
+# further behind reloads the whole index instead of applying the changes
+_CHANGE_LOG_GENERATIONS = 10_000
+
+# Kinds of freed slots. Chunk rowids address the title embeddings, embedding slots
+# the chunk embeddings
+_FREE_CHUNK_ROWID = "chunk"
+_FREE_EMBEDDING_SLOT = "embedding"
+
+
+@dataclass
+class ChunkAttributes:
+    """The fields of a chunk used for filtering and ranking, kept in memory like
+    Vespa attributes"""
+
+    tenant_id: str
+    document_id: str
+    chunk_id: int
+    access_control_list: frozenset[str]
+    document_sets: frozenset[str]
+    source_type: str
+    metadata_list: frozenset[str]
+    user_file: int | None
+    user_folder: int | None
+    doc_updated_at: int | None
+    hidden: bool
+    boost: int
+    aggregated_chunk_boost_factor: float | None
+    is_large_chunk: bool
+    has_title_embedding: bool
+    embedding_slots: list[int] = field(default_factory=list)
+
+    @classmethod
+    def from_fields(cls, tenant_id: str, fields: dict[str, Any]) -> "ChunkAttributes":
+        return cls(
+            tenant_id=tenant_id,
+            document_id=fields[DOCUMENT_ID],
+            chunk_id=fields[CHUNK_ID],
+            access_control_list=frozenset(fields.get(ACCESS_CONTROL_LIST) or []),
+            document_sets=frozenset(fields.get(DOCUMENT_SETS) or []),
+            source_type=fields[SOURCE_TYPE],
+            metadata_list=frozenset(fields.get(METADATA_LIST) or []),
+            user_file=fields.get(USER_FILE),
+            user_folder=fields.get(USER_FOLDER),
+            doc_updated_at=fields.get(DOC_UPDATED_AT),
+            hidden=bool(fields.get(HIDDEN)),
+            boost=fields.get(BOOST, 0),
+            aggregated_chunk_boost_factor=fields.get(AGGREGATED_CHUNK_BOOST_FACTOR),
+            is_large_chunk=bool(fields.get(LARGE_CHUNK_REFERENCE_IDS)),
+            has_title_embedding=not fields.get(SKIP_TITLE_EMBEDDING, True),
+        )
+
+
+def chunk_to_fields(chunk: DocMetadataAwareIndexChunk) -> dict[str, Any]:
+    """The stored fields of a chunk, named and built like the Vespa document fields"""
+    document = chunk.source_document
+    title = document.get_title_for_document_index()
+    doc_updated_at = document.doc_updated_at
+    if doc_updated_at and doc_updated_at.tzinfo != timezone.utc:
+        raise ValueError("Connectors must provide document update time in UTC")
+
+    return {
+        DOCUMENT_ID: document.id,
+        CHUNK_ID: chunk.chunk_id,
+        BLURB: chunk.blurb,
+        TITLE: title or None,
+        SKIP_TITLE_EMBEDDING: not title or chunk.title_embedding is None,
+        CONTENT: (
+            f"{chunk.title_prefix}{chunk.doc_summary}{chunk.content}"
+            f"{chunk.chunk_context}{chunk.metadata_suffix_keyword}"
+        ),
+        CONTENT_SUMMARY: chunk.content,
+        SOURCE_TYPE: str(document.source.value),
+        SOURCE_LINKS: chunk.source_links,
+        SEMANTIC_IDENTIFIER: document.semantic_identifier,
+        SECTION_CONTINUATION: chunk.section_continuation,
+        LARGE_CHUNK_REFERENCE_IDS: chunk.large_chunk_reference_ids,
+        METADATA: json.dumps(document.metadata),
+        METADATA_LIST: document.get_metadata_str_attributes(),
+        METADATA_SUFFIX: chunk.metadata_suffix_keyword,
+        CHUNK_CONTEXT: chunk.chunk_context,
+        DOC_SUMMARY: chunk.doc_summary,
+        DOC_UPDATED_AT: int(doc_updated_at.timestamp()) if doc_updated_at else None,
+        PRIMARY_OWNERS: get_experts_stores_representations(document.primary_owners),
+        SECONDARY_OWNERS: get_experts_stores_representations(document.secondary_owners),
+        ACCESS_CONTROL_LIST: sorted(chunk.access.to_acl()),
+        DOCUMENT_SETS: sorted(chunk.document_sets),
+        IMAGE_FILE_NAME: chunk.image_file_name,
+        USER_FILE: chunk.user_file,
+        USER_FOLDER: chunk.user_folder,
+        BOOST: chunk.boost,
+        AGGREGATED_CHUNK_BOOST_FACTOR: chunk.aggregated_chunk_boost_factor,
+    }
+
+
+class EmbeddedChunkStore:
+    """One index on local disk. Chunk fields are stored in SQLite, the chunk and
+    title embeddings in memory-mapped vector stores (a chunk can have several
+    embeddings, the full chunk and its mini chunks).
+
+    Attributes, BM25 and ANN indices are kept in memory. Every write bumps a
+    generation number and logs the documents it changed, a process that finds the
+    generation changed by another process reloads just those documents (see
+    `refresh`).
+
+    Rowids and embedding slots of deleted chunks are reused by later writes, so the
+    vector files only grow with the number of live chunks, not with every
+    re-index."""
+
+    def __init__(self, directory: str, dim: int | None = None) -> None:
+        """Opens the index in `directory`, creating it if `dim` is given"""
+        if dim is None and not os.path.exists(directory):
+            raise RuntimeError(f"Embedded index {directory} does not exist")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.lock = threading.RLock()
+
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "chunks.sqlite"),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('generation', '0')")
+        # the changes of the generations after this one are in the change log
+        self.conn.execute(
+            "INSERT OR IGNORE INTO meta "
+            "SELECT 'change_log_start', value FROM meta WHERE key = 'generation'"
+        )
+        if dim is not None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(dim),)
+            )
+
+        stored_dim = self._get_meta("dim")
+        if stored_dim is None:
+            raise RuntimeError(f"Embedded index {directory} was never initialized")
+        self.dim = int(stored_dim)
+
+        self.embeddings = VectorStore(
+            os.path.join(directory, "embeddings.f32"), self.dim
+        )
+        self.title_embeddings = VectorStore(
+            os.path.join(directory, "title_embeddings.f32"), self.dim
+        )
+
+        self.attributes: dict[int, ChunkAttributes] = {}
+        self.document_rowids: dict[tuple[str, str], set[int]] = {}
+        self.embedding_slot_owners: dict[int, int] = {}
+        self.title_bm25 = BM25Index()
+        self.content_bm25 = BM25Index()
+        self.embedding_ann = IVFIndex()
+        self.title_ann = IVFIndex()
+        self._generation = -1
+        self.refresh()
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _get_generation(self) -> int:
+        return int(self._get_meta("generation") or 0)
+
+    def close(self) -> None:
+        with self.lock:
+            self.embeddings.flush()
+            self.title_embeddings.flush()
+            self.conn.close()
+
+    def refresh(self) -> None:
+        """Updates the in-memory indices if another process wrote to the index"""
+        with self.lock:
+            # a read transaction, so the generation matches the rows read
+            self.conn.execute("BEGIN")
+            try:
+                generation = self._get_generation()
+                if generation == self._generation:
+                    return
+
+                change_log_start = int(self._get_meta("change_log_start") or 0)
+                if 0 <= change_log_start <= self._generation:
+                    self._apply_changes(self._generation)
+                else:
+                    self._load()
+                self._generation = generation
+            finally:
+                self.conn.execute("COMMIT")
+
+    def _load(self) -> None:
+        self.embeddings.refresh()
+        self.title_embeddings.refresh()
+        self.attributes = {}
+        self.document_rowids = {}
+        self.embedding_slot_owners = {}
+        self.title_bm25 = BM25Index()
+        self.content_bm25 = BM25Index()
+        self.embedding_ann = IVFIndex()
+        self.title_ann = IVFIndex()
+
+        for rowid, tenant_id, raw_fields in self.conn.execute(
+            "SELECT rowid, tenant_id, fields FROM chunks"
+        ):
+            self._add_to_memory(rowid, tenant_id, json.loads(raw_fields), [])
+        for slot, chunk_rowid in self.conn.execute(
+            "SELECT slot, chunk_rowid FROM embedding_slots"
+        ):
+            self.attributes[chunk_rowid].embedding_slots.append(slot)
+            self.embedding_slot_owners[slot] = chunk_rowid
+
+        self._train_ann_indices()
+        logger.info(
+            f"Loaded embedded index {self.directory}: chunks={len(self.attributes)}"
+        )
+
+    def _apply_changes(self, since_generation: int) -> None:
+        """Reloads the documents written after `since_generation`"""
+        self.embeddings.refresh()
+        self.title_embeddings.refresh()
+
+        changed_documents = self.conn.execute(
+            "SELECT DISTINCT tenant_id, document_id FROM changes WHERE generation > ?",
+            (since_generation,),
+        ).fetchall()
+        # everything is removed before anything is added back, a write can reuse
+        # the slots freed by another document
+        for tenant_id, document_id in changed_documents:
+            for rowid in list(self.document_rowids.get((tenant_id, document_id), ())):
+                self._remove_from_memory(rowid)
+        for tenant_id, document_id in changed_documents:
+            for rowid, raw_fields in self.conn.execute(
+                "SELECT rowid, fields FROM chunks WHERE tenant_id = ? AND document_id = ?",
+                (tenant_id, document_id),
+            ).fetchall():
+                slots = [
+                    row[0]
+                    for row in self.conn.execute(
+                        "SELECT slot FROM embedding_slots WHERE chunk_rowid = ? "
+                        "ORDER BY slot",
+                        (rowid,),
+                    )
+                ]
+                self._add_chunk(rowid, tenant_id, json.loads(raw_fields), slots)
+
+        self._train_ann_indices()
+        logger.debug(
+            f"Applied changes to embedded index {self.directory}: "
+            f"documents={len(changed_documents)}"
+        )
+
+    def _train_ann_indices(self) -> None:
+        if self.embedding_ann.needs_training(len(self.embedding_slot_owners)):
+            self.embedding_ann.train(
+                self.embeddings, np.fromiter(self.embedding_slot_owners, dtype=np.int64)
+            )
+        title_rowids = [
+            rowid
+            for rowid, attributes in self.attributes.items()
+            if attributes.has_title_embedding
+        ]
+        if self.title_ann.needs_training(len(title_rowids)):
+            self.title_ann.train(
+                self.title_embeddings, np.asarray(title_rowids, dtype=np.int64)
+            )
+
+    def _add_to_memory(
+        self,
+        rowid: int,
+        tenant_id: str,
+        fields: dict[str, Any],
+        embedding_slots: list[int],
+    ) -> None:
+        attributes = ChunkAttributes.from_fields(tenant_id, fields)
+        attributes.embedding_slots = embedding_slots
+        self.attributes[rowid] = attributes
+        self.document_rowids.setdefault((tenant_id, attributes.document_id), set()).add(
+            rowid
+        )
+        for slot in embedding_slots:
+            self.embedding_slot_owners[slot] = rowid
+        self.title_bm25.add(rowid, fields.get(TITLE))
+        self.content_bm25.add(rowid, fields.get(CONTENT))
+
+    def _add_chunk(
+        self,
+        rowid: int,
+        tenant_id: str,
+        fields: dict[str, Any],
+        embedding_slots: list[int],
+    ) -> None:
+        """_add_to_memory for a chunk added after the ANN indices were trained"""
+        self._add_to_memory(rowid, tenant_id, fields, embedding_slots)
+        self.embedding_ann.add(
+            self.embeddings, np.asarray(embedding_slots, dtype=np.int64)
+        )
+        if self.attributes[rowid].has_title_embedding:
+            self.title_ann.add(
+                self.title_embeddings, np.asarray([rowid], dtype=np.int64)
+            )
+
+    def _remove_from_memory(self, rowid: int) -> None:
+        attributes = self.attributes.pop(rowid, None)
+        if attributes is None:
+            return
+
+        key = (attributes.tenant_id, attributes.document_id)
+        self.document_rowids[key].discard(rowid)
+        if not self.document_rowids[key]:
+            del self.document_rowids[key]
+        for slot in attributes.embedding_slots:
+            self.embedding_slot_owners.pop(slot, None)
+        self.embedding_ann.remove(attributes.embedding_slots)
+        self.title_ann.remove([rowid])
+        self.title_bm25.remove(rowid)
+        self.content_bm25.remove(rowid)
+
+    @contextmanager
+    def _write(
+        self, tenant_id: str, document_ids: Iterable[str]
+    ) -> Iterator[sqlite3.Connection]:
+        """A write transaction to the documents, serialized across processes. Vectors
+        are flushed before the commit so readers never see rows without their
+        vectors."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                generation = self._get_generation()
+                yield self.conn
+                self.embeddings.flush()
+                self.title_embeddings.flush()
+                self._log_changes(generation + 1, tenant_id, document_ids)
+                self.conn.execute(
+                    "UPDATE meta SET value = ? WHERE key = 'generation'",
+                    (str(generation + 1),),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            # in memory state is updated by the caller, which only makes it current
+            # if nothing was written by other processes in between. Otherwise the
+            # next refresh applies the missed changes (and this one again)
+            if generation == self._generation:
+                self._generation = generation + 1
+
+    def _log_changes(
+        self, generation: int, tenant_id: str, document_ids: Iterable[str]
+    ) -> None:
+        self.conn.executemany(
+            "INSERT INTO changes (generation, tenant_id, document_id) VALUES (?, ?, ?)",
+            [(generation, tenant_id, document_id) for document_id in document_ids],
+        )
+
+        change_log_start = generation - _CHANGE_LOG_GENERATIONS
+        if change_log_start > int(self._get_meta("change_log_start") or 0):
+            self.conn.execute(
+                "DELETE FROM changes WHERE generation <= ?", (change_log_start,)
+            )
+            self.conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'change_log_start'",
+                (str(change_log_start),),
+            )
+
+    def _delete_rows(self, conn: sqlite3.Connection, rowids: list[int]) -> None:
+        for rowid in rowids:
+            slots = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT slot FROM embedding_slots WHERE chunk_rowid = ?", (rowid,)
+                )
+            ]
+            conn.execute("DELETE FROM chunks WHERE rowid = ?", (rowid,))
+            conn.execute("DELETE FROM embedding_slots WHERE chunk_rowid = ?", (rowid,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO free_slots (kind, slot) VALUES (?, ?)",
+                [(_FREE_CHUNK_ROWID, rowid)]
+                + [(_FREE_EMBEDDING_SLOT, slot) for slot in slots],
+            )
+
+    def _take_free_slot(self, conn: sqlite3.Connection, kind: str) -> int | None:
+        """The lowest freed slot of the kind, None to have SQLite allocate a new one.
+        Freed slots are always taken first, so a new one is never also on the list"""
+        row = conn.execute(
+            "SELECT slot FROM free_slots WHERE kind = ? ORDER BY slot LIMIT 1", (kind,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute(
+            "DELETE FROM free_slots WHERE kind = ? AND slot = ?", (kind, row[0])
+        )
+        return row[0]
+
+    def _get_document_rowids(
+        self, conn: sqlite3.Connection, tenant_id: str, document_id: str
+    ) -> list[int]:
+        return [
+            row[0]
+            for row in conn.execute(
+                "SELECT rowid FROM chunks WHERE tenant_id = ? AND document_id = ?",
+                (tenant_id, document_id),
+            )
+        ]
+
+    def replace_documents(
+        self,
+        tenant_id: str,
+        document_ids: set[str],
+        chunks: list[DocMetadataAwareIndexChunk],
+    ) -> set[str]:
+        """Replaces all chunks of the documents with `chunks`, returns the IDs of the
+        documents that already had chunks"""
+        existing_document_ids: set[str] = set()
+        removed_rowids: list[int] = []
+        added: list[
+            tuple[int, dict[str, Any], list[int], DocMetadataAwareIndexChunk]
+        ] = []
+
+        with self._write(tenant_id, document_ids) as conn:
+            for document_id in document_ids:
+                rowids = self._get_document_rowids(conn, tenant_id, document_id)
+                if rowids:
+                    existing_document_ids.add(document_id)
+                self._delete_rows(conn, rowids)
+                removed_rowids.extend(rowids)
+
+            for chunk in chunks:
+                fields = chunk_to_fields(chunk)
+                cursor = conn.execute(
+                    "INSERT INTO chunks (rowid, tenant_id, document_id, chunk_id, fields) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        self._take_free_slot(conn, _FREE_CHUNK_ROWID),
+                        tenant_id,
+                        fields[DOCUMENT_ID],
+                        chunk.chunk_id,
+                        json.dumps(fields),
+                    ),
+                )
+                rowid = cast_rowid(cursor.lastrowid)
+
+                embeddings = [chunk.embeddings.full_embedding] + list(
+                    chunk.embeddings.mini_chunk_embeddings
+                )
+                slots = [
+                    cast_rowid(
+                        conn.execute(
+                            "INSERT INTO embedding_slots (slot, chunk_rowid) "
+                            "VALUES (?, ?)",
+                            (self._take_free_slot(conn, _FREE_EMBEDDING_SLOT), rowid),
+                        ).lastrowid
+                    )
+                    for _ in embeddings
+                ]
+                self.embeddings.put(slots, embeddings)
+                if not fields[SKIP_TITLE_EMBEDDING] and chunk.title_embedding:
+                    self.title_embeddings.put([rowid], [chunk.title_embedding])
+                added.append((rowid, fields, slots, chunk))
+
+        for rowid in removed_rowids:
+            self._remove_from_memory(rowid)
+        for rowid, fields, slots, _ in added:
+            self._add_chunk(rowid, tenant_id, fields, slots)
+        self._train_ann_indices()
+        return existing_document_ids
+
+    def delete_document(self, tenant_id: str, document_id: str) -> int:
+        with self._write(tenant_id, [document_id]) as conn:
+            rowids = self._get_document_rowids(conn, tenant_id, document_id)
+            self._delete_rows(conn, rowids)
+
+        for rowid in rowids:
+            self._remove_from_memory(rowid)
+        return len(rowids)
+
+    def update_documents(
+        self, tenant_id: str, document_ids: list[str], updates: dict[str, Any]
+    ) -> int:
+        """Assigns `updates` to the fields of all chunks of the documents, returns the
+        number of updated chunks"""
+        updated: list[tuple[int, dict[str, Any]]] = []
+        with self._write(tenant_id, document_ids) as conn:
+            for document_id in document_ids:
+                for rowid, raw_fields in conn.execute(
+                    "SELECT rowid, fields FROM chunks "
+                    "WHERE tenant_id = ? AND document_id = ?",
+                    (tenant_id, document_id),
+                ).fetchall():
+                    fields = json.loads(raw_fields) | updates
+                    conn.execute(
+                        "UPDATE chunks SET fields = ? WHERE rowid = ?",
+                        (json.dumps(fields), rowid),
+                    )
+                    updated.append((rowid, fields))
+
+        for rowid, fields in updated:
+            previous = self.attributes.get(rowid)
+            if previous is None:
+                continue
+            attributes = ChunkAttributes.from_fields(tenant_id, fields)
+            attributes.embedding_slots = previous.embedding_slots
+            self.attributes[rowid] = attributes
+        return len(updated)
+
+    def get_fields(self, rowids: list[int]) -> dict[int, dict[str, Any]]:
+        if not rowids:
+            return {}
+
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT rowid, fields FROM chunks WHERE rowid IN "
+                f"({','.join('?' * len(rowids))})",
+                rowids,
+            ).fetchall()
+        return {rowid: json.loads(raw_fields) for rowid, raw_fields in rows}
+
+
+def cast_rowid(rowid: int | None) -> int:
+    if rowid is None:
+        raise RuntimeError("SQLite did not return a row id")
+    return rowid
@@ -0,0 +1,639 @@
+import os
+import random
+import shutil
+import threading
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+
+import numpy as np
+
+from sambaai.agents.agent_search.shared_graph_utils.models import QueryExpansionType
+from sambaai.configs.app_configs import EMBEDDED_INDEX_DIR
+from sambaai.configs.chat_configs import DOC_TIME_DECAY
+from sambaai.configs.chat_configs import NUM_RETURNED_HITS
+from sambaai.configs.chat_configs import TITLE_CONTENT_RATIO
+from sambaai.configs.constants import INDEX_SEPARATOR
+from sambaai.context.search.models import IndexFilters
+from sambaai.context.search.models import InferenceChunkUncleaned
+from sambaai.db.enums import EmbeddingPrecision
+from sambaai.document_index.embedded.chunk_store import EmbeddedChunkStore
+from sambaai.document_index.embedded.keyword_index import build_match_highlights
+from sambaai.document_index.embedded.keyword_index import tokenize
+from sambaai.document_index.embedded.vector_store import angular_closeness
+from sambaai.document_index.interfaces import DocumentIndex
+from sambaai.document_index.interfaces import DocumentInsertionRecord
+from sambaai.document_index.interfaces import IndexBatchParams
+from sambaai.document_index.interfaces import UpdateRequest
+from sambaai.document_index.interfaces import VespaChunkRequest
+from sambaai.document_index.interfaces import VespaDocumentFields
+from sambaai.document_index.interfaces import VespaDocumentUserFields
+from sambaai.document_index.vespa.chunk_retrieval import _vespa_hit_to_inference_chunk
+from sambaai.document_index.vespa_constants import ACCESS_CONTROL_LIST
+from sambaai.document_index.vespa_constants import BOOST
+from sambaai.document_index.vespa_constants import CONTENT_SUMMARY
+from sambaai.document_index.vespa_constants import DOCUMENT_SETS
+from sambaai.document_index.vespa_constants import HIDDEN
+from sambaai.document_index.vespa_constants import RECENCY_BIAS
+from sambaai.document_index.vespa_constants import USER_FILE
+from sambaai.document_index.vespa_constants import USER_FOLDER
+from sambaai.indexing.models import DocMetadataAwareIndexChunk
+from sambaai.utils.logger import setup_logger
+from shared_configs.configs import MULTI_TENANT
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# same as the rerank-count of the Vespa hybrid ranking profiles
+_RERANK_COUNT = 1000
+# age assumed for documents without an update time, same as the Vespa schema
+_UNTIMED_DOC_AGE_SECONDS = 7_890_000
+_SECONDS_PER_YEAR = 31_536_000
+_UNTIMED_DOC_CUTOFF = timedelta(days=92)
+_ADMIN_TITLE_WEIGHT = 5
+
+# the factory builds a new index object per use, the stores are shared per process
+_STORES: dict[str, EmbeddedChunkStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def _get_store(index_name: str) -> EmbeddedChunkStore:
+    directory = os.path.join(EMBEDDED_INDEX_DIR, index_name)
+    with _STORES_LOCK:
+        if directory not in _STORES:
+            _STORES[directory] = EmbeddedChunkStore(directory)
+        store = _STORES[directory]
+    store.refresh()
+    return store
+
+
+def _create_store(index_name: str, dim: int) -> None:
+    """Creates the index if needed. Like a Vespa schema change, a different embedding
+    dimension wipes the existing index."""
+    directory = os.path.join(EMBEDDED_INDEX_DIR, index_name)
+    with _STORES_LOCK:
+        store = _STORES.pop(directory, None)
+        if store is None:
+            store = EmbeddedChunkStore(directory, dim)
+
+        if store.dim != dim:
+            logger.warning(
+                f"Recreating embedded index {index_name}: "
+                f"dim={store.dim} -> dim={dim}"
+            )
+            store.close()
+            shutil.rmtree(directory)
+            store = EmbeddedChunkStore(directory, dim)
+
+        _STORES[directory] = store
+
+
+def _normalize_linear(values: np.ndarray) -> np.ndarray:
+    """Vespa's normalize_linear over the reranked hits"""
+    if not len(values):
+        return values
+
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.full_like(values, 1.0 if high > 0 else 0.0)
+    return (values - low) / (high - low)
+
+
+def _document_boost(boosts: np.ndarray) -> np.ndarray:
+    # 0.5 to 2x score: piecewise sigmoid function stretched out by factor of 3
+    sigmoid = 1 / (1 + np.exp(-boosts / 3))
+    return np.where(boosts < 0, 0.5 + sigmoid, 2 * sigmoid)
+
+
+def _recency_bias(doc_updated_at: np.ndarray, decay_factor: float) -> np.ndarray:
+    now = datetime.now(timezone.utc).timestamp()
+    age_seconds = np.where(
+        np.isnan(doc_updated_at), _UNTIMED_DOC_AGE_SECONDS, now - doc_updated_at
+    )
+    age_years = np.maximum(age_seconds / _SECONDS_PER_YEAR, 0)
+    return np.maximum(1 / (1 + decay_factor * age_years), 0.75)
+
+
+def _filter_rowids(
+    store: EmbeddedChunkStore,
+    filters: IndexFilters,
+    tenant_id: str,
+    include_hidden: bool = False,
+) -> list[int]:
+    """The chunks matching the filters, same semantics as build_vespa_filters"""
+    acl = set(filters.access_control_list or [])
+    sources = (
+        {source.value for source in filters.source_type}
+        if filters.source_type
+        else None
+    )
+    tags = (
+        {f"{tag.tag_key}{INDEX_SEPARATOR}{tag.tag_value}" for tag in filters.tags}
+        if filters.tags
+        else None
+    )
+    document_sets = set(filters.document_set) if filters.document_set else None
+    user_files = set(filters.user_file_ids) if filters.user_file_ids else None
+    user_folders = set(filters.user_folder_ids) if filters.user_folder_ids else None
+
+    cutoff_secs: int | None = None
+    include_untimed = False
+    if filters.time_cutoff:
+        cutoff_secs = int(filters.time_cutoff.timestamp())
+        include_untimed = (
+            datetime.now(timezone.utc) - _UNTIMED_DOC_CUTOFF > filters.time_cutoff
+        )
+
+    rowids: list[int] = []
+    for rowid, chunk in store.attributes.items():
+        if chunk.tenant_id != tenant_id:
+            continue
+        if not include_hidden and chunk.hidden:
+            continue
+        if acl and acl.isdisjoint(chunk.access_control_list):
+            continue
+        if sources is not None and chunk.source_type not in sources:
+            continue
+        if tags is not None and tags.isdisjoint(chunk.metadata_list):
+            continue
+        if document_sets is not None and document_sets.isdisjoint(chunk.document_sets):
+            continue
+        if user_files is not None and chunk.user_file not in user_files:
+            continue
+        if user_folders is not None and chunk.user_folder not in user_folders:
+            continue
+        if cutoff_secs is not None:
+            if chunk.doc_updated_at is None:
+                if not include_untimed:
+                    continue
+            elif chunk.doc_updated_at < cutoff_secs:
+                continue
+        rowids.append(rowid)
+    return rowids
+
+
+def _to_inference_chunk(
+    fields: dict[str, Any],
+    score: float | None,
+    recency_bias: float = 1.0,
+    query_terms: list[str] | None = None,
+) -> InferenceChunkUncleaned:
+    # Vespa omits empty fields from hits
+    hit_fields = {key: value for key, value in fields.items() if value is not None}
+    highlights = build_match_highlights(
+        fields.get(CONTENT_SUMMARY) or "", query_terms or []
+    )
+    if highlights:
+        hit_fields[CONTENT_SUMMARY] = "<sep />".join(highlights)
+    hit_fields["matchfeatures"] = {RECENCY_BIAS: recency_bias}
+
+    return _vespa_hit_to_inference_chunk(
+        {"fields": hit_fields, "relevance": score}, null_score=score is None
+    )
+
+
+class EmbeddedIndex(DocumentIndex):
+    """Document index stored on local disk inside the application processes, for
+    deployments without a Vespa cluster. Implements the same filtering and ranking as
+    the Vespa schema, scaled for small to medium sized indices (see
+    EmbeddedChunkStore for the storage layout)."""
+
+    def __init__(
+        self,
+        index_name: str,
+        secondary_index_name: str | None,
+        large_chunks_enabled: bool,
+        secondary_large_chunks_enabled: bool | None,
+        multitenant: bool = False,
+    ) -> None:
+        self.index_name = index_name
+        self.secondary_index_name = secondary_index_name
+        self.large_chunks_enabled = large_chunks_enabled
+        self.secondary_large_chunks_enabled = secondary_large_chunks_enabled
+        self.multitenant = multitenant
+
+    @property
+    def _index_names(self) -> list[str]:
+        if self.secondary_index_name:
+            return [self.index_name, self.secondary_index_name]
+        return [self.index_name]
+
+    def _get_tenant_id(self, tenant_id: str | None) -> str:
+        # same as the Vespa tenant_id field, only set for multitenant deployments
+        return (tenant_id or "") if self.multitenant else ""
+
+    def ensure_indices_exist(
+        self,
+        primary_embedding_dim: int,
+        primary_embedding_precision: EmbeddingPrecision,
+        secondary_index_embedding_dim: int | None,
+        secondary_index_embedding_precision: EmbeddingPrecision | None,
+    ) -> None:
+        # vectors are always stored as float32, the precision is only a Vespa concern
+        _create_store(self.index_name, primary_embedding_dim)
+        if self.secondary_index_name:
+            if secondary_index_embedding_dim is None:
+                raise ValueError("Secondary index embedding dimension is required")
+            _create_store(self.secondary_index_name, secondary_index_embedding_dim)
+
+    @staticmethod
+    def register_multitenant_indices(
+        indices: list[str],
+        embedding_dims: list[int],
+        embedding_precisions: list[EmbeddingPrecision],
+    ) -> None:
+        if not MULTI_TENANT:
+            raise ValueError("Multi-tenant is not enabled")
+
+        for index_name, dim in zip(indices, embedding_dims):
+            _create_store(index_name, dim)
+
+    def index(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        index_batch_params: IndexBatchParams,
+    ) -> set[DocumentInsertionRecord]:
+        # IMPORTANT: This must be done one index at a time, do not use secondary index here
+        store = _get_store(self.index_name)
+        existing_docs = store.replace_documents(
+            tenant_id=self._get_tenant_id(index_batch_params.tenant_id),
+            document_ids=set(index_batch_params.doc_id_to_new_chunk_cnt),
+            chunks=chunks,
+        )
+
+        return {
+            DocumentInsertionRecord(
+                document_id=document_id,
+                already_existed=document_id in existing_docs,
+            )
+            for document_id in {chunk.source_document.id for chunk in chunks}
+        }
+
+    def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
+        for update_request in update_requests:
+            updates = self._build_updates(
+                VespaDocumentFields(
+                    access=update_request.access,
+                    document_sets=update_request.document_sets,
+                    boost=update_request.boost,
+                    hidden=update_request.hidden,
+                ),
+                None,
+            )
+            if not updates:
+                logger.error("Update request received but nothing to update")
+                continue
+
+            document_ids = [
+                doc_info.doc_id
+                for doc_info in update_request.minimal_document_indexing_info
+            ]
+            for index_name in self._index_names:
+                _get_store(index_name).update_documents(
+                    self._get_tenant_id(tenant_id), document_ids, updates
+                )
+
+    @staticmethod
+    def _build_updates(
+        fields: VespaDocumentFields | None,
+        user_fields: VespaDocumentUserFields | None,
+    ) -> dict[str, Any]:
+        updates: dict[str, Any] = {}
+        if fields is not None:
+            if fields.boost is not None:
+                updates[BOOST] = fields.boost
+            if fields.document_sets is not None:
+                updates[DOCUMENT_SETS] = sorted(fields.document_sets)
+            if fields.access is not None:
+                updates[ACCESS_CONTROL_LIST] = sorted(fields.access.to_acl())
+            if fields.hidden is not None:
+                updates[HIDDEN] = fields.hidden
+
+        if user_fields is not None:
+            if user_fields.user_file_id is not None:
+                updates[USER_FILE] = int(user_fields.user_file_id)
+            if user_fields.user_folder_id is not None:
+                updates[USER_FOLDER] = int(user_fields.user_folder_id)
+        return updates
+
+    def update_single(
+        self,
+        doc_id: str,
+        *,
+        chunk_count: int | None,
+        tenant_id: str,
+        fields: VespaDocumentFields | None,
+        user_fields: VespaDocumentUserFields | None,
+    ) -> int:
+        updates = self._build_updates(fields, user_fields)
+        if not updates:
+            logger.error("Update request received but nothing to update.")
+            return 0
+
+        return sum(
+            _get_store(index_name).update_documents(
+                self._get_tenant_id(tenant_id), [doc_id], updates
+            )
+            for index_name in self._index_names
+        )
+
+    def delete_single(
+        self,
+        doc_id: str,
+        *,
+        tenant_id: str,
+        chunk_count: int | None,
+    ) -> int:
+        return sum(
+            _get_store(index_name).delete_document(
+                self._get_tenant_id(tenant_id), doc_id
+            )
+            for index_name in self._index_names
+        )
+
+    def id_based_retrieval(
+        self,
+        chunk_requests: list[VespaChunkRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+        get_large_chunks: bool = False,
+    ) -> list[InferenceChunkUncleaned]:
+        store = _get_store(self.index_name)
+        tenant_id = self._get_tenant_id(filters.tenant_id)
+        # like the Vespa visit API, only the ACL is checked
+        acl = set(filters.access_control_list or [])
+
+        rowids: list[int] = []
+        with store.lock:
+            for chunk_request in chunk_requests:
+                document_rowids = store.document_rowids.get(
+                    (tenant_id, chunk_request.document_id), set()
+                )
+                for rowid in document_rowids:
+                    chunk = store.attributes[rowid]
+                    if chunk.chunk_id < (chunk_request.min_chunk_ind or 0):
+                        continue
+                    if (
+                        chunk_request.max_chunk_ind is not None
+                        and chunk.chunk_id > chunk_request.max_chunk_ind
+                    ):
+                        continue
+                    if chunk.is_large_chunk and not get_large_chunks:
+                        continue
+                    if acl and acl.isdisjoint(chunk.access_control_list):
+                        continue
+                    rowids.append(rowid)
+
+            rowids.sort(key=lambda rowid: store.attributes[rowid].chunk_id)
+
+        rowid_to_fields = store.get_fields(rowids)
+        return [
+            _to_inference_chunk(rowid_to_fields[rowid], score=None)
+            for rowid in rowids
+            if rowid in rowid_to_fields
+        ]
+
+    def _nearest_chunks(
+        self,
+        store: EmbeddedChunkStore,
+        query_vector: np.ndarray,
+        rowids: list[int],
+        target_hits: int,
+    ) -> tuple[dict[int, float], dict[int, float]]:
+        """closeness(field, embeddings) and closeness(field, title_embedding) of the
+        nearest neighbours among `rowids`. Like Vespa, chunks that are not among the
+        nearest neighbours of a field get no closeness for it."""
+        slots = np.fromiter(
+            (
+                slot
+                for rowid in rowids
+                for slot in store.attributes[rowid].embedding_slots
+            ),
+            dtype=np.int64,
+        )
+        embedding_closeness: dict[int, float] = {}
+        if len(slots):
+            nearest_slots, similarities = store.embedding_ann.search(
+                store.embeddings, query_vector, slots, target_hits
+            )
+            for slot, closeness in zip(
+                nearest_slots.tolist(), angular_closeness(similarities).tolist()
+            ):
+                rowid = store.embedding_slot_owners[slot]
+                embedding_closeness[rowid] = max(
+                    closeness, embedding_closeness.get(rowid, 0.0)
+                )
+
+        title_rowids = np.asarray(
+            [rowid for rowid in rowids if store.attributes[rowid].has_title_embedding],
+            dtype=np.int64,
+        )
+        title_closeness: dict[int, float] = {}
+        if len(title_rowids):
+            nearest_rowids, similarities = store.title_ann.search(
+                store.title_embeddings, query_vector, title_rowids, target_hits
+            )
+            title_closeness = dict(
+                zip(nearest_rowids.tolist(), angular_closeness(similarities).tolist())
+            )
+        return embedding_closeness, title_closeness
+
+    def hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        filters: IndexFilters,
+        hybrid_alpha: float,
+        time_decay_multiplier: float,
+        num_to_retrieve: int,
+        ranking_profile_type: QueryExpansionType,
+        offset: int = 0,
+        title_content_ratio: float | None = TITLE_CONTENT_RATIO,
+    ) -> list[InferenceChunkUncleaned]:
+        store = _get_store(self.index_name)
+        # Needs to be at least as much as the Vespa query uses
+        target_hits = max(10 * num_to_retrieve, 1000)
+        title_ratio = (
+            title_content_ratio
+            if title_content_ratio is not None
+            else TITLE_CONTENT_RATIO
+        )
+        terms = tokenize(" ".join(final_keywords) if final_keywords else query)
+
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        with store.lock:
+            rowids = _filter_rowids(
+                store, filters, self._get_tenant_id(filters.tenant_id)
+            )
+            embedding_closeness, title_closeness = self._nearest_chunks(
+                store, query_vector, rowids, target_hits
+            )
+            filtered = set(rowids)
+            keyword_matches = (
+                store.title_bm25.matching(terms) | store.content_bm25.matching(terms)
+            ) & filtered
+            candidates = np.asarray(
+                sorted(
+                    set(embedding_closeness) | set(title_closeness) | keyword_matches
+                ),
+                dtype=np.int64,
+            )
+            if not len(candidates):
+                return []
+
+            candidate_set = set(candidates.tolist())
+            title_bm25 = store.title_bm25.scores(terms, candidate_set)
+            content_bm25 = store.content_bm25.scores(terms, candidate_set)
+
+            def _feature(values: dict[int, float]) -> np.ndarray:
+                return np.asarray(
+                    [values.get(rowid, 0.0) for rowid in candidates.tolist()],
+                    dtype=np.float64,
+                )
+
+            features = {
+                "closeness_embeddings": _feature(embedding_closeness),
+                "closeness_title": _feature(title_closeness),
+                "bm25_title": _feature(title_bm25),
+                "bm25_content": _feature(content_bm25),
+            }
+
+            if ranking_profile_type == QueryExpansionType.KEYWORD:
+                first_phase = (
+                    title_ratio * features["bm25_title"]
+                    + (1 - title_ratio) * features["bm25_content"]
+                )
+            else:
+                first_phase = (
+                    title_ratio * features["closeness_title"]
+                    + (1 - title_ratio) * features["closeness_embeddings"]
+                )
+
+            if len(candidates) > _RERANK_COUNT:
+                top = np.argpartition(-first_phase, _RERANK_COUNT - 1)[:_RERANK_COUNT]
+                candidates = candidates[top]
+                features = {name: values[top] for name, values in features.items()}
+
+            attributes = [store.attributes[rowid] for rowid in candidates.tolist()]
+            boosts = np.asarray([chunk.boost for chunk in attributes], dtype=np.float64)
+            doc_updated_at = np.asarray(
+                [
+                    np.nan if chunk.doc_updated_at is None else chunk.doc_updated_at
+                    for chunk in attributes
+                ],
+                dtype=np.float64,
+            )
+            aggregated_boosts = np.asarray(
+                [
+                    (
+                        1.0
+                        if chunk.aggregated_chunk_boost_factor is None
+                        else chunk.aggregated_chunk_boost_factor
+                    )
+                    for chunk in attributes
+                ],
+                dtype=np.float64,
+            )
+
+        # If no good matching titles, the content embeddings are used rather than
+        # having some irrelevant title get a vector score of 1
+        title_vector_score = np.maximum(
+            features["closeness_embeddings"], features["closeness_title"]
+        )
+        vector_score = title_ratio * _normalize_linear(title_vector_score) + (
+            1 - title_ratio
+        ) * _normalize_linear(features["closeness_embeddings"])
+        keyword_score = title_ratio * _normalize_linear(features["bm25_title"]) + (
+            1 - title_ratio
+        ) * _normalize_linear(features["bm25_content"])
+        recency_bias = _recency_bias(
+            doc_updated_at, DOC_TIME_DECAY * time_decay_multiplier
+        )
+        scores = (
+            (hybrid_alpha * vector_score + (1 - hybrid_alpha) * keyword_score)
+            * _document_boost(boosts)
+            * recency_bias
+            * aggregated_boosts
+        )
+
+        order = np.argsort(-scores, kind="stable")[offset : offset + num_to_retrieve]
+        result_rowids = candidates[order].tolist()
+        rowid_to_fields = store.get_fields(result_rowids)
+        return [
+            _to_inference_chunk(
+                rowid_to_fields[rowid],
+                score=float(scores[ind]),
+                recency_bias=float(recency_bias[ind]),
+                query_terms=terms,
+            )
+            for rowid, ind in zip(result_rowids, order.tolist())
+            if rowid in rowid_to_fields
+        ]
+
+    def admin_retrieval(
+        self,
+        query: str,
+        filters: IndexFilters,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        offset: int = 0,
+    ) -> list[InferenceChunkUncleaned]:
+        store = _get_store(self.index_name)
+        terms = tokenize(query)
+
+        with store.lock:
+            filtered = set(
+                _filter_rowids(
+                    store,
+                    filters,
+                    self._get_tenant_id(filters.tenant_id),
+                    include_hidden=True,
+                )
+            )
+            content_bm25 = store.content_bm25.scores(terms, filtered)
+            title_bm25 = store.title_bm25.scores(terms, filtered)
+
+        # Very heavily prioritize title
+        scores = {
+            rowid: content_bm25.get(rowid, 0.0)
+            + _ADMIN_TITLE_WEIGHT * title_bm25.get(rowid, 0.0)
+            for rowid in content_bm25.keys() | title_bm25.keys()
+        }
+        ranked = sorted(scores, key=lambda rowid: -scores[rowid])[
+            offset : offset + num_to_retrieve
+        ]
+        rowid_to_fields = store.get_fields(ranked)
+        return [
+            _to_inference_chunk(
+                rowid_to_fields[rowid], score=scores[rowid], query_terms=terms
+            )
+            for rowid in ranked
+            if rowid in rowid_to_fields
+        ]
+
+    def random_retrieval(
+        self,
+        filters: IndexFilters,
+        num_to_retrieve: int = 10,
+    ) -> list[InferenceChunkUncleaned]:
+        """Retrieve random chunks matching the filters
+
+        This method is currently used for random chunk retrieval in the context of
+        assistant starter message creation (passed as sample context for usage by the assistant).
+        """
+        store = _get_store(self.index_name)
+        with store.lock:
+            rowids = _filter_rowids(
+                store, filters, self._get_tenant_id(filters.tenant_id)
+            )
+
+        sampled = random.sample(rowids, min(num_to_retrieve, len(rowids)))
+        rowid_to_fields = store.get_fields(sampled)
+        return [
+            _to_inference_chunk(rowid_to_fields[rowid], score=0.0)
+            for rowid in sampled
+            if rowid in rowid_to_fields
+        ]
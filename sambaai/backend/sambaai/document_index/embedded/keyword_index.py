@@ -0,0 +1,128 @@
+import math
+import re
+from collections import Counter
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# same parameters as Vespa's bm25 rank feature
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [token.lower() for token in _TOKEN_PATTERN.findall(text)]
+
+
+class BM25Index:
+    """Inverted index over one text field, scores documents like Vespa's
+    bm25(field) rank feature"""
+
+    def __init__(self) -> None:
+        # term -> {doc key -> term frequency}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.doc_lengths: dict[int, int] = {}
+        self._doc_terms: dict[int, list[str]] = {}
+        self._total_length = 0
+
+    def add(self, key: int, text: str | None) -> None:
+        self.remove(key)
+        term_counts = Counter(tokenize(text))
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[key] = count
+
+        length = sum(term_counts.values())
+        self.doc_lengths[key] = length
+        self._doc_terms[key] = list(term_counts)
+        self._total_length += length
+
+    def remove(self, key: int) -> None:
+        terms = self._doc_terms.pop(key, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            term_postings = self.postings[term]
+            del term_postings[key]
+            if not term_postings:
+                del self.postings[term]
+        self._total_length -= self.doc_lengths.pop(key)
+
+    def matching(self, terms: list[str]) -> set[int]:
+        matches: set[int] = set()
+        for term in set(terms):
+            matches.update(self.postings.get(term, {}))
+        return matches
+
+    def scores(
+        self, terms: list[str], keys: set[int] | None = None
+    ) -> dict[int, float]:
+        """bm25 of every document (restricted to `keys`) matching any of the terms"""
+        num_docs = len(self.doc_lengths)
+        if not num_docs:
+            return {}
+
+        avg_length = self._total_length / num_docs or 1.0
+        scores: dict[int, float] = {}
+        for term in set(terms):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+
+            num_matching = len(term_postings)
+            idf = math.log(1 + (num_docs - num_matching + 0.5) / (num_matching + 0.5))
+            for key, frequency in term_postings.items():
+                if keys is not None and key not in keys:
+                    continue
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[key] / avg_length
+                scores[key] = scores.get(key, 0.0) + idf * (
+                    frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                )
+        return scores
+
+
+def build_match_highlights(
+    text: str, terms: list[str], max_length: int = 400, context_chars: int = 80
+) -> list[str]:
+    """Snippets of `text` around the query terms with the matches wrapped in
+    <hi></hi>, the format of Vespa's dynamic summaries"""
+    if not text or not terms:
+        return []
+
+    term_set = set(terms)
+    matches = [
+        match
+        for match in _TOKEN_PATTERN.finditer(text)
+        if match.group().lower() in term_set
+    ]
+    if not matches:
+        return []
+
+    highlights: list[str] = []
+    total_length = 0
+    window_end = -1
+    for match in matches:
+        if match.start() < window_end:
+            # already part of the previous snippet
+            continue
+
+        start = max(0, match.start() - context_chars)
+        window_end = min(len(text), match.end() + context_chars)
+        if total_length + window_end - start > max_length:
+            break
+
+        snippet = text[start:window_end]
+        highlights.append(
+            _TOKEN_PATTERN.sub(
+                lambda token: (
+                    f"<hi>{token.group()}</hi>"
+                    if token.group().lower() in term_set
+                    else token.group()
+                ),
+                snippet,
+            ).strip()
+            + ("..." if window_end < len(text) else "")
+        )
+        total_length += window_end - start
+    return highlights
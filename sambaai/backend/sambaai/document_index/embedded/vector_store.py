@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_INITIAL_CAPACITY = 1024
+
+
+def angular_closeness(similarities: np.ndarray) -> np.ndarray:
+    """Vespa's closeness for the angular distance metric, 1 / (1 + angle)"""
+    return 1 / (1 + np.arccos(np.clip(similarities, -1.0, 1.0)))
+
+
+class VectorStore:
+    """Fixed-dimension float32 vectors in a memory-mapped file, addressed by slot.
+    Vectors are normalized on write, so dot products are cosine similarities.
+
+    The file only grows, other processes pick up new slots with `refresh`."""
+
+    def __init__(self, path: str, dim: int) -> None:
+        self.path = path
+        self.dim = dim
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.truncate(_INITIAL_CAPACITY * self._row_bytes)
+        self._open()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * np.dtype(np.float32).itemsize
+
+    def _open(self) -> None:
+        self.capacity = os.path.getsize(self.path) // self._row_bytes
+        self.vectors = np.memmap(
+            self.path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+        )
+
+    def refresh(self) -> None:
+        if os.path.getsize(self.path) // self._row_bytes != self.capacity:
+            self._open()
+
+    def _ensure_capacity(self, max_slot: int) -> None:
+        self.refresh()
+        if max_slot < self.capacity:
+            return
+
+        new_capacity = max(self.capacity * 2, max_slot + 1)
+        self.vectors.flush()
+        with open(self.path, "r+b") as f:
+            f.truncate(new_capacity * self._row_bytes)
+        self._open()
+
+    def put(self, slots: list[int], vectors: list[list[float]]) -> None:
+        if not slots:
+            return
+
+        self._ensure_capacity(max(slots))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.vectors[slots] = matrix / np.where(norms == 0, 1, norms)
+
+    def get(self, slots: np.ndarray) -> np.ndarray:
+        return np.asarray(self.vectors[slots])
+
+    def flush(self) -> None:
+        self.vectors.flush()
+
+    def similarities(self, slots: np.ndarray, query: np.ndarray) -> np.ndarray:
+        return self.get(slots) @ query
+
+
+class IVFIndex:
+    """Approximate nearest neighbour index over the slots of a VectorStore: each
+    vector is assigned to the closest of `num_lists` centroids (k-means over a
+    sample) and a query only scans the lists of its `num_probes` closest centroids.
+
+    Below `exact_search_threshold` candidates the search is exact. Lists are not
+    rebalanced on inserts, `needs_training` tells when a retrain is due."""
+
+    def __init__(
+        self,
+        num_probes: int = 8,
+        exact_search_threshold: int = 20_000,
+        sample_size: int = 50_000,
+        iterations: int = 10,
+    ) -> None:
+        self.num_probes = num_probes
+        self.exact_search_threshold = exact_search_threshold
+        self.sample_size = sample_size
+        self.iterations = iterations
+        self.centroids: np.ndarray | None = None
+        self.lists: list[set[int]] = []
+        self._slot_to_list: dict[int, int] = {}
+        self._trained_size = 0
+
+    def needs_training(self, num_vectors: int) -> bool:
+        if num_vectors < self.exact_search_threshold:
+            return False
+        # retrain once the index doubled since the last training
+        return self.centroids is None or num_vectors > 2 * self._trained_size
+
+    def train(self, store: VectorStore, slots: np.ndarray) -> None:
+        num_lists = max(1, int(np.sqrt(len(slots))))
+        rng = np.random.default_rng(0)
+        sample = store.get(
+            np.sort(rng.choice(slots, min(len(slots), self.sample_size), replace=False))
+        )
+        centroids = sample[rng.choice(len(sample), num_lists, replace=False)]
+        for _ in range(self.iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for list_num in range(num_lists):
+                members = sample[assignments == list_num]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[list_num] = centroid / (np.linalg.norm(centroid) or 1)
+
+        self.centroids = centroids
+        self.lists = [set() for _ in range(num_lists)]
+        self._slot_to_list = {}
+        self._trained_size = len(slots)
+        self.add(store, slots)
+        logger.info(f"Trained IVF index: vectors={len(slots)} lists={num_lists}")
+
+    def add(self, store: VectorStore, slots: np.ndarray) -> None:
+        if self.centroids is None or not len(slots):
+            return
+
+        assignments = np.argmax(store.get(slots) @ self.centroids.T, axis=1)
+        for slot, list_num in zip(slots.tolist(), assignments.tolist()):
+            self.remove([slot])
+            self.lists[list_num].add(slot)
+            self._slot_to_list[slot] = list_num
+
+    def remove(self, slots: list[int]) -> None:
+        for slot in slots:
+            list_num = self._slot_to_list.pop(slot, None)
+            if list_num is not None:
+                self.lists[list_num].discard(slot)
+
+    def search(
+        self,
+        store: VectorStore,
+        query: np.ndarray,
+        candidates: np.ndarray,
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The (up to) k candidate slots most similar to the query, with their cosine
+        similarities. Falls back to an exact search if the probed lists don't hold k
+        candidates, e.g. with very selective filters."""
+        if len(candidates) > self.exact_search_threshold and self.centroids is not None:
+            closest_lists = np.argsort(-(self.centroids @ query))[: self.num_probes]
+            probed = np.fromiter(
+                (
+                    slot
+                    for list_num in closest_lists.tolist()
+                    for slot in self.lists[list_num]
+                ),
+                dtype=np.int64,
+            )
+            probed = probed[np.isin(probed, candidates)]
+            if len(probed) >= k:
+                candidates = probed
+
+        similarities = store.similarities(candidates, query)
+        if len(candidates) > k:
+            top = np.argpartition(-similarities, k - 1)[:k]
+            candidates, similarities = candidates[top], similarities[top]
+        return candidates, similarities
@@ -1,8 +1,11 @@
 import httpx
 from sqlalchemy.orm import Session
 
+from sambaai.configs.app_configs import DOCUMENT_INDEX_TYPE
+from sambaai.configs.constants import DocumentIndexType
 from sambaai.db.models import SearchSettings
 from sambaai.db.search_settings import get_current_search_settings
+from sambaai.document_index.embedded.index import EmbeddedIndex
 from sambaai.document_index.interfaces import DocumentIndex
 from sambaai.document_index.vespa.index import VespaIndex
 from shared_configs.configs import MULTI_TENANT
@@ -23,7 +26,15 @@ def get_default_document_index(
         secondary_index_name = secondary_search_settings.index_name
         secondary_large_chunks_enabled = secondary_search_settings.large_chunks_enabled
 
-    # Currently only supporting Vespa
+    if DOCUMENT_INDEX_TYPE == DocumentIndexType.EMBEDDED.value:
+        return EmbeddedIndex(
+            index_name=search_settings.index_name,
+            secondary_index_name=secondary_index_name,
+            large_chunks_enabled=search_settings.large_chunks_enabled,
+            secondary_large_chunks_enabled=secondary_large_chunks_enabled,
+            multitenant=MULTI_TENANT,
+        )
+
     return VespaIndex(
         index_name=search_settings.index_name,
         secondary_index_name=secondary_index_name,
@@ -252,6 +252,25 @@ class Deletable(abc.ABC):
         """
         raise NotImplementedError
 
+    def delete_multiple(
+        self,
+        doc_id_to_chunk_count: dict[str, int | None],
+        *,
+        tenant_id: str,
+    ) -> int:
+        """
+        Hard delete several documents from the document index. Indices that can delete
+        a batch of documents in fewer requests than one document at a time override this
+
+        Parameters:
+        - doc_id_to_chunk_count: document ids as specified by the connector, mapped to
+          their chunk count
+        """
+        return sum(
+            self.delete_single(doc_id, tenant_id=tenant_id, chunk_count=chunk_count)
+            for doc_id, chunk_count in doc_id_to_chunk_count.items()
+        )
+
 
 class Updatable(abc.ABC):
     """
@@ -1,11 +1,21 @@
 import concurrent.futures
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
 from uuid import UUID
 
 import httpx
 from retry import retry
 
+from sambaai.configs.app_configs import VESPA_SELECTION_DELETE_SLICES
+from sambaai.document_index.vespa_constants import DOCUMENT_ID
 from sambaai.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from sambaai.document_index.vespa_constants import NUM_THREADS
+from sambaai.document_index.vespa_constants import TENANT_ID
+from sambaai.document_index.vespa_constants import VESPA_CONTENT_CLUSTER
 from sambaai.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -59,3 +69,115 @@ def delete_vespa_chunks(
     finally:
         if not external_executor:
             executor.shutdown(wait=True)
+
+
+# how long Vespa visits before answering a selection-based delete with a continuation
+SELECTION_DELETE_TIME_CHUNK = "30s"
+
+
+@dataclass
+class SelectionDeleteProgress:
+    documents_deleted: int = 0
+    requests: int = 0
+    slices_done: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents_deleted / max(self.elapsed, 1e-9)
+
+
+def _selection_string(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def build_document_id_selection(index_name: str, document_ids: list[str]) -> str:
+    """Selects all chunks of the documents. Takes the document ids as stored in the
+    document_id field, i.e. before replace_invalid_doc_id_characters"""
+    return " or ".join(
+        f"{index_name}.{DOCUMENT_ID}=={_selection_string(document_id)}"
+        for document_id in document_ids
+    )
+
+
+def build_tenant_id_selection(index_name: str, tenant_id: str) -> str:
+    return f"{index_name}.{TENANT_ID}=={_selection_string(tenant_id)}"
+
+
+@retry(tries=10, delay=1, backoff=2)
+def _retryable_selection_delete(
+    http_client: httpx.Client, url: str, params: dict[str, str | int]
+) -> dict[str, Any]:
+    res = http_client.delete(url, params=params, timeout=None)
+    res.raise_for_status()
+    return res.json()
+
+
+def delete_vespa_chunks_by_selection(
+    selection: str,
+    index_name: str,
+    http_client: httpx.Client,
+    slices: int = VESPA_SELECTION_DELETE_SLICES,
+    on_progress: Callable[[SelectionDeleteProgress], None] | None = None,
+) -> int:
+    """Deletes all chunks matching the document selection with the document API's
+    selection-based delete. Vespa visits the index and deletes the matches itself, so
+    the chunks don't have to be enumerated first.
+
+    The visit is split into `slices` which run concurrently, each following its
+    continuation tokens until done. `on_progress` is called after every response.
+    Returns the number of chunks deleted."""
+    url = DOCUMENT_ID_ENDPOINT.format(index_name=index_name)
+    progress = SelectionDeleteProgress()
+    progress_lock = threading.Lock()
+
+    def _delete_slice(slice_id: int) -> None:
+        params: dict[str, str | int] = {
+            "selection": selection,
+            "cluster": VESPA_CONTENT_CLUSTER,
+            "slices": slices,
+            "sliceId": slice_id,
+            "timeChunk": SELECTION_DELETE_TIME_CHUNK,
+        }
+        while True:
+            try:
+                response = _retryable_selection_delete(http_client, url, params)
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    f"Failed to delete chunks by selection, details: {e.response.text}"
+                )
+                raise
+
+            continuation = response.get("continuation")
+            with progress_lock:
+                progress.documents_deleted += response.get("documentCount", 0)
+                progress.requests += 1
+                if not continuation:
+                    progress.slices_done += 1
+                if on_progress:
+                    on_progress(progress)
+
+            if not continuation:
+                return
+            params["continuation"] = continuation
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=slices) as executor:
+        futures = [
+            executor.submit(_delete_slice, slice_id) for slice_id in range(slices)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            # Will raise exception if the deletion raised an exception
+            future.result()
+
+    logger.info(
+        f"Deleted chunks by selection: index={index_name} "
+        f"chunks={progress.documents_deleted} requests={progress.requests} "
+        f"elapsed={progress.elapsed:.2f}s "
+        f"rate={progress.documents_per_second:.1f} chunks/s"
+    )
+    return progress.documents_deleted
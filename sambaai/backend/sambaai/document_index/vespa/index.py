@@ -5,14 +5,12 @@ import os
 import random
 import re
 import time
-import urllib
 import zipfile
 from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from typing import BinaryIO
 from typing import cast
-from typing import List
 from uuid import UUID
 
 import httpx  # type: ignore
@@ -25,6 +23,7 @@ from sambaai.configs.chat_configs import DOC_TIME_DECAY
 from sambaai.configs.chat_configs import NUM_RETURNED_HITS
 from sambaai.configs.chat_configs import TITLE_CONTENT_RATIO
 from sambaai.configs.chat_configs import VESPA_SEARCHER_THREADS
+from sambaai.configs.app_configs import VESPA_SELECTION_DELETE_MIN_CHUNKS
 from sambaai.configs.constants import KV_REINDEX_KEY
 from sambaai.context.search.models import IndexFilters
 from sambaai.context.search.models import InferenceChunkUncleaned
@@ -44,7 +43,10 @@ from sambaai.document_index.vespa.chunk_retrieval import (
     parallel_visit_api_retrieval,
 )
 from sambaai.document_index.vespa.chunk_retrieval import query_vespa
+from sambaai.document_index.vespa.deletion import build_document_id_selection
+from sambaai.document_index.vespa.deletion import build_tenant_id_selection
 from sambaai.document_index.vespa.deletion import delete_vespa_chunks
+from sambaai.document_index.vespa.deletion import delete_vespa_chunks_by_selection
 from sambaai.document_index.vespa.indexing_utils import BaseHTTPXClientContext
 from sambaai.document_index.vespa.indexing_utils import batch_index_vespa_chunks
 from sambaai.document_index.vespa.indexing_utils import check_for_final_chunk_existence
@@ -705,6 +707,44 @@ class VespaIndex(DocumentIndex):
 
         return doc_chunk_count
 
+    def _delete_by_selection(self, doc_ids: list[str], tenant_id: str) -> int:
+        total_chunks_deleted = 0
+        # the document_id field holds the ids before replace_invalid_doc_id_characters
+        with self.httpx_client_context as http_client:
+            for index_name in self.index_to_large_chunks_enabled:
+                selection = build_document_id_selection(index_name, doc_ids)
+                if self.multitenant:
+                    # the index is shared, other tenants may have the same doc ids
+                    selection = (
+                        f"({selection}) and "
+                        f"{build_tenant_id_selection(index_name, tenant_id)}"
+                    )
+                total_chunks_deleted += delete_vespa_chunks_by_selection(
+                    selection=selection,
+                    index_name=index_name,
+                    http_client=http_client,
+                )
+        return total_chunks_deleted
+
+    def delete_multiple(
+        self,
+        doc_id_to_chunk_count: dict[str, int | None],
+        *,
+        tenant_id: str,
+    ) -> int:
+        """A selection delete visits the whole index once, however many documents it
+        matches, so a batch is deleted with one when it has enough chunks in total"""
+        total_chunk_count = sum(
+            chunk_count or 0 for chunk_count in doc_id_to_chunk_count.values()
+        )
+        if (
+            not VESPA_SELECTION_DELETE_MIN_CHUNKS
+            or total_chunk_count < VESPA_SELECTION_DELETE_MIN_CHUNKS
+        ):
+            return super().delete_multiple(doc_id_to_chunk_count, tenant_id=tenant_id)
+
+        return self._delete_by_selection(list(doc_id_to_chunk_count), tenant_id)
+
     def delete_single(
         self,
         doc_id: str,
@@ -714,6 +754,13 @@ class VespaIndex(DocumentIndex):
     ) -> int:
         total_chunks_deleted = 0
 
+        if (
+            VESPA_SELECTION_DELETE_MIN_CHUNKS
+            and chunk_count is not None
+            and chunk_count >= VESPA_SELECTION_DELETE_MIN_CHUNKS
+        ):
+            return self._delete_by_selection([doc_id], tenant_id)
+
         doc_id = replace_invalid_doc_id_characters(doc_id)
 
         # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficial for
@@ -933,144 +980,17 @@ class VespaIndex(DocumentIndex):
             f"Deleting entries with tenant_id: {tenant_id} from index: {index_name}"
         )
 
-        # Step 1: Retrieve all document IDs with the given tenant_id
-        document_ids = cls._get_all_document_ids_by_tenant_id(tenant_id, index_name)
-
-        if not document_ids:
-            logger.info(
-                f"No documents found with tenant_id: {tenant_id} in index: {index_name}"
-            )
-            return
-
-        # Step 2: Delete documents in batches
-        delete_requests = [
-            _VespaDeleteRequest(document_id=doc_id, index_name=index_name)
-            for doc_id in document_ids
-        ]
-
-        cls._apply_deletes_batched(delete_requests)
-
-    @classmethod
-    def _get_all_document_ids_by_tenant_id(
-        cls, tenant_id: str, index_name: str
-    ) -> List[str]:
-        """
-        Retrieves all document IDs with the specified tenant_id, handling pagination.
-
-        Internal helper function for delete_entries_by_tenant_id.
-
-        Parameters:
-            tenant_id (str): The tenant ID to search for.
-            index_name (str): The name of the index to search in.
-
-        Returns:
-            List[str]: A list of document IDs matching the tenant_id.
-        """
-        offset = 0
-        limit = 1000  # Vespa's maximum hits per query
-        document_ids = []
-
-        logger.debug(
-            f"Starting document ID retrieval for tenant_id: {tenant_id} in index: {index_name}"
-        )
-
-        while True:
-            # Construct the query to fetch document IDs
-            query_params = {
-                "yql": f'select id from sources * where tenant_id contains "{tenant_id}";',
-                "offset": str(offset),
-                "hits": str(limit),
-                "timeout": "10s",
-                "format": "json",
-                "summary": "id",
-            }
-
-            url = f"{VESPA_APPLICATION_ENDPOINT}/search/"
-
-            logger.debug(
-                f"Querying for document IDs with tenant_id: {tenant_id}, offset: {offset}"
+        with get_vespa_http_client() as http_client:
+            chunks_deleted = delete_vespa_chunks_by_selection(
+                selection=build_tenant_id_selection(index_name, tenant_id),
+                index_name=index_name,
+                http_client=http_client,
             )
 
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=query_params, timeout=None)
-                response.raise_for_status()
-
-                search_result = response.json()
-                hits = search_result.get("root", {}).get("children", [])
-
-                if not hits:
-                    break
-
-                for hit in hits:
-                    doc_id = hit.get("id")
-                    if doc_id:
-                        document_ids.append(doc_id)
-
-                offset += limit  # Move to the next page
-
-        logger.debug(
-            f"Retrieved {len(document_ids)} document IDs for tenant_id: {tenant_id}"
+        logger.info(
+            f"Deleted {chunks_deleted} entries with tenant_id: {tenant_id} "
+            f"from index: {index_name}"
         )
-        return document_ids
-
-    @classmethod
-    def _apply_deletes_batched(
-        cls,
-        delete_requests: List["_VespaDeleteRequest"],
-        batch_size: int = BATCH_SIZE,
-    ) -> None:
-        """
-        Deletes documents in batches using multiple threads.
-
-        Internal helper function for delete_entries_by_tenant_id.
-
-        This is a class method and does not use the httpx pool of the instance.
-        This is OK because we don't use this method often.
-
-        Parameters:
-            delete_requests (List[_VespaDeleteRequest]): The list of delete requests.
-            batch_size (int): The number of documents to delete in each batch.
-        """
-
-        def _delete_document(
-            delete_request: "_VespaDeleteRequest", http_client: httpx.Client
-        ) -> None:
-            logger.debug(f"Deleting document with ID {delete_request.document_id}")
-            response = http_client.delete(
-                delete_request.url,
-                headers={"Content-Type": "application/json"},
-                timeout=None,
-            )
-            response.raise_for_status()
-
-        logger.debug(f"Starting batch deletion for {len(delete_requests)} documents")
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-            with get_vespa_http_client() as http_client:
-                for batch_start in range(0, len(delete_requests), batch_size):
-                    batch = delete_requests[batch_start : batch_start + batch_size]
-
-                    future_to_document_id = {
-                        executor.submit(
-                            _delete_document,
-                            delete_request,
-                            http_client,
-                        ): delete_request.document_id
-                        for delete_request in batch
-                    }
-
-                    for future in concurrent.futures.as_completed(
-                        future_to_document_id
-                    ):
-                        doc_id = future_to_document_id[future]
-                        try:
-                            future.result()
-                            logger.debug(f"Successfully deleted document: {doc_id}")
-                        except httpx.HTTPError as e:
-                            logger.error(f"Failed to delete document {doc_id}: {e}")
-                            # Optionally, implement retry logic or error handling here
-
-        logger.info("Batch deletion completed")
 
     def random_retrieval(
         self,
@@ -1097,14 +1017,3 @@ class VespaIndex(DocumentIndex):
         }
 
         return query_vespa(params)
-
-
-class _VespaDeleteRequest:
-    def __init__(self, document_id: str, index_name: str) -> None:
-        self.document_id = document_id
-        # Encode the document ID to ensure it's safe for use in the URL
-        encoded_doc_id = urllib.parse.quote_plus(self.document_id)
-        self.url = (
-            f"{VESPA_APPLICATION_ENDPOINT}/document/v1/"
-            f"{index_name}/{index_name}/docid/{encoded_doc_id}"
-        )
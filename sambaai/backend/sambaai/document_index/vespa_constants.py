@@ -24,6 +24,10 @@ DOCUMENT_ID_ENDPOINT = (
 
 # the default document id endpoint is http://localhost:8080/document/v1/default/sambaai_chunk/docid
 
+# id of the content cluster in vespa/app_config/services.xml.jinja, selection-based
+# operations of the document API must name it
+VESPA_CONTENT_CLUSTER = "danswer_index"
+
 SEARCH_ENDPOINT = f"{VESPA_APP_CONTAINER_URL}/search/"
 
 NUM_THREADS = (
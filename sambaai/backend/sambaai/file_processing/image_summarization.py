@@ -10,6 +10,7 @@ from sambaai.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
 from sambaai.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
 from sambaai.llm.interfaces import LLM
 from sambaai.llm.utils import message_to_string
+from sambaai.llm.work_executor import LLMWorkExecutor
 from sambaai.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -100,7 +101,7 @@ def _summarize_image(
     )
 
     try:
-        return message_to_string(llm.invoke(messages))
+        return message_to_string(LLMWorkExecutor(llm).invoke(messages))
 
     except Exception as e:
         error_msg = f"Summarization failed. Messages: {messages}"
@@ -1,3 +1,7 @@
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
 from sambaai.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
 from sambaai.configs.app_configs import BLURB_SIZE
 from sambaai.configs.app_configs import LARGE_CHUNK_RATIO
@@ -14,6 +18,8 @@ from sambaai.connectors.cross_connector_utils.miscellaneous_utils import (
 )
 from sambaai.connectors.models import IndexingDocument
 from sambaai.connectors.models import Section
+from sambaai.indexing.chunking_pool import ChunkingPool
+from sambaai.indexing.incremental_splitter import IncrementalSentenceSplitter
 from sambaai.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from sambaai.indexing.models import DocAwareChunk
 from sambaai.llm.utils import MAX_CONTEXT_TOKENS
@@ -30,6 +36,16 @@ CHUNK_OVERLAP = 0
 # overwhelm the actual contents of the chunk
 MAX_METADATA_PERCENTAGE = 0.25
 CHUNK_MIN_CONTENT = 256
+# Texts are measured several times while chunking (section, chunk, blurb and mini-chunk
+# texts, their paragraphs and sentences), so token ids of texts up to this length are
+# kept for the document being chunked. The least recently used ids are dropped once the
+# cache holds more than MAX_TOKEN_CACHE_TOKENS, the texts measured together are close to
+# each other so a few chunks worth is enough, and large sections are never held whole
+MAX_TOKEN_CACHE_TEXT_CHARS = 20_000
+MAX_TOKEN_CACHE_TOKENS = 16_384
+# Adjacent texts may tokenize into a slightly different number of tokens when joined
+# than on their own, this bounds the difference per section separator
+MAX_TOKEN_DRIFT_PER_SEPARATOR = 2
 
 logger = setup_logger()
 
@@ -134,10 +150,31 @@ class Chunker:
         chunk_overlap: int = CHUNK_OVERLAP,
         mini_chunk_size: int = MINI_CHUNK_SIZE,
         callback: IndexingHeartbeatInterface | None = None,
+        num_processes: int = 0,
     ) -> None:
         # importing llama_index uses a lot of RAM, so we only import it when needed.
         from llama_index.core.node_parser import SentenceSplitter
 
+        if num_processes > 1 and mp.current_process().daemon:
+            raise ValueError(
+                "Chunking worker processes can't be started from a daemon process"
+            )
+
+        # everything but the callback, which stays with this process
+        self._worker_kwargs = dict(
+            tokenizer=tokenizer,
+            enable_multipass=enable_multipass,
+            enable_large_chunks=enable_large_chunks,
+            enable_contextual_rag=enable_contextual_rag,
+            blurb_size=blurb_size,
+            include_metadata=include_metadata,
+            chunk_token_limit=chunk_token_limit,
+            chunk_overlap=chunk_overlap,
+            mini_chunk_size=mini_chunk_size,
+        )
+        self.num_processes = num_processes
+        self._pool: ChunkingPool | None = None
+
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
         self.enable_multipass = enable_multipass
@@ -156,21 +193,31 @@ class Chunker:
         self.max_context = 0
         self.prompt_tokens = 0
 
-        self.blurb_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
-            chunk_size=blurb_size,
-            chunk_overlap=0,
+        self._token_ids_cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._cached_token_count = 0
+        self.separator_token_count = len(tokenizer.encode(SECTION_SEPARATOR))
+
+        # the splitters only use the number of tokens, so they can share the ids
+        self.blurb_splitter = IncrementalSentenceSplitter(
+            SentenceSplitter(
+                tokenizer=self._encode,
+                chunk_size=blurb_size,
+                chunk_overlap=0,
+            )
         )
 
         self.chunk_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+            tokenizer=self._encode,
             chunk_size=chunk_token_limit,
             chunk_overlap=chunk_overlap,
         )
+        self.incremental_chunk_splitter = IncrementalSentenceSplitter(
+            self.chunk_splitter
+        )
 
         self.mini_chunk_splitter = (
             SentenceSplitter(
-                tokenizer=tokenizer.tokenize,
+                tokenizer=self._encode,
                 chunk_size=mini_chunk_size,
                 chunk_overlap=0,
             )
@@ -178,6 +225,28 @@ class Chunker:
             else None
         )
 
+    def _encode(self, text: str) -> list[int]:
+        token_ids = self._token_ids_cache.get(text)
+        if token_ids is not None:
+            self._token_ids_cache.move_to_end(text)
+            return token_ids
+
+        token_ids = self.tokenizer.encode(text)
+        if (
+            len(text) <= MAX_TOKEN_CACHE_TEXT_CHARS
+            and len(token_ids) <= MAX_TOKEN_CACHE_TOKENS
+        ):
+            self._token_ids_cache[text] = token_ids
+            self._cached_token_count += len(token_ids)
+            while self._cached_token_count > MAX_TOKEN_CACHE_TOKENS:
+                _, evicted = self._token_ids_cache.popitem(last=False)
+                self._cached_token_count -= len(evicted)
+        return token_ids
+
+    def _clear_token_cache(self) -> None:
+        self._token_ids_cache.clear()
+        self._cached_token_count = 0
+
     def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
         """
         Splits the text into smaller chunks based on token count to ensure
@@ -199,10 +268,7 @@ class Chunker:
         """
         Extract a short blurb from the text (first chunk of size `blurb_size`).
         """
-        texts = self.blurb_splitter.split_text(text)
-        if not texts:
-            return ""
-        return texts[0]
+        return self.blurb_splitter.first_chunk(text)
 
     def _get_mini_chunk_texts(self, chunk_text: str) -> list[str] | None:
         """
@@ -263,6 +329,11 @@ class Chunker:
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # the token count of chunk_text is summed up from its sections, it is off by at
+        # most chunk_token_drift and only measured when that could change a decision
+        chunk_token_count = 0
+        chunk_token_drift = 0
+        chunk_cleaned_len = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -294,6 +365,7 @@ class Chunker:
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = chunk_token_drift = chunk_cleaned_len = 0
 
                 # Create a chunk specifically for this image section
                 # (Using the text summary that was generated during processing)
@@ -311,7 +383,10 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            # long sections are only tokenized as far as needed to know they're too long
+            section_token_count = self.incremental_chunk_splitter.count_tokens_up_to(
+                section_text, content_token_limit
+            )
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -328,13 +403,14 @@ class Chunker:
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = chunk_token_drift = chunk_cleaned_len = 0
 
-                split_texts = self.chunk_splitter.split_text(section_text)
+                split_texts = self.incremental_chunk_splitter.split_text(section_text)
                 for i, split_text in enumerate(split_texts):
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and len(self._encode(split_text)) > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -364,17 +440,25 @@ class Chunker:
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
-            current_offset = len(shared_precompare_cleanup(chunk_text))
-            next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
-            )
-
-            if next_section_tokens + current_token_count <= content_token_limit:
+            next_section_tokens = self.separator_token_count + section_token_count
+            if (
+                chunk_token_count - chunk_token_drift + next_section_tokens
+                <= content_token_limit
+                < chunk_token_count + chunk_token_drift + next_section_tokens
+            ):
+                chunk_token_count = len(self._encode(chunk_text))
+                chunk_token_drift = 0
+
+            if next_section_tokens + chunk_token_count <= content_token_limit:
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    chunk_token_count += self.separator_token_count
+                    chunk_token_drift += MAX_TOKEN_DRIFT_PER_SEPARATOR
                 chunk_text += section_text
-                link_offsets[current_offset] = section_link_text
+                chunk_token_count += section_token_count
+                # the cleanup only removes single characters, so lengths add up
+                link_offsets[chunk_cleaned_len] = section_link_text
+                chunk_cleaned_len += len(shared_precompare_cleanup(section_text))
             else:
                 # finalize the existing chunk
                 self._create_chunk(
@@ -390,6 +474,9 @@ class Chunker:
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                chunk_token_count = section_token_count
+                chunk_token_drift = 0
+                chunk_cleaned_len = len(shared_precompare_cleanup(section_text))
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -415,7 +502,7 @@ class Chunker:
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.encode(title_prefix))
+        title_tokens = len(self._encode(title_prefix))
 
         # Metadata prep
         metadata_suffix_semantic = ""
@@ -428,7 +515,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.encode(metadata_suffix_semantic))
+            metadata_tokens = len(self._encode(metadata_suffix_semantic))
 
         # If metadata is too large, skip it in the semantic content
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
@@ -506,16 +593,48 @@ class Chunker:
         while persisting the document metadata.
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
+        With num_processes > 1 the documents are chunked in a pool of worker processes.
         """
+        if self.num_processes > 1 and len(documents) > 1:
+            return self._chunk_in_pool(documents)
+        return self._chunk_in_process(documents)
+
+    def _chunk_in_process(
+        self, documents: list[IndexingDocument]
+    ) -> list[DocAwareChunk]:
         final_chunks: list[DocAwareChunk] = []
         for document in documents:
             if self.callback and self.callback.should_stop():
                 raise RuntimeError("Chunker.chunk: Stop signal detected")
 
-            chunks = self._handle_single_document(document)
+            try:
+                chunks = self._handle_single_document(document)
+            finally:
+                self._clear_token_cache()
             final_chunks.extend(chunks)
 
             if self.callback:
                 self.callback.progress("Chunker.chunk", len(chunks))
 
         return final_chunks
+
+    def _chunk_in_pool(self, documents: list[IndexingDocument]) -> list[DocAwareChunk]:
+        if self._pool is None:
+            self._pool = ChunkingPool(
+                self._worker_kwargs,
+                self.num_processes,
+                keep_sections=self.enable_contextual_rag,
+            )
+
+        try:
+            return self._pool.chunk(documents, callback=self.callback)
+        except BrokenProcessPool:
+            logger.exception("Chunking worker died, chunking in process instead")
+            self.close()
+        return self._chunk_in_process(documents)
+
+    def close(self) -> None:
+        """Shuts down the worker processes, if any were started"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
@@ -0,0 +1,153 @@
+import multiprocessing as mp
+import weakref
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import TYPE_CHECKING
+
+from sambaai.connectors.models import IndexingDocument
+from sambaai.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from sambaai.indexing.models import DocAwareChunk
+from sambaai.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from sambaai.indexing.chunker import Chunker
+
+logger = setup_logger()
+
+# More shards than processes keep the workers busy when document sizes vary
+_SHARDS_PER_PROCESS = 4
+# How often the stop signal is checked while waiting for the workers
+_STOP_CHECK_INTERVAL_SECONDS = 1.0
+
+# Chunks travel back as tuples of these fields, the document is reattached by the
+# indexing process instead of being copied back once per chunk
+_CHUNK_FIELDS = tuple(
+    name for name in DocAwareChunk.model_fields if name != "source_document"
+)
+
+_worker_chunker: "Chunker | None" = None
+
+
+def _init_worker(chunker_kwargs: dict[str, Any]) -> None:
+    from sambaai.indexing.chunker import Chunker
+
+    global _worker_chunker
+    _worker_chunker = Chunker(**chunker_kwargs, num_processes=0)
+
+
+def _chunk_shard(documents: list[IndexingDocument]) -> list[list[tuple]]:
+    if _worker_chunker is None:
+        raise RuntimeError("Chunking worker was not initialized")
+
+    return [
+        [
+            tuple(getattr(chunk, name) for name in _CHUNK_FIELDS)
+            for chunk in _worker_chunker.chunk([document])
+        ]
+        for document in documents
+    ]
+
+
+def _shard_documents(
+    documents: list[IndexingDocument], num_shards: int
+) -> list[list[IndexingDocument]]:
+    """Splits the documents into consecutive shards of about the same size"""
+    total_chars = sum(document.get_total_char_length() for document in documents)
+    target_chars = total_chars / num_shards
+
+    shards: list[list[IndexingDocument]] = [[]]
+    shard_chars = 0
+    for document in documents:
+        if shards[-1] and shard_chars >= target_chars:
+            shards.append([])
+            shard_chars = 0
+        shards[-1].append(document)
+        shard_chars += document.get_total_char_length()
+    return shards
+
+
+class ChunkingPool:
+    """
+    Chunks documents in worker processes, each running its own Chunker built from
+    chunker_kwargs. The workers are spawned once and reused for every batch.
+    """
+
+    def __init__(
+        self,
+        chunker_kwargs: dict[str, Any],
+        num_processes: int,
+        keep_sections: bool = False,
+    ) -> None:
+        self.num_processes = num_processes
+        # the chunker only reads processed_sections, unless contextual RAG needs the
+        # text of the original sections
+        self.keep_sections = keep_sections
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_processes,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(chunker_kwargs,),
+        )
+        self._finalizer = weakref.finalize(
+            self, self.executor.shutdown, wait=False, cancel_futures=True
+        )
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def _to_worker(self, document: IndexingDocument) -> IndexingDocument:
+        if self.keep_sections:
+            return document
+        return document.model_copy(update={"sections": []})
+
+    def chunk(
+        self,
+        documents: list[IndexingDocument],
+        callback: IndexingHeartbeatInterface | None = None,
+    ) -> list[DocAwareChunk]:
+        """Same as Chunker.chunk, the chunks are returned in document order"""
+        shards = _shard_documents(documents, self.num_processes * _SHARDS_PER_PROCESS)
+        futures: list[Future] = [
+            self.executor.submit(
+                _chunk_shard, [self._to_worker(document) for document in shard]
+            )
+            for shard in shards
+        ]
+        shard_results: dict[Future, list[list[tuple]]] = {}
+
+        try:
+            pending = set(futures)
+            while pending:
+                if callback and callback.should_stop():
+                    raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+                done, pending = wait(
+                    pending,
+                    timeout=_STOP_CHECK_INTERVAL_SECONDS,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    shard_results[future] = future.result()
+                    if callback:
+                        callback.progress(
+                            "Chunker.chunk",
+                            sum(len(rows) for rows in shard_results[future]),
+                        )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+        chunks: list[DocAwareChunk] = []
+        for shard, future in zip(shards, futures):
+            for document, chunk_rows in zip(shard, shard_results[future]):
+                chunks.extend(
+                    DocAwareChunk.model_construct(
+                        source_document=document, **dict(zip(_CHUNK_FIELDS, row))
+                    )
+                    for row in chunk_rows
+                )
+        return chunks
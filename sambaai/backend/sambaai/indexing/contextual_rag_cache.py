@@ -0,0 +1,156 @@
+import hashlib
+import json
+import time
+from typing import cast
+
+from redis import Redis
+
+from sambaai.configs.app_configs import CONTEXTUAL_RAG_CACHE_MAX_ENTRIES
+from sambaai.configs.app_configs import CONTEXTUAL_RAG_CACHE_MAX_ENTRY_BYTES
+from sambaai.configs.app_configs import CONTEXTUAL_RAG_CACHE_TTL
+from sambaai.llm.interfaces import LLM
+from sambaai.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT1
+from sambaai.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
+from sambaai.prompts.chat_prompts import DOCUMENT_SUMMARY_PROMPT
+from sambaai.redis.redis_pool import get_redis_client
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_DOC_SUMMARY_KEY_PREFIX = "contextual_rag_doc_summary"
+_CHUNK_CONTEXTS_KEY_PREFIX = "contextual_rag_chunk_contexts"
+# sorted set of all cache keys, scored by when they were written
+_INDEX_KEY = "contextual_rag_cache_index"
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ContextualRAGCache:
+    """Caches LLM generated document summaries and chunk contexts in Redis so that
+    re-indexing an unchanged document does not call the LLM again.
+
+    Entries are keyed by the LLM and a hash of exactly what would be sent to it, so
+    any change to the document (or to how it is truncated, or to the prompt
+    templates) is a cache miss. All chunk contexts of a document are stored under a
+    single key, so a document costs one round trip to look up regardless of its
+    number of chunks.
+
+    The Redis is shared with Celery, so the cache holds at most `max_entries`
+    entries of at most `max_entry_bytes` each, evicting the oldest first.
+
+    Redis failures are logged and treated as misses, the cache must never fail
+    indexing."""
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        model_key: str,
+        ttl: int,
+        max_entries: int = CONTEXTUAL_RAG_CACHE_MAX_ENTRIES,
+        max_entry_bytes: int = CONTEXTUAL_RAG_CACHE_MAX_ENTRY_BYTES,
+    ) -> None:
+        self.redis_client = redis_client
+        self.model_key = model_key
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _doc_summary_key(self, doc_content: str) -> str:
+        return (
+            f"{_DOC_SUMMARY_KEY_PREFIX}:{self.model_key}:"
+            f"{_hash(DOCUMENT_SUMMARY_PROMPT)}:{_hash(doc_content)}"
+        )
+
+    def _chunk_contexts_key(self, doc_info: str) -> str:
+        prompts_hash = _hash(CONTEXTUAL_RAG_PROMPT1 + CONTEXTUAL_RAG_PROMPT2)
+        return (
+            f"{_CHUNK_CONTEXTS_KEY_PREFIX}:{self.model_key}:"
+            f"{prompts_hash}:{_hash(doc_info)}"
+        )
+
+    def _get(self, key: str) -> str | None:
+        try:
+            value = self.redis_client.get(key)
+        except Exception:
+            logger.exception(f"Failed to read contextual RAG cache: key={key}")
+            return None
+
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def _set(self, key: str, value: str) -> None:
+        if len(value.encode()) > self.max_entry_bytes:
+            logger.debug(f"Not caching contextual RAG entry, too large: key={key}")
+            return
+
+        try:
+            now = time.time()
+            self.redis_client.set(key, value, ex=self.ttl)
+            self.redis_client.zadd(_INDEX_KEY, {key: now})
+            self.redis_client.expire(_INDEX_KEY, self.ttl)
+            self._evict(now)
+        except Exception:
+            logger.exception(f"Failed to write contextual RAG cache: key={key}")
+
+    def _evict(self, now: float) -> None:
+        # entries that expired on their own only need to leave the index
+        self.redis_client.zremrangebyscore(_INDEX_KEY, "-inf", now - self.ttl)
+        num_over = cast(int, self.redis_client.zcard(_INDEX_KEY)) - self.max_entries
+        if num_over <= 0:
+            return
+
+        evicted = cast(
+            list[tuple[bytes, float]], self.redis_client.zpopmin(_INDEX_KEY, num_over)
+        )
+        for key, _ in evicted:
+            self.redis_client.delete(key)
+
+    def get_doc_summary(self, doc_content: str) -> str | None:
+        summary = self._get(self._doc_summary_key(doc_content))
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def set_doc_summary(self, doc_content: str, summary: str) -> None:
+        self._set(self._doc_summary_key(doc_content), summary)
+
+    def get_chunk_contexts(
+        self, doc_info: str, chunk_contents: list[str]
+    ) -> list[str | None]:
+        """Returns the cached context of each chunk (None if not cached), in order."""
+        raw_contexts = self._get(self._chunk_contexts_key(doc_info))
+        cached: dict[str, str] = json.loads(raw_contexts) if raw_contexts else {}
+
+        contexts = [cached.get(_hash(content)) for content in chunk_contents]
+        num_hits = sum(context is not None for context in contexts)
+        self.hits += num_hits
+        self.misses += len(contexts) - num_hits
+        return contexts
+
+    def set_chunk_contexts(self, doc_info: str, contexts: dict[str, str]) -> None:
+        """`contexts` maps chunk content to its context. Replaces whatever was cached
+        for the document, so chunks that no longer exist are dropped."""
+        self._set(
+            self._chunk_contexts_key(doc_info),
+            json.dumps(
+                {_hash(content): context for content, context in contexts.items()}
+            ),
+        )
+
+
+def get_contextual_rag_cache(llm: LLM, tenant_id: str) -> ContextualRAGCache | None:
+    if CONTEXTUAL_RAG_CACHE_TTL <= 0:
+        return None
+
+    return ContextualRAGCache(
+        redis_client=get_redis_client(tenant_id=tenant_id),
+        model_key=f"{llm.config.model_provider}/{llm.config.model_name}",
+        ttl=CONTEXTUAL_RAG_CACHE_TTL,
+    )
@@ -206,8 +206,10 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     )[0]
                     title_embed_dict[title] = title_embedding
 
+            # the chunks of a document share its source document instead of each
+            # getting a copy through model_dump
             new_embedded_chunk = IndexChunk(
-                **chunk.model_dump(),
+                **dict(chunk),
                 embeddings=ChunkEmbedding(
                     full_embedding=chunk_embeddings[0],
                     mini_chunk_embeddings=chunk_embeddings[1:],
@@ -0,0 +1,152 @@
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from llama_index.core.node_parser import SentenceSplitter
+    from llama_index.core.node_parser.text.sentence import _Split
+
+# Upper bound of the characters a single token covers in practice, texts longer than
+# limit * MAX_CHARS_PER_TOKEN are counted paragraph by paragraph instead of as a whole
+MAX_CHARS_PER_TOKEN = 100
+
+
+class IncrementalSentenceSplitter:
+    """
+    Splits a text into the same chunks as SentenceSplitter.split_text, measuring it
+    piece by piece instead of tokenizing the whole text up front.
+
+    SentenceSplitter splits a text longer than the chunk size into paragraphs, splits
+    each paragraph further if needed and merges the pieces into chunks left to right.
+    So once a text is known to contain several paragraphs and to exceed the chunk size,
+    each paragraph is measured when it is reached and each chunk is yielded as soon as
+    it is closed. A text without paragraph separators is split as a whole.
+
+    Token counts of paragraphs are assumed to add up to the count of the text, which
+    holds up to a token per paragraph break for the tokenizers in use. That slack is
+    accounted for before splitting by paragraph.
+
+    _iter_splits and _merge mirror private SentenceSplitter methods of the pinned
+    llama-index version, test_incremental_splitter compares the two.
+    """
+
+    def __init__(
+        self,
+        splitter: "SentenceSplitter",
+        count_tokens: Callable[[str], int] | None = None,
+    ) -> None:
+        self.splitter = splitter
+        # only used for count_tokens_up_to, splitting counts like the splitter does
+        self.count_tokens = count_tokens or splitter._token_size
+
+    def _paragraphs(self, text: str) -> list[str]:
+        """The non-empty paragraphs, split like SentenceSplitter splits them"""
+        from llama_index.core.node_parser.text.utils import split_text_keep_separator
+
+        return split_text_keep_separator(text, self.splitter.paragraph_separator)
+
+    def _exceeds(self, token_counts: list[int], token_limit: int) -> bool:
+        # every paragraph break may be counted one token too many
+        return sum(token_counts) - (len(token_counts) - 1) > token_limit
+
+    def count_tokens_up_to(self, text: str, token_limit: int) -> int:
+        """
+        The exact token count of the text if it is at most token_limit, otherwise some
+        count above token_limit. Long texts are only tokenized until they are known to
+        exceed the limit.
+        """
+        if len(text) <= token_limit * MAX_CHARS_PER_TOKEN:
+            return self.count_tokens(text)
+
+        token_counts: list[int] = []
+        for paragraph in self._paragraphs(text):
+            token_counts.append(self.count_tokens(paragraph))
+            if self._exceeds(token_counts, token_limit):
+                return sum(token_counts)
+        return self.count_tokens(text)
+
+    def _iter_splits(
+        self, text: str, chunk_size: int, token_size: int | None = None
+    ) -> Iterator["_Split"]:
+        """SentenceSplitter._split, measuring each piece only when it is reached"""
+        from llama_index.core.node_parser.text.sentence import _Split
+
+        if token_size is None:
+            token_size = self.splitter._token_size(text)
+        if token_size <= chunk_size:
+            yield _Split(text, is_sentence=True, token_size=token_size)
+            return
+
+        pieces, is_sentence = self.splitter._get_splits_by_fns(text)
+        for piece in pieces:
+            piece_token_size = self.splitter._token_size(piece)
+            if piece_token_size <= chunk_size:
+                yield _Split(
+                    piece, is_sentence=is_sentence, token_size=piece_token_size
+                )
+            else:
+                yield from self._iter_splits(piece, chunk_size, piece_token_size)
+
+    def _merge(self, splits: Iterable["_Split"]) -> Iterator[str]:
+        """SentenceSplitter._merge, yielding each chunk as soon as it is closed"""
+        chunk_size = self.splitter.chunk_size
+        chunk_overlap = self.splitter.chunk_overlap
+        cur_chunk: list[tuple[str, int]] = []
+        cur_chunk_len = 0
+
+        for split in splits:
+            if split.token_size > chunk_size:
+                raise ValueError("Single token exceeded chunk size")
+
+            if cur_chunk and cur_chunk_len + split.token_size > chunk_size:
+                chunk = "".join(text for text, _ in cur_chunk).strip()
+                if chunk:
+                    yield chunk
+
+                # carry the overlap over, the split then always gets added
+                last_chunk = cur_chunk
+                cur_chunk = []
+                cur_chunk_len = 0
+                for text, length in reversed(last_chunk):
+                    if cur_chunk_len + length > chunk_overlap:
+                        break
+                    cur_chunk_len += length
+                    cur_chunk.insert(0, (text, length))
+
+            cur_chunk_len += split.token_size
+            cur_chunk.append((split.text, split.token_size))
+
+        if cur_chunk:
+            chunk = "".join(text for text, _ in cur_chunk).strip()
+            if chunk:
+                yield chunk
+
+    def split_text(self, text: str) -> Iterator[str]:
+        """The chunks of SentenceSplitter.split_text, each yielded once it is closed"""
+        chunk_size = self.splitter.chunk_size
+        paragraphs = self._paragraphs(text)
+
+        token_counts: list[int] = []
+        for paragraph in paragraphs:
+            token_counts.append(self.splitter._token_size(paragraph))
+            if len(token_counts) > 1 and self._exceeds(token_counts, chunk_size):
+                break
+        else:
+            # a short text or a single paragraph, split it as a whole
+            yield from self.splitter.split_text(text)
+            return
+
+        def _paragraph_splits() -> Iterator["_Split"]:
+            for ind, paragraph in enumerate(paragraphs):
+                token_size = token_counts[ind] if ind < len(token_counts) else None
+                yield from self._iter_splits(paragraph, chunk_size, token_size)
+
+        yield from self._merge(_paragraph_splits())
+
+    def first_chunk(self, text: str) -> str:
+        """
+        The first chunk of split_text, or "" if there is none. Only the start of a long
+        text gets split and measured.
+        """
+        return next(self._merge(self._iter_splits(text, self.splitter.chunk_size)), "")
@@ -3,6 +3,7 @@ from collections.abc import Callable
 from functools import partial
 from typing import Protocol
 
+from langchain.schema.language_model import LanguageModelInput
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from sqlalchemy.orm import Session
@@ -35,15 +36,14 @@ from sambaai.db.document import fetch_chunk_counts_for_documents
 from sambaai.db.document import get_documents_by_ids
 from sambaai.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from sambaai.db.document import prepare_to_modify_documents
-from sambaai.db.document import update_docs_chunk_count__no_commit
-from sambaai.db.document import update_docs_last_modified__no_commit
-from sambaai.db.document import update_docs_updated_at__no_commit
+from sambaai.db.document import update_docs_indexing_status__no_commit
 from sambaai.db.document import upsert_document_by_connector_credential_pair
 from sambaai.db.document import upsert_documents
 from sambaai.db.document_set import fetch_document_sets_for_documents
 from sambaai.db.engine import get_session_with_current_tenant
 from sambaai.db.models import Document as DBDocument
 from sambaai.db.models import IndexModelStatus
+from sambaai.db.models import SearchSettings
 from sambaai.db.pg_file_store import get_pgfilestore_by_file_name
 from sambaai.db.pg_file_store import read_lobj
 from sambaai.db.search_settings import get_active_search_settings
@@ -56,11 +56,14 @@ from sambaai.document_index.document_index_utils import (
     get_multipass_config,
 )
 from sambaai.document_index.interfaces import DocumentIndex
+from sambaai.document_index.interfaces import DocumentInsertionRecord
 from sambaai.document_index.interfaces import DocumentMetadata
 from sambaai.document_index.interfaces import IndexBatchParams
 from sambaai.file_processing.image_summarization import summarize_image_with_error_handling
 from sambaai.file_store.utils import store_user_file_plaintext
 from sambaai.indexing.chunker import Chunker
+from sambaai.indexing.contextual_rag_cache import ContextualRAGCache
+from sambaai.indexing.contextual_rag_cache import get_contextual_rag_cache
 from sambaai.indexing.embedder import embed_chunks_with_failure_handling
 from sambaai.indexing.embedder import IndexingEmbedder
 from sambaai.indexing.indexing_heartbeat import IndexingHeartbeatInterface
@@ -74,8 +77,11 @@ from sambaai.llm.factory import get_default_llm_with_vision
 from sambaai.llm.factory import get_default_llms
 from sambaai.llm.factory import get_llm_for_contextual_rag
 from sambaai.llm.interfaces import LLM
+from sambaai.llm.utils import build_prompt_with_cached_prefix
 from sambaai.llm.utils import MAX_CONTEXT_TOKENS
 from sambaai.llm.utils import message_to_string
+from sambaai.llm.utils import model_requires_prompt_cache_markers
+from sambaai.llm.work_executor import LLMWorkExecutor
 from sambaai.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
@@ -86,7 +92,6 @@ from sambaai.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT1
 from sambaai.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
 from sambaai.prompts.chat_prompts import DOCUMENT_SUMMARY_PROMPT
 from sambaai.utils.logger import setup_logger
-from sambaai.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from sambaai.utils.timing import log_function_time
 from shared_configs.configs import (
     INDEXING_INFORMATION_CONTENT_CLASSIFICATION_CUTOFF_LENGTH,
@@ -561,9 +566,10 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
 
 def add_document_summaries(
     chunks_by_doc: list[DocAwareChunk],
-    llm: LLM,
+    llm_executor: LLMWorkExecutor,
     tokenizer: BaseTokenizer,
     trunc_doc_tokens: int,
+    cache: ContextualRAGCache | None = None,
 ) -> list[int] | None:
     """
     Adds a document summary to a list of chunks from the same document.
@@ -579,10 +585,7 @@ def add_document_summaries(
 
     doc_tokens = tokenizer.encode(chunks_by_doc[0].source_document.get_text_content())
     doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_tokens, tokenizer)
-    summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-    doc_summary = message_to_string(
-        llm.invoke(summary_prompt, max_tokens=MAX_CONTEXT_TOKENS)
-    )
+    doc_summary = _summarize_document(doc_content, llm_executor, cache)
 
     for chunk in chunks_by_doc:
         chunk.doc_summary = doc_summary
@@ -590,12 +593,32 @@ def add_document_summaries(
     return doc_tokens
 
 
+def _summarize_document(
+    doc_content: str, llm_executor: LLMWorkExecutor, cache: ContextualRAGCache | None
+) -> str:
+    doc_summary = cache.get_doc_summary(doc_content) if cache else None
+    if doc_summary is not None:
+        return doc_summary
+
+    doc_summary = message_to_string(
+        llm_executor.invoke(
+            DOCUMENT_SUMMARY_PROMPT.format(document=doc_content),
+            max_tokens=MAX_CONTEXT_TOKENS,
+        )
+    )
+    if cache:
+        cache.set_doc_summary(doc_content, doc_summary)
+    return doc_summary
+
+
 def add_chunk_summaries(
     chunks_by_doc: list[DocAwareChunk],
-    llm: LLM,
+    llm_executor: LLMWorkExecutor,
     tokenizer: BaseTokenizer,
     trunc_doc_chunk_tokens: int,
     doc_tokens: list[int] | None,
+    cache: ContextualRAGCache | None = None,
+    use_prompt_cache_markers: bool = False,
 ) -> None:
     """
     Adds chunk summaries to the chunks grouped by document id.
@@ -621,36 +644,65 @@ def add_chunk_summaries(
     if not doc_info:
         # This happens if the document is too long AND document summaries are turned off
         # In this case we compute a doc summary using the LLM
-        doc_info = message_to_string(
-            llm.invoke(
-                DOCUMENT_SUMMARY_PROMPT.format(document=doc_content),
-                max_tokens=MAX_CONTEXT_TOKENS,
-            )
+        doc_info = _summarize_document(doc_content, llm_executor, cache)
+
+    chunks_to_contextualize = chunks_by_doc
+    if cache:
+        cached_contexts = cache.get_chunk_contexts(
+            doc_info, [chunk.content for chunk in chunks_by_doc]
         )
+        chunks_to_contextualize = []
+        for chunk, cached_context in zip(chunks_by_doc, cached_contexts):
+            if cached_context is None:
+                chunks_to_contextualize.append(chunk)
+            else:
+                chunk.chunk_context = cached_context
+
+        if not chunks_to_contextualize:
+            return
 
+    # the document part of the prompt is identical for every chunk, so it is placed
+    # first to let the provider cache it
     context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
 
     def assign_context(chunk: DocAwareChunk) -> None:
         context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
+        prompt: LanguageModelInput = (
+            build_prompt_with_cached_prefix(context_prompt1, context_prompt2)
+            if use_prompt_cache_markers
+            else context_prompt1 + context_prompt2
+        )
         try:
             chunk.chunk_context = message_to_string(
-                llm.invoke(
-                    context_prompt1 + context_prompt2,
-                    max_tokens=MAX_CONTEXT_TOKENS,
-                )
+                llm_executor.invoke(prompt, max_tokens=MAX_CONTEXT_TOKENS)
             )
         except LLMRateLimitError as e:
-            # Erroring during chunker is undesirable, so we log the error and continue
-            # TODO: for v2, add robust retry logic
+            # Erroring during chunker is undesirable, so we log the error and continue.
+            # Only happens once the executor has run out of retries
             logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
             chunk.chunk_context = ""
         except Exception as e:
             logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
             chunk.chunk_context = ""
 
-    run_functions_tuples_in_parallel(
-        [(assign_context, (chunk,)) for chunk in chunks_by_doc]
-    )
+    # the prefix is only cached once the first request completes, so the
+    # first chunk is done on its own before fanning out
+    if use_prompt_cache_markers:
+        assign_context(chunks_to_contextualize[0])
+        chunks_to_contextualize = chunks_to_contextualize[1:]
+
+    llm_executor.run([(assign_context, (chunk,)) for chunk in chunks_to_contextualize])
+
+    if cache:
+        # failed chunks are left with an empty context and are retried next time
+        cache.set_chunk_contexts(
+            doc_info,
+            {
+                chunk.content: chunk.chunk_context
+                for chunk in chunks_by_doc
+                if chunk.chunk_context
+            },
+        )
 
 
 def add_contextual_summaries(
@@ -658,10 +710,13 @@ def add_contextual_summaries(
     llm: LLM,
     tokenizer: BaseTokenizer,
     chunk_token_limit: int,
+    cache: ContextualRAGCache | None = None,
+    callback: IndexingHeartbeatInterface | None = None,
 ) -> list[DocAwareChunk]:
     """
     Adds Document summary and chunk-within-document context to the chunks
-    based on which environment variables are set.
+    based on which environment variables are set. Results are looked up in / stored
+    to `cache` if provided.
     """
     doc2chunks = defaultdict(list)
     for chunk in chunks:
@@ -680,21 +735,291 @@ def add_contextual_summaries(
     trunc_doc_chunk_tokens = (
         llm.config.max_input_tokens - prompt_tokens - chunk_token_limit
     )
+    use_prompt_cache_markers = USE_CHUNK_SUMMARY and (
+        model_requires_prompt_cache_markers(
+            model_name=llm.config.model_name,
+            model_provider=llm.config.model_provider,
+        )
+    )
+    llm_executor = LLMWorkExecutor(
+        llm,
+        # keep the heartbeat alive while waiting on (possibly rate limited) LLM calls
+        progress_callback=(
+            (lambda _, __: callback.progress("add_contextual_summaries", 0))
+            if callback
+            else None
+        ),
+    )
     for chunks_by_doc in doc2chunks.values():
         doc_tokens = None
         if USE_DOCUMENT_SUMMARY:
             doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
+                chunks_by_doc, llm_executor, tokenizer, trunc_doc_summary_tokens, cache
             )
 
         if USE_CHUNK_SUMMARY:
             add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
+                chunks_by_doc,
+                llm_executor,
+                tokenizer,
+                trunc_doc_chunk_tokens,
+                doc_tokens,
+                cache,
+                use_prompt_cache_markers,
             )
 
+    if cache:
+        logger.debug(f"Contextual RAG cache: hits={cache.hits} misses={cache.misses}")
+    logger.debug(f"Contextual RAG LLM calls: {llm_executor.stats}")
+
     return chunks
 
 
+def _index_locked_documents(
+    *,
+    document_ids: list[str],
+    indexed_document_ids: list[str],
+    ctx: DocumentBatchPrepareContext,
+    chunks_with_embeddings: list[IndexChunk],
+    chunk_content_scores: list[float],
+    embedding_failures: list[ConnectorFailure],
+    chunker: Chunker,
+    document_index: DocumentIndex,
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+    tenant_id: str,
+) -> tuple[list[DocumentInsertionRecord], list[ConnectorFailure], int]:
+    """Writes the chunks of `document_ids`, which must be locked by the caller, to the
+    document index and records them as indexed in postgres together with
+    `indexed_document_ids`. Commits, which releases the locks.
+
+    Returns the insertion records, the write failures and the number of chunks."""
+    no_access = DocumentAccess.build(
+        user_emails=[],
+        user_groups=[],
+        external_user_emails=[],
+        external_user_group_ids=[],
+        is_public=False,
+    )
+
+    document_id_set = set(document_ids)
+    chunk_nums = [
+        chunk_num
+        for chunk_num, chunk in enumerate(chunks_with_embeddings)
+        if chunk.source_document.id in document_id_set
+    ]
+    chunk_content_scores = [chunk_content_scores[i] for i in chunk_nums]
+    chunks_with_embeddings = [chunks_with_embeddings[i] for i in chunk_nums]
+    updatable_chunk_data = [
+        UpdatableChunkData(
+            chunk_id=chunk.chunk_id,
+            document_id=chunk.source_document.id,
+            boost_score=score,
+        )
+        for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
+    ]
+
+    doc_id_to_access_info = get_access_for_documents(
+        document_ids=document_ids, db_session=db_session
+    )
+    doc_id_to_document_set = {
+        document_id: document_sets
+        for document_id, document_sets in fetch_document_sets_for_documents(
+            document_ids=document_ids, db_session=db_session
+        )
+    }
+
+    doc_id_to_user_file_id: dict[str, int | None] = fetch_user_files_for_documents(
+        document_ids=document_ids, db_session=db_session
+    )
+    doc_id_to_user_folder_id: dict[str, int | None] = fetch_user_folders_for_documents(
+        document_ids=document_ids, db_session=db_session
+    )
+
+    doc_id_to_previous_chunk_cnt: dict[str, int | None] = {
+        document_id: chunk_count
+        for document_id, chunk_count in fetch_chunk_counts_for_documents(
+            document_ids=document_ids,
+            db_session=db_session,
+        )
+    }
+
+    doc_id_to_new_chunk_cnt: dict[str, int] = {
+        document_id: len(
+            [
+                chunk
+                for chunk in chunks_with_embeddings
+                if chunk.source_document.id == document_id
+            ]
+        )
+        for document_id in document_ids
+    }
+
+    try:
+        llm, _ = get_default_llms()
+
+        llm_tokenizer = get_tokenizer(
+            model_name=llm.config.model_name,
+            provider_type=llm.config.model_provider,
+        )
+    except Exception as e:
+        logger.error(f"Error getting tokenizer: {e}")
+        llm_tokenizer = None
+
+    # Calculate token counts for each document by combining all its chunks' content
+    user_file_id_to_token_count: dict[int, int | None] = {}
+    user_file_id_to_raw_text: dict[int, str] = {}
+    for document_id in document_ids:
+        # Only calculate token counts for documents that have a user file ID
+        if (
+            document_id in doc_id_to_user_file_id
+            and doc_id_to_user_file_id[document_id] is not None
+        ):
+            user_file_id = doc_id_to_user_file_id[document_id]
+            if not user_file_id:
+                continue
+            document_chunks = [
+                chunk
+                for chunk in chunks_with_embeddings
+                if chunk.source_document.id == document_id
+            ]
+            if document_chunks:
+                combined_content = " ".join(
+                    [chunk.content for chunk in document_chunks]
+                )
+                token_count = (
+                    len(llm_tokenizer.encode(combined_content)) if llm_tokenizer else 0
+                )
+                user_file_id_to_token_count[user_file_id] = token_count
+                user_file_id_to_raw_text[user_file_id] = combined_content
+            else:
+                user_file_id_to_token_count[user_file_id] = None
+
+    # we're concerned about race conditions where multiple simultaneous indexings might result
+    # in one set of metadata overwriting another one in vespa.
+    # we still write data here for the immediate and most likely correct sync, but
+    # to resolve this, an update of the last modified field at the end of this loop
+    # always triggers a final metadata sync via the celery queue
+    access_aware_chunks = [
+        DocMetadataAwareIndexChunk.from_index_chunk(
+            index_chunk=chunk,
+            access=doc_id_to_access_info.get(chunk.source_document.id, no_access),
+            document_sets=set(doc_id_to_document_set.get(chunk.source_document.id, [])),
+            user_file=doc_id_to_user_file_id.get(chunk.source_document.id, None),
+            user_folder=doc_id_to_user_folder_id.get(chunk.source_document.id, None),
+            boost=(
+                ctx.id_to_db_doc_map[chunk.source_document.id].boost
+                if chunk.source_document.id in ctx.id_to_db_doc_map
+                else DEFAULT_BOOST
+            ),
+            tenant_id=tenant_id,
+            aggregated_chunk_boost_factor=chunk_content_scores[chunk_num],
+        )
+        for chunk_num, chunk in enumerate(chunks_with_embeddings)
+    ]
+
+    short_descriptor_list = [
+        chunk.to_short_descriptor() for chunk in access_aware_chunks
+    ]
+    short_descriptor_log = str(short_descriptor_list)[:1024]
+    logger.debug(f"Indexing the following chunks: {short_descriptor_log}")
+
+    # A document will not be spread across different batches, so all the
+    # documents with chunks in this set, are fully represented by the chunks
+    # in this set
+    (
+        insertion_records,
+        vector_db_write_failures,
+    ) = write_chunks_to_vector_db_with_backoff(
+        document_index=document_index,
+        chunks=access_aware_chunks,
+        index_batch_params=IndexBatchParams(
+            doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
+            doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
+            tenant_id=tenant_id,
+            large_chunks_enabled=chunker.enable_large_chunks,
+        ),
+    )
+
+    all_returned_doc_ids = (
+        {record.document_id for record in insertion_records}
+        .union(
+            {
+                record.failed_document.document_id
+                for record in vector_db_write_failures
+                if record.failed_document
+            }
+        )
+        .union(
+            {
+                record.failed_document.document_id
+                for record in embedding_failures
+                if record.failed_document
+                and record.failed_document.document_id in document_id_set
+            }
+        )
+    )
+    if all_returned_doc_ids != set(document_ids):
+        raise RuntimeError(
+            f"Some documents were not successfully indexed. "
+            f"Updatable IDs: {document_ids}, "
+            f"Returned IDs: {all_returned_doc_ids}. "
+            "This should never happen."
+        )
+
+    ids_to_new_updated_at = {}
+    for doc in ctx.updatable_docs:
+        if doc.id not in document_id_set:
+            continue
+        # doc_updated_at is the source's idea (on the other end of the connector)
+        # of when the doc was last modified
+        if doc.doc_updated_at is None:
+            continue
+        ids_to_new_updated_at[doc.id] = doc.doc_updated_at
+
+    # updates chunk count, last modified and doc_updated_at of the indexed
+    # documents. These documents can now also be counted as part of the CC Pairs
+    # document count, so we need to mark them as indexed
+    # NOTE: even documents we skipped since they were already up
+    # to date should be counted here in order to maintain parity
+    # between CC Pair and index attempt counts
+    update_docs_indexing_status__no_commit(
+        db_session=db_session,
+        connector_id=index_attempt_metadata.connector_id,
+        credential_id=index_attempt_metadata.credential_id,
+        doc_id_to_chunk_count={
+            document_id: doc_id_to_new_chunk_cnt[document_id]
+            for document_id in document_ids
+        },
+        ids_to_new_updated_at=ids_to_new_updated_at,
+        indexed_document_ids=indexed_document_ids,
+    )
+
+    update_user_file_token_count__no_commit(
+        user_file_id_to_token_count=user_file_id_to_token_count,
+        db_session=db_session,
+    )
+    # Store the plaintext in the file store for faster retrieval
+    for user_file_id, raw_text in user_file_id_to_raw_text.items():
+        # Use the dedicated function to store plaintext
+        store_user_file_plaintext(
+            user_file_id=user_file_id,
+            plaintext_content=raw_text,
+            db_session=db_session,
+        )
+
+    # save the chunk boost components to postgres
+    update_chunk_boost_components__no_commit(
+        chunk_data=updatable_chunk_data, db_session=db_session
+    )
+
+    # Pause user file ccpairs
+
+    db_session.commit()
+
+    return insertion_records, vector_db_write_failures, len(access_aware_chunks)
+
+
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -718,14 +1043,6 @@ def index_doc_batch(
     Returns a tuple where the first element is the number of new docs and the
     second element is the number of chunks."""
 
-    no_access = DocumentAccess.build(
-        user_emails=[],
-        user_groups=[],
-        external_user_emails=[],
-        external_user_group_ids=[],
-        is_public=False,
-    )
-
     filtered_documents = filter_fnc(document_batch)
 
     ctx = index_doc_batch_prepare(
@@ -786,6 +1103,8 @@ def index_doc_batch(
             llm=llm,
             tokenizer=llm_tokenizer,
             chunk_token_limit=chunker.chunk_token_limit * 2,
+            cache=get_contextual_rag_cache(llm, tenant_id),
+            callback=chunker.callback,
         )
 
     logger.debug("Starting embedding")
@@ -809,242 +1128,103 @@ def index_doc_batch(
     )
 
     updatable_ids = [doc.id for doc in ctx.updatable_docs]
-    updatable_chunk_data = [
-        UpdatableChunkData(
-            chunk_id=chunk.chunk_id,
-            document_id=chunk.source_document.id,
-            boost_score=score,
-        )
-        for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
-    ]
+
+    insertion_records: list[DocumentInsertionRecord] = []
+    vector_db_write_failures: list[ConnectorFailure] = []
+    total_chunks = 0
 
     # Acquires a lock on the documents so that no other process can modify them
     # NOTE: don't need to acquire till here, since this is when the actual race condition
     # with Vespa can occur.
-    with prepare_to_modify_documents(db_session=db_session, document_ids=updatable_ids):
-        doc_id_to_access_info = get_access_for_documents(
-            document_ids=updatable_ids, db_session=db_session
-        )
-        doc_id_to_document_set = {
-            document_id: document_sets
-            for document_id, document_sets in fetch_document_sets_for_documents(
-                document_ids=updatable_ids, db_session=db_session
-            )
-        }
-
-        doc_id_to_user_file_id: dict[str, int | None] = fetch_user_files_for_documents(
-            document_ids=updatable_ids, db_session=db_session
-        )
-        doc_id_to_user_folder_id: dict[str, int | None] = (
-            fetch_user_folders_for_documents(
-                document_ids=updatable_ids, db_session=db_session
-            )
-        )
-
-        doc_id_to_previous_chunk_cnt: dict[str, int | None] = {
-            document_id: chunk_count
-            for document_id, chunk_count in fetch_chunk_counts_for_documents(
-                document_ids=updatable_ids,
-                db_session=db_session,
-            )
-        }
-
-        doc_id_to_new_chunk_cnt: dict[str, int] = {
-            document_id: len(
-                [
-                    chunk
-                    for chunk in chunks_with_embeddings
-                    if chunk.source_document.id == document_id
-                ]
-            )
-            for document_id in updatable_ids
-        }
-
-        try:
-            llm, _ = get_default_llms()
-
-            llm_tokenizer = get_tokenizer(
-                model_name=llm.config.model_name,
-                provider_type=llm.config.model_provider,
-            )
-        except Exception as e:
-            logger.error(f"Error getting tokenizer: {e}")
-            llm_tokenizer = None
-
-        # Calculate token counts for each document by combining all its chunks' content
-        user_file_id_to_token_count: dict[int, int | None] = {}
-        user_file_id_to_raw_text: dict[int, str] = {}
-        for document_id in updatable_ids:
-            # Only calculate token counts for documents that have a user file ID
-            if (
-                document_id in doc_id_to_user_file_id
-                and doc_id_to_user_file_id[document_id] is not None
-            ):
-                user_file_id = doc_id_to_user_file_id[document_id]
-                if not user_file_id:
-                    continue
-                document_chunks = [
-                    chunk
-                    for chunk in chunks_with_embeddings
-                    if chunk.source_document.id == document_id
-                ]
-                if document_chunks:
-                    combined_content = " ".join(
-                        [chunk.content for chunk in document_chunks]
-                    )
-                    token_count = (
-                        len(llm_tokenizer.encode(combined_content))
-                        if llm_tokenizer
-                        else 0
-                    )
-                    user_file_id_to_token_count[user_file_id] = token_count
-                    user_file_id_to_raw_text[user_file_id] = combined_content
-                else:
-                    user_file_id_to_token_count[user_file_id] = None
-
-        # we're concerned about race conditions where multiple simultaneous indexings might result
-        # in one set of metadata overwriting another one in vespa.
-        # we still write data here for the immediate and most likely correct sync, but
-        # to resolve this, an update of the last modified field at the end of this loop
-        # always triggers a final metadata sync via the celery queue
-        access_aware_chunks = [
-            DocMetadataAwareIndexChunk.from_index_chunk(
-                index_chunk=chunk,
-                access=doc_id_to_access_info.get(chunk.source_document.id, no_access),
-                document_sets=set(
-                    doc_id_to_document_set.get(chunk.source_document.id, [])
-                ),
-                user_file=doc_id_to_user_file_id.get(chunk.source_document.id, None),
-                user_folder=doc_id_to_user_folder_id.get(
-                    chunk.source_document.id, None
-                ),
-                boost=(
-                    ctx.id_to_db_doc_map[chunk.source_document.id].boost
-                    if chunk.source_document.id in ctx.id_to_db_doc_map
-                    else DEFAULT_BOOST
-                ),
-                tenant_id=tenant_id,
-                aggregated_chunk_boost_factor=chunk_content_scores[chunk_num],
-            )
-            for chunk_num, chunk in enumerate(chunks_with_embeddings)
-        ]
-
-        short_descriptor_list = [
-            chunk.to_short_descriptor() for chunk in access_aware_chunks
-        ]
-        short_descriptor_log = str(short_descriptor_list)[:1024]
-        logger.debug(f"Indexing the following chunks: {short_descriptor_log}")
-
-        # A document will not be spread across different batches, so all the
-        # documents with chunks in this set, are fully represented by the chunks
-        # in this set
-        (
-            insertion_records,
-            vector_db_write_failures,
-        ) = write_chunks_to_vector_db_with_backoff(
-            document_index=document_index,
-            chunks=access_aware_chunks,
-            index_batch_params=IndexBatchParams(
-                doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
-                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
-                tenant_id=tenant_id,
-                large_chunks_enabled=chunker.enable_large_chunks,
-            ),
-        )
-
-        all_returned_doc_ids = (
-            {record.document_id for record in insertion_records}
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in vector_db_write_failures
-                    if record.failed_document
-                }
-            )
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in embedding_failures
-                    if record.failed_document
-                }
-            )
-        )
-        if all_returned_doc_ids != set(updatable_ids):
-            raise RuntimeError(
-                f"Some documents were not successfully indexed. "
-                f"Updatable IDs: {updatable_ids}, "
-                f"Returned IDs: {all_returned_doc_ids}. "
-                "This should never happen."
-            )
-
-        last_modified_ids = []
-        ids_to_new_updated_at = {}
-        for doc in ctx.updatable_docs:
-            last_modified_ids.append(doc.id)
-            # doc_updated_at is the source's idea (on the other end of the connector)
-            # of when the doc was last modified
-            if doc.doc_updated_at is None:
-                continue
-            ids_to_new_updated_at[doc.id] = doc.doc_updated_at
-
-        update_docs_updated_at__no_commit(
-            ids_to_new_updated_at=ids_to_new_updated_at, db_session=db_session
-        )
-
-        update_docs_last_modified__no_commit(
-            document_ids=last_modified_ids, db_session=db_session
-        )
-
-        update_docs_chunk_count__no_commit(
-            document_ids=updatable_ids,
-            doc_id_to_chunk_count=doc_id_to_new_chunk_cnt,
-            db_session=db_session,
-        )
-
-        update_user_file_token_count__no_commit(
-            user_file_id_to_token_count=user_file_id_to_token_count,
-            db_session=db_session,
-        )
-
-        # these documents can now be counted as part of the CC Pairs
-        # document count, so we need to mark them as indexed
-        # NOTE: even documents we skipped since they were already up
-        # to date should be counted here in order to maintain parity
-        # between CC Pair and index attempt counts
-        mark_document_as_indexed_for_cc_pair__no_commit(
-            connector_id=index_attempt_metadata.connector_id,
-            credential_id=index_attempt_metadata.credential_id,
-            document_ids=[doc.id for doc in filtered_documents],
-            db_session=db_session,
-        )
-        # Store the plaintext in the file store for faster retrieval
-        for user_file_id, raw_text in user_file_id_to_raw_text.items():
-            # Use the dedicated function to store plaintext
-            store_user_file_plaintext(
-                user_file_id=user_file_id,
-                plaintext_content=raw_text,
-                db_session=db_session,
+    # The first pass skips documents locked by another job (e.g. another connector
+    # indexing the same document) instead of waiting for them. They are deferred to a
+    # second pass which waits for their locks, so the rest of the batch isn't blocked.
+    # NOTE: documents we skipped since they were already up to date are recorded as
+    # indexed as well in order to maintain parity between CC Pair and index attempt
+    # counts
+    updatable_id_set = set(updatable_ids)
+    indexed_document_ids = [
+        doc.id for doc in filtered_documents if doc.id not in updatable_id_set
+    ]
+    pending_ids = updatable_ids
+    for skip_locked in (True, False):
+        if not pending_ids:
+            break
+
+        with prepare_to_modify_documents(
+            db_session=db_session, document_ids=pending_ids, skip_locked=skip_locked
+        ) as locks:
+            if locks.locked_ids:
+                records, failures, num_chunks = _index_locked_documents(
+                    document_ids=locks.locked_ids,
+                    indexed_document_ids=indexed_document_ids + locks.locked_ids,
+                    ctx=ctx,
+                    chunks_with_embeddings=chunks_with_embeddings,
+                    chunk_content_scores=chunk_content_scores,
+                    embedding_failures=embedding_failures,
+                    chunker=chunker,
+                    document_index=document_index,
+                    index_attempt_metadata=index_attempt_metadata,
+                    db_session=db_session,
+                    tenant_id=tenant_id,
+                )
+                insertion_records.extend(records)
+                vector_db_write_failures.extend(failures)
+                total_chunks += num_chunks
+                indexed_document_ids = []
+
+        if locks.skipped_ids:
+            logger.info(
+                f"Deferred {len(locks.skipped_ids)} documents locked by other jobs "
+                "to the end of the batch"
             )
-
-        # save the chunk boost components to postgres
-        update_chunk_boost_components__no_commit(
-            chunk_data=updatable_chunk_data, db_session=db_session
-        )
-
-        # Pause user file ccpairs
-
-        db_session.commit()
+        pending_ids = locks.skipped_ids
 
     result = IndexingPipelineResult(
         new_docs=len([r for r in insertion_records if r.already_existed is False]),
         total_docs=len(filtered_documents),
-        total_chunks=len(access_aware_chunks),
+        total_chunks=total_chunks,
         failures=vector_db_write_failures + embedding_failures,
     )
 
     return result
 
 
+def _get_indexing_search_settings(db_session: Session) -> SearchSettings:
+    all_search_settings = get_active_search_settings(db_session)
+    if (
+        all_search_settings.secondary
+        and all_search_settings.secondary.status == IndexModelStatus.FUTURE
+    ):
+        return all_search_settings.secondary
+    return all_search_settings.primary
+
+
+def build_chunker(
+    *,
+    embedder: IndexingEmbedder,
+    db_session: Session,
+    callback: IndexingHeartbeatInterface | None = None,
+    num_processes: int = 0,
+) -> Chunker:
+    """Builds the chunker build_indexing_pipeline uses by default. A chunker with
+    worker processes should be closed by the caller once indexing is done."""
+    search_settings = _get_indexing_search_settings(db_session)
+    multipass_config = get_multipass_config(search_settings)
+
+    return Chunker(
+        tokenizer=embedder.embedding_model.tokenizer,
+        enable_multipass=multipass_config.multipass_indexing,
+        enable_large_chunks=multipass_config.enable_large_chunks,
+        enable_contextual_rag=(
+            search_settings.enable_contextual_rag or ENABLE_CONTEXTUAL_RAG
+        ),
+        # after every doc, update status in case there are a bunch of really long docs
+        callback=callback,
+        num_processes=num_processes,
+    )
+
+
 def build_indexing_pipeline(
     *,
     embedder: IndexingEmbedder,
@@ -1057,16 +1237,7 @@ def build_indexing_pipeline(
     callback: IndexingHeartbeatInterface | None = None,
 ) -> IndexingPipelineProtocol:
     """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
-    all_search_settings = get_active_search_settings(db_session)
-    if (
-        all_search_settings.secondary
-        and all_search_settings.secondary.status == IndexModelStatus.FUTURE
-    ):
-        search_settings = all_search_settings.secondary
-    else:
-        search_settings = all_search_settings.primary
-
-    multipass_config = get_multipass_config(search_settings)
+    search_settings = _get_indexing_search_settings(db_session)
 
     enable_contextual_rag = (
         search_settings.enable_contextual_rag or ENABLE_CONTEXTUAL_RAG
@@ -1079,13 +1250,8 @@ def build_indexing_pipeline(
             or DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER,
         )
 
-    chunker = chunker or Chunker(
-        tokenizer=embedder.embedding_model.tokenizer,
-        enable_multipass=multipass_config.multipass_indexing,
-        enable_large_chunks=multipass_config.enable_large_chunks,
-        enable_contextual_rag=enable_contextual_rag,
-        # after every doc, update status in case there are a bunch of really long docs
-        callback=callback,
+    chunker = chunker or build_chunker(
+        embedder=embedder, db_session=db_session, callback=callback
     )
 
     return partial(
@@ -117,9 +117,10 @@ class DocMetadataAwareIndexChunk(IndexChunk):
         aggregated_chunk_boost_factor: float,
         tenant_id: str,
     ) -> "DocMetadataAwareIndexChunk":
-        index_chunk_data = index_chunk.model_dump()
+        # dict() keeps the field values as they are, model_dump would copy the whole
+        # source document into every chunk
         return cls(
-            **index_chunk_data,
+            **dict(index_chunk),
             access=access,
             document_sets=document_sets,
             user_file=user_file,
@@ -1,3 +1,4 @@
+import copy
 import json
 import os
 import traceback
@@ -33,6 +34,7 @@ from sambaai.configs.model_configs import (
 )
 from sambaai.configs.model_configs import GEN_AI_TEMPERATURE
 from sambaai.configs.model_configs import LITELLM_EXTRA_BODY
+from sambaai.llm.http_client import get_litellm_client
 from sambaai.llm.interfaces import LLM
 from sambaai.llm.interfaces import LLMConfig
 from sambaai.llm.interfaces import ToolChoiceOptions
@@ -284,6 +286,7 @@ class DefaultMultiLLM(LLM):
 
         # Create a dictionary for model-specific arguments if it's None
         model_kwargs = model_kwargs or {}
+        self._custom_config_env: dict[str, str] = {}
 
         # NOTE: have to set these as environment variables for Litellm since
         # not all are able to passed in but they always support them set as env
@@ -305,7 +308,8 @@ class DefaultMultiLLM(LLM):
                         continue
 
                 # for all values, set them as env variables
-                os.environ[k] = v
+                self._custom_config_env[k] = v
+            self.apply_custom_config_env()
 
         if extra_headers:
             model_kwargs.update({"extra_headers": extra_headers})
@@ -314,6 +318,21 @@ class DefaultMultiLLM(LLM):
 
         self._model_kwargs = model_kwargs
 
+    def apply_custom_config_env(self) -> None:
+        """Sets the custom config env variables again. LLMs are cached by the
+        factory, in the meantime another LLM may have set the same variables."""
+        for k, v in self._custom_config_env.items():
+            os.environ[k] = v
+
+    def with_long_term_logger(
+        self, long_term_logger: LongTermLogger
+    ) -> "DefaultMultiLLM":
+        """Returns a shallow copy that records to the given logger, so that a cached
+        LLM can be used for a request without rebuilding it."""
+        llm = copy.copy(self)
+        llm._long_term_logger = long_term_logger
+        return llm
+
     def log_model_configs(self) -> None:
         logger.debug(f"Config: {self.config}")
 
@@ -385,6 +404,17 @@ class DefaultMultiLLM(LLM):
         ):
             final_model_kwargs[VERTEX_CREDENTIALS_KWARG] = self.config.credentials_file
 
+        # long lived connection pool per provider / API base
+        client = (
+            None
+            if self._custom_llm_provider
+            else get_litellm_client(
+                model_provider=self.config.model_provider,
+                api_base=self._api_base or None,
+                api_key=self._api_key or None,
+            )
+        )
+
         try:
             return litellm.completion(
                 mock_response=MOCK_LLM_RESPONSE,
@@ -430,6 +460,7 @@ class DefaultMultiLLM(LLM):
                     if structured_response_format
                     else {}
                 ),
+                **({"client": client} if client else {}),
                 **final_model_kwargs,
             )
         except Exception as e:
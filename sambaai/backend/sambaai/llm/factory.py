@@ -1,9 +1,11 @@
+from functools import lru_cache
 from typing import Any
 
 from sambaai.chat.models import PersonaOverrideConfig
 from sambaai.configs.app_configs import DISABLE_GENERATIVE_AI
 from sambaai.configs.model_configs import GEN_AI_MODEL_FALLBACK_MAX_TOKENS
 from sambaai.configs.model_configs import GEN_AI_TEMPERATURE
+from sambaai.configs.model_configs import LLM_FACTORY_CACHE_SIZE
 from sambaai.db.engine import get_session_context_manager
 from sambaai.db.engine import get_session_with_current_tenant
 from sambaai.db.llm import fetch_default_provider
@@ -257,6 +259,36 @@ def get_default_llms(
     return _create_llm(model_name), _create_llm(fast_model_name)
 
 
+@lru_cache(maxsize=LLM_FACTORY_CACHE_SIZE)
+def _get_cached_llm(
+    provider: str,
+    model: str,
+    max_input_tokens: int,
+    deployment_name: str | None,
+    api_key: str | None,
+    api_base: str | None,
+    api_version: str | None,
+    custom_config: tuple[tuple[str, str], ...] | None,
+    temperature: float,
+    timeout: int | None,
+    extra_headers: tuple[tuple[str, str], ...],
+) -> DefaultMultiLLM:
+    return DefaultMultiLLM(
+        model_provider=provider,
+        model_name=model,
+        deployment_name=deployment_name,
+        api_key=api_key,
+        api_base=api_base,
+        api_version=api_version,
+        timeout=timeout,
+        temperature=temperature,
+        custom_config=dict(custom_config) if custom_config is not None else None,
+        extra_headers=dict(extra_headers),
+        model_kwargs=_build_extra_model_kwargs(provider),
+        max_input_tokens=max_input_tokens,
+    )
+
+
 def get_llm(
     provider: str,
     model: str,
@@ -271,20 +303,28 @@ def get_llm(
     additional_headers: dict[str, str] | None = None,
     long_term_logger: LongTermLogger | None = None,
 ) -> LLM:
+    """LLMs are cached per (provider, model, config) since the same few are used by
+    every chat message. Only the long term logger differs between requests."""
     if temperature is None:
         temperature = GEN_AI_TEMPERATURE
-    return DefaultMultiLLM(
-        model_provider=provider,
-        model_name=model,
+    llm = _get_cached_llm(
+        provider=provider,
+        model=model,
+        max_input_tokens=max_input_tokens,
         deployment_name=deployment_name,
         api_key=api_key,
         api_base=api_base,
         api_version=api_version,
-        timeout=timeout,
+        custom_config=(
+            tuple(sorted(custom_config.items())) if custom_config is not None else None
+        ),
         temperature=temperature,
-        custom_config=custom_config,
-        extra_headers=build_llm_extra_headers(additional_headers),
-        model_kwargs=_build_extra_model_kwargs(provider),
-        long_term_logger=long_term_logger,
-        max_input_tokens=max_input_tokens,
+        timeout=timeout,
+        extra_headers=tuple(
+            sorted(build_llm_extra_headers(additional_headers).items())
+        ),
     )
+    llm.apply_custom_config_env()
+    if long_term_logger:
+        return llm.with_long_term_logger(long_term_logger)
+    return llm
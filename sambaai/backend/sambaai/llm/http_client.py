@@ -0,0 +1,146 @@
+import importlib.util
+import threading
+from typing import Any
+
+import httpx
+from litellm.llms.custom_httpx.http_handler import HTTPHandler  # type: ignore
+from openai import OpenAI
+from pydantic import BaseModel
+
+from sambaai.configs.model_configs import LLM_HTTP2_ENABLED
+from sambaai.configs.model_configs import LLM_HTTP_CLIENT_POOLING
+from sambaai.configs.model_configs import LLM_HTTP_KEEPALIVE_EXPIRY
+from sambaai.configs.model_configs import LLM_HTTP_MAX_CONNECTIONS
+from sambaai.configs.model_configs import LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# providers for which LiteLLM accepts an openai.OpenAI client
+_OPENAI_CLIENT_PROVIDERS = {"openai"}
+# providers for which LiteLLM accepts one of its own HTTPHandlers
+_HTTP_HANDLER_PROVIDERS = {"anthropic"}
+# same as LiteLLM's default when it builds the OpenAI client itself
+_OPENAI_MAX_RETRIES = 2
+
+# emitted by httpcore for the "trace" request extension
+_TRACE_CONNECT = "connection.connect_tcp.complete"
+_TRACE_TLS = "connection.start_tls.complete"
+
+
+class LLMHTTPClientStats(BaseModel):
+    requests: int = 0
+    # every connection is used by at least one request, all other requests
+    # reused a pooled (keep-alive / HTTP/2) connection
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+
+    @property
+    def reused_requests(self) -> int:
+        return max(0, self.requests - self.connections_opened)
+
+
+class _PooledClient:
+    def __init__(self, pool_key: str) -> None:
+        self.pool_key = pool_key
+        self.stats = LLMHTTPClientStats()
+        self._stats_lock = threading.Lock()
+        self.client = httpx.Client(
+            http2=LLM_HTTP2_ENABLED and importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            # LiteLLM passes the timeout of each request explicitly
+            timeout=httpx.Timeout(timeout=600.0, connect=5.0),
+            event_hooks={"request": [self._on_request]},
+        )
+
+    def _on_request(self, request: httpx.Request) -> None:
+        with self._stats_lock:
+            self.stats.requests += 1
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == _TRACE_CONNECT:
+            with self._stats_lock:
+                self.stats.connections_opened += 1
+            logger.debug(
+                f"Opened LLM connection: pool={self.pool_key} "
+                f"connections={self.stats.connections_opened} "
+                f"requests={self.stats.requests}"
+            )
+        elif event_name == _TRACE_TLS:
+            with self._stats_lock:
+                self.stats.tls_handshakes += 1
+
+
+_pooled_clients: dict[str, _PooledClient] = {}
+_openai_clients: dict[tuple[str, str | None], OpenAI] = {}
+_http_handlers: dict[str, HTTPHandler] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_pooled_client(model_provider: str, api_base: str | None) -> _PooledClient:
+    pool_key = f"{model_provider}|{api_base or ''}"
+    with _clients_lock:
+        if pool_key not in _pooled_clients:
+            _pooled_clients[pool_key] = _PooledClient(pool_key)
+        return _pooled_clients[pool_key]
+
+
+def get_litellm_client(
+    model_provider: str,
+    api_base: str | None,
+    api_key: str | None,
+) -> OpenAI | HTTPHandler | None:
+    """Returns the client to pass to `litellm.completion` so that calls to the same
+    provider / API base share one long lived connection pool (keep-alive, HTTP/2 if
+    available) instead of paying for a new TLS handshake.
+
+    Returns None if the provider is not supported, in which case LiteLLM falls back
+    to its own client handling."""
+    if not LLM_HTTP_CLIENT_POOLING:
+        return None
+
+    if model_provider in _OPENAI_CLIENT_PROVIDERS:
+        pooled_client = _get_pooled_client(model_provider, api_base)
+        # the OpenAI client holds the API key, the connection pool does not
+        openai_key = (api_key or "", api_base)
+        with _clients_lock:
+            if openai_key not in _openai_clients:
+                try:
+                    _openai_clients[openai_key] = OpenAI(
+                        api_key=api_key,
+                        base_url=api_base,
+                        http_client=pooled_client.client,
+                        max_retries=_OPENAI_MAX_RETRIES,
+                    )
+                except Exception:
+                    # e.g. no API key configured at all, let LiteLLM deal with it
+                    logger.exception(
+                        f"Failed to create pooled OpenAI client for {api_base}"
+                    )
+                    return None
+            return _openai_clients[openai_key]
+
+    if model_provider in _HTTP_HANDLER_PROVIDERS:
+        pooled_client = _get_pooled_client(model_provider, api_base)
+        with _clients_lock:
+            if pooled_client.pool_key not in _http_handlers:
+                _http_handlers[pooled_client.pool_key] = HTTPHandler(
+                    client=pooled_client.client
+                )
+            return _http_handlers[pooled_client.pool_key]
+
+    return None
+
+
+def get_llm_http_client_stats() -> dict[str, LLMHTTPClientStats]:
+    """Connection reuse stats of each pool, keyed by `<provider>|<api base>`"""
+    with _clients_lock:
+        return {
+            pool_key: pooled_client.stats.model_copy()
+            for pool_key, pooled_client in _pooled_clients.items()
+        }
@@ -285,6 +285,24 @@ def str_prompt_to_langchain_prompt(message: str) -> list[BaseMessage]:
     return [HumanMessage(content=message)]
 
 
+def build_prompt_with_cached_prefix(prefix: str, suffix: str) -> list[BaseMessage]:
+    """Builds a single user message with `prefix` marked as cacheable, for providers
+    that only cache explicitly marked prompt prefixes (see
+    model_requires_prompt_cache_markers)"""
+    return [
+        HumanMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": prefix,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": suffix},
+            ]
+        )
+    ]
+
+
 def convert_lm_input_to_basic_string(lm_input: LanguageModelInput) -> str:
     """Heavily inspired by:
     https://github.com/langchain-ai/langchain/blob/master/libs/langchain/langchain/chat_models/base.py#L86
@@ -663,6 +681,23 @@ def model_supports_image_input(model_name: str, model_provider: str) -> bool:
         return False
 
 
+def model_requires_prompt_cache_markers(model_name: str, model_provider: str) -> bool:
+    """OpenAI style providers cache long shared prompt prefixes automatically.
+    Anthropic models (directly or through Bedrock / Vertex) only cache prefixes that
+    are explicitly marked with `cache_control`."""
+    try:
+        if "claude" not in model_name.lower():
+            return False
+
+        model_obj = find_model_obj(get_model_map(), model_provider, model_name)
+        return bool(model_obj and model_obj.get("supports_prompt_caching"))
+    except Exception:
+        logger.exception(
+            f"Failed to get model object for {model_provider}/{model_name}"
+        )
+        return False
+
+
 def model_is_reasoning_model(model_name: str) -> bool:
     _REASONING_MODEL_NAMES = [
         "o1",
@@ -0,0 +1,268 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from langchain.schema import PromptValue
+from langchain.schema.language_model import LanguageModelInput
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from sambaai.configs.app_configs import INDEXING_LLM_MAX_IN_FLIGHT
+from sambaai.configs.app_configs import INDEXING_LLM_MAX_RETRIES
+from sambaai.configs.app_configs import INDEXING_LLM_RATE_LIMITS
+from sambaai.configs.app_configs import INDEXING_LLM_REQUESTS_PER_MINUTE
+from sambaai.configs.app_configs import INDEXING_LLM_TOKENS_PER_MINUTE
+from sambaai.llm.chat_llm import LLMRateLimitError
+from sambaai.llm.chat_llm import LLMTimeoutError
+from sambaai.llm.interfaces import LLM
+from sambaai.utils.logger import setup_logger
+from sambaai.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
+logger = setup_logger()
+
+_RETRYABLE_ERRORS = (LLMRateLimitError, LLMTimeoutError)
+_BACKOFF_BASE_SECONDS = 2.0
+_BACKOFF_MAX_SECONDS = 60.0
+
+# rough estimate, only used for budgeting. Avoids running a tokenizer per call
+_CHARS_PER_TOKEN = 4
+# matches the estimate used in sambaai.llm.utils.check_message_tokens
+_IMAGE_TOKENS = 85
+
+
+def estimate_prompt_tokens(prompt: LanguageModelInput) -> int:
+    if isinstance(prompt, str):
+        return len(prompt) // _CHARS_PER_TOKEN
+
+    num_chars = 0
+    num_images = 0
+    messages = prompt.to_messages() if isinstance(prompt, PromptValue) else prompt
+    for message in messages:
+        if isinstance(message, BaseMessage):
+            content = message.content
+        elif isinstance(message, dict):
+            content = message.get("content") or ""
+        elif isinstance(message, tuple):
+            content = message[1]
+        else:
+            content = str(message)
+
+        if isinstance(content, str):
+            num_chars += len(content)
+            continue
+
+        for part in content:
+            if isinstance(part, str):
+                num_chars += len(part)
+            elif part.get("type") == "image_url":
+                num_images += 1
+            else:
+                num_chars += len(part.get("text") or "")
+
+    return num_chars // _CHARS_PER_TOKEN + num_images * _IMAGE_TOKENS
+
+
+class LLMRateLimiter:
+    """Paces the calls to a single provider / model across all threads of the process.
+
+    Keeps a token bucket for requests per minute and one for tokens per minute (a
+    budget of 0 is unlimited), caps the number of requests in flight, and lets a
+    caller that got rate limited anyway pause everyone so that one 429 doesn't turn
+    into a storm of them."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_in_flight: int,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        self._lock = threading.Lock()
+        self._request_tokens = float(requests_per_minute)
+        self._llm_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed_minutes = (now - self._last_refill) / 60.0
+        self._request_tokens = min(
+            float(self.requests_per_minute),
+            self._request_tokens + elapsed_minutes * self.requests_per_minute,
+        )
+        self._llm_tokens = min(
+            float(self.tokens_per_minute),
+            self._llm_tokens + elapsed_minutes * self.tokens_per_minute,
+        )
+        self._last_refill = now
+
+    def acquire(self, num_tokens: int) -> float:
+        """Blocks until a request of roughly num_tokens (prompt + completion) fits in
+        the budget. Returns the seconds waited."""
+        # a request larger than the whole budget only waits for a full bucket
+        num_tokens = min(num_tokens, self.tokens_per_minute)
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = max(0.0, self._paused_until - now)
+                if self.requests_per_minute and self._request_tokens < 1.0:
+                    wait = max(
+                        wait,
+                        (1.0 - self._request_tokens) * 60.0 / self.requests_per_minute,
+                    )
+                if self.tokens_per_minute and self._llm_tokens < num_tokens:
+                    wait = max(
+                        wait,
+                        (num_tokens - self._llm_tokens) * 60.0 / self.tokens_per_minute,
+                    )
+
+                if wait <= 0.0:
+                    if self.requests_per_minute:
+                        self._request_tokens -= 1.0
+                    if self.tokens_per_minute:
+                        self._llm_tokens -= num_tokens
+                    return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_rate_limiters: dict[str, LLMRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_llm_rate_limiter(model_provider: str, model_name: str) -> LLMRateLimiter:
+    """Returns the process wide rate limiter for a provider / model."""
+    key = f"{model_provider}/{model_name}"
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            limits = INDEXING_LLM_RATE_LIMITS.get(key, {})
+            _rate_limiters[key] = LLMRateLimiter(
+                requests_per_minute=limits.get(
+                    "requests_per_minute", INDEXING_LLM_REQUESTS_PER_MINUTE
+                ),
+                tokens_per_minute=limits.get(
+                    "tokens_per_minute", INDEXING_LLM_TOKENS_PER_MINUTE
+                ),
+                max_in_flight=INDEXING_LLM_MAX_IN_FLIGHT,
+            )
+        return _rate_limiters[key]
+
+
+class LLMWorkStats(BaseModel):
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    rate_limit_wait_seconds: float = 0.0
+
+
+class LLMWorkExecutor:
+    """Runs LLM calls for indexing time features (contextual RAG, image
+    summarization, ...) within the rate limits of the model, retrying rate limited
+    and timed out calls with exponential backoff and jitter.
+
+    `invoke` is a drop in replacement for `llm.invoke`. `run` fans work out over at
+    most `max_in_flight` threads and reports progress as functions complete."""
+
+    def __init__(
+        self,
+        llm: LLM,
+        max_retries: int = INDEXING_LLM_MAX_RETRIES,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> None:
+        self.llm = llm
+        self.max_retries = max_retries
+        self.progress_callback = progress_callback
+        self.rate_limiter = get_llm_rate_limiter(
+            llm.config.model_provider, llm.config.model_name
+        )
+        self.stats = LLMWorkStats()
+        self._stats_lock = threading.Lock()
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        # "equal jitter": at least half of the exponential delay
+        delay = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def invoke(
+        self, prompt: LanguageModelInput, max_tokens: int | None = None
+    ) -> BaseMessage:
+        num_tokens = estimate_prompt_tokens(prompt) + (max_tokens or 0)
+
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire(num_tokens)
+            with self._stats_lock:
+                self.stats.requests += 1
+                self.stats.rate_limit_wait_seconds += waited
+
+            try:
+                with self.rate_limiter.in_flight:
+                    return self.llm.invoke(prompt, max_tokens=max_tokens)
+            except _RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    with self._stats_lock:
+                        self.stats.failures += 1
+                    raise
+
+                backoff = self._backoff_seconds(attempt)
+                if isinstance(e, LLMRateLimitError):
+                    # everyone else is about to hit the same limit
+                    self.rate_limiter.pause(backoff)
+
+                logger.warning(
+                    f"LLM call failed, retrying in {backoff:.1f}s: "
+                    f"attempt={attempt + 1}/{self.max_retries} error={type(e).__name__}"
+                )
+                with self._stats_lock:
+                    self.stats.retries += 1
+                time.sleep(backoff)
+                attempt += 1
+            except Exception:
+                with self._stats_lock:
+                    self.stats.failures += 1
+                raise
+
+    def run(
+        self,
+        functions_with_args: list[tuple[Callable, tuple]],
+        allow_failures: bool = False,
+    ) -> list[Any]:
+        """Like run_functions_tuples_in_parallel, with at most max_in_flight threads.
+        The functions are expected to call `invoke`."""
+        total = len(functions_with_args)
+        completed = 0
+        completed_lock = threading.Lock()
+
+        def _report_progress() -> None:
+            nonlocal completed
+            with completed_lock:
+                completed += 1
+                current = completed
+            if self.progress_callback:
+                self.progress_callback(current, total)
+
+        def _run_one(func: Callable, args: tuple) -> Any:
+            try:
+                return func(*args)
+            finally:
+                _report_progress()
+
+        return run_functions_tuples_in_parallel(
+            [(_run_one, (func, args)) for func, args in functions_with_args],
+            allow_failures=allow_failures,
+            max_workers=self.rate_limiter.max_in_flight,
+        )
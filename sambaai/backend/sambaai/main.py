@@ -39,13 +39,12 @@ from sambaai.configs.app_configs import DISABLE_GENERATIVE_AI
 from sambaai.configs.app_configs import LOG_ENDPOINT_LATENCY
 from sambaai.configs.app_configs import OAUTH_CLIENT_ID
 from sambaai.configs.app_configs import OAUTH_CLIENT_SECRET
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_OVERFLOW
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_SIZE
 from sambaai.configs.app_configs import SYSTEM_RECURSION_LIMIT
 from sambaai.configs.app_configs import USER_AUTH_SECRET
 from sambaai.configs.app_configs import WEB_DOMAIN
 from sambaai.configs.constants import AuthType
 from sambaai.configs.constants import POSTGRES_WEB_APP_NAME
+from sambaai.db.engine import get_api_server_pool_size
 from sambaai.db.engine import get_session_context_manager
 from sambaai.db.engine import SqlEngine
 from sambaai.db.engine import warm_up_connections
@@ -217,10 +216,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     SqlEngine.set_app_name(POSTGRES_WEB_APP_NAME)
 
-    SqlEngine.init_engine(
-        pool_size=POSTGRES_API_SERVER_POOL_SIZE,
-        max_overflow=POSTGRES_API_SERVER_POOL_OVERFLOW,
-    )
+    pool_size, max_overflow = get_api_server_pool_size()
+    SqlEngine.init_engine(pool_size=pool_size, max_overflow=max_overflow)
     SqlEngine.get_engine()
 
     verify_auth = fetch_versioned_implementation(
@@ -49,6 +49,11 @@ class TiktokenTokenizer(BaseTokenizer):
             import tiktoken
 
             self.encoder = tiktoken.encoding_for_model(model_name)
+            self.model_name = model_name
+
+    def __reduce__(self) -> tuple[type["TiktokenTokenizer"], tuple[str]]:
+        # instances are shared per model, so an unpickled one is looked up by its name
+        return (TiktokenTokenizer, (self.model_name,))
 
     def encode(self, string: str) -> list[int]:
         # this ignores special tokens that the model is trained on, see encode_ordinary for details
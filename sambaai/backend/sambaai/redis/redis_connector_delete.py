@@ -9,6 +9,7 @@ from pydantic import BaseModel
 from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
+from sambaai.configs.app_configs import CONNECTOR_DELETION_DOCUMENT_BATCH_SIZE
 from sambaai.configs.app_configs import DB_YIELD_PER_DEFAULT
 from sambaai.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from sambaai.configs.constants import SambaAICeleryPriority
@@ -16,7 +17,10 @@ from sambaai.configs.constants import SambaAICeleryQueues
 from sambaai.configs.constants import SambaAICeleryTask
 from sambaai.configs.constants import SambaAIRedisConstants
 from sambaai.db.connector_credential_pair import get_connector_credential_pair_from_id
-from sambaai.db.document import construct_document_id_select_for_connector_credential_pair
+from sambaai.db.document import (
+    construct_document_id_select_for_connector_credential_pair,
+)
+from sambaai.utils.batching import batch_generator
 
 
 class RedisConnectorDeletePayload(BaseModel):
@@ -127,8 +131,10 @@ class RedisConnectorDelete:
         stmt = construct_document_id_select_for_connector_credential_pair(
             cc_pair.connector_id, cc_pair.credential_id
         )
-        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-            doc_id = cast(str, doc_id)
+        for doc_ids in batch_generator(
+            db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT),
+            CONNECTOR_DELETION_DOCUMENT_BATCH_SIZE,
+        ):
             current_time = time.monotonic()
             if current_time - last_lock_time >= (
                 CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
@@ -144,9 +150,9 @@ class RedisConnectorDelete:
 
             # Priority on sync's triggered by new indexing should be medium
             celery_app.send_task(
-                SambaAICeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
+                SambaAICeleryTask.DOCUMENTS_BY_CC_PAIR_CLEANUP_TASK,
                 kwargs=dict(
-                    document_id=doc_id,
+                    document_ids=[cast(str, doc_id) for doc_id in doc_ids],
                     connector_id=cc_pair.connector_id,
                     credential_id=cc_pair.credential_id,
                     tenant_id=self.tenant_id,
@@ -122,10 +122,16 @@ class TenantRedis(redis.Redis):
             "srem",
             "scard",
             "hexists",
+            "hgetall",
             "hset",
             "hdel",
             "ttl",
             "pttl",
+            "expire",
+            "zadd",
+            "zcard",
+            "zpopmin",
+            "zremrangebyscore",
         ]  # Regular methods that need simple prefixing
 
         if item == "scan_iter" or item == "sscan_iter":
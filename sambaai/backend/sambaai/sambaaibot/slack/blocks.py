@@ -596,7 +596,12 @@ def build_slack_response_blocks(
         )
 
     web_follow_up_block = []
-    if channel_conf and channel_conf.get("show_continue_in_web_ui"):
+    if (
+        channel_conf
+        and channel_conf.get("show_continue_in_web_ui")
+        # answers replayed from the answer cache have no chat message
+        and answer.chat_message_id is not None
+    ):
         web_follow_up_block.append(
             _build_continue_in_web_ui_block(
                 message_id=answer.chat_message_id,
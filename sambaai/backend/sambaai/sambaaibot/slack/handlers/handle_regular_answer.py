@@ -8,6 +8,7 @@ from retry import retry
 from slack_sdk import WebClient
 from slack_sdk.models.blocks import SectionBlock
 
+from sambaai.chat.answer_cache import get_answer_cache
 from sambaai.chat.chat_utils import prepare_chat_message_request
 from sambaai.chat.models import ChatSambaAIBotResponse
 from sambaai.chat.process_message import gather_stream_for_slack
@@ -17,12 +18,15 @@ from sambaai.configs.constants import DEFAULT_PERSONA_ID
 from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_DISABLE_DOCS_ONLY_ANSWER
 from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_DISPLAY_ERROR_MSGS
 from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_NUM_RETRIES
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_SEARCH_TIME_BUDGET
 from sambaai.configs.sambaaibot_configs import SAMBAAI_FOLLOWUP_EMOJI
 from sambaai.configs.sambaaibot_configs import SAMBAAI_REACT_EMOJI
 from sambaai.configs.sambaaibot_configs import MAX_THREAD_CONTEXT_PERCENTAGE
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import OptionalSearchSetting
 from sambaai.context.search.models import BaseFilters
 from sambaai.context.search.models import RetrievalDetails
+from sambaai.context.search.retrieval.search_runner import get_query_embedding
 from sambaai.db.engine import get_session_with_current_tenant
 from sambaai.db.models import SlackChannelConfig
 from sambaai.db.models import User
@@ -181,6 +185,11 @@ def handle_regular_answer(
         # pass in `None` to make the answer based on public documents only
         sambaai_user: User | None,
     ) -> ChatSambaAIBotResponse:
+        search_deadline = (
+            SearchDeadline(SAMBAAI_BOT_SEARCH_TIME_BUDGET)
+            if SAMBAAI_BOT_SEARCH_TIME_BUDGET
+            else None
+        )
         with get_session_with_current_tenant() as db_session:
             packets = stream_chat_message_objects(
                 new_msg_req=new_message_request,
@@ -188,10 +197,20 @@ def handle_regular_answer(
                 db_session=db_session,
                 bypass_acl=bypass_acl,
                 single_message_history=single_message_history,
+                search_deadline=search_deadline,
             )
 
             answer = gather_stream_for_slack(packets)
 
+        if search_deadline is not None and search_deadline.skipped_stages:
+            logger.info(
+                "Answered within the search time budget by skipping: "
+                + ", ".join(
+                    f"{stage.value} ({reason})"
+                    for stage, reason in search_deadline.skipped_stages.items()
+                )
+            )
+
         if answer.error_msg:
             raise RuntimeError(answer.error_msg)
 
@@ -238,10 +257,37 @@ def handle_regular_answer(
         # if it's a DM or ephemeral message, answer based on private documents.
         # otherwise, answer based on public documents ONLY as to not leak information.
         can_search_over_private_docs = message_info.is_bot_dm or send_as_ephemeral
-        answer = _get_slack_answer(
-            new_message_request=answer_request,
-            sambaai_user=user if can_search_over_private_docs else None,
-        )
+        search_user = user if can_search_over_private_docs else None
+
+        # repeated questions are answered from the cache if the persona opted in.
+        # Follow ups depend on the thread, so only standalone questions are cached
+        answer = None
+        answer_cache = None
+        query_embedding = None
+        if not history_messages:
+            with get_session_with_current_tenant() as db_session:
+                answer_cache = get_answer_cache(
+                    persona_id=persona.id,
+                    document_sets=document_set_names,
+                    enable_auto_detect_filters=auto_detect_filters,
+                    user=search_user,
+                    db_session=db_session,
+                )
+                if answer_cache:
+                    query_embedding = get_query_embedding(
+                        user_message.message, db_session
+                    )
+                    answer = answer_cache.get(query_embedding, db_session)
+
+        if answer is None:
+            # a cache miss doesn't embed the question a second time
+            answer_request.precomputed_query_embedding = query_embedding
+            answer = _get_slack_answer(
+                new_message_request=answer_request,
+                sambaai_user=search_user,
+            )
+            if answer_cache and query_embedding is not None:
+                answer_cache.put(query_embedding, answer)
 
     except Exception as e:
         logger.exception(
@@ -1,4 +1,3 @@
-import asyncio
 import os
 import signal
 import sys
@@ -34,6 +33,10 @@ from sambaai.configs.constants import SambaAIRedisLocks
 from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_REPHRASE_MESSAGE
 from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_RESPOND_EVERY_CHANNEL
 from sambaai.configs.sambaaibot_configs import NOTIFY_SLACKBOT_NO_ANSWER
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_TENANT_REBALANCE_COOLDOWN
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_TENANT_REBALANCE_MIN_LOAD
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_TENANT_REBALANCE_THRESHOLD
 from sambaai.connectors.slack.utils import expert_info_from_slack_id
 from sambaai.context.search.retrieval.search_runner import (
     download_nltk_data,
@@ -83,6 +86,12 @@ from sambaai.sambaaibot.slack.handlers.handle_message import (
 )
 from sambaai.sambaaibot.slack.handlers.handle_message import schedule_feedback_reminder
 from sambaai.sambaaibot.slack.models import SlackMessageInfo
+from sambaai.sambaaibot.slack.tenant_load import fetch_pod_loads
+from sambaai.sambaaibot.slack.tenant_load import pick_tenant_to_shed
+from sambaai.sambaaibot.slack.tenant_load import PodLoad
+from sambaai.sambaaibot.slack.tenant_load import publish_pod_load
+from sambaai.sambaaibot.slack.tenant_load import should_acquire_tenant
+from sambaai.sambaaibot.slack.tenant_load import tenant_load_tracker
 from sambaai.sambaaibot.slack.utils import check_message_limit
 from sambaai.sambaaibot.slack.utils import decompose_action_id
 from sambaai.sambaaibot.slack.utils import get_channel_name_from_id
@@ -92,7 +101,10 @@ from sambaai.sambaaibot.slack.utils import remove_sambaai_bot_tag
 from sambaai.sambaaibot.slack.utils import rephrase_slack_message
 from sambaai.sambaaibot.slack.utils import respond_in_thread_or_channel
 from sambaai.sambaaibot.slack.utils import TenantSocketModeClient
+from sambaai.sambaaibot.slack.workspace_cache import drop_workspace_caches
+from sambaai.sambaaibot.slack.workspace_cache import get_workspace_cache
 from sambaai.redis.redis_pool import get_redis_client
+from sambaai.redis.redis_pool import get_shared_redis_client
 from sambaai.server.manage.models import SlackBotTokens
 from sambaai.utils.logger import setup_logger
 from sambaai.utils.variable_functionality import fetch_ee_implementation_or_noop
@@ -114,6 +126,11 @@ active_tenants_gauge = Gauge(
     "Number of active tenants handled by this pod",
     ["namespace", "pod"],
 )
+pod_load_gauge = Gauge(
+    "slack_bot_load",
+    "Message rate (per minute) plus answers in flight of the tenants on this pod",
+    ["namespace", "pod"],
+)
 
 # In rare cases, some users have been experiencing a massive amount of trivial messages coming through
 # to the Slack Bot with trivial messages. Adding this to avoid exploding LLM costs while we track down
@@ -142,6 +159,9 @@ class SlackbotHandler:
 
         # Store Redis lock objects here so we can release them properly
         self.redis_locks: Dict[str, Lock] = {}
+        # Tenants handed over to other pods, and when. Taken back if no other pod
+        # picked them up, and not handed over again for a while
+        self.shed_tenants: Dict[str, float] = {}
 
         self.running = True
         self.pod_id = self.get_pod_id()
@@ -180,6 +200,7 @@ class SlackbotHandler:
         while not self._shutdown_event.is_set():
             try:
                 self.acquire_tenants()
+                self.rebalance_tenants()
 
                 # After we finish acquiring and managing Slack bots,
                 # set the gauge to the number of active tenants (those with Slack bots).
@@ -224,8 +245,7 @@ class SlackbotHandler:
                 f"No Slack bot tokens found for tenant={tenant_id}, bot {bot.id}"
             )
             if tenant_bot_pair in self.socket_clients:
-                asyncio.run(self.socket_clients[tenant_bot_pair].close())
-                del self.socket_clients[tenant_bot_pair]
+                self._drain_socket_clients([tenant_bot_pair])
                 del self.slack_bot_tokens[tenant_bot_pair]
             return
 
@@ -252,12 +272,32 @@ class SlackbotHandler:
 
             # Close any existing connection first
             if tenant_bot_pair in self.socket_clients:
-                asyncio.run(self.socket_clients[tenant_bot_pair].close())
+                self._drain_socket_clients([tenant_bot_pair])
 
             self.start_socket_client(bot.id, tenant_id, slack_bot_tokens)
 
+    def _get_other_pod_loads(self) -> list[PodLoad]:
+        try:
+            return [
+                pod_load
+                for pod_load in fetch_pod_loads(get_shared_redis_client())
+                if pod_load.pod_id != self.pod_id
+            ]
+        except Exception:
+            logger.exception("Error fetching the load of other pods")
+            return []
+
+    def _get_own_score(self) -> float:
+        return sum(
+            load.score
+            for load in tenant_load_tracker.get_loads(set(self.tenant_ids)).values()
+        )
+
     def acquire_tenants(self) -> None:
         """
+        - Skip tenants that would put this pod further above the fleet's average load
+          than other pods. Tenants this pod handed over are taken back if they are
+          still unlocked, i.e. no other pod took them during its acquisition round.
         - Attempt to acquire a Redis lock for each tenant.
         - If acquired, check if that tenant actually has Slack bots.
         - If yes, store them in self.tenant_ids and manage the socket connections.
@@ -279,6 +319,15 @@ class SlackbotHandler:
 
         token: Token[str | None]
 
+        other_pod_scores = [pod_load.score for pod_load in self._get_other_pod_loads()]
+        own_score = self._get_own_score()
+        now = time.monotonic()
+        self.shed_tenants = {
+            tenant_id: shed_at
+            for tenant_id, shed_at in self.shed_tenants.items()
+            if now - shed_at < SAMBAAI_BOT_TENANT_REBALANCE_COOLDOWN
+        }
+
         # 1) Try to acquire locks for new tenants
         for tenant_id in all_tenants:
             if (
@@ -300,6 +349,26 @@ class SlackbotHandler:
                 break
 
             redis_client = get_redis_client(tenant_id=tenant_id)
+            # the load the tenant had on the pod that served it last
+            tenant_score = float(
+                cast(
+                    bytes | None,
+                    redis_client.get(SambaAIRedisLocks.SLACK_BOT_TENANT_LOAD),
+                )
+                or 0
+            )
+            if tenant_id not in self.shed_tenants and not should_acquire_tenant(
+                own_score=own_score,
+                other_pod_scores=other_pod_scores,
+                tenant_score=tenant_score,
+                threshold=SAMBAAI_BOT_TENANT_REBALANCE_THRESHOLD,
+            ):
+                logger.debug(
+                    f"Leaving tenant {tenant_id} (load {tenant_score:.1f}) to a less "
+                    f"loaded pod, own load {own_score:.1f}."
+                )
+                continue
+
             # Acquire a Redis lock (non-blocking)
             rlock = redis_client.lock(
                 SambaAIRedisLocks.SLACK_BOT_LOCK, timeout=TENANT_LOCK_EXPIRATION
@@ -341,6 +410,7 @@ class SlackbotHandler:
                     if bots:
                         # Mark as active tenant
                         self.tenant_ids.add(tenant_id)
+                        own_score += tenant_score
                         for bot in bots:
                             self._manage_clients_per_tenant(
                                 db_session=db_session,
@@ -384,15 +454,7 @@ class SlackbotHandler:
                         self._remove_tenant(tenant_id)
 
                         # NOTE: We release the lock here (in the same scope it was acquired)
-                        if tenant_id in self.redis_locks and not DEV_MODE:
-                            try:
-                                self.redis_locks[tenant_id].release()
-                                del self.redis_locks[tenant_id]
-                                logger.info(f"Released lock for tenant {tenant_id}")
-                            except Exception as e:
-                                logger.error(
-                                    f"Error releasing lock for tenant {tenant_id}: {e}"
-                                )
+                        self._release_lock(tenant_id)
                     else:
                         # Manage or reconnect Slack bot sockets
                         for bot in bots:
@@ -404,20 +466,103 @@ class SlackbotHandler:
             finally:
                 CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
 
+    def rebalance_tenants(self) -> None:
+        """
+        Hands one tenant over to the other pods if this pod's load is too far above
+        the fleet's average and a less loaded pod has room for it. The tenant is
+        drained first, other pods pick it up on their next acquisition round. If none
+        does, this pod takes it back on its own next round (see acquire_tenants).
+        """
+        if DEV_MODE:
+            return
+
+        tenant_loads = tenant_load_tracker.get_loads(set(self.tenant_ids))
+        tenant_id = pick_tenant_to_shed(
+            tenant_scores={
+                tenant_id: load.score for tenant_id, load in tenant_loads.items()
+            },
+            other_pods=self._get_other_pod_loads(),
+            max_tenants_per_pod=MAX_TENANTS_PER_POD,
+            threshold=SAMBAAI_BOT_TENANT_REBALANCE_THRESHOLD,
+            min_score=SAMBAAI_BOT_TENANT_REBALANCE_MIN_LOAD,
+            keep=set(self.shed_tenants),
+        )
+        if tenant_id is None:
+            return
+
+        logger.info(
+            f"Shedding tenant {tenant_id} (load {tenant_loads[tenant_id].score:.1f}) "
+            "to rebalance the load between pods"
+        )
+        token = CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+        try:
+            get_redis_client(tenant_id=tenant_id).set(
+                SambaAIRedisLocks.SLACK_BOT_TENANT_LOAD,
+                tenant_loads[tenant_id].score,
+                ex=TENANT_LOCK_EXPIRATION,
+            )
+            self._remove_tenant(tenant_id)
+            self._release_lock(tenant_id)
+        finally:
+            CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+        self.shed_tenants[tenant_id] = time.monotonic()
+
+    def _release_lock(self, tenant_id: str) -> None:
+        if tenant_id in self.redis_locks and not DEV_MODE:
+            try:
+                self.redis_locks[tenant_id].release()
+                del self.redis_locks[tenant_id]
+                logger.info(f"Released lock for tenant {tenant_id}")
+            except Exception as e:
+                logger.error(f"Error releasing lock for tenant {tenant_id}: {e}")
+
+    def _drain_socket_clients(self, tenant_bot_pairs: list[tuple[str, int]]) -> None:
+        """
+        Disconnects the socket clients so that Slack stops sending them events, gives
+        the answers in flight up to SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT seconds to
+        finish, then closes the clients.
+        """
+        clients = {
+            tenant_bot_pair: self.socket_clients.pop(tenant_bot_pair)
+            for tenant_bot_pair in tenant_bot_pairs
+            if tenant_bot_pair in self.socket_clients
+        }
+        for client in clients.values():
+            client.auto_reconnect_enabled = False
+            client.disconnect()
+
+        tenant_ids = {tenant_id for tenant_id, _ in clients}
+        if not tenant_load_tracker.wait_until_idle(
+            tenant_ids, SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT
+        ):
+            logger.warning(
+                f"Answers still in flight after {SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT}s "
+                f"for tenants: {tenant_ids}"
+            )
+
+        for (tenant_id, slack_bot_id), client in clients.items():
+            client.close()
+            logger.info(
+                f"Stopped SocketModeClient for tenant: {tenant_id}, app: {slack_bot_id}"
+            )
+
     def _remove_tenant(self, tenant_id: str) -> None:
         """
-        Helper to remove a tenant from `self.tenant_ids` and close any socket clients.
+        Helper to remove a tenant from `self.tenant_ids` and drain any socket clients.
         (Lock release now happens in `acquire_tenants()`, not here.)
         """
-        # Close all socket clients for this tenant
-        for (t_id, slack_bot_id), client in list(self.socket_clients.items()):
-            if t_id == tenant_id:
-                asyncio.run(client.close())
-                del self.socket_clients[(t_id, slack_bot_id)]
-                del self.slack_bot_tokens[(t_id, slack_bot_id)]
-                logger.info(
-                    f"Stopped SocketModeClient for tenant: {t_id}, app: {slack_bot_id}"
-                )
+        # Drain all socket clients for this tenant
+        tenant_bot_pairs = [
+            tenant_bot_pair
+            for tenant_bot_pair in self.socket_clients
+            if tenant_bot_pair[0] == tenant_id
+        ]
+        self._drain_socket_clients(tenant_bot_pairs)
+        for tenant_bot_pair in tenant_bot_pairs:
+            self.slack_bot_tokens.pop(tenant_bot_pair, None)
+
+        drop_workspace_caches(tenant_id)
+        tenant_load_tracker.forget(tenant_id)
 
         # Remove from active set
         if tenant_id in self.tenant_ids:
@@ -426,12 +571,27 @@ class SlackbotHandler:
     def send_heartbeats(self) -> None:
         current_time = int(time.time())
         logger.debug(f"Sending heartbeats for {len(self.tenant_ids)} active tenants")
-        for tenant_id in self.tenant_ids:
+        tenant_loads = tenant_load_tracker.get_loads(set(self.tenant_ids))
+        for tenant_id, tenant_load in tenant_loads.items():
             redis_client = get_redis_client(tenant_id=tenant_id)
             heartbeat_key = f"{SambaAIRedisLocks.SLACK_BOT_HEARTBEAT_PREFIX}:{self.pod_id}"
             redis_client.set(
                 heartbeat_key, current_time, ex=TENANT_HEARTBEAT_EXPIRATION
             )
+            # lets the next pod serving the tenant anticipate its load
+            redis_client.set(
+                SambaAIRedisLocks.SLACK_BOT_TENANT_LOAD,
+                tenant_load.score,
+                ex=TENANT_LOCK_EXPIRATION,
+            )
+
+        pod_score = sum(tenant_load.score for tenant_load in tenant_loads.values())
+        publish_pod_load(
+            get_shared_redis_client(),
+            PodLoad(pod_id=self.pod_id, score=pod_score, num_tenants=len(tenant_loads)),
+            ttl=TENANT_HEARTBEAT_EXPIRATION,
+        )
+        pod_load_gauge.labels(namespace=POD_NAMESPACE, pod=POD_NAME).set(pod_score)
 
     def start_socket_client(
         self, slack_bot_id: int, tenant_id: str, slack_bot_tokens: SlackBotTokens
@@ -490,13 +650,11 @@ class SlackbotHandler:
 
     def stop_socket_clients(self) -> None:
         logger.info(f"Stopping {len(self.socket_clients)} socket clients")
-        for (tenant_id, slack_bot_id), client in list(self.socket_clients.items()):
-            asyncio.run(client.close())
-            logger.info(
-                f"Stopped SocketModeClient for tenant: {tenant_id}, app: {slack_bot_id}"
-            )
+        self._drain_socket_clients(list(self.socket_clients))
 
     def shutdown(self, signum: int | None, frame: FrameType | None) -> None:
+        """Signal handler, only stops the loops. Draining the tenants takes up to
+        SAMBAAI_BOT_TENANT_DRAIN_TIMEOUT, so the main thread does it in `close`."""
         if not self.running:
             return
 
@@ -504,8 +662,13 @@ class SlackbotHandler:
         self.running = False
         self._shutdown_event.set()
 
-        # Stop all socket clients
-        logger.info(f"Stopping {len(self.socket_clients)} socket clients")
+    def close(self) -> None:
+        # Wait for background threads to finish (with a timeout)
+        logger.info("Waiting for background threads to finish...")
+        self.acquire_thread.join(timeout=5)
+        self.heartbeat_thread.join(timeout=5)
+
+        # Stop all socket clients, letting the answers in flight finish
         self.stop_socket_clients()
 
         # Release locks for all tenants we currently hold
@@ -520,13 +683,7 @@ class SlackbotHandler:
                 finally:
                     del self.redis_locks[tenant_id]
 
-        # Wait for background threads to finish (with a timeout)
-        logger.info("Waiting for background threads to finish...")
-        self.acquire_thread.join(timeout=5)
-        self.heartbeat_thread.join(timeout=5)
-
         logger.info("Shutdown complete")
-        sys.exit(0)
 
 
 def prefilter_requests(req: SocketModeRequest, client: TenantSocketModeClient) -> bool:
@@ -850,45 +1007,49 @@ def process_message(
     if not prefilter_requests(req, client):
         return
 
-    details = build_request_details(req, client)
-    channel = details.channel_to_respond
-    channel_name, is_dm = get_channel_name_from_id(
-        client=client.web_client, channel_id=channel
-    )
-
-    with get_session_with_current_tenant() as db_session:
-        slack_channel_config = get_slack_channel_config_for_bot_and_channel(
-            db_session=db_session,
-            slack_bot_id=client.slack_bot_id,
-            channel_name=channel_name,
+    # Counts towards the tenant's load and waits for one of its answer slots, so
+    # that a busy workspace can't starve the other tenants on this pod
+    with tenant_load_tracker.track_answer(tenant_id):
+        details = build_request_details(req, client)
+        channel = details.channel_to_respond
+        channel_name, is_dm = get_channel_name_from_id(
+            client=client.web_client, channel_id=channel
         )
 
-        follow_up = bool(
-            slack_channel_config.channel_config
-            and slack_channel_config.channel_config.get("follow_up_tags") is not None
-        )
+        with get_session_with_current_tenant() as db_session:
+            slack_channel_config = get_slack_channel_config_for_bot_and_channel(
+                db_session=db_session,
+                slack_bot_id=client.slack_bot_id,
+                channel_name=channel_name,
+            )
 
-        feedback_reminder_id = schedule_feedback_reminder(
-            details=details, client=client.web_client, include_followup=follow_up
-        )
+            follow_up = bool(
+                slack_channel_config.channel_config
+                and slack_channel_config.channel_config.get("follow_up_tags")
+                is not None
+            )
 
-        failed = handle_message(
-            message_info=details,
-            slack_channel_config=slack_channel_config,
-            client=client.web_client,
-            feedback_reminder_id=feedback_reminder_id,
-        )
+            feedback_reminder_id = schedule_feedback_reminder(
+                details=details, client=client.web_client, include_followup=follow_up
+            )
 
-        if failed:
-            if feedback_reminder_id:
-                remove_scheduled_feedback_reminder(
-                    client=client.web_client,
-                    channel=details.sender_id,
-                    msg_id=feedback_reminder_id,
-                )
-            # Skipping answering due to pre-filtering is not considered a failure
-            if notify_no_answer:
-                apologize_for_fail(details, client)
+            failed = handle_message(
+                message_info=details,
+                slack_channel_config=slack_channel_config,
+                client=client.web_client,
+                feedback_reminder_id=feedback_reminder_id,
+            )
+
+            if failed:
+                if feedback_reminder_id:
+                    remove_scheduled_feedback_reminder(
+                        client=client.web_client,
+                        channel=details.sender_id,
+                        msg_id=feedback_reminder_id,
+                    )
+                # Skipping answering due to pre-filtering is not considered a failure
+                if notify_no_answer:
+                    apologize_for_fail(details, client)
 
 
 def acknowledge_message(req: SocketModeRequest, client: TenantSocketModeClient) -> None:
@@ -941,6 +1102,12 @@ def create_process_slack_event() -> (
         acknowledge_message(req, client)
 
         try:
+            if req.type == "events_api":
+                # keep the workspace cache up to date, also for events we ignore
+                get_workspace_cache(client.web_client).handle_event(
+                    cast(dict[str, Any], req.payload.get("event", {}))
+                )
+
             if req.type == "interactive":
                 if req.payload.get("type") == "block_actions":
                     return action_routing(req, client)
@@ -1000,3 +1167,6 @@ if __name__ == "__main__":
     except Exception:
         logger.exception("Fatal error in main thread")
         tenant_handler.shutdown(None, None)
+
+    tenant_handler.close()
+    sys.exit(0)
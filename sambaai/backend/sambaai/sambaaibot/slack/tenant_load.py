@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import cast
+
+from pydantic import BaseModel
+from redis import Redis
+
+from sambaai.configs.constants import SambaAIRedisLocks
+from sambaai.configs.sambaaibot_configs import (
+    SAMBAAI_BOT_MAX_CONCURRENT_ANSWERS_PER_TENANT,
+)
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_TENANT_LOAD_WINDOW
+from sambaai.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class TenantLoad(BaseModel):
+    messages_per_minute: float
+    in_flight: int
+
+    @property
+    def score(self) -> float:
+        return self.messages_per_minute + self.in_flight
+
+
+class PodLoad(BaseModel):
+    pod_id: str
+    score: float
+    num_tenants: int
+
+
+class _TenantState:
+    def __init__(self, max_concurrent_answers: int) -> None:
+        self.message_times: deque[float] = deque()
+        self.in_flight = 0
+        self.answer_slots = threading.BoundedSemaphore(max_concurrent_answers)
+
+
+class TenantLoadTracker:
+    """Tracks the message rate and the answers in flight of each tenant served by
+    this pod, and limits how many answers are generated concurrently per tenant."""
+
+    def __init__(
+        self,
+        window: float = SAMBAAI_BOT_TENANT_LOAD_WINDOW,
+        max_concurrent_answers: int = SAMBAAI_BOT_MAX_CONCURRENT_ANSWERS_PER_TENANT,
+    ) -> None:
+        self.window = window
+        self.max_concurrent_answers = max_concurrent_answers
+        self._tenants: dict[str, _TenantState] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def _get_state(self, tenant_id: str) -> _TenantState:
+        # callers hold self._lock
+        if tenant_id not in self._tenants:
+            self._tenants[tenant_id] = _TenantState(self.max_concurrent_answers)
+        return self._tenants[tenant_id]
+
+    def _prune(self, state: _TenantState, now: float) -> None:
+        while state.message_times and state.message_times[0] < now - self.window:
+            state.message_times.popleft()
+
+    @contextmanager
+    def track_answer(self, tenant_id: str) -> Iterator[None]:
+        """Counts a message for `tenant_id` and waits for one of the tenant's
+        answer slots before the wrapped block runs"""
+        with self._lock:
+            state = self._get_state(tenant_id)
+            state.message_times.append(time.monotonic())
+            state.in_flight += 1
+
+        if not state.answer_slots.acquire(blocking=False):
+            logger.info(
+                f"Tenant {tenant_id} has {self.max_concurrent_answers} answers in "
+                "flight; waiting for a slot"
+            )
+            state.answer_slots.acquire()
+
+        try:
+            yield
+        finally:
+            state.answer_slots.release()
+            with self._lock:
+                state.in_flight -= 1
+                self._idle.notify_all()
+
+    def get_load(self, tenant_id: str) -> TenantLoad:
+        with self._lock:
+            state = self._tenants.get(tenant_id)
+            if state is None:
+                return TenantLoad(messages_per_minute=0.0, in_flight=0)
+
+            self._prune(state, time.monotonic())
+            return TenantLoad(
+                messages_per_minute=len(state.message_times) * 60 / self.window,
+                in_flight=state.in_flight,
+            )
+
+    def get_loads(self, tenant_ids: set[str]) -> dict[str, TenantLoad]:
+        return {tenant_id: self.get_load(tenant_id) for tenant_id in tenant_ids}
+
+    def wait_until_idle(self, tenant_ids: set[str], timeout: float) -> bool:
+        """Waits until none of the tenants has answers in flight, False on timeout"""
+
+        def _is_idle() -> bool:
+            return all(
+                self._tenants[tenant_id].in_flight == 0
+                for tenant_id in tenant_ids
+                if tenant_id in self._tenants
+            )
+
+        with self._idle:
+            return self._idle.wait_for(_is_idle, timeout=timeout)
+
+    def forget(self, tenant_id: str) -> None:
+        with self._lock:
+            state = self._tenants.get(tenant_id)
+            if state is not None and state.in_flight == 0:
+                del self._tenants[tenant_id]
+
+
+tenant_load_tracker = TenantLoadTracker()
+
+
+def publish_pod_load(redis_client: Redis, pod_load: PodLoad, ttl: int) -> None:
+    redis_client.set(
+        f"{SambaAIRedisLocks.SLACK_BOT_POD_LOAD_PREFIX}:{pod_load.pod_id}",
+        pod_load.model_dump_json(),
+        ex=ttl,
+    )
+
+
+def fetch_pod_loads(redis_client: Redis) -> list[PodLoad]:
+    """Loads of all pods with a recent heartbeat"""
+    pod_loads: list[PodLoad] = []
+    for key in redis_client.scan_iter(
+        match=f"{SambaAIRedisLocks.SLACK_BOT_POD_LOAD_PREFIX}:*"
+    ):
+        raw_pod_load = cast(bytes | None, redis_client.get(key))
+        if raw_pod_load is not None:
+            pod_loads.append(PodLoad.model_validate_json(raw_pod_load))
+    return pod_loads
+
+
+def should_acquire_tenant(
+    own_score: float,
+    other_pod_scores: list[float],
+    tenant_score: float,
+    threshold: float,
+) -> bool:
+    """A pod takes a tenant if it is the least loaded pod, or if serving the tenant
+    keeps it within `threshold` of the fleet average. Otherwise the tenant is left
+    to a less loaded pod."""
+    if not other_pod_scores or own_score <= min(other_pod_scores):
+        return True
+
+    average = (own_score + sum(other_pod_scores)) / (len(other_pod_scores) + 1)
+    return own_score + tenant_score <= average * (1 + threshold)
+
+
+def pick_tenant_to_shed(
+    tenant_scores: dict[str, float],
+    other_pods: list[PodLoad],
+    max_tenants_per_pod: int,
+    threshold: float,
+    min_score: float,
+    keep: set[str] | None = None,
+) -> str | None:
+    """The tenant to hand over to a less loaded pod, if this pod is more than
+    `threshold` above the fleet average. Picks the tenant that best evens out this
+    pod and the least loaded pod with room for another tenant, a tenant that is as
+    busy as the gap between them is never moved since that would just swap the
+    roles. Tenants in `keep` are never picked."""
+    if not other_pods:
+        return None
+
+    own_score = sum(tenant_scores.values())
+    average = (own_score + sum(pod.score for pod in other_pods)) / (len(other_pods) + 1)
+    if own_score < min_score or own_score <= average * (1 + threshold):
+        return None
+
+    target_scores = [
+        pod.score for pod in other_pods if pod.num_tenants < max_tenants_per_pod
+    ]
+    if not target_scores:
+        return None
+
+    gap = own_score - min(target_scores)
+    candidates = [
+        (score, tenant_id)
+        for tenant_id, score in tenant_scores.items()
+        if 0 < score < gap and tenant_id not in (keep or set())
+    ]
+    if not candidates:
+        return None
+
+    return min(candidates, key=lambda candidate: abs(candidate[0] - gap / 2))[1]
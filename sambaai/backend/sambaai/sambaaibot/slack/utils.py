@@ -39,6 +39,7 @@ from sambaai.llm.utils import dict_based_prompt_to_langchain_prompt
 from sambaai.llm.utils import message_to_string
 from sambaai.sambaaibot.slack.constants import FeedbackVisibility
 from sambaai.sambaaibot.slack.models import ThreadMessage
+from sambaai.sambaaibot.slack.workspace_cache import get_workspace_cache
 from sambaai.prompts.miscellaneous_prompts import SLACK_LANGUAGE_REPHRASE_PROMPT
 from sambaai.utils.logger import setup_logger
 from sambaai.utils.telemetry import optional_telemetry
@@ -393,9 +394,7 @@ def remove_slack_text_interactions(slack_str: str) -> str:
 
 
 def get_channel_from_id(client: WebClient, channel_id: str) -> dict[str, Any]:
-    response = client.conversations_info(channel=channel_id)
-    response.validate()
-    return response["channel"]
+    return get_workspace_cache(client).get_channel(client, channel_id)
 
 
 def get_channel_name_from_id(
@@ -414,12 +413,12 @@ def get_channel_name_from_id(
 def fetch_slack_user_ids_from_emails(
     user_emails: list[str], client: WebClient
 ) -> tuple[list[str], list[str]]:
+    workspace_cache = get_workspace_cache(client)
     user_ids: list[str] = []
     failed_to_find: list[str] = []
     for email in user_emails:
         try:
-            user = client.users_lookupByEmail(email=email)
-            user_ids.append(user.data["user"]["id"])  # type: ignore
+            user_ids.append(workspace_cache.lookup_user_id_by_email(client, email))
         except Exception:
             logger.error(f"Was not able to find slack user by email: {email}")
             failed_to_find.append(email)
@@ -430,15 +429,15 @@ def fetch_slack_user_ids_from_emails(
 def fetch_user_ids_from_groups(
     given_names: list[str], client: WebClient
 ) -> tuple[list[str], list[str]]:
+    workspace_cache = get_workspace_cache(client)
     user_ids: list[str] = []
     failed_to_find: list[str] = []
     try:
-        response = client.usergroups_list()
-        if not isinstance(response.data, dict):
+        all_group_data = workspace_cache.get_usergroups(client)
+        if all_group_data is None:
             logger.error("Error fetching user groups")
             return user_ids, given_names
 
-        all_group_data = response.data.get("usergroups", [])
         name_id_map = {d["name"]: d["id"] for d in all_group_data}
         handle_id_map = {d["handle"]: d["id"] for d in all_group_data}
         for given_name in given_names:
@@ -449,9 +448,9 @@ def fetch_user_ids_from_groups(
                 failed_to_find.append(given_name)
                 continue
             try:
-                response = client.usergroups_users_list(usergroup=group_id)
-                if isinstance(response.data, dict):
-                    user_ids.extend(response.data.get("users", []))
+                members = workspace_cache.get_usergroup_members(client, group_id)
+                if members is not None:
+                    user_ids.extend(members)
                 else:
                     failed_to_find.append(given_name)
             except Exception as e:
@@ -471,13 +470,11 @@ def fetch_group_ids_from_names(
     failed_to_find: list[str] = []
 
     try:
-        response = client.usergroups_list()
-        if not isinstance(response.data, dict):
+        all_group_data = get_workspace_cache(client).get_usergroups(client)
+        if all_group_data is None:
             logger.error("Error fetching user groups")
             return group_data, given_names
 
-        all_group_data = response.data.get("usergroups", [])
-
         name_id_map = {d["name"]: d["id"] for d in all_group_data}
         handle_id_map = {d["handle"]: d["id"] for d in all_group_data}
 
@@ -501,12 +498,10 @@ def fetch_user_semantic_id_from_id(
     if not user_id:
         return None
 
-    response = client.users_info(user=user_id)
-    if not response["ok"]:
+    user = get_workspace_cache(client).get_user(client, user_id)
+    if user is None:
         return None
 
-    user: dict = cast(dict[Any, dict], response.data).get("user", {})
-
     return (
         user.get("real_name")
         or user.get("name")
@@ -518,8 +513,7 @@ def read_slack_thread(
     channel: str, thread: str, client: WebClient
 ) -> list[ThreadMessage]:
     thread_messages: list[ThreadMessage] = []
-    response = client.conversations_replies(channel=channel, ts=thread)
-    replies = cast(dict, response.data).get("messages", [])
+    replies = get_workspace_cache(client).get_thread_messages(client, channel, thread)
     for reply in replies:
         if "user" in reply and "bot_id" not in reply:
             message = reply["text"]
@@ -588,7 +582,7 @@ def slack_usage_report(action: str, sender_id: str | None, client: WebClient) ->
     sambaai_user = None
     sender_email = None
     try:
-        sender_email = client.users_info(user=sender_id).data["user"]["profile"]["email"]  # type: ignore
+        sender_email = get_workspace_cache(client).get_user(client, sender_id)["profile"]["email"]  # type: ignore
     except Exception:
         logger.warning("Unable to find sender email")
 
@@ -0,0 +1,254 @@
+import threading
+import time
+from typing import Any
+from typing import cast
+from typing import TypeVar
+
+from slack_sdk import WebClient
+
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_WORKSPACE_CACHE_MAX_ENTRIES
+from sambaai.configs.sambaaibot_configs import SAMBAAI_BOT_WORKSPACE_CACHE_TTL
+from sambaai.utils.logger import setup_logger
+from sambaai.utils.lru_cache import ThreadSafeLRUCache
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_USERGROUPS_KEY = "usergroups"
+
+# events that change what conversations.info returns for event["channel"]
+_CHANNEL_EVENTS = {
+    "channel_archive",
+    "channel_deleted",
+    "channel_rename",
+    "channel_unarchive",
+    "group_archive",
+    "group_deleted",
+    "group_rename",
+    "group_unarchive",
+}
+_USER_EVENTS = {"user_change", "user_profile_changed"}
+_USERGROUP_EVENTS = {"subteam_created", "subteam_updated"}
+_THREAD_MESSAGE_SUBTYPES = {"message_changed", "message_deleted"}
+
+
+def _ts_value(ts: str | None) -> float:
+    return float(ts) if ts else 0.0
+
+
+class _TTLCache(ThreadSafeLRUCache[K, tuple[float, V]]):
+    def get_fresh(self, key: K) -> V | None:
+        entry = self.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.pop(key, None)
+            return None
+        return value
+
+    def put(self, key: K, value: V, ttl: float) -> None:
+        self[key] = (time.monotonic() + ttl, value)
+
+
+class SlackWorkspaceCache:
+    """Caches the workspace metadata the bot reads for every message: channel info,
+    user profiles, user groups with their members and thread history. One instance
+    per Slack bot (and so per tenant), only failed lookups are not cached.
+
+    Entries expire after `ttl` seconds. Slack events for renamed / archived channels,
+    changed users, changed user groups and edited / deleted thread messages drop the
+    affected entries right away, see `handle_event`.
+
+    Thread history is fetched incrementally: once a thread is cached, only replies
+    newer than the latest cached one are requested from Slack."""
+
+    def __init__(
+        self,
+        ttl: int = SAMBAAI_BOT_WORKSPACE_CACHE_TTL,
+        max_entries: int = SAMBAAI_BOT_WORKSPACE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.channels: _TTLCache[str, dict[str, Any]] = _TTLCache(max_entries)
+        self.users: _TTLCache[str, dict[str, Any]] = _TTLCache(max_entries)
+        self.email_to_user_id: _TTLCache[str, str] = _TTLCache(max_entries)
+        self.usergroups: _TTLCache[str, list[dict[str, Any]]] = _TTLCache(1)
+        self.usergroup_members: _TTLCache[str, list[str]] = _TTLCache(max_entries)
+        self.threads: _TTLCache[tuple[str, str], list[dict[str, Any]]] = _TTLCache(
+            max_entries
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get_channel(self, client: WebClient, channel_id: str) -> dict[str, Any]:
+        """conversations.info, raises SlackApiError if the lookup fails"""
+        if self.enabled and (channel := self.channels.get_fresh(channel_id)):
+            return channel
+
+        response = client.conversations_info(channel=channel_id)
+        response.validate()
+        channel = cast(dict[str, Any], response["channel"])
+        if self.enabled:
+            self.channels.put(channel_id, channel, self.ttl)
+        return channel
+
+    def get_user(self, client: WebClient, user_id: str) -> dict[str, Any] | None:
+        """users.info, None if the user can't be found"""
+        if self.enabled and (user := self.users.get_fresh(user_id)):
+            return user
+
+        response = client.users_info(user=user_id)
+        if not response["ok"]:
+            return None
+
+        user = cast(dict[str, Any], response.data).get("user") or {}
+        if self.enabled and user:
+            self.users.put(user_id, user, self.ttl)
+        return user
+
+    def lookup_user_id_by_email(self, client: WebClient, email: str) -> str:
+        """users.lookupByEmail, raises if the user can't be found"""
+        if self.enabled and (user_id := self.email_to_user_id.get_fresh(email)):
+            return user_id
+
+        user = cast(dict[str, Any], client.users_lookupByEmail(email=email).data)[
+            "user"
+        ]
+        user_id = cast(str, user["id"])
+        if self.enabled:
+            self.email_to_user_id.put(email, user_id, self.ttl)
+            self.users.put(user_id, user, self.ttl)
+        return user_id
+
+    def get_usergroups(self, client: WebClient) -> list[dict[str, Any]] | None:
+        """usergroups.list, None if the response is not usable"""
+        if (
+            self.enabled
+            and (usergroups := self.usergroups.get_fresh(_USERGROUPS_KEY)) is not None
+        ):
+            return usergroups
+
+        response = client.usergroups_list()
+        if not isinstance(response.data, dict):
+            return None
+
+        usergroups = cast(list[dict[str, Any]], response.data.get("usergroups", []))
+        if self.enabled:
+            self.usergroups.put(_USERGROUPS_KEY, usergroups, self.ttl)
+        return usergroups
+
+    def get_usergroup_members(
+        self, client: WebClient, usergroup_id: str
+    ) -> list[str] | None:
+        """usergroups.users.list, None if the response is not usable"""
+        if (
+            self.enabled
+            and (members := self.usergroup_members.get_fresh(usergroup_id)) is not None
+        ):
+            return members
+
+        response = client.usergroups_users_list(usergroup=usergroup_id)
+        if not isinstance(response.data, dict):
+            return None
+
+        members = cast(list[str], response.data.get("users", []))
+        if self.enabled:
+            self.usergroup_members.put(usergroup_id, members, self.ttl)
+        return members
+
+    def get_thread_messages(
+        self, client: WebClient, channel: str, thread_ts: str
+    ) -> list[dict[str, Any]]:
+        """conversations.replies, the thread root followed by all replies"""
+        if not self.enabled:
+            response = client.conversations_replies(channel=channel, ts=thread_ts)
+            return cast(dict, response.data).get("messages", [])
+
+        key = (channel, thread_ts)
+        cached = self.threads.get_fresh(key)
+        if not cached:
+            response = client.conversations_replies(channel=channel, ts=thread_ts)
+            messages = cast(dict, response.data).get("messages", [])
+        else:
+            latest_ts = cached[-1].get("ts")
+            response = client.conversations_replies(
+                channel=channel, ts=thread_ts, oldest=latest_ts
+            )
+            # Slack always includes the thread root, keep only the new replies
+            new_messages = [
+                message
+                for message in cast(dict, response.data).get("messages", [])
+                if _ts_value(message.get("ts")) > _ts_value(latest_ts)
+            ]
+            messages = cached + new_messages
+            logger.debug(
+                f"Read thread incrementally: channel={channel} thread={thread_ts} "
+                f"cached={len(cached)} new={len(new_messages)}"
+            )
+
+        self.threads.put(key, messages, self.ttl)
+        return list(messages)
+
+    def handle_event(self, event: dict[str, Any]) -> None:
+        """Drops the entries a Slack Events API event makes stale"""
+        event_type = event.get("type")
+        if event_type in _CHANNEL_EVENTS:
+            channel = event.get("channel")
+            channel_id = channel.get("id") if isinstance(channel, dict) else channel
+            if channel_id:
+                self.channels.pop(channel_id, None)
+        elif event_type in _USER_EVENTS:
+            user_id = (event.get("user") or {}).get("id")
+            if user_id:
+                self.users.pop(user_id, None)
+                # the email might have changed as well
+                for email in list(self.email_to_user_id):
+                    entry = self.email_to_user_id.get(email)
+                    if entry and entry[1] == user_id:
+                        self.email_to_user_id.pop(email, None)
+        elif event_type in _USERGROUP_EVENTS:
+            self.usergroups.pop(_USERGROUPS_KEY, None)
+            usergroup_id = (event.get("subteam") or {}).get("id")
+            if usergroup_id:
+                self.usergroup_members.pop(usergroup_id, None)
+        elif event_type == "subteam_members_changed":
+            usergroup_id = event.get("subteam_id")
+            if usergroup_id:
+                self.usergroup_members.pop(usergroup_id, None)
+        elif event_type == "message":
+            channel_id = event.get("channel")
+            if not channel_id:
+                return
+
+            if event.get("subtype") in _THREAD_MESSAGE_SUBTYPES:
+                message = event.get("message") or event.get("previous_message") or {}
+                thread_ts = message.get("thread_ts") or message.get("ts")
+                if thread_ts:
+                    self.threads.pop((channel_id, thread_ts), None)
+
+
+_workspace_caches: dict[tuple[str, str], SlackWorkspaceCache] = {}
+_workspace_caches_lock = threading.Lock()
+
+
+def get_workspace_cache(client: WebClient) -> SlackWorkspaceCache:
+    """Returns the cache for the Slack bot behind `client` in the current tenant"""
+    key = (get_current_tenant_id(), client.token or "")
+    with _workspace_caches_lock:
+        if key not in _workspace_caches:
+            _workspace_caches[key] = SlackWorkspaceCache()
+        return _workspace_caches[key]
+
+
+def drop_workspace_caches(tenant_id: str) -> None:
+    """Drops the caches of all Slack bots of a tenant, e.g. once the pod stops
+    serving it"""
+    with _workspace_caches_lock:
+        for key in [key for key in _workspace_caches if key[0] == tenant_id]:
+            del _workspace_caches[key]
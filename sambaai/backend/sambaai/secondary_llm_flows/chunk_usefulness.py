@@ -1,6 +1,9 @@
 from collections.abc import Callable
+from typing import Any
 
 from sambaai.configs.chat_configs import DISABLE_LLM_DOC_RELEVANCE
+from sambaai.context.search.deadline import SearchDeadline
+from sambaai.context.search.enums import SearchStage
 from sambaai.llm.interfaces import LLM
 from sambaai.llm.utils import dict_based_prompt_to_langchain_prompt
 from sambaai.llm.utils import message_to_string
@@ -56,6 +59,15 @@ def llm_eval_section(
     return _extract_usefulness(model_output)
 
 
+def _llm_eval_section_before_deadline(
+    deadline: SearchDeadline | None, *args: Any
+) -> bool | None:
+    # evaluations still queued once the deadline passed are not started
+    if deadline is not None and deadline.expired():
+        return None
+    return llm_eval_section(*args)
+
+
 def llm_batch_eval_sections(
     query: str,
     section_contents: list[str],
@@ -63,6 +75,7 @@ def llm_batch_eval_sections(
     titles: list[str],
     metadata_list: list[dict[str, str | list[str]]],
     use_threads: bool = True,
+    deadline: SearchDeadline | None = None,
 ) -> list[bool]:
     if DISABLE_LLM_DOC_RELEVANCE:
         raise RuntimeError(
@@ -72,7 +85,10 @@ def llm_batch_eval_sections(
 
     if use_threads:
         functions_with_args: list[tuple[Callable, tuple]] = [
-            (llm_eval_section, (query, section_content, llm, title, metadata))
+            (
+                _llm_eval_section_before_deadline,
+                (deadline, query, section_content, llm, title, metadata),
+            )
             for section_content, title, metadata in zip(
                 section_contents, titles, metadata_list
             )
@@ -81,10 +97,19 @@ def llm_batch_eval_sections(
         logger.debug(
             "Running LLM usefulness eval in parallel (following logging may be out of order)"
         )
+        # not rate limited like the indexing LLM calls, indexing must not stall search
         parallel_results = run_functions_tuples_in_parallel(
             functions_with_args, allow_failures=True
         )
 
+        if deadline is not None and deadline.expired():
+            num_unevaluated = sum(1 for item in parallel_results if item is None)
+            if num_unevaluated:
+                deadline.skip(
+                    SearchStage.LLM_FILTER,
+                    f"{num_unevaluated} of {len(parallel_results)} sections not evaluated",
+                )
+
         # In case of failure/timeout, don't throw out the section
         return [True if item is None else item for item in parallel_results]
 
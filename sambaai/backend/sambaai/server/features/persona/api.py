@@ -18,6 +18,7 @@ from sambaai.auth.users import current_user
 from sambaai.configs.constants import FileOrigin
 from sambaai.configs.constants import MilestoneRecordType
 from sambaai.configs.constants import NotificationType
+from sambaai.db.engine import get_readonly_session
 from sambaai.db.engine import get_session
 from sambaai.db.models import StarterMessageModel as StarterMessage
 from sambaai.db.models import User
@@ -393,7 +394,7 @@ def get_image_generation_tool(
 @basic_router.get("")
 def list_personas(
     user: User | None = Depends(current_chat_accessible_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
     include_deleted: bool = False,
     persona_ids: list[int] = Query(None),
 ) -> list[PersonaSnapshot]:
@@ -23,6 +23,7 @@ from sambaai.file_store.models import FileDescriptor
 from sambaai.llm.override_models import LLMOverride
 from sambaai.llm.override_models import PromptOverride
 from sambaai.tools.models import ToolCallFinalResult
+from shared_configs.model_server_models import Embedding
 
 
 if TYPE_CHECKING:
@@ -143,6 +144,11 @@ class CreateChatMessageRequest(ChunkContext):
     # TODO: decide how many of the above options we want to pass through to pro search
     use_agentic_search: bool = False
 
+    # Query embedding of `message` the caller already computed, the search uses it
+    # instead of embedding the message again.
+    # This won't be passed in directly from the API
+    precomputed_query_embedding: Embedding | None = None
+
     skip_gen_ai_answer_generation: bool = False
 
     @model_validator(mode="after")
@@ -22,10 +22,12 @@ from sambaai.db.chat import get_search_docs_for_chat_message
 from sambaai.db.chat import get_valid_messages_from_query_sessions
 from sambaai.db.chat import translate_db_message_to_chat_message_detail
 from sambaai.db.chat import translate_db_search_doc_to_server_search_doc
+from sambaai.db.engine import get_readonly_session
 from sambaai.db.engine import get_session
 from sambaai.db.models import User
 from sambaai.db.search_settings import get_current_search_settings
 from sambaai.db.tag import find_tags
+from sambaai.document_index.embedded.index import EmbeddedIndex
 from sambaai.document_index.factory import get_default_document_index
 from sambaai.document_index.vespa.index import VespaIndex
 from sambaai.server.query_and_chat.models import AdminSearchRequest
@@ -67,7 +69,7 @@ def admin_search(
     search_settings = get_current_search_settings(db_session)
     document_index = get_default_document_index(search_settings, None)
 
-    if not isinstance(document_index, VespaIndex):
+    if not isinstance(document_index, (VespaIndex, EmbeddedIndex)):
         raise HTTPException(
             status_code=400,
             detail="Cannot use admin-search when using a non-Vespa document index",
@@ -131,7 +133,7 @@ def get_tags(
 @basic_router.get("/user-searches")
 def get_user_search_sessions(
     user: User | None = Depends(current_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> ChatSessionsResponse:
     user_id = user.id if user is not None else None
 
@@ -178,7 +180,7 @@ def get_search_session(
     session_id: UUID,
     is_shared: bool = False,
     user: User | None = Depends(current_user),
-    db_session: Session = Depends(get_session),
+    db_session: Session = Depends(get_readonly_session),
 ) -> SearchSessionDetailResponse:
     user_id = user.id if user is not None else None
 
@@ -3,8 +3,10 @@ import time
 from sqlalchemy.orm import Session
 
 from sambaai.configs.app_configs import DISABLE_INDEX_UPDATE_ON_SWAP
+from sambaai.configs.app_configs import DOCUMENT_INDEX_TYPE
 from sambaai.configs.app_configs import MANAGED_VESPA
 from sambaai.configs.app_configs import VESPA_NUM_ATTEMPTS_ON_STARTUP
+from sambaai.configs.constants import DocumentIndexType
 from sambaai.configs.constants import KV_REINDEX_KEY
 from sambaai.configs.constants import KV_SEARCH_SETTINGS
 from sambaai.configs.model_configs import FAST_GEN_AI_MODEL_VERSION
@@ -34,6 +36,7 @@ from sambaai.db.search_settings import get_secondary_search_settings
 from sambaai.db.search_settings import update_current_search_settings
 from sambaai.db.search_settings import update_secondary_search_settings
 from sambaai.db.swap_index import check_and_perform_index_swap
+from sambaai.document_index.embedded.index import EmbeddedIndex
 from sambaai.document_index.factory import get_default_document_index
 from sambaai.document_index.interfaces import DocumentIndex
 from sambaai.document_index.vespa.index import VespaIndex
@@ -371,7 +374,12 @@ def setup_vespa_multitenant(supported_indices: list[SupportedEmbeddingModel]) ->
     for x in range(VESPA_ATTEMPTS):
         try:
             logger.notice(f"Setting up Vespa (attempt {x+1}/{VESPA_ATTEMPTS})...")
-            VespaIndex.register_multitenant_indices(
+            index_cls = (
+                EmbeddedIndex
+                if DOCUMENT_INDEX_TYPE == DocumentIndexType.EMBEDDED.value
+                else VespaIndex
+            )
+            index_cls.register_multitenant_indices(
                 indices=[index.index_name for index in supported_indices]
                 + [
                     f"{index.index_name}{ALT_INDEX_SUFFIX}"
@@ -2,6 +2,7 @@ from typing import cast
 from uuid import UUID
 
 from pydantic import BaseModel
+from pydantic import ConfigDict
 from pydantic import Field
 from sqlalchemy.orm import Session
 
@@ -15,6 +16,7 @@ from sambaai.configs.app_configs import AZURE_DALLE_API_VERSION
 from sambaai.configs.app_configs import AZURE_DALLE_DEPLOYMENT_NAME
 from sambaai.configs.chat_configs import BING_API_KEY
 from sambaai.configs.model_configs import GEN_AI_TEMPERATURE
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
 from sambaai.context.search.models import InferenceSection
 from sambaai.context.search.models import RerankingDetails
@@ -114,6 +116,9 @@ class SearchToolConfig(BaseModel):
     latest_query_files: list[InMemoryChatFile] | None = None
     # Use with care, should only be used for SambaAIBot in channels with multiple users
     bypass_acl: bool = False
+    deadline: SearchDeadline | None = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
 class InternetSearchToolConfig(BaseModel):
@@ -188,6 +193,7 @@ def construct_tools(
                     ),
                     rerank_settings=search_tool_config.rerank_settings,
                     bypass_acl=search_tool_config.bypass_acl,
+                    deadline=search_tool_config.deadline,
                 )
                 tool_dict[db_tool_model.id] = [search_tool]
 
@@ -280,6 +286,7 @@ def construct_tools(
             ),
             rerank_settings=search_tool_config.rerank_settings,
             bypass_acl=search_tool_config.bypass_acl,
+            deadline=search_tool_config.deadline,
         )
         tool_dict[1] = [search_tool]
 
@@ -23,6 +23,7 @@ from sambaai.chat.prune_and_merge import prune_sections
 from sambaai.configs.chat_configs import CONTEXT_CHUNKS_ABOVE
 from sambaai.configs.chat_configs import CONTEXT_CHUNKS_BELOW
 from sambaai.configs.model_configs import GEN_AI_MODEL_FALLBACK_MAX_TOKENS
+from sambaai.context.search.deadline import SearchDeadline
 from sambaai.context.search.enums import LLMEvaluationType
 from sambaai.context.search.enums import QueryFlow
 from sambaai.context.search.enums import SearchType
@@ -106,6 +107,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
         full_doc: bool = False,
         bypass_acl: bool = False,
         rerank_settings: RerankingDetails | None = None,
+        deadline: SearchDeadline | None = None,
     ) -> None:
         self.user = user
         self.persona = persona
@@ -123,6 +125,8 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
 
         # Only used via API
         self.rerank_settings = rerank_settings
+        # Time budget of the request, shared by every search it runs
+        self.deadline = deadline
 
         self.chunks_above = (
             chunks_above
@@ -408,6 +412,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
             prompt_config=self.prompt_config,
             retrieved_sections_callback=retrieved_sections_callback,
             contextual_pruning_config=self.contextual_pruning_config,
+            deadline=self.deadline,
         )
 
         search_query_info = SearchQueryInfo(
@@ -0,0 +1,202 @@
+"""Benchmarks the indexing chunker on a synthetic corpus.
+
+Usage:
+
+PYTHONPATH=. python scripts/chunker_benchmark.py
+
+The corpus mixes the document shapes connectors produce: chat threads and tickets with
+many short sections, wiki pages with medium sections and PDF-like documents with long
+sections. By default a WordPiece tokenizer is trained on the corpus so the benchmark
+runs offline, pass --tokenizer-model to use the embedding model's tokenizer instead.
+Pass --save / --compare to check that two versions of the chunker produce the same
+chunks, the trained tokenizer is saved next to the chunks since training is not
+deterministic across runs.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Any
+
+from tokenizers import Tokenizer  # type: ignore
+from tokenizers import models
+from tokenizers import normalizers
+from tokenizers import pre_tokenizers
+from tokenizers import trainers
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import ImageSection
+from sambaai.connectors.models import IndexingDocument
+from sambaai.connectors.models import Section
+from sambaai.connectors.models import TextSection
+from sambaai.indexing.chunker import Chunker
+from sambaai.natural_language_processing.utils import BaseTokenizer
+from sambaai.natural_language_processing.utils import HuggingFaceTokenizer
+
+_WORDS = (
+    "the of and to in is for that on with as by this be are from at or an it not "
+    "index search connector document chunk embedding vector query tenant user "
+    "permission sync retrieval model token latency throughput worker queue celery "
+    "postgres vespa redis cache request response deployment kubernetes cluster "
+    "configuration environment variable release incident postmortem customer "
+    "onboarding roadmap quarter revenue pipeline meeting notes action items owner "
+    "deadline approximately significantly implementation architecture dependency "
+    "2024 v1.2.3 https://example.com/docs API_KEY foo_bar() user@example.com ½ café"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(6, 24))
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        words.insert(rng.randint(1, len(words) - 1), rng.choice(["-", ",", ";"]))
+    return " ".join(words) + rng.choice([".", ".", ".", "?", "!", ":"])
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _long_text(rng: random.Random, paragraphs: int) -> str:
+    parts = []
+    for _ in range(paragraphs):
+        parts.append(_paragraph(rng, rng.randint(2, 12)))
+        parts.append(rng.choice(["\n", "\n\n", "\n\n\n"]))
+    return "".join(parts)
+
+
+def build_corpus(num_documents: int, seed: int = 0) -> list[IndexingDocument]:
+    rng = random.Random(seed)
+    documents = []
+    for ind in range(num_documents):
+        shape = ind % 4
+        if shape == 0:
+            # chat thread / ticket comments
+            texts = [_sentence(rng) for _ in range(rng.randint(5, 80))]
+        elif shape in (1, 2):
+            # wiki page
+            texts = [
+                _long_text(rng, rng.randint(1, 6)) for _ in range(rng.randint(2, 12))
+            ]
+        else:
+            # pdf / long file
+            texts = [_long_text(rng, rng.randint(40, 200))]
+
+        sections: list[TextSection | ImageSection] = [
+            TextSection(text=text, link=f"https://example.com/{ind}#{section_ind}")
+            for section_ind, text in enumerate(texts)
+        ]
+        documents.append(
+            IndexingDocument(
+                id=f"doc_{ind}",
+                source=DocumentSource.WEB,
+                semantic_identifier=f"Document {ind}: {_sentence(rng)}",
+                metadata={"tags": ["benchmark", f"shape_{shape}"], "owner": "bench"},
+                sections=sections,
+                processed_sections=[
+                    Section(text=section.text, link=section.link)
+                    for section in sections
+                ],
+            )
+        )
+    return documents
+
+
+def _wrap(tokenizer: Tokenizer) -> BaseTokenizer:
+    hf_tokenizer = HuggingFaceTokenizer.__new__(HuggingFaceTokenizer)
+    hf_tokenizer.encoder = tokenizer
+    return hf_tokenizer
+
+
+def train_tokenizer(documents: list[IndexingDocument]) -> Tokenizer:
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    trainer = trainers.WordPieceTrainer(vocab_size=3000, special_tokens=["[UNK]"])
+    tokenizer.train_from_iterator(
+        (section.text or "" for doc in documents for section in doc.sections),
+        trainer=trainer,
+    )
+    return tokenizer
+
+
+def _chunk_summaries(chunker: Chunker, documents: list[IndexingDocument]) -> list:
+    return [
+        [
+            chunk.chunk_id,
+            chunk.content,
+            chunk.blurb,
+            chunk.mini_chunk_texts,
+            {str(offset): link for offset, link in (chunk.source_links or {}).items()},
+            chunk.section_continuation,
+            chunk.large_chunk_reference_ids,
+        ]
+        for chunk in chunker.chunk(documents)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-token-limit", type=int, default=512)
+    parser.add_argument("--multipass", action="store_true")
+    parser.add_argument("--tokenizer-model", default=None)
+    parser.add_argument("--save", default=None, help="write the chunks to this file")
+    parser.add_argument(
+        "--compare", default=None, help="compare the chunks to this file"
+    )
+    args = parser.parse_args()
+
+    documents = build_corpus(args.documents)
+    tokenizer: BaseTokenizer
+    if args.tokenizer_model:
+        tokenizer = HuggingFaceTokenizer(args.tokenizer_model)
+    elif args.compare and os.path.exists(args.compare + ".tokenizer.json"):
+        tokenizer = _wrap(Tokenizer.from_file(args.compare + ".tokenizer.json"))
+    else:
+        trained_tokenizer = train_tokenizer(documents)
+        if args.save:
+            trained_tokenizer.save(args.save + ".tokenizer.json")
+        tokenizer = _wrap(trained_tokenizer)
+    chunker_kwargs: dict[str, Any] = dict(
+        tokenizer=tokenizer,
+        enable_multipass=args.multipass,
+        enable_large_chunks=args.multipass,
+        chunk_token_limit=args.chunk_token_limit,
+    )
+
+    timings = []
+    chunks = []
+    for _ in range(max(args.repeat, 1)):
+        chunker = Chunker(**chunker_kwargs)
+        start = time.perf_counter()
+        chunks = chunker.chunk(documents)
+        timings.append(time.perf_counter() - start)
+
+    num_chars = sum(len(doc.get_text_content()) for doc in documents)
+    best = min(timings)
+    print(
+        f"{len(documents)} documents, {num_chars / 1e6:.1f}M chars, {len(chunks)} chunks: "
+        f"best {best * 1000:.0f}ms, median {sorted(timings)[len(timings) // 2] * 1000:.0f}ms, "
+        f"{num_chars / best / 1e6:.2f}M chars/s"
+    )
+
+    if args.save or args.compare:
+        summaries = _chunk_summaries(Chunker(**chunker_kwargs), documents)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(summaries, f)
+        if args.compare:
+            with open(args.compare) as f:
+                expected = json.load(f)
+            mismatches = sum(
+                1 for got, exp in zip(summaries, expected) if got != exp
+            ) + abs(len(summaries) - len(expected))
+            print(f"{mismatches} chunks differ from {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Benchmarks how chunks are built, copied and merged on the search and indexing paths.
+
+Usage:
+
+PYTHONPATH=. python scripts/search_chunk_benchmark.py
+
+Each search request turns synthetic Vespa hits into cleaned InferenceChunks, builds a
+section around every hit, prunes the sections and merges them per document, the same
+steps a search tool call goes through after retrieval. The indexing stage attaches the
+indexing metadata to the embedded chunks of a batch of documents.
+
+Every stage reports its latency, the memory it allocates (traced with tracemalloc in a
+separate run) and the garbage collections it triggers.
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from sambaai.access.models import DocumentAccess
+from sambaai.chat.prune_and_merge import _apply_pruning
+from sambaai.chat.prune_and_merge import _merge_sections
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import TextSection
+from sambaai.context.search.models import InferenceChunk
+from sambaai.context.search.models import InferenceSection
+from sambaai.context.search.postprocessing.postprocessing import cleanup_chunks
+from sambaai.context.search.utils import inference_section_from_chunks
+from sambaai.document_index.vespa.chunk_retrieval import _vespa_hit_to_inference_chunk
+from sambaai.indexing.models import ChunkEmbedding
+from sambaai.indexing.models import DocMetadataAwareIndexChunk
+from sambaai.indexing.models import IndexChunk
+from sambaai.llm.interfaces import LLMConfig
+
+_WORDS = (
+    "the of and to in is for that on with as by this be are from at or an it not "
+    "index search connector document chunk embedding vector query tenant user "
+    "permission sync retrieval model token latency throughput worker queue celery "
+    "postgres vespa redis cache request response deployment kubernetes cluster"
+).split()
+
+
+def _text(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=num_words))
+
+
+def build_hits(
+    num_documents: int, chunks_per_document: int, rng: random.Random
+) -> list[dict[str, Any]]:
+    hits = []
+    for doc_ind in range(num_documents):
+        title = f"Document {doc_ind}: {_text(rng, 6)}"
+        metadata_suffix = f"\n\nowner: bench\ntags: shape_{doc_ind % 4}"
+        for chunk_id in range(chunks_per_document):
+            content = _text(rng, 350)
+            hits.append(
+                {
+                    "relevance": rng.random(),
+                    "fields": {
+                        "document_id": f"doc_{doc_ind}",
+                        "chunk_id": chunk_id,
+                        "blurb": content[:200],
+                        "content": f"{title}\n{content}{metadata_suffix}",
+                        "content_summary": f"<hi>{content[:100]}</hi><sep />",
+                        "source_links": json.dumps(
+                            {"0": f"https://example.com/{doc_ind}#{chunk_id}"}
+                        ),
+                        "semantic_identifier": title,
+                        "title": title,
+                        "section_continuation": chunk_id > 0,
+                        "source_type": DocumentSource.WEB.value,
+                        "metadata": json.dumps(
+                            {"owner": "bench", "tags": [f"shape_{doc_ind % 4}"]}
+                        ),
+                        "metadata_suffix": metadata_suffix,
+                        "doc_updated_at": 1_700_000_000 + doc_ind,
+                        "boost": 0,
+                        "hidden": False,
+                    },
+                }
+            )
+    rng.shuffle(hits)
+    return hits
+
+
+def search_request(hits: list[dict[str, Any]], llm_config: LLMConfig) -> None:
+    chunks = cleanup_chunks([_vespa_hit_to_inference_chunk(hit) for hit in hits])
+    by_document: dict[str, dict[int, InferenceChunk]] = {}
+    for chunk in chunks:
+        by_document.setdefault(chunk.document_id, {})[chunk.chunk_id] = chunk
+
+    sections: list[InferenceSection] = []
+    for chunk in sorted(chunks, reverse=True):
+        neighbours = by_document[chunk.document_id]
+        section = inference_section_from_chunks(
+            center_chunk=chunk,
+            chunks=[
+                neighbours[chunk_id]
+                for chunk_id in range(chunk.chunk_id - 1, chunk.chunk_id + 2)
+                if chunk_id in neighbours
+            ],
+        )
+        if section:
+            sections.append(section)
+
+    pruned_sections = _apply_pruning(
+        sections=sections,
+        section_relevance_list=None,
+        token_limit=1_000_000,
+        is_manually_selected_docs=False,
+        use_sections=True,
+        using_tool_message=False,
+        llm_config=llm_config,
+    )
+    _merge_sections(pruned_sections)
+
+
+def build_index_chunks(
+    num_documents: int, chunks_per_document: int, rng: random.Random
+) -> list[IndexChunk]:
+    index_chunks = []
+    for doc_ind in range(num_documents):
+        document = Document(
+            id=f"doc_{doc_ind}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Document {doc_ind}",
+            metadata={"owner": "bench"},
+            sections=[
+                TextSection(text=_text(rng, 350), link=f"https://example.com/{ind}")
+                for ind in range(chunks_per_document)
+            ],
+        )
+        for chunk_id, section in enumerate(document.sections):
+            index_chunks.append(
+                IndexChunk(
+                    chunk_id=chunk_id,
+                    blurb=section.text[:200] if section.text else "",
+                    content=section.text or "",
+                    source_links={0: section.link or ""},
+                    image_file_name=None,
+                    section_continuation=False,
+                    source_document=document,
+                    title_prefix="",
+                    metadata_suffix_semantic="",
+                    metadata_suffix_keyword="",
+                    contextual_rag_reserved_tokens=0,
+                    doc_summary="",
+                    chunk_context="",
+                    mini_chunk_texts=None,
+                    large_chunk_id=None,
+                    embeddings=ChunkEmbedding(
+                        full_embedding=[rng.random() for _ in range(384)],
+                        mini_chunk_embeddings=[],
+                    ),
+                    title_embedding=None,
+                )
+            )
+    return index_chunks
+
+
+def index_batch(index_chunks: list[IndexChunk]) -> None:
+    access = DocumentAccess.build(
+        user_emails=[],
+        user_groups=[],
+        external_user_emails=[],
+        external_user_group_ids=[],
+        is_public=True,
+    )
+    # the pipeline holds the whole batch until it is written to the index
+    indexed_chunks = [
+        DocMetadataAwareIndexChunk.from_index_chunk(
+            index_chunk=chunk,
+            access=access,
+            document_sets=set(),
+            user_file=None,
+            user_folder=None,
+            boost=0,
+            aggregated_chunk_boost_factor=1.0,
+            tenant_id="public",
+        )
+        for chunk in index_chunks
+    ]
+    del indexed_chunks
+
+
+def _measure(
+    name: str, run: Callable[[], None], repeat: int, num_items: int, unit: str
+) -> None:
+    run()
+
+    timings = []
+    collections_before = sum(stat["collections"] for stat in gc.get_stats())
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    collections = (
+        sum(stat["collections"] for stat in gc.get_stats()) - collections_before
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    print(
+        f"{name}: best {best * 1000:.1f}ms, "
+        f"median {sorted(timings)[len(timings) // 2] * 1000:.1f}ms, "
+        f"{num_items / best:.0f} {unit}/s, peak {peak / 1e6:.1f}MB allocated, "
+        f"{collections / repeat:.1f} gc runs per call"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--chunks-per-document", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--index-documents", type=int, default=50)
+    parser.add_argument("--index-chunks-per-document", type=int, default=40)
+    parser.add_argument(
+        "--llm-provider",
+        default="benchmark",
+        help="an unknown provider uses the default embedding model tokenizer",
+    )
+    parser.add_argument("--llm-model", default="benchmark")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hits = build_hits(args.documents, args.chunks_per_document, rng)
+    llm_config = LLMConfig(
+        model_provider=args.llm_provider,
+        model_name=args.llm_model,
+        temperature=0.0,
+        max_input_tokens=128_000,
+    )
+    _measure(
+        f"search ({len(hits)} hits)",
+        lambda: search_request(hits, llm_config),
+        args.repeat,
+        len(hits),
+        "hits",
+    )
+
+    index_chunks = build_index_chunks(
+        args.index_documents, args.index_chunks_per_document, rng
+    )
+    _measure(
+        f"index ({len(index_chunks)} chunks)",
+        lambda: index_batch(index_chunks),
+        max(args.repeat // 4, 1),
+        len(index_chunks),
+        "chunks",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,8 @@ from sambaai.chat.models import PromptConfig
 from sambaai.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
 from sambaai.chat.prompt_builder.answer_prompt_builder import default_build_system_message
 from sambaai.chat.prompt_builder.answer_prompt_builder import default_build_user_message
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_OVERFLOW
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_SIZE
 from sambaai.configs.constants import DEFAULT_PERSONA_ID
+from sambaai.db.engine import get_api_server_pool_size
 from sambaai.db.engine import get_session_with_current_tenant
 from sambaai.db.engine import SqlEngine
 from sambaai.db.persona import get_persona_by_id
@@ -86,10 +85,8 @@ def generate_search_queries() -> None:
     if MULTI_TENANT:
         raise ValueError("Multi-tenant is not supported currently")
 
-    SqlEngine.init_engine(
-        pool_size=POSTGRES_API_SERVER_POOL_SIZE,
-        max_overflow=POSTGRES_API_SERVER_POOL_OVERFLOW,
-    )
+    pool_size, max_overflow = get_api_server_pool_size()
+    SqlEngine.init_engine(pool_size=pool_size, max_overflow=max_overflow)
 
     queries = _load_queries()
 
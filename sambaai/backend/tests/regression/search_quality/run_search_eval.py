@@ -10,8 +10,6 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from sambaai.agents.agent_search.shared_graph_utils.models import QueryExpansionType
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_OVERFLOW
-from sambaai.configs.app_configs import POSTGRES_API_SERVER_POOL_SIZE
 from sambaai.configs.chat_configs import DOC_TIME_DECAY
 from sambaai.configs.chat_configs import HYBRID_ALPHA
 from sambaai.configs.chat_configs import HYBRID_ALPHA_KEYWORD
@@ -24,6 +22,7 @@ from sambaai.context.search.postprocessing.postprocessing import semantic_rerank
 from sambaai.context.search.preprocessing.preprocessing import query_analysis
 from sambaai.context.search.retrieval.search_runner import get_query_embedding
 from sambaai.context.search.utils import remove_stop_words_and_punctuation
+from sambaai.db.engine import get_api_server_pool_size
 from sambaai.db.engine import get_session_with_current_tenant
 from sambaai.db.engine import SqlEngine
 from sambaai.db.search_settings import get_current_search_settings
@@ -240,10 +239,8 @@ def run_search_eval() -> None:
     if MULTI_TENANT:
         raise ValueError("Multi-tenant is not supported currently")
 
-    SqlEngine.init_engine(
-        pool_size=POSTGRES_API_SERVER_POOL_SIZE,
-        max_overflow=POSTGRES_API_SERVER_POOL_OVERFLOW,
-    )
+    pool_size, max_overflow = get_api_server_pool_size()
+    SqlEngine.init_engine(pool_size=pool_size, max_overflow=max_overflow)
 
     query_pairs = _load_query_pairs()
     search_parameters = _load_search_parameters()
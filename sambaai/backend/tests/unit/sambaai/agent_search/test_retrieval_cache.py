@@ -0,0 +1,171 @@
+import threading
+import time
+from collections.abc import Hashable
+from datetime import datetime
+
+import pytest
+from langgraph.graph import END
+from langgraph.graph import START
+from langgraph.graph import StateGraph
+from langgraph.types import Send
+from pydantic import BaseModel
+
+from sambaai.agents.agent_search.shared_graph_utils.node_timing import (
+    NodeTimingCallbackHandler,
+)
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    AgentRetrievalCache,
+)
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    CachedRetrieval,
+)
+from sambaai.agents.agent_search.shared_graph_utils.retrieval_cache import (
+    make_retrieval_cache_key,
+)
+from sambaai.configs.constants import DocumentSource
+from sambaai.context.search.models import BaseFilters
+from sambaai.context.search.models import InferenceChunk
+from sambaai.context.search.models import InferenceSection
+from sambaai.context.search.models import RetrievalDetails
+
+
+def _retrieval(document_id: str) -> CachedRetrieval:
+    chunk = InferenceChunk(
+        chunk_id=0,
+        blurb=document_id,
+        content=document_id,
+        source_links=None,
+        section_continuation=False,
+        document_id=document_id,
+        source_type=DocumentSource.FILE,
+        image_file_name=None,
+        title=None,
+        semantic_identifier=document_id,
+        boost=1,
+        recency_bias=1.0,
+        score=1.0,
+        hidden=False,
+        primary_owners=None,
+        secondary_owners=None,
+        large_chunk_reference_ids=[],
+        metadata={},
+        doc_summary="",
+        chunk_context="",
+        match_highlights=[],
+        updated_at=datetime.now(),
+    )
+    section = InferenceSection(center_chunk=chunk, chunks=[chunk], combined_content="")
+    return CachedRetrieval(
+        retrieved_documents=[section], pre_rerank_documents=[], query_info=None
+    )
+
+
+def test_cache_key_normalizes_query_and_includes_filters() -> None:
+    options = RetrievalDetails(filters=BaseFilters(document_set=["a"]))
+
+    assert make_retrieval_cache_key(
+        "What is  SambaAI?", False, options
+    ) == make_retrieval_cache_key("what is sambaai", False, options)
+    assert make_retrieval_cache_key(
+        "what is sambaai", False, options
+    ) != make_retrieval_cache_key("what is sambaai", True, options)
+    assert make_retrieval_cache_key(
+        "what is sambaai", False, options
+    ) != make_retrieval_cache_key(
+        "what is sambaai",
+        False,
+        RetrievalDetails(filters=BaseFilters(document_set=["b"])),
+    )
+
+
+def test_concurrent_lookups_retrieve_once() -> None:
+    cache = AgentRetrievalCache()
+    key = make_retrieval_cache_key("query", False, None)
+    calls = 0
+    release = threading.Event()
+
+    def _retrieve() -> CachedRetrieval:
+        nonlocal calls
+        calls += 1
+        release.wait(timeout=5)
+        return _retrieval("doc")
+
+    results: list[CachedRetrieval] = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_retrieve(key, _retrieve))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert len(results) == 4
+    # each caller can modify its own result
+    results[0].retrieved_documents[0].center_chunk.score = -2.0
+    assert results[1].retrieved_documents[0].center_chunk.score == 1.0
+
+
+def test_failed_retrieval_is_not_cached() -> None:
+    cache = AgentRetrievalCache()
+    key = make_retrieval_cache_key("query", False, None)
+
+    def _fail() -> CachedRetrieval:
+        raise RuntimeError("search failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_retrieve(key, _fail)
+
+    result = cache.get_or_retrieve(key, lambda: _retrieval("doc"))
+    assert result.retrieved_documents[0].center_chunk.document_id == "doc"
+
+
+def test_embed_queries_batches_missing_queries() -> None:
+    cache = AgentRetrievalCache()
+    batches: list[list[str]] = []
+
+    def _embed(queries: list[str]) -> list[list[float]]:
+        batches.append(queries)
+        return [[float(len(query))] for query in queries]
+
+    cache.embed_queries(["a", "bb", "a"], _embed)
+    cache.embed_queries(["bb", "ccc"], _embed)
+
+    assert batches == [["a", "bb"], ["ccc"]]
+    assert cache.get_embedding("ccc") == [3.0]
+    assert cache.get_embedding("dddd") is None
+
+
+class _State(BaseModel):
+    count: int = 0
+
+
+def test_node_timing_records_each_node_run() -> None:
+    def _fan_out(state: _State) -> list[Send | Hashable]:
+        return [Send("work", state) for _ in range(3)]
+
+    graph = StateGraph(_State)
+    graph.add_node("start", lambda state: {})
+    graph.add_node("work", lambda state: {})
+    graph.add_edge(START, "start")
+    graph.add_conditional_edges("start", _fan_out, ["work"])
+    graph.add_edge("work", END)
+
+    node_timer = NodeTimingCallbackHandler()
+    list(
+        graph.compile().stream(
+            _State(count=1), config={"callbacks": [node_timer], "max_concurrency": 2}
+        )
+    )
+
+    assert {node: timing.calls for node, timing in node_timer.timings.items()} == {
+        "start": 1,
+        "work": 3,
+    }
+    assert "work: calls=3" in node_timer.summary()
@@ -0,0 +1,44 @@
+import multiprocessing as mp
+import time
+from pathlib import Path
+
+import psutil
+
+from sambaai.background.indexing.job_client import SimpleJobClient
+
+
+def _start_child_and_wait(pid_file: str) -> None:
+    # would fail if the job was a daemon process
+    child = mp.get_context("spawn").Process(target=time.sleep, args=(60,))
+    child.start()
+    Path(pid_file).write_text(str(child.pid))
+    time.sleep(60)
+
+
+def _is_gone(pid: int) -> bool:
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+
+
+def test_released_job_takes_its_children_along(tmp_path: Path) -> None:
+    pid_file = tmp_path / "child.pid"
+    job = SimpleJobClient().submit(_start_child_and_wait, str(pid_file))
+    assert job is not None and job.process is not None
+
+    deadline = time.monotonic() + 60
+    while not pid_file.exists() or not pid_file.read_text():
+        assert job.status == "running", job.exception()
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    child_pid = int(pid_file.read_text())
+
+    assert job.release()
+    job.process.join(timeout=10)
+    assert job.done()
+
+    deadline = time.monotonic() + 10
+    while not _is_gone(child_pid):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
@@ -0,0 +1,139 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from sambaai.background.indexing import run_indexing
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import IndexAttemptMetadata
+from sambaai.connectors.models import TextSection
+from sambaai.db.enums import IndexModelStatus
+from sambaai.indexing.chunker import Chunker
+from sambaai.indexing.indexing_pipeline import IndexingPipelineResult
+from sambaai.indexing.indexing_pipeline import process_image_sections
+from sambaai.natural_language_processing.utils import BaseTokenizer
+
+_MODULE = "sambaai.background.indexing.run_indexing"
+
+
+class _WhitespaceTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [len(token) for token in string.split()]
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[int]) -> str:
+        return " ".join("x" * token for token in tokens)
+
+
+def _documents() -> list[Document]:
+    return [
+        Document(
+            id=f"doc_{ind}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Document {ind}",
+            metadata={},
+            sections=[
+                TextSection(text=f"Sentence {ind} of the document. " * 50, link="link")
+            ],
+        )
+        for ind in range(4)
+    ]
+
+
+def _index_attempt() -> MagicMock:
+    attempt = MagicMock()
+    attempt.from_beginning = True
+    attempt.search_settings.index_name = "index"
+    attempt.search_settings.status = IndexModelStatus.PRESENT
+    attempt.connector_credential_pair.id = 1
+    attempt.connector_credential_pair.connector.id = 1
+    attempt.connector_credential_pair.connector.source = DocumentSource.WEB
+    attempt.connector_credential_pair.connector.indexing_start = None
+    attempt.connector_credential_pair.credential.id = 1
+    return attempt
+
+
+def _connector_runner(documents: list[Document]) -> MagicMock:
+    checkpoint = MagicMock(has_more=True)
+    final_checkpoint = MagicMock(has_more=False)
+    connector_runner = MagicMock()
+    connector_runner.connector.build_dummy_checkpoint.return_value = checkpoint
+    connector_runner.run.return_value = iter([(documents, None, final_checkpoint)])
+    connector_runner.doc_buffer.stats.model_dump.return_value = {}
+    return connector_runner
+
+
+@contextmanager
+def _session() -> Iterator[MagicMock]:
+    yield MagicMock()
+
+
+def test_run_indexing_chunks_in_worker_processes() -> None:
+    documents = _documents()
+    chunkers: list[Chunker] = []
+    used_pool: list[bool] = []
+
+    def _build_chunker(num_processes: int, **kwargs: Any) -> Chunker:
+        chunkers.append(
+            Chunker(
+                tokenizer=_WhitespaceTokenizer(),
+                chunk_token_limit=64,
+                num_processes=num_processes,
+            )
+        )
+        return chunkers[-1]
+
+    def _build_indexing_pipeline(chunker: Chunker, **kwargs: Any) -> Any:
+        def _pipeline(
+            document_batch: list[Document],
+            index_attempt_metadata: IndexAttemptMetadata,
+        ) -> IndexingPipelineResult:
+            chunks = chunker.chunk(process_image_sections(document_batch))
+            used_pool.append(chunker._pool is not None)
+            return IndexingPipelineResult(
+                new_docs=len(document_batch),
+                total_docs=len(document_batch),
+                total_chunks=len(chunks),
+                failures=[],
+            )
+
+        return _pipeline
+
+    mark_attempt_succeeded = MagicMock()
+    patches: dict[str, Any] = {
+        "INDEXING_CHUNKER_PROCESSES": 2,
+        "get_session_with_current_tenant": _session,
+        "get_index_attempt": MagicMock(return_value=_index_attempt()),
+        "get_recent_completed_attempts_for_cc_pair": MagicMock(return_value=[]),
+        "get_index_attempt_errors_for_cc_pair": MagicMock(return_value=[]),
+        "_get_connector_runner": MagicMock(return_value=_connector_runner(documents)),
+        "_check_connector_and_attempt_status": MagicMock(),
+        "build_chunker": _build_chunker,
+        "build_indexing_pipeline": _build_indexing_pipeline,
+        "DefaultIndexingEmbedder": MagicMock(),
+        "InformationContentClassificationModel": MagicMock(),
+        "get_default_document_index": MagicMock(),
+        "HttpxPool": MagicMock(),
+        "MemoryTracer": MagicMock(),
+        "save_checkpoint": MagicMock(),
+        "update_docs_indexed": MagicMock(),
+        "optional_telemetry": MagicMock(),
+        "mark_attempt_succeeded": mark_attempt_succeeded,
+        "create_milestone_and_report": MagicMock(),
+        "update_connector_credential_pair": MagicMock(),
+    }
+    with patch.multiple(_MODULE, **patches), patch(
+        "sambaai.indexing.indexing_pipeline.get_image_extraction_and_analysis_enabled",
+        return_value=False,
+    ):
+        run_indexing._run_indexing(MagicMock(), 1, "public")
+
+    assert [chunker.num_processes for chunker in chunkers] == [2]
+    assert used_pool == [True]
+    # the workers are shut down once the attempt is over
+    assert chunkers[0]._pool is None
+    mark_attempt_succeeded.assert_called_once()
@@ -0,0 +1,149 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from sambaai.chat.answer_cache import AnswerCache
+from sambaai.chat.models import ChatSambaAIBotResponse
+from sambaai.chat.models import CitationInfo
+from sambaai.redis.redis_pool import TenantRedis
+
+_LAST_MODIFIED = "sambaai.chat.answer_cache.get_documents_last_modified"
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    def get(self, key: str) -> bytes | None:
+        value = self.data.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.data[key] = value
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def hset(self, key: str, field: str, value: str) -> None:
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return {
+            field.encode(): value.encode()
+            for field, value in self.hashes.get(key, {}).items()
+        }
+
+    def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    def expire(self, key: str, ttl: int) -> None:
+        pass
+
+
+def _answer(text: str) -> ChatSambaAIBotResponse:
+    return ChatSambaAIBotResponse(
+        answer=text,
+        citations=[CitationInfo(citation_num=1, document_id="doc1")],
+        chat_message_id=1,
+    )
+
+
+def _cache(redis_client: _FakeRedis | None = None) -> AnswerCache:
+    return AnswerCache(
+        redis_client=redis_client or _FakeRedis(),  # type: ignore
+        scope_key="scope",
+        similarity_threshold=0.95,
+        ttl=3600,
+        max_entries=2,
+    )
+
+
+def _unmodified(db_session: object, document_ids: list[str]) -> dict:
+    long_ago = datetime.now(timezone.utc) - timedelta(days=1)
+    return {document_id: long_ago for document_id in document_ids}
+
+
+@patch(_LAST_MODIFIED, side_effect=_unmodified)
+def test_similar_questions_share_an_answer(_: MagicMock) -> None:
+    cache = _cache()
+    cache.put([1.0, 0.0, 0.0], _answer("the answer"))
+
+    # nearly the same direction, the magnitude doesn't matter
+    hit = cache.get([2.0, 0.1, 0.0], MagicMock())
+    assert hit is not None and hit.answer == "the answer"
+    # the chat message belongs to the first asker
+    assert hit.chat_message_id is None
+
+    assert cache.get([1.0, 1.0, 0.0], MagicMock()) is None
+
+
+@patch(_LAST_MODIFIED, side_effect=_unmodified)
+def test_invalid_answers_are_not_cached(_: MagicMock) -> None:
+    cache = _cache()
+    cache.put([1.0, 0.0], ChatSambaAIBotResponse(answer="x", answer_valid=False))
+    cache.put([1.0, 0.0], ChatSambaAIBotResponse(answer=None))
+    cache.put([1.0, 0.0], ChatSambaAIBotResponse(answer="x", error_msg="failed"))
+
+    assert cache.get([1.0, 0.0], MagicMock()) is None
+
+
+@patch(_LAST_MODIFIED, side_effect=_unmodified)
+def test_puts_from_several_workers_are_all_kept(_: MagicMock) -> None:
+    redis_client = _FakeRedis()
+    worker_1, worker_2 = _cache(redis_client), _cache(redis_client)
+
+    # worker 1 has read the index before worker 2 writes to it
+    assert worker_1.get([0.0, 1.0], MagicMock()) is None
+    worker_2.put([1.0, 0.0], _answer("a"))
+    worker_1.put([0.0, 1.0], _answer("b"))
+
+    for cache in (worker_1, worker_2):
+        assert cache.get([1.0, 0.0], MagicMock()) is not None
+        assert cache.get([0.0, 1.0], MagicMock()) is not None
+
+
+@patch(_LAST_MODIFIED, side_effect=_unmodified)
+def test_only_the_newest_entries_are_kept(_: MagicMock) -> None:
+    cache = _cache()
+    cache.put([1.0, 0.0, 0.0], _answer("a"))
+    cache.put([0.0, 1.0, 0.0], _answer("b"))
+    cache.put([0.0, 0.0, 1.0], _answer("c"))
+
+    assert cache.get([1.0, 0.0, 0.0], MagicMock()) is None
+    assert cache.get([0.0, 0.0, 1.0], MagicMock()) is not None
+
+
+def test_answers_are_dropped_when_their_documents_change() -> None:
+    cache = _cache()
+    cache.put([1.0, 0.0], _answer("the answer"))
+
+    with patch(
+        _LAST_MODIFIED,
+        return_value={"doc1": datetime.now(timezone.utc) + timedelta(seconds=1)},
+    ):
+        assert cache.get([1.0, 0.0], MagicMock()) is None
+
+    # and stays dropped
+    with patch(_LAST_MODIFIED, side_effect=_unmodified):
+        assert cache.get([1.0, 0.0], MagicMock()) is None
+
+    cache.put([1.0, 0.0], _answer("the answer"))
+    # a deleted document invalidates the answer as well
+    with patch(_LAST_MODIFIED, return_value={}):
+        assert cache.get([1.0, 0.0], MagicMock()) is None
+
+
+def test_index_commands_use_the_tenant_prefix() -> None:
+    redis_client = TenantRedis("tenant_1")
+    with patch.object(TenantRedis, "execute_command") as execute_command:
+        execute_command.return_value = {}
+        cache = AnswerCache(redis_client=redis_client, scope_key="scope")
+        cache._load_index()
+        cache._drop_from_index(["entry"])
+
+    keys = {call.args[1] for call in execute_command.call_args_list}
+    assert keys == {"tenant_1:answer_cache_index:scope"}
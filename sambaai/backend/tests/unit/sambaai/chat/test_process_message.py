@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sambaai.chat.process_message import _get_force_search_settings
+from sambaai.context.search.enums import OptionalSearchSetting
+from sambaai.context.search.models import RetrievalDetails
+from sambaai.server.query_and_chat.models import CreateChatMessageRequest
+from sambaai.tools.tool import Tool
+from sambaai.tools.tool_implementations.search.search_tool import SearchTool
+
+
+def _request(**kwargs: object) -> CreateChatMessageRequest:
+    return CreateChatMessageRequest(
+        chat_session_id=uuid4(),
+        parent_message_id=None,
+        message="what is the vacation policy?",
+        file_descriptors=[],
+        prompt_id=None,
+        search_doc_ids=None,
+        retrieval_options=RetrievalDetails(run_search=OptionalSearchSetting.ALWAYS),
+        **kwargs,  # type: ignore
+    )
+
+
+def test_precomputed_query_embedding_is_passed_to_the_search() -> None:
+    tools: list[Tool] = [MagicMock(spec=SearchTool)]
+
+    force_use_tool = _get_force_search_settings(
+        _request(precomputed_query_embedding=[0.1, 0.2]), tools, [], []
+    )
+    assert force_use_tool.force_use
+    assert force_use_tool.override_kwargs is not None
+    assert force_use_tool.override_kwargs.precomputed_query_embedding == [0.1, 0.2]
+
+    # the embedding is of the message, not of an overridden query
+    force_use_tool = _get_force_search_settings(
+        _request(precomputed_query_embedding=[0.1, 0.2], query_override="other"),
+        tools,
+        [],
+        [],
+    )
+    assert force_use_tool.override_kwargs is None
@@ -1,10 +1,16 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
 import pytest
 
+from sambaai.chat.prune_and_merge import _apply_pruning
 from sambaai.chat.prune_and_merge import _merge_sections
 from sambaai.configs.constants import DocumentSource
 from sambaai.context.search.models import InferenceChunk
 from sambaai.context.search.models import InferenceSection
 from sambaai.context.search.utils import inference_section_from_chunks
+from sambaai.natural_language_processing.utils import BaseTokenizer
+from sambaai.prompts.prompt_utils import build_doc_context_str
 
 
 # This large test accounts for all of the following:
@@ -224,3 +230,59 @@ def test_merge_minimal_sections(
     merged_sections = _merge_sections(sections)
     assert merged_sections[0].combined_content == expected_content
     assert merged_sections[0].center_chunk == expected_center_chunk
+
+
+class _CharTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [ord(char) for char in string]
+
+    def tokenize(self, string: str) -> list[str]:
+        return list(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+def test_pruning_does_not_modify_the_sections() -> None:
+    sections: list[InferenceSection] = []
+    for chunk in [DOC_2_TOP_CHUNK, DOC_2_FILLER_1]:
+        section = inference_section_from_chunks(center_chunk=chunk, chunks=[chunk])
+        assert section is not None
+        sections.append(section)
+    section_token_counts = [
+        len(
+            build_doc_context_str(
+                semantic_identifier=section.center_chunk.semantic_identifier,
+                source_type=section.center_chunk.source_type,
+                content=section.combined_content,
+                metadata_dict=section.center_chunk.metadata,
+                updated_at=section.center_chunk.updated_at,
+                ind=ind,
+            )
+        )
+        for ind, section in enumerate(sections)
+    ]
+
+    with patch(
+        "sambaai.chat.prune_and_merge.get_tokenizer", return_value=_CharTokenizer()
+    ):
+        pruned_sections = _apply_pruning(
+            sections=sections,
+            section_relevance_list=None,
+            token_limit=sum(section_token_counts) - 5,
+            is_manually_selected_docs=False,
+            use_sections=True,
+            using_tool_message=False,
+            llm_config=MagicMock(),
+        )
+
+    assert [section.combined_content for section in pruned_sections] == [
+        "Doc 2 Content 3",
+        "Doc 2 Cont",
+    ]
+    assert [section.combined_content for section in sections] == [
+        "Doc 2 Content 3",
+        "Doc 2 Content 1",
+    ]
+    assert pruned_sections[1].center_chunk is DOC_2_FILLER_1
+    assert DOC_2_FILLER_1.content == "Doc 2 Content 1"
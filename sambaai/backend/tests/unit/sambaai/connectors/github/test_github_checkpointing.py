@@ -3,6 +3,7 @@ from collections.abc import Callable
 from collections.abc import Generator
 from datetime import datetime
 from datetime import timezone
+from typing import Any
 from typing import cast
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -25,7 +26,9 @@ from sambaai.connectors.github.connector import GithubConnector
 from sambaai.connectors.github.connector import GithubConnectorStage
 from sambaai.connectors.github.connector import SerializedRepository
 from sambaai.connectors.models import Document
-from tests.unit.sambaai.connectors.utils import load_everything_from_checkpoint_connector
+from tests.unit.sambaai.connectors.utils import (
+    load_everything_from_checkpoint_connector,
+)
 from tests.unit.sambaai.connectors.utils import (
     load_everything_from_checkpoint_connector_from_checkpoint,
 )
@@ -90,6 +93,7 @@ def create_mock_pr() -> Callable[..., MagicMock]:
         mock_pr.body = body
         mock_pr.state = state
         mock_pr.merged = merged
+        mock_pr.merged_at = updated_at if merged else None
         mock_pr.updated_at = updated_at
         mock_pr.html_url = (
             html_url
@@ -914,3 +918,224 @@ def test_load_from_checkpoint_cursor_pagination_completion(
     assert (
         pull_requests_func_invocation_count == 3
     )  # twice for repo2 PRs, once for repo1 PRs
+
+
+def _etag_response(status: int, etag: str | None = None) -> tuple[int, dict, str]:
+    return status, ({"ETag": etag} if etag else {}), ""
+
+
+def test_load_from_checkpoint_skips_unchanged_repos(
+    build_github_connector: Callable[..., GithubConnector],
+    mock_github_client: MagicMock,
+    create_mock_repo: Callable[..., MagicMock],
+    create_mock_issue: Callable[..., MagicMock],
+) -> None:
+    """Repos whose first page ETag matches the previous run are skipped"""
+    github_connector = build_github_connector()
+    mock_repo = create_mock_repo()
+    mock_repo.full_name = "test-org/test-repo"
+    mock_github_client.get_repo.return_value = mock_repo
+
+    previous_checkpoint = github_connector.build_dummy_checkpoint()
+    previous_checkpoint.repo_etags = {
+        "test-org/test-repo:prs": '"pr-etag"',
+        "test-org/test-repo:issues": '"old-issue-etag"',
+    }
+    checkpoint = github_connector.build_checkpoint_from_previous_run(
+        lambda: previous_checkpoint
+    )
+    assert checkpoint.repo_etags == previous_checkpoint.repo_etags
+    assert checkpoint.stage == GithubConnectorStage.PRS
+
+    def _request_json(
+        verb: str, url: str, parameters: dict, headers: dict
+    ) -> tuple[int, dict, str]:
+        if url.endswith("/pulls"):
+            assert headers == {"If-None-Match": '"pr-etag"'}
+            return _etag_response(304)
+        return _etag_response(200, '"new-issue-etag"')
+
+    mock_github_client._requester.requestJson.side_effect = _request_json
+    mock_repo.get_issues.return_value = MagicMock()
+    mock_repo.get_issues.return_value.get_page.side_effect = [
+        [create_mock_issue(number=1)],
+        [],
+    ]
+
+    with patch.object(SerializedRepository, "to_Repository", return_value=mock_repo):
+        outputs = load_everything_from_checkpoint_connector_from_checkpoint(
+            github_connector, 0, time.time(), checkpoint
+        )
+
+    mock_repo.get_pulls.assert_not_called()
+    docs = [item for output in outputs for item in output.items]
+    assert [cast(Document, doc).id for doc in docs] == [
+        "https://github.com/test-org/test-repo/issues/1"
+    ]
+    assert outputs[-1].next_checkpoint.repo_etags == {
+        "test-org/test-repo:prs": '"pr-etag"',
+        "test-org/test-repo:issues": '"new-issue-etag"',
+    }
+
+
+def test_load_from_checkpoint_drops_etag_when_skipping_items_after_end(
+    build_github_connector: Callable[..., GithubConnector],
+    mock_github_client: MagicMock,
+    create_mock_repo: Callable[..., MagicMock],
+    create_mock_issue: Callable[..., MagicMock],
+) -> None:
+    """An ETag covering items past the end of the run must not skip the next run"""
+    github_connector = build_github_connector()
+    github_connector.include_prs = False
+    mock_repo = create_mock_repo()
+    mock_repo.full_name = "test-org/test-repo"
+    mock_github_client.get_repo.return_value = mock_repo
+    mock_github_client._requester.requestJson.return_value = _etag_response(
+        200, '"issue-etag"'
+    )
+    mock_repo.get_issues.return_value = MagicMock()
+    mock_repo.get_issues.return_value.get_page.side_effect = [
+        [
+            create_mock_issue(
+                number=2, updated_at=datetime(2024, 6, 1, tzinfo=timezone.utc)
+            ),
+            create_mock_issue(
+                number=1, updated_at=datetime(2023, 12, 1, tzinfo=timezone.utc)
+            ),
+        ],
+        [],
+    ]
+
+    end = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    with patch.object(SerializedRepository, "to_Repository", return_value=mock_repo):
+        outputs = load_everything_from_checkpoint_connector(github_connector, 0, end)
+
+    docs = [item for output in outputs for item in output.items]
+    assert [cast(Document, doc).id for doc in docs] == [
+        "https://github.com/test-org/test-repo/issues/1"
+    ]
+    assert outputs[-1].next_checkpoint.repo_etags == {}
+
+
+def _graphql_connection(
+    nodes: list[dict], end_cursor: str | None = None
+) -> dict[str, Any]:
+    return {
+        "pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor},
+        "nodes": nodes,
+    }
+
+
+def _graphql_node(repo: str, kind: str, number: int, updated_at: str) -> dict:
+    return {
+        "databaseId": number,
+        "url": f"https://github.com/test-org/{repo}/{kind}/{number}",
+        "title": f"{kind} {number}",
+        "body": "body",
+        "updatedAt": updated_at,
+        "state": "MERGED" if kind == "pull" else "OPEN",
+        "merged": kind == "pull",
+    }
+
+
+def test_load_from_checkpoint_graphql_batches_repos(
+    build_github_connector: Callable[..., GithubConnector],
+    mock_github_client: MagicMock,
+    create_mock_repo: Callable[..., MagicMock],
+) -> None:
+    """GraphQL mode pages several repos per query with a cursor per repo"""
+    github_connector = build_github_connector(repositories="repo-a,repo-b")
+    github_connector.use_graphql = True
+    repo_a = create_mock_repo(name="repo-a", id=1)
+    repo_a.full_name = "test-org/repo-a"
+    repo_b = create_mock_repo(name="repo-b", id=2)
+    repo_b.full_name = "test-org/repo-b"
+    mock_github_client.get_repo.side_effect = [repo_a, repo_b]
+    mock_github_client._requester.requestJson.return_value = _etag_response(200)
+    mock_github_client._requester.graphql_url = "https://api.github.com/graphql"
+
+    recent = "2024-01-02T00:00:00Z"
+    queries: list[dict[str, Any]] = []
+    responses = [
+        {
+            "data": {
+                "r0": {
+                    "pullRequests": _graphql_connection(
+                        [_graphql_node("repo-a", "pull", 1, recent)], "pr-cursor-a"
+                    ),
+                    "issues": _graphql_connection(
+                        [_graphql_node("repo-a", "issues", 2, recent)]
+                    ),
+                },
+                "r1": {
+                    "pullRequests": _graphql_connection([]),
+                    "issues": _graphql_connection(
+                        [
+                            _graphql_node("repo-b", "issues", 1, recent),
+                            # older than the start of the window, stops the repo
+                            _graphql_node(
+                                "repo-b", "issues", 3, "2020-01-01T00:00:00Z"
+                            ),
+                        ],
+                        "issue-cursor-b",
+                    ),
+                },
+            }
+        },
+        {
+            "data": {
+                "r0": {
+                    "pullRequests": _graphql_connection(
+                        [_graphql_node("repo-a", "pull", 3, recent)]
+                    )
+                }
+            }
+        },
+    ]
+
+    def _graphql(verb: str, url: str, input: dict[str, Any]) -> tuple[dict, dict]:
+        queries.append(input)
+        return {}, responses[len(queries) - 1]
+
+    mock_github_client._requester.requestJsonAndCheck.side_effect = _graphql
+
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp()
+    outputs = load_everything_from_checkpoint_connector(
+        github_connector, start, time.time()
+    )
+
+    assert len(outputs) == 3
+    assert outputs[0].next_checkpoint.graphql_pending_repos == [
+        "test-org/repo-a",
+        "test-org/repo-b",
+    ]
+
+    first_call = outputs[1]
+    assert [cast(Document, doc).id for doc in first_call.items] == [
+        "https://github.com/test-org/repo-a/pull/1",
+        "https://github.com/test-org/repo-a/issues/2",
+        "https://github.com/test-org/repo-b/issues/1",
+    ]
+    pr_doc = cast(Document, first_call.items[0])
+    assert pr_doc.metadata == {"merged": "True", "state": "closed"}
+    # repo-b finished, repo-a only has PRs left
+    active_repos = first_call.next_checkpoint.graphql_active_repos
+    assert [(r.full_name, r.pr_cursor, r.done) for r in active_repos] == [
+        ("test-org/repo-a", "pr-cursor-a", False)
+    ]
+    assert active_repos[0].issues_done
+
+    # one query for both repos, then one for the remaining PR page of repo-a
+    assert queries[0]["variables"]["name0"] == "repo-a"
+    assert queries[0]["variables"]["name1"] == "repo-b"
+    assert queries[1]["variables"] == {
+        "owner0": "test-org",
+        "name0": "repo-a",
+        "prCursor0": "pr-cursor-a",
+    }
+    assert "issues(" not in queries[1]["query"]
+
+    assert [cast(Document, doc).id for doc in outputs[2].items] == [
+        "https://github.com/test-org/repo-a/pull/3"
+    ]
+    assert outputs[2].next_checkpoint.has_more is False
@@ -0,0 +1,181 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from googleapiclient.errors import HttpError  # type: ignore
+
+from sambaai.connectors.google_drive.connector import GoogleDriveConnector
+from sambaai.connectors.google_drive.file_retrieval import get_changed_files
+from sambaai.connectors.google_drive.models import build_change_feed_key
+from sambaai.connectors.google_drive.models import ChangeFeedCursor
+from sambaai.connectors.google_drive.models import ChangeFeedKeyType
+from sambaai.connectors.google_drive.models import DriveRetrievalStage
+from sambaai.connectors.google_drive.models import GoogleDriveCheckpoint
+
+_CONNECTOR_MODULE = "sambaai.connectors.google_drive.connector"
+
+USER_EMAIL = "user@example.com"
+DRIVE_ID = "drive-1"
+
+
+def _file(file_id: str, **kwargs: Any) -> dict[str, Any]:
+    return {
+        "id": file_id,
+        "name": file_id,
+        "mimeType": "text/plain",
+        "modifiedTime": "2024-01-01T00:00:00+00:00",
+        "owners": [{"emailAddress": USER_EMAIL}],
+        **kwargs,
+    }
+
+
+def _http_error(status: int) -> HttpError:
+    resp = MagicMock()
+    resp.status = status
+    return HttpError(resp=resp, content=b"error")
+
+
+@pytest.fixture
+def connector() -> GoogleDriveConnector:
+    connector = GoogleDriveConnector(include_shared_drives=True)
+    connector.use_changes_api = True
+    connector._creds = MagicMock()
+    connector._primary_admin_email = USER_EMAIL
+    return connector
+
+
+def _change_feed_checkpoint(keys: list[str]) -> GoogleDriveCheckpoint:
+    checkpoint = GoogleDriveConnector(
+        include_shared_drives=True
+    ).build_dummy_checkpoint()
+    checkpoint.completion_stage = DriveRetrievalStage.CHANGES
+    checkpoint.change_feed_cursors = {
+        key: ChangeFeedCursor(page_token="token-0", user_email=USER_EMAIL)
+        for key in keys
+    }
+    checkpoint.change_feed_keys_to_retrieve = keys
+    return checkpoint
+
+
+def test_get_changed_files_filters_and_returns_resume_tokens() -> None:
+    service = MagicMock()
+    service.changes().list().execute.side_effect = [
+        {
+            "nextPageToken": "token-1",
+            "changes": [
+                {"fileId": "a", "file": _file("a")},
+                {"fileId": "b", "removed": True},
+                {"fileId": "c", "file": _file("c", trashed=True)},
+            ],
+        },
+        {
+            "newStartPageToken": "token-2",
+            "changes": [
+                {
+                    "fileId": "d",
+                    "file": _file("d", mimeType="application/vnd.google-apps.folder"),
+                },
+                {"fileId": "e", "file": _file("e")},
+            ],
+        },
+    ]
+
+    pages = list(get_changed_files(service=service, page_token="token-0"))
+
+    assert [([f["id"] for f in files], token) for files, token in pages] == [
+        (["a"], "token-1"),
+        (["e"], "token-2"),
+    ]
+
+
+def test_change_feed_advances_cursors(connector: GoogleDriveConnector) -> None:
+    drive_key = build_change_feed_key(ChangeFeedKeyType.DRIVE, DRIVE_ID)
+    checkpoint = _change_feed_checkpoint([drive_key])
+
+    def _changed_files(**kwargs: Any) -> Iterator[tuple[list[dict], str]]:
+        assert kwargs["drive_id"] == DRIVE_ID
+        yield [_file("a"), _file("b")], "token-1"
+        yield [_file("a")], "token-2"
+
+    with patch(f"{_CONNECTOR_MODULE}.get_drive_service"), patch(
+        f"{_CONNECTOR_MODULE}.get_changed_files", side_effect=_changed_files
+    ):
+        retrieved = list(connector._change_feed_retrieval(checkpoint))
+
+    assert [file.drive_file["id"] for file in retrieved] == ["a", "b"]
+    assert all(file.parent_id == DRIVE_ID for file in retrieved)
+    assert checkpoint.change_feed_cursors[drive_key].page_token == "token-2"
+    assert checkpoint.completion_stage == DriveRetrievalStage.DONE
+
+    # cursors survive serialization and are carried over to the next run
+    serialized = checkpoint.model_dump_json()
+    next_checkpoint = connector.build_checkpoint_from_previous_run(
+        lambda: connector.validate_checkpoint_json(serialized)
+    )
+    assert next_checkpoint.completion_stage == DriveRetrievalStage.START
+    assert next_checkpoint.change_feed_cursors[drive_key].page_token == "token-2"
+
+
+def test_change_feed_falls_back_on_expired_token(
+    connector: GoogleDriveConnector,
+) -> None:
+    drive_key = build_change_feed_key(ChangeFeedKeyType.DRIVE, DRIVE_ID)
+    checkpoint = _change_feed_checkpoint([drive_key])
+
+    def _changed_files(**kwargs: Any) -> Iterator[tuple[list[dict], str]]:
+        raise _http_error(410)
+        yield
+
+    with patch(f"{_CONNECTOR_MODULE}.get_drive_service"), patch(
+        f"{_CONNECTOR_MODULE}.get_changed_files", side_effect=_changed_files
+    ):
+        retrieved = list(connector._change_feed_retrieval(checkpoint))
+
+    assert retrieved == []
+    assert checkpoint.completion_stage == DriveRetrievalStage.START
+    assert checkpoint.change_feed_cursors == {}
+
+
+def test_change_feed_requires_cursor_for_every_drive(
+    connector: GoogleDriveConnector,
+) -> None:
+    checkpoint = connector.build_dummy_checkpoint()
+    checkpoint.change_feed_cursors = {
+        build_change_feed_key(ChangeFeedKeyType.DRIVE, DRIVE_ID): ChangeFeedCursor(
+            page_token="token-0", user_email=USER_EMAIL
+        )
+    }
+
+    with patch.object(
+        connector, "get_all_drive_ids", return_value={DRIVE_ID, "drive-2"}
+    ):
+        assert not connector._can_use_change_feed(checkpoint)
+
+    with patch.object(connector, "get_all_drive_ids", return_value={DRIVE_ID}):
+        assert connector._can_use_change_feed(checkpoint)
+    assert checkpoint.change_feed_keys_to_retrieve == [
+        build_change_feed_key(ChangeFeedKeyType.DRIVE, DRIVE_ID)
+    ]
+
+
+@pytest.mark.parametrize("use_changes_api", [True, False])
+def test_full_listing_is_unbounded_when_recording_cursors(
+    connector: GoogleDriveConnector, use_changes_api: bool
+) -> None:
+    connector.use_changes_api = use_changes_api
+    checkpoint = connector.build_dummy_checkpoint()
+
+    with patch.object(
+        connector, "_manage_oauth_retrieval", return_value=iter([])
+    ) as retrieval:
+        list(connector._fetch_drive_items(False, checkpoint, start=10, end=20))
+        list(connector._fetch_drive_items(True, checkpoint, start=10, end=20))
+
+    # cursors are taken after `end`, so a listing that records them can't stop
+    # at `end`; slim listings record no cursors
+    assert retrieval.call_args_list[0].kwargs["end"] == (
+        None if use_changes_api else 20
+    )
+    assert retrieval.call_args_list[1].kwargs["end"] == 20
@@ -757,3 +757,80 @@ def test_salesforce_sqlite() -> None:
         sf_db.close()
 
         _clear_sf_db(directory)
+
+
+def test_salesforce_sqlite_bulk_load() -> None:
+    """
+    Tests the batched load path:
+    1. Rows spanning several executemany batches are all written
+    2. Parents loaded after their children still resolve as affected parents
+    3. Batched record and child record lookups
+    4. Connection pragmas are reapplied when reconnecting to an existing db
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "salesforce_db.sqlite")
+        sf_db = SambaAISalesforceSQLite(filename)
+        sf_db.BULK_LOAD_BATCH_SIZE = 3
+        sf_db.connect()
+        sf_db.apply_schema()
+
+        account_ids = _VALID_SALESFORCE_IDS[:2]
+        contact_ids = _VALID_SALESFORCE_IDS[40:47]
+
+        # load the children first so the parent types can't be resolved yet
+        _create_csv_file_and_update_db(
+            sf_db,
+            "Contact",
+            [
+                {
+                    "Id": contact_id,
+                    "AccountId": account_ids[i % 2],
+                    "LastName": f"Contact {i}",
+                }
+                for i, contact_id in enumerate(contact_ids)
+            ],
+            "contacts.csv",
+        )
+        assert set(sf_db.find_ids_by_type("Contact")) == set(contact_ids)
+
+        _create_csv_file_and_update_db(
+            sf_db,
+            "Account",
+            [{"Id": account_id, "Name": "Account"} for account_id in account_ids],
+            "accounts.csv",
+        )
+
+        affected_ids_by_type = list(
+            sf_db.get_affected_parent_ids_by_type(contact_ids, ["Account"])
+        )
+        assert affected_ids_by_type == [("Account", set(account_ids))]
+
+        # batches never exceed batch_size and never repeat an id
+        batches = list(
+            sf_db.get_affected_parent_ids_by_type(
+                account_ids + contact_ids, ["Account", "Contact"], batch_size=2
+            )
+        )
+        assert all(len(batch) <= 2 for _, batch in batches)
+        assert sorted(id for _, batch in batches for id in batch) == sorted(
+            account_ids + contact_ids
+        )
+
+        records = sf_db.get_records(account_ids + ["missing"])
+        assert set(records) == set(account_ids)
+        assert all(record.type == "Account" for record in records.values())
+
+        child_records = sf_db.get_child_records(account_ids[0])
+        assert {record.id for record in child_records} == set(contact_ids[::2])
+        assert all(record.type == "Contact" for record in child_records)
+        assert all("AccountId" not in record.data for record in child_records)
+
+        sf_db.close()
+
+        sf_db = SambaAISalesforceSQLite(filename)
+        sf_db.connect()
+        cursor = sf_db.cursor()
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cursor.execute("PRAGMA cache_size").fetchone()[0] == -2000000
+        sf_db.close()
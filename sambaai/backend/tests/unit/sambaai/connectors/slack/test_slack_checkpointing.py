@@ -0,0 +1,205 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from sambaai.connectors.models import ConnectorFailure
+from sambaai.connectors.models import Document
+from sambaai.connectors.slack.connector import get_thread
+from sambaai.connectors.slack.connector import SlackCheckpoint
+from sambaai.connectors.slack.connector import SlackConnector
+from sambaai.connectors.slack.utils import SlackTextCleaner
+from sambaai.connectors.slack.utils import SlackTierRateLimiter
+from sambaai.utils.lru_cache import ThreadSafeLRUCache
+from tests.unit.sambaai.connectors.utils import (
+    load_everything_from_checkpoint_connector,
+)
+from tests.unit.sambaai.connectors.utils import (
+    load_everything_from_checkpoint_connector_from_checkpoint,
+)
+
+_CONNECTOR_MODULE = "sambaai.connectors.slack.connector"
+
+END = 1_700_000_000.0
+
+
+def _channel(channel_id: str) -> dict[str, Any]:
+    return {
+        "id": channel_id,
+        "name": f"name-{channel_id}",
+        "is_member": True,
+        "is_private": False,
+    }
+
+
+def _message(ts: str) -> dict[str, Any]:
+    return {"ts": ts, "text": f"message {ts}"}
+
+
+# channel id -> pages of messages, newest to oldest
+_PAGES: dict[str, list[list[dict[str, Any]]]] = {
+    "C1": [[_message("100.1"), _message("99.1")], [_message("98.1")]],
+    "C2": [[_message("100.2")]],
+    "C3": [[_message("100.3")]],
+}
+
+
+def _get_messages(
+    channel: dict[str, Any], client: Any, oldest: str | None, latest: str | None
+) -> tuple[list[dict[str, Any]], bool]:
+    pages = _PAGES[channel["id"]]
+    for i, page in enumerate(pages):
+        if float(page[0]["ts"]) < float(latest or END):
+            return page, i < len(pages) - 1
+    return [], False
+
+
+@pytest.fixture
+def slack_connector() -> SlackConnector:
+    connector = SlackConnector(channel_concurrency=2)
+    connector.client = MagicMock()
+    connector.text_cleaner = SlackTextCleaner(client=connector.client)
+    return connector
+
+
+def test_channels_progress_independently(slack_connector: SlackConnector) -> None:
+    with patch(
+        f"{_CONNECTOR_MODULE}.get_channels",
+        return_value=[_channel("C1"), _channel("C2"), _channel("C3")],
+    ), patch(f"{_CONNECTOR_MODULE}._get_messages", side_effect=_get_messages), patch(
+        f"{_CONNECTOR_MODULE}._get_channel_by_id",
+        side_effect=lambda client, channel_id: _channel(channel_id),
+    ), patch(
+        f"{_CONNECTOR_MODULE}.get_message_link", return_value="https://slack/link"
+    ):
+        outputs = load_everything_from_checkpoint_connector(slack_connector, 0, END)
+
+    # first call only lists channels and activates the first two
+    assert outputs[0].items == []
+    assert [c["id"] for c in outputs[0].next_checkpoint.active_channels] == [
+        "C1",
+        "C2",
+    ]
+
+    # second call pages both channels at once, C2 finishes and C3 takes its slot
+    second = outputs[1]
+    assert {doc.id for doc in second.items if isinstance(doc, Document)} == {
+        "C1__100.1",
+        "C1__99.1",
+        "C2__100.2",
+    }
+    assert second.next_checkpoint.channel_completion_map == {
+        "C1": "99.1",
+        "C2": "100.2",
+    }
+    assert [c["id"] for c in second.next_checkpoint.active_channels] == ["C1", "C3"]
+
+    all_doc_ids = [
+        item.id
+        for output in outputs
+        for item in output.items
+        if isinstance(item, Document)
+    ]
+    assert sorted(all_doc_ids) == sorted(
+        f"{channel_id}__{message['ts']}"
+        for channel_id, pages in _PAGES.items()
+        for page in pages
+        for message in page
+    )
+    assert not outputs[-1].next_checkpoint.has_more
+
+
+def test_failed_channel_is_retried(slack_connector: SlackConnector) -> None:
+    attempts: dict[str, int] = {}
+
+    def _flaky_get_messages(
+        channel: dict[str, Any], client: Any, oldest: str | None, latest: str | None
+    ) -> tuple[list[dict[str, Any]], bool]:
+        attempts[channel["id"]] = attempts.get(channel["id"], 0) + 1
+        if channel["id"] == "C2" and attempts["C2"] == 1:
+            raise RuntimeError("boom")
+        return _get_messages(channel, client, oldest, latest)
+
+    # a checkpoint from before channels were indexed in parallel
+    checkpoint = SlackCheckpoint(
+        channel_ids=["C1", "C2"],
+        channel_completion_map={},
+        current_channel=_channel("C2"),
+        seen_thread_ts=[],
+        has_more=True,
+    )
+    with patch(
+        f"{_CONNECTOR_MODULE}._get_messages", side_effect=_flaky_get_messages
+    ), patch(
+        f"{_CONNECTOR_MODULE}._get_channel_by_id",
+        side_effect=lambda client, channel_id: _channel(channel_id),
+    ), patch(
+        f"{_CONNECTOR_MODULE}.get_message_link", return_value="https://slack/link"
+    ):
+        outputs = load_everything_from_checkpoint_connector_from_checkpoint(
+            slack_connector, 0, END, checkpoint
+        )
+
+    first = outputs[0]
+    assert len(first.items) == 1
+    assert isinstance(first.items[0], ConnectorFailure)
+    assert first.next_checkpoint.current_channel is None
+    assert "C2" not in first.next_checkpoint.channel_completion_map
+    assert [c["id"] for c in first.next_checkpoint.active_channels] == ["C2", "C1"]
+
+    assert attempts["C2"] == 2
+    assert not outputs[-1].next_checkpoint.has_more
+
+
+def test_thread_replies_are_cached(slack_connector: SlackConnector) -> None:
+    thread = [
+        {"ts": "100.1", "thread_ts": "100.1", "text": "parent"},
+        {"ts": "100.5", "thread_ts": "100.1", "text": "reply"},
+    ]
+    client = MagicMock()
+    client.conversations_replies.return_value.validate.return_value = {
+        "messages": thread
+    }
+    client.conversations_replies.return_value.get.return_value = {}
+
+    for _ in range(3):
+        assert (
+            get_thread(client, "C1", "100.1", thread_cache=slack_connector.thread_cache)
+            == thread
+        )
+    assert client.conversations_replies.call_count == 1
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: ThreadSafeLRUCache[str, int] = ThreadSafeLRUCache(max_size=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1  # a is now the most recently used
+    cache["c"] = 3
+
+    assert "b" not in cache
+    assert dict(cache.items()) == {"a": 1, "c": 3}
+
+
+def test_rate_limiter_paces_by_tier() -> None:
+    limiter = SlackTierRateLimiter(tier_requests_per_minute={1: 1, 2: 2, 3: 3, 4: 60})
+    now = [0.0]
+    sleeps: list[float] = []
+
+    def _sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    with patch("sambaai.connectors.slack.utils.time.monotonic", lambda: now[0]), patch(
+        "sambaai.connectors.slack.utils.time.sleep", _sleep
+    ):
+        # tier 2 allows a burst of 2, then one call every 30 seconds
+        assert limiter.acquire("conversations.list") == 0
+        assert limiter.acquire("conversations.list") == 0
+        assert limiter.acquire("conversations.list") == pytest.approx(30.0)
+
+        # other methods have their own budget
+        assert limiter.acquire("users.info") == 0
+
+    assert sleeps == [pytest.approx(30.0)]
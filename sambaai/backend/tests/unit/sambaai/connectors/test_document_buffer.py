@@ -0,0 +1,109 @@
+import sys
+from collections.abc import Generator
+from typing import Any
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.connector_runner import ConnectorRunner
+from sambaai.connectors.document_buffer import DocumentBatchBuffer
+from sambaai.connectors.interfaces import LoadConnector
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import ImageSection
+from sambaai.connectors.models import TextSection
+
+
+def _doc(doc_id: str, text_len: int = 10) -> Document:
+    return Document(
+        id=doc_id,
+        sections=[
+            TextSection(link=f"https://example.com/{doc_id}", text="a" * text_len),
+            ImageSection(image_file_name=f"{doc_id}.png"),
+        ],
+        source=DocumentSource.FILE,
+        semantic_identifier=doc_id,
+        metadata={"key": ["v1", "v2"]},
+    )
+
+
+def test_buffer_spills_over_budget_and_preserves_order() -> None:
+    docs = [_doc(str(i), text_len=1000) for i in range(6)]
+    doc_size = sys.getsizeof(docs[0])
+    buffer = DocumentBatchBuffer(batch_size=6, max_memory_bytes=doc_size * 2)
+
+    for doc in docs:
+        buffer.add(doc)
+    assert buffer.is_full()
+
+    batches = list(buffer.drain())
+
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+    assert [doc for batch in batches for doc in batch] == docs
+    assert isinstance(batches[-1][-1].sections[1], ImageSection)
+    assert len(buffer) == 0
+
+    assert buffer.stats.spilled_documents == 4
+    assert buffer.stats.spilled_memory_bytes == doc_size * 4
+    # text compresses well
+    assert 0 < buffer.stats.spilled_disk_bytes < buffer.stats.spilled_memory_bytes
+    assert buffer.stats.peak_memory_bytes == doc_size * 2
+
+
+def test_buffer_yields_oversized_document_alone() -> None:
+    small, large = _doc("small"), _doc("large", text_len=10_000)
+    buffer = DocumentBatchBuffer(batch_size=10, max_memory_bytes=1000)
+
+    for doc in [small, large, small]:
+        buffer.add(doc)
+
+    assert [[doc.id for doc in batch] for batch in buffer.drain()] == [
+        ["small"],
+        ["large"],
+        ["small"],
+    ]
+    assert buffer.stats.largest_document_bytes == sys.getsizeof(large)
+
+
+class _LoadConnector(LoadConnector):
+    def __init__(self, batches: list[list[Document]]) -> None:
+        self.batches = batches
+
+    def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
+        return None
+
+    def load_from_state(self) -> Generator[list[Document], None, None]:
+        yield from self.batches
+
+
+def test_connector_runner_bounds_batches_by_memory() -> None:
+    docs = [_doc(str(i), text_len=1000) for i in range(3)]
+    runner: ConnectorRunner = ConnectorRunner(
+        connector=_LoadConnector([list(docs)]),
+        batch_size=10,
+        max_memory_bytes=sys.getsizeof(docs[0]),
+    )
+
+    outputs = list(runner.run(runner.connector.build_dummy_checkpoint()))
+
+    doc_batches = [batch for batch, _, _ in outputs if batch is not None]
+    assert doc_batches == [[doc] for doc in docs]
+    assert outputs[-1][2] is not None and not outputs[-1][2].has_more
+    assert runner.doc_buffer.stats.spilled_documents == 2
+
+
+def test_connector_runner_leaves_connector_batches_untouched() -> None:
+    docs = [_doc(str(i), text_len=1000) for i in range(3)]
+    connector_batch = list(docs)
+    runner: ConnectorRunner = ConnectorRunner(
+        connector=_LoadConnector([connector_batch]),
+        batch_size=10,
+        max_memory_bytes=sys.getsizeof(docs[0]),
+    )
+
+    doc_batches = [
+        batch
+        for batch, _, _ in runner.run(runner.connector.build_dummy_checkpoint())
+        if batch is not None
+    ]
+
+    assert doc_batches == [[doc] for doc in docs]
+    # the connector may still hold the list it yielded
+    assert connector_batch == docs
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+from sambaai.context.search import deadline as deadline_module
+from sambaai.context.search.deadline import SearchDeadline
+from sambaai.context.search.enums import SearchStage
+
+
+def test_stages_are_skipped_once_too_little_time_is_left() -> None:
+    with patch.object(deadline_module.time, "monotonic", return_value=100.0):
+        deadline = SearchDeadline(
+            5.0,
+            stage_min_seconds={
+                SearchStage.QUERY_EXPANSION: 3.0,
+                SearchStage.RERANK: 1.0,
+            },
+        )
+
+    with patch.object(deadline_module.time, "monotonic", return_value=103.0):
+        assert deadline.remaining() == 2.0
+        assert not deadline.expired()
+        assert not deadline.allows(SearchStage.QUERY_EXPANSION)
+        assert deadline.allows(SearchStage.RERANK)
+        # stages without a minimum run as long as the deadline has not passed
+        assert deadline.allows(SearchStage.SECTION_EXPANSION)
+
+    with patch.object(deadline_module.time, "monotonic", return_value=106.0):
+        assert deadline.remaining() == 0.0
+        assert deadline.expired()
+
+    assert list(deadline.skipped_stages) == [SearchStage.QUERY_EXPANSION]
+
+
+def test_skipped_stages_is_a_copy() -> None:
+    deadline = SearchDeadline(0)
+    deadline.skip(SearchStage.LLM_FILTER, "2 of 4 sections not evaluated")
+
+    skipped_stages = deadline.skipped_stages
+    skipped_stages.clear()
+    assert deadline.skipped_stages == {
+        SearchStage.LLM_FILTER: "2 of 4 sections not evaluated"
+    }
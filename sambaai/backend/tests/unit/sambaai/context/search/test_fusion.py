@@ -0,0 +1,106 @@
+import pytest
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.context.search.enums import FusionMethod
+from sambaai.context.search.models import InferenceChunkUncleaned
+from sambaai.context.search.retrieval import fusion
+from sambaai.context.search.retrieval.fusion import fuse_chunk_lists
+
+
+def _chunk(document_id: str, chunk_id: int, score: float) -> InferenceChunkUncleaned:
+    return InferenceChunkUncleaned(
+        chunk_id=chunk_id,
+        section_continuation=False,
+        title=None,
+        boost=0,
+        recency_bias=1.0,
+        score=score,
+        hidden=False,
+        content=f"{document_id} {chunk_id}",
+        source_type=DocumentSource.WEB,
+        metadata={},
+        document_id=document_id,
+        blurb="",
+        semantic_identifier=document_id,
+        updated_at=None,
+        source_links=None,
+        match_highlights=[],
+        image_file_name=None,
+        doc_summary="",
+        chunk_context="",
+        metadata_suffix="suffix",
+    )
+
+
+def _ids(chunks: list[InferenceChunkUncleaned]) -> list[str]:
+    return [chunk.unique_id for chunk in chunks]
+
+
+def test_max_score_fusion_keeps_best_occurrence() -> None:
+    best_a0 = _chunk("a", 0, 0.9)
+    fused = fuse_chunk_lists(
+        [
+            [_chunk("a", 0, 0.5), _chunk("b", 0, 0.4)],
+            [best_a0, _chunk("b", 1, 0.7), _chunk("b", 0, 0.1)],
+        ],
+        method=FusionMethod.MAX_SCORE,
+    )
+    assert _ids(fused) == ["a__0", "b__1", "b__0"]
+    assert fused[0] is best_a0
+    assert [chunk.score for chunk in fused] == [0.9, 0.7, 0.4]
+
+
+def test_reciprocal_rank_fusion_and_document_cap() -> None:
+    lists = [
+        [_chunk("a", 0, 30), _chunk("a", 1, 20), _chunk("b", 0, 10)],
+        [_chunk("b", 0, 0.9), _chunk("a", 1, 0.8), _chunk("c", 0, 0.7)],
+    ]
+    fused = fuse_chunk_lists(lists, method=FusionMethod.RECIPROCAL_RANK, rrf_k=0)
+    # a__0 and a__1 tie, the first seen chunk goes first
+    assert _ids(fused) == ["b__0", "a__0", "a__1", "c__0"]
+    assert [chunk.score for chunk in fused] == pytest.approx(
+        [1 / 3 + 1, 1, 1 / 2 + 1 / 2, 1 / 3]
+    )
+
+    capped = fuse_chunk_lists(
+        lists,
+        method=FusionMethod.RECIPROCAL_RANK,
+        rrf_k=0,
+        max_chunks_per_document=1,
+    )
+    assert _ids(capped) == ["b__0", "a__0", "c__0"]
+
+
+def test_weighted_fusion_normalizes_each_list() -> None:
+    fused = fuse_chunk_lists(
+        [
+            [_chunk("a", 0, 100), _chunk("b", 0, 50), _chunk("c", 0, 0)],
+            [_chunk("c", 0, 0.3), _chunk("b", 0, 0.2), _chunk("a", 0, 0.1)],
+        ],
+        method=FusionMethod.WEIGHTED_SCORE,
+        weights=[1.0, 3.0],
+    )
+    assert _ids(fused) == ["c__0", "b__0", "a__0"]
+    assert [chunk.score for chunk in fused] == pytest.approx([3.0, 2.0, 1.0])
+
+
+def test_single_list_is_only_deduped() -> None:
+    fused = fuse_chunk_lists(
+        [[_chunk("a", 0, 0.2), _chunk("a", 0, 0.5)]],
+        method=FusionMethod.RECIPROCAL_RANK,
+    )
+    assert [chunk.score for chunk in fused] == [0.5]
+
+
+def test_default_method_is_resolved_per_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    lists = [
+        [_chunk("a", 0, 0.9), _chunk("b", 0, 0.1)],
+        [_chunk("b", 0, 0.8), _chunk("c", 0, 0.7)],
+    ]
+    monkeypatch.setattr(fusion, "RETRIEVAL_FUSION_METHOD", "rrf")
+    fused = fuse_chunk_lists(lists, rrf_k=0)
+    assert _ids(fused) == ["b__0", "a__0", "c__0"]
+
+    monkeypatch.setattr(fusion, "RETRIEVAL_FUSION_METHOD", "unknown")
+    with pytest.raises(ValueError):
+        fuse_chunk_lists(lists)
@@ -0,0 +1,106 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.context.search.deadline import SearchDeadline
+from sambaai.context.search.enums import SearchStage
+from sambaai.context.search.models import InferenceChunk
+from sambaai.context.search.models import RerankingDetails
+from sambaai.context.search.postprocessing import postprocessing
+from sambaai.context.search.postprocessing.postprocessing import semantic_reranking
+from sambaai.utils.lru_cache import ThreadSafeLRUCache
+
+RERANK_SETTINGS = RerankingDetails(
+    rerank_model_name="test-reranker",
+    rerank_api_url=None,
+    rerank_provider_type=None,
+    num_rerank=20,
+)
+
+
+def _chunk(chunk_id: int) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=chunk_id,
+        section_continuation=False,
+        title=None,
+        boost=0,
+        recency_bias=1.0,
+        score=1.0,
+        hidden=False,
+        content=f"passage {chunk_id}",
+        source_type=DocumentSource.WEB,
+        metadata={},
+        document_id="doc",
+        blurb="",
+        semantic_identifier="doc",
+        updated_at=None,
+        source_links=None,
+        match_highlights=[],
+        image_file_name=None,
+        doc_summary="",
+        chunk_context="",
+    )
+
+
+@pytest.fixture
+def cross_encoder() -> Iterator[MagicMock]:
+    """Scores a passage by its chunk id, higher ids are more relevant"""
+    model = MagicMock()
+    model.predict.side_effect = lambda query, passages: [
+        int(passage.rsplit(" ", 1)[-1]) / 100 for passage in passages
+    ]
+    with (
+        patch.object(postprocessing, "RerankingModel", return_value=model),
+        patch.object(postprocessing, "_rerank_score_cache", ThreadSafeLRUCache(100)),
+    ):
+        yield model
+
+
+def test_scores_are_cached_per_query(cross_encoder: MagicMock) -> None:
+    ranked, indices = semantic_reranking(
+        "query", RERANK_SETTINGS, [_chunk(1), _chunk(2)]
+    )
+    assert [chunk.chunk_id for chunk in ranked] == [2, 1]
+    assert indices == [1, 0]
+    assert ranked[0].score == pytest.approx(0.02)
+
+    semantic_reranking("query", RERANK_SETTINGS, [_chunk(2), _chunk(3)])
+    semantic_reranking("other query", RERANK_SETTINGS, [_chunk(3)])
+    sent_passages = [
+        call.kwargs["passages"] for call in cross_encoder.predict.call_args_list
+    ]
+    assert sent_passages == [
+        ["doc\npassage 1", "doc\npassage 2"],
+        ["doc\npassage 3"],
+        ["doc\npassage 3"],
+    ]
+
+
+def test_progressive_rerank_stops_when_top_k_is_settled(
+    cross_encoder: MagicMock,
+) -> None:
+    # the relevant chunks come first, later batches can't displace them
+    chunks = [_chunk(chunk_id) for chunk_id in [50, 40, 30, 3, 2, 1, 6, 5, 4, 9, 8, 7]]
+    ranked, _ = semantic_reranking(
+        "query", RERANK_SETTINGS, chunks, batch_size=3, early_cutoff_top_k=3
+    )
+
+    assert [chunk.chunk_id for chunk in ranked] == [50, 40, 30, 3, 2, 1]
+    assert cross_encoder.predict.call_count == 2
+
+
+def test_rerank_stops_after_the_batch_the_deadline_passed(
+    cross_encoder: MagicMock,
+) -> None:
+    deadline = SearchDeadline(0)
+    chunks = [_chunk(chunk_id) for chunk_id in range(1, 10)]
+    ranked, _ = semantic_reranking(
+        "query", RERANK_SETTINGS, chunks, batch_size=3, deadline=deadline
+    )
+
+    assert [chunk.chunk_id for chunk in ranked] == [3, 2, 1]
+    assert cross_encoder.predict.call_count == 1
+    assert SearchStage.RERANK in deadline.skipped_stages
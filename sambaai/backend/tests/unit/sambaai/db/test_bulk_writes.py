@@ -0,0 +1,85 @@
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.compiler import SQLCompiler
+
+from sambaai.db.chunk import update_chunk_boost_components__no_commit
+from sambaai.db.document import update_docs_indexing_status__no_commit
+from sambaai.db.document import upsert_document_by_connector_credential_pair
+from sambaai.indexing.models import UpdatableChunkData
+
+
+def _compile_executed(db_session: MagicMock) -> list[SQLCompiler]:
+    return [
+        call.args[0].compile(dialect=postgresql.psycopg2.dialect())
+        for call in db_session.execute.call_args_list
+    ]
+
+
+def _index_batch(num_docs: int) -> SQLCompiler:
+    db_session = MagicMock()
+    doc_ids = [f"doc{i}" for i in range(num_docs)]
+    update_docs_indexing_status__no_commit(
+        db_session=db_session,
+        connector_id=1,
+        credential_id=2,
+        doc_id_to_chunk_count={doc_id: 3 for doc_id in doc_ids},
+        ids_to_new_updated_at={doc_ids[0]: datetime.now(timezone.utc)},
+        indexed_document_ids=doc_ids + ["skipped_doc"],
+    )
+
+    [compiled] = _compile_executed(db_session)
+    return compiled
+
+
+def test_indexing_bookkeeping_is_one_statement_of_fixed_size() -> None:
+    compiled = _index_batch(2)
+    sql = str(compiled)
+    assert sql.startswith("WITH updated_documents AS")
+    assert "UPDATE document SET" in sql
+    assert "unnest(" in sql
+    assert "UPDATE document_by_connector_credential_pair" in sql
+    assert compiled.params["connector_id_1"] == 1
+
+    # the batch is passed as arrays, not one parameter per document
+    assert len(_index_batch(200).params) == len(compiled.params)
+    arrays = [value for value in compiled.params.values() if isinstance(value, list)]
+    assert ["doc0", "doc1", "skipped_doc"] in arrays
+    assert [3, 3] in arrays
+    assert any(
+        len(array) == 2 and array[0] is not None and array[1] is None
+        for array in arrays
+    )
+
+
+def test_cc_pair_links_are_inserted_from_arrays() -> None:
+    db_session = MagicMock()
+    upsert_document_by_connector_credential_pair(db_session, 1, 2, ["a", "b"])
+
+    [compiled] = _compile_executed(db_session)
+    assert "FROM unnest(" in str(compiled)
+    assert "ON CONFLICT DO NOTHING" in str(compiled)
+    assert ["a", "b"] in compiled.params.values()
+
+
+def test_chunk_boosts_are_upserted_in_one_statement() -> None:
+    db_session = MagicMock()
+    update_chunk_boost_components__no_commit(
+        [
+            UpdatableChunkData(chunk_id=0, document_id="a", boost_score=0.5),
+            UpdatableChunkData(chunk_id=1, document_id="a", boost_score=1.0),
+            # the same chunk again, the last score wins
+            UpdatableChunkData(chunk_id=0, document_id="a", boost_score=0.7),
+        ],
+        db_session,
+    )
+
+    [compiled] = _compile_executed(db_session)
+    sql = str(compiled)
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    # neutral scores only update existing chunk stats
+    assert "EXISTS" in sql
+    assert ["a__0", "a__1"] in compiled.params.values()
+    assert [0.7, 1.0] in compiled.params.values()
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from sambaai.db.document import lock_documents
+from sambaai.db.document import prepare_to_modify_documents
+
+
+def _compiled_sql(db_session: MagicMock) -> list[str]:
+    return [
+        str(call.args[0].compile(dialect=postgresql.psycopg2.dialect()))
+        for call in db_session.scalars.call_args_list
+    ]
+
+
+def test_documents_are_locked_in_sorted_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("sambaai.db.document._DOCUMENT_LOCK_CHUNK_SIZE", 2)
+    db_session = MagicMock()
+    db_session.execute.return_value.one.return_value = ("0", "1min")
+    db_session.scalars.side_effect = [
+        MagicMock(all=MagicMock(return_value=["a", "b"])),
+        MagicMock(all=MagicMock(return_value=["c"])),
+    ]
+
+    locks = lock_documents(db_session, ["c", "b", "a", "b"], lock_timeout=5)
+
+    assert locks.locked_ids == ["a", "b", "c"]
+    assert locks.missing_ids == []
+    assert len(locks.wait_seconds) == 2
+    timeouts = [call.args[1] for call in db_session.execute.call_args_list[1:]]
+    # each chunk gets what is left of the overall wait
+    for chunk_timeouts in timeouts[:2]:
+        remaining_ms = int(chunk_timeouts["lock_timeout"].removesuffix("ms"))
+        assert 4000 < remaining_ms <= 5000
+        assert chunk_timeouts["statement_timeout"] == chunk_timeouts["lock_timeout"]
+    # and the rest of the transaction isn't bounded by them
+    assert timeouts[2] == {"lock_timeout": "0", "statement_timeout": "1min"}
+    sql = _compiled_sql(db_session)
+    assert all("FOR UPDATE" in statement for statement in sql)
+    assert all('ORDER BY document.id COLLATE "C"' in statement for statement in sql)
+    first_chunk = db_session.scalars.call_args_list[0].args[0]
+    assert ["a", "b"] in first_chunk.compile().params.values()
+
+
+def test_skip_locked_reports_contended_documents() -> None:
+    db_session = MagicMock()
+    db_session.scalars.side_effect = [
+        # "b" is locked by another job, "x" doesn't exist
+        MagicMock(all=MagicMock(return_value=["a", "c"])),
+        MagicMock(all=MagicMock(return_value=["b"])),
+    ]
+
+    locks = lock_documents(db_session, ["a", "b", "c", "x"], skip_locked=True)
+
+    assert locks.locked_ids == ["a", "c"]
+    assert locks.skipped_ids == ["b"]
+    assert locks.missing_ids == ["x"]
+    assert "FOR UPDATE SKIP LOCKED" in _compiled_sql(db_session)[0]
+    db_session.execute.assert_not_called()
+
+
+def test_errors_in_the_locked_block_are_not_retried() -> None:
+    db_session = MagicMock()
+    db_session.scalars.return_value.all.return_value = ["a"]
+
+    with pytest.raises(ValueError):
+        with prepare_to_modify_documents(db_session, ["a"], retry_delay=0):
+            raise ValueError()
+
+    assert db_session.begin.call_count == 1
@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from sambaai.db.engine import get_pool_size_for_concurrency
+from sambaai.db.pool_metrics import MeteredQueuePool
+
+
+def _sample(name: str, pool: str) -> float:
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+def test_checkouts_are_metered() -> None:
+    pool = MeteredQueuePool(
+        lambda: sqlite3.connect(":memory:"),
+        pool_size=1,
+        max_overflow=0,
+        timeout=0.05,
+        logging_name="test_metered",
+    )
+
+    connection = pool.connect()
+    assert _sample("sambaai_db_pool_checked_out_connections", "test_metered") == 1
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    assert _sample("sambaai_db_pool_checkout_timeouts_total", "test_metered") == 1
+
+    connection.close()
+    assert _sample("sambaai_db_pool_checked_out_connections", "test_metered") == 0
+    assert _sample("sambaai_db_pool_checkout_wait_seconds_count", "test_metered") == 2
+    # the timed out checkout waited for the pool's timeout
+    assert _sample("sambaai_db_pool_checkout_wait_seconds_sum", "test_metered") >= 0.05
+
+
+def test_pools_are_sized_from_concurrency() -> None:
+    assert get_pool_size_for_concurrency(40) == (40, 10)
+    assert get_pool_size_for_concurrency(1) == (1, 2)
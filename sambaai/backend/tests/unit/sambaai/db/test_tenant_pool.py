@@ -0,0 +1,85 @@
+from typing import Any
+
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+
+from sambaai.db.engine import _set_search_path_on_checkout__listener
+from sambaai.db.tenant_pool import request_schema
+from sambaai.db.tenant_pool import TenantAffineQueuePool
+
+
+class _FakeCursor:
+    def __init__(self, connection: "_FakeConnection") -> None:
+        self.connection = connection
+
+    def execute(self, statement: str) -> None:
+        self.connection.statements.append(statement)
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeConnection:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _checkouts(tenant: str, outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "sambaai_db_tenant_pool_checkouts_total",
+            {"pool": "test_affine", "tenant": tenant, "outcome": outcome},
+        )
+        or 0.0
+    )
+
+
+def _checkout(pool: TenantAffineQueuePool, tenant_id: str) -> Any:
+    with request_schema(tenant_id):
+        return pool.connect()
+
+
+def test_connections_stay_bound_to_their_tenant() -> None:
+    opened: list[_FakeConnection] = []
+
+    def creator() -> Any:
+        opened.append(_FakeConnection())
+        return opened[-1]
+
+    pool = TenantAffineQueuePool(
+        creator, pool_size=2, max_overflow=0, logging_name="test_affine"
+    )
+    event.listen(pool, "checkout", _set_search_path_on_checkout__listener)
+
+    tenant_a = _checkout(pool, "tenant_a")
+    tenant_b = _checkout(pool, "tenant_b")
+    tenant_a.close()
+    tenant_b.close()
+
+    # the queue would hand out tenant_a's connection first
+    for _ in range(3):
+        _checkout(pool, "tenant_b").close()
+    _checkout(pool, "tenant_a").close()
+
+    connection_a, connection_b = opened
+    assert connection_a.statements == ['SET search_path TO "tenant_a"']
+    assert connection_b.statements == ['SET search_path TO "tenant_b"']
+    assert _checkouts("tenant_b", "new") == 1
+    assert _checkouts("tenant_b", "affine") == 3
+
+    # a new tenant takes over the longest idle connection
+    _checkout(pool, "tenant_c").close()
+    assert connection_b.statements[-1] == 'SET search_path TO "tenant_c"'
+    assert _checkouts("tenant_c", "rebound") == 1
@@ -0,0 +1,274 @@
+import os
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from sambaai.access.models import DocumentAccess
+from sambaai.agents.agent_search.shared_graph_utils.models import QueryExpansionType
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import TextSection
+from sambaai.context.search.models import IndexFilters
+from sambaai.db.enums import EmbeddingPrecision
+from sambaai.document_index.embedded import chunk_store
+from sambaai.document_index.embedded import index as embedded_index
+from sambaai.document_index.embedded.chunk_store import EmbeddedChunkStore
+from sambaai.document_index.embedded.index import EmbeddedIndex
+from sambaai.document_index.interfaces import IndexBatchParams
+from sambaai.document_index.interfaces import VespaChunkRequest
+from sambaai.document_index.interfaces import VespaDocumentFields
+from sambaai.indexing.models import ChunkEmbedding
+from sambaai.indexing.models import DocMetadataAwareIndexChunk
+
+_DIM = 4
+
+
+def _chunk(
+    document_id: str,
+    chunk_id: int,
+    content: str,
+    embedding: list[float],
+    title: str = "",
+    document_sets: set[str] | None = None,
+    is_public: bool = True,
+) -> DocMetadataAwareIndexChunk:
+    document = Document(
+        id=document_id,
+        sections=[TextSection(text=content, link=None)],
+        source=DocumentSource.FILE,
+        semantic_identifier=title or document_id,
+        title=title or None,
+        metadata={"team": "search"},
+        doc_updated_at=datetime.now(timezone.utc),
+    )
+    return DocMetadataAwareIndexChunk(
+        chunk_id=chunk_id,
+        blurb=content[:20],
+        content=content,
+        source_links={0: f"https://docs/{document_id}"},
+        image_file_name=None,
+        section_continuation=False,
+        source_document=document,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=0,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+        embeddings=ChunkEmbedding(full_embedding=embedding, mini_chunk_embeddings=[]),
+        title_embedding=embedding if title else None,
+        tenant_id="public",
+        access=DocumentAccess.build(
+            user_emails=["owner@example.com"],
+            user_groups=[],
+            external_user_emails=[],
+            external_user_group_ids=[],
+            is_public=is_public,
+        ),
+        document_sets=document_sets or set(),
+        user_file=None,
+        user_folder=None,
+        boost=0,
+        aggregated_chunk_boost_factor=1.0,
+    )
+
+
+@pytest.fixture
+def document_index(tmp_path: str, monkeypatch: pytest.MonkeyPatch) -> EmbeddedIndex:
+    monkeypatch.setattr(embedded_index, "EMBEDDED_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(embedded_index, "_STORES", {})
+    document_index = EmbeddedIndex(
+        index_name="test_index",
+        secondary_index_name=None,
+        large_chunks_enabled=False,
+        secondary_large_chunks_enabled=None,
+    )
+    document_index.ensure_indices_exist(_DIM, EmbeddingPrecision.FLOAT, None, None)
+
+    chunks = [
+        _chunk("cats", 0, "Cats sleep most of the day", [1, 0, 0, 0], "Cat facts"),
+        _chunk("cats", 1, "A cat purrs when content", [0.9, 0.1, 0, 0], "Cat facts"),
+        _chunk(
+            "dogs",
+            0,
+            "Dogs like long walks",
+            [0, 1, 0, 0],
+            document_sets={"pets"},
+            is_public=False,
+        ),
+    ]
+    document_index.index(
+        chunks,
+        IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={"cats": None, "dogs": None},
+            doc_id_to_new_chunk_cnt={"cats": 2, "dogs": 1},
+            tenant_id="public",
+            large_chunks_enabled=False,
+        ),
+    )
+    return document_index
+
+
+def _search(
+    document_index: EmbeddedIndex,
+    query: str,
+    embedding: list[float],
+    filters: IndexFilters | None = None,
+) -> list[str]:
+    chunks = document_index.hybrid_retrieval(
+        query=query,
+        query_embedding=embedding,
+        final_keywords=None,
+        filters=filters or IndexFilters(access_control_list=None),
+        hybrid_alpha=0.5,
+        time_decay_multiplier=1.0,
+        num_to_retrieve=10,
+        ranking_profile_type=QueryExpansionType.SEMANTIC,
+    )
+    return [f"{chunk.document_id}:{chunk.chunk_id}" for chunk in chunks]
+
+
+def test_hybrid_retrieval_ranks_and_filters(document_index: EmbeddedIndex) -> None:
+    assert _search(document_index, "cat purrs", [0.9, 0.1, 0, 0]) == [
+        "cats:1",
+        "cats:0",
+        "dogs:0",
+    ]
+    assert _search(document_index, "walks", [0, 1, 0, 0])[0] == "dogs:0"
+
+    # dogs is not public and only in the "pets" document set
+    assert _search(
+        document_index,
+        "walks",
+        [0, 1, 0, 0],
+        IndexFilters(access_control_list=["PUBLIC"]),
+    ) == ["cats:1", "cats:0"]
+    assert _search(
+        document_index,
+        "cats",
+        [1, 0, 0, 0],
+        IndexFilters(access_control_list=None, document_set=["pets"]),
+    ) == ["dogs:0"]
+
+    [chunk] = document_index.admin_retrieval(
+        "purrs", IndexFilters(access_control_list=None)
+    )
+    assert chunk.match_highlights == ["A cat <hi>purrs</hi> when content"]
+
+
+def test_reindex_update_and_delete(document_index: EmbeddedIndex) -> None:
+    records = document_index.index(
+        [_chunk("cats", 0, "Cats are now a single chunk", [1, 0, 0, 0])],
+        IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={"cats": 2},
+            doc_id_to_new_chunk_cnt={"cats": 1},
+            tenant_id="public",
+            large_chunks_enabled=False,
+        ),
+    )
+    assert [record.already_existed for record in records] == [True]
+
+    chunks = document_index.id_based_retrieval(
+        [VespaChunkRequest(document_id="cats")],
+        IndexFilters(access_control_list=None),
+    )
+    assert [chunk.content for chunk in chunks] == ["Cats are now a single chunk"]
+
+    assert (
+        document_index.update_single(
+            "cats",
+            tenant_id="public",
+            chunk_count=1,
+            fields=VespaDocumentFields(hidden=True),
+            user_fields=None,
+        )
+        == 1
+    )
+    assert _search(document_index, "cats", [1, 0, 0, 0]) == ["dogs:0"]
+
+    assert document_index.delete_single("dogs", tenant_id="public", chunk_count=1) == 1
+    assert _search(document_index, "cats", [1, 0, 0, 0]) == []
+
+
+def test_other_processes_apply_only_the_changes(
+    document_index: EmbeddedIndex, tmp_path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    directory = os.path.join(tmp_path, "test_index")
+    # a second store on the same directory stands in for another process
+    reader = EmbeddedChunkStore(directory)
+    full_loads: list[int] = []
+    load = reader._load
+
+    def _counted_load() -> None:
+        full_loads.append(1)
+        load()
+
+    monkeypatch.setattr(reader, "_load", _counted_load)
+
+    document_index.index(
+        [_chunk("cats", 0, "Cats are now a single chunk", [1, 0, 0, 0], "Cat facts")],
+        IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={"cats": 2},
+            doc_id_to_new_chunk_cnt={"cats": 1},
+            tenant_id="public",
+            large_chunks_enabled=False,
+        ),
+    )
+    document_index.delete_single("dogs", tenant_id="public", chunk_count=1)
+    reader.refresh()
+
+    assert full_loads == []
+    assert reader.attributes == EmbeddedChunkStore(directory).attributes
+    assert [
+        (attributes.document_id, attributes.chunk_id)
+        for attributes in reader.attributes.values()
+    ] == [("cats", 0)]
+
+    # too far behind for the change log
+    monkeypatch.setattr(chunk_store, "_CHANGE_LOG_GENERATIONS", 1)
+    document_index.delete_single("cats", tenant_id="public", chunk_count=1)
+    document_index.delete_single("cats", tenant_id="public", chunk_count=1)
+    reader.refresh()
+
+    assert full_loads == [1]
+    assert reader.attributes == {}
+
+
+def test_freed_slots_are_reused(
+    document_index: EmbeddedIndex, tmp_path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    directory = os.path.join(tmp_path, "test_index")
+    reader = EmbeddedChunkStore(directory)
+
+    def _index(chunk: DocMetadataAwareIndexChunk, previous: int | None) -> None:
+        document_id = chunk.source_document.id
+        document_index.index(
+            [chunk],
+            IndexBatchParams(
+                doc_id_to_previous_chunk_cnt={document_id: previous},
+                doc_id_to_new_chunk_cnt={document_id: 1},
+                tenant_id="public",
+                large_chunks_enabled=False,
+            ),
+        )
+
+    _index(_chunk("birds", 0, "Birds sing", [0, 0, 1, 0]), None)
+    document_index.delete_single("dogs", tenant_id="public", chunk_count=1)
+    # takes the slots freed by "dogs", which the reader only drops afterwards
+    _index(_chunk("birds", 0, "Birds sing at dawn", [0, 0, 1, 0]), 1)
+    for previous in [2, 1, 1, 1]:
+        _index(
+            _chunk("cats", 0, "Cats are re-indexed", [1, 0, 0, 0], "Cat facts"),
+            previous,
+        )
+    reader.refresh()
+
+    writer = EmbeddedChunkStore(directory)
+    assert set(writer.attributes) == {1, 3}
+    assert set(writer.embedding_slot_owners) == {1, 3}
+    assert reader.attributes == writer.attributes
+    assert reader.embedding_slot_owners == writer.embedding_slot_owners
+    assert _search(document_index, "birds", [0, 0, 1, 0])[0] == "birds:0"
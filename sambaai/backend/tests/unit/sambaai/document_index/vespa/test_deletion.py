@@ -0,0 +1,133 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from sambaai.document_index.vespa import index as vespa_index_module
+from sambaai.document_index.vespa.deletion import build_document_id_selection
+from sambaai.document_index.vespa.deletion import build_tenant_id_selection
+from sambaai.document_index.vespa.deletion import delete_vespa_chunks_by_selection
+from sambaai.document_index.vespa.deletion import SelectionDeleteProgress
+from sambaai.document_index.vespa.index import VespaIndex
+
+
+def test_selections_quote_their_values() -> None:
+    assert (
+        build_document_id_selection("sambaai_chunk", ["doc 1", 'say "hi"'])
+        == 'sambaai_chunk.document_id=="doc 1" or '
+        'sambaai_chunk.document_id=="say \\"hi\\""'
+    )
+    assert (
+        build_tenant_id_selection("sambaai_chunk", "tenant_1")
+        == 'sambaai_chunk.tenant_id=="tenant_1"'
+    )
+
+
+def test_delete_by_selection_follows_continuations_per_slice() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if "continuation" in request.url.params:
+            return httpx.Response(200, json={"documentCount": 10})
+        slice_id = request.url.params["sliceId"]
+        return httpx.Response(
+            200, json={"documentCount": 5, "continuation": f"token-{slice_id}"}
+        )
+
+    progress_updates: list[int] = []
+
+    def on_progress(progress: SelectionDeleteProgress) -> None:
+        progress_updates.append(progress.slices_done)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        deleted = delete_vespa_chunks_by_selection(
+            selection='sambaai_chunk.tenant_id=="tenant_1"',
+            index_name="sambaai_chunk",
+            http_client=http_client,
+            slices=2,
+            on_progress=on_progress,
+        )
+
+    assert deleted == 30
+    assert len(requests) == 4
+    assert {request.method for request in requests} == {"DELETE"}
+    assert {request.url.path for request in requests} == {
+        "/document/v1/default/sambaai_chunk/docid"
+    }
+    for request in requests:
+        assert request.url.params["selection"] == 'sambaai_chunk.tenant_id=="tenant_1"'
+        assert request.url.params["cluster"] == "danswer_index"
+        assert request.url.params["slices"] == "2"
+    assert sorted(
+        request.url.params["continuation"]
+        for request in requests
+        if "continuation" in request.url.params
+    ) == ["token-0", "token-1"]
+    assert progress_updates[-1] == 2
+
+
+@pytest.mark.parametrize("multitenant", [True, False])
+def test_delete_single_by_selection_is_scoped_to_the_tenant(multitenant: bool) -> None:
+    selections: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        selections.append(request.url.params["selection"])
+        return httpx.Response(200, json={"documentCount": 3})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        vespa_index = VespaIndex(
+            index_name="sambaai_chunk",
+            secondary_index_name=None,
+            large_chunks_enabled=False,
+            secondary_large_chunks_enabled=None,
+            multitenant=multitenant,
+            httpx_client=http_client,
+        )
+        with patch.object(vespa_index_module, "VESPA_SELECTION_DELETE_MIN_CHUNKS", 10):
+            deleted = vespa_index.delete_single(
+                "doc_1", tenant_id="tenant_1", chunk_count=20
+            )
+
+    assert deleted == 3 * len(selections)
+    expected = 'sambaai_chunk.document_id=="doc_1"'
+    if multitenant:
+        expected = f'({expected}) and sambaai_chunk.tenant_id=="tenant_1"'
+    assert set(selections) == {expected}
+
+
+def test_delete_multiple_deletes_a_batch_with_one_selection() -> None:
+    selections: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        selections.append(request.url.params["selection"])
+        return httpx.Response(200, json={"documentCount": 3})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        vespa_index = VespaIndex(
+            index_name="sambaai_chunk",
+            secondary_index_name=None,
+            large_chunks_enabled=False,
+            secondary_large_chunks_enabled=None,
+            multitenant=False,
+            httpx_client=http_client,
+        )
+        with patch.object(
+            vespa_index_module, "VESPA_SELECTION_DELETE_MIN_CHUNKS", 10
+        ), patch.object(vespa_index, "delete_single") as delete_single:
+            # too few chunks for a selection delete
+            vespa_index.delete_multiple({"doc_1": 4, "doc_2": 5}, tenant_id="tenant_1")
+            assert delete_single.call_count == 2
+            assert selections == []
+
+            delete_single.reset_mock()
+            deleted = vespa_index.delete_multiple(
+                {"doc_1": 4, "doc_2": 5, "doc_3": None, "doc_4": 1},
+                tenant_id="tenant_1",
+            )
+            delete_single.assert_not_called()
+
+    assert deleted == 3 * len(selections)
+    assert set(selections) == {
+        " or ".join(f'sambaai_chunk.document_id=="doc_{ind}"' for ind in range(1, 5))
+    }
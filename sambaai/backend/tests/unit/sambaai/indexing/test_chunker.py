@@ -1,5 +1,6 @@
 from typing import Any
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
 
@@ -8,6 +9,7 @@ from sambaai.configs.app_configs import USE_DOCUMENT_SUMMARY
 from sambaai.configs.constants import DocumentSource
 from sambaai.connectors.models import Document
 from sambaai.connectors.models import TextSection
+from sambaai.indexing import chunker as chunker_module
 from sambaai.indexing.chunker import Chunker
 from sambaai.indexing.embedder import DefaultIndexingEmbedder
 from sambaai.indexing.indexing_pipeline import process_image_sections
@@ -105,3 +107,49 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+def test_token_cache_is_bounded(embedder: DefaultIndexingEmbedder) -> None:
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        doc_updated_at=None,
+        sections=[
+            TextSection(
+                text="\n\n".join(
+                    f"Paragraph {ind} goes on for a while. " * 20 for ind in range(200)
+                ),
+                link="link1",
+            ),
+        ],
+    )
+    indexing_documents = process_image_sections([document])
+
+    chunker = Chunker(
+        tokenizer=embedder.embedding_model.tokenizer,
+        enable_multipass=True,
+        enable_contextual_rag=False,
+    )
+    clear_token_cache = chunker._clear_token_cache
+    cached_token_counts: list[int] = []
+
+    def _clear_token_cache() -> None:
+        cached_token_counts.append(chunker._cached_token_count)
+        assert chunker._cached_token_count == sum(
+            len(token_ids) for token_ids in chunker._token_ids_cache.values()
+        )
+        clear_token_cache()
+
+    with (
+        patch.object(chunker_module, "MAX_TOKEN_CACHE_TOKENS", 1_000),
+        patch.object(chunker, "_clear_token_cache", _clear_token_cache),
+    ):
+        chunks = chunker.chunk(indexing_documents)
+
+    assert len(chunks) > 10
+    assert len(cached_token_counts) == 1
+    assert 0 < cached_token_counts[0] <= 1_000
+    assert not chunker._token_ids_cache
+    assert chunker._cached_token_count == 0
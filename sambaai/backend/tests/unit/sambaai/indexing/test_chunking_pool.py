@@ -0,0 +1,95 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from sambaai.configs.constants import DocumentSource
+from sambaai.connectors.models import IndexingDocument
+from sambaai.connectors.models import Section
+from sambaai.connectors.models import TextSection
+from sambaai.indexing import chunker as chunker_module
+from sambaai.indexing.chunker import Chunker
+from sambaai.natural_language_processing.utils import BaseTokenizer
+from tests.unit.sambaai.indexing.conftest import MockHeartbeat
+
+
+class _WhitespaceTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [len(token) for token in string.split()]
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[int]) -> str:
+        return " ".join("x" * token for token in tokens)
+
+
+class _StoppedHeartbeat(MockHeartbeat):
+    def should_stop(self) -> bool:
+        return True
+
+
+def _documents() -> list[IndexingDocument]:
+    documents = []
+    for ind in range(6):
+        texts = [
+            f"Section {section_ind} of document {ind}. " * (5 + 40 * (ind % 3))
+            for section_ind in range(1 + ind)
+        ]
+        documents.append(
+            IndexingDocument(
+                id=f"doc_{ind}",
+                source=DocumentSource.WEB,
+                semantic_identifier=f"Document {ind}",
+                metadata={"index": str(ind)},
+                sections=[TextSection(text=text, link=f"link_{ind}") for text in texts],
+                processed_sections=[
+                    Section(text=text, link=f"link_{ind}") for text in texts
+                ],
+            )
+        )
+    return documents
+
+
+def test_pool_chunks_like_the_chunker() -> None:
+    documents = _documents()
+    expected = Chunker(
+        tokenizer=_WhitespaceTokenizer(), enable_multipass=True, chunk_token_limit=64
+    ).chunk(documents)
+
+    heartbeat = MockHeartbeat()
+    chunker = Chunker(
+        tokenizer=_WhitespaceTokenizer(),
+        enable_multipass=True,
+        chunk_token_limit=64,
+        callback=heartbeat,
+        num_processes=2,
+    )
+    try:
+        chunks = chunker.chunk(documents)
+
+        assert [chunk.model_dump() for chunk in chunks] == [
+            chunk.model_dump() for chunk in expected
+        ]
+        assert all(
+            chunk.source_document is expected_chunk.source_document
+            for chunk, expected_chunk in zip(chunks, expected)
+        )
+        assert heartbeat.call_count > 0
+
+        chunker.callback = _StoppedHeartbeat()
+        with pytest.raises(RuntimeError, match="Stop signal detected"):
+            chunker.chunk(documents)
+    finally:
+        chunker.close()
+
+
+def test_daemon_processes_cant_use_a_pool() -> None:
+    with patch.object(
+        chunker_module.mp, "current_process", return_value=Mock(daemon=True)
+    ):
+        with pytest.raises(ValueError, match="daemon"):
+            Chunker(tokenizer=_WhitespaceTokenizer(), num_processes=2)
+
+        # chunking in process is fine
+        Chunker(tokenizer=_WhitespaceTokenizer(), num_processes=1)
@@ -0,0 +1,198 @@
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from sambaai.connectors.models import Document
+from sambaai.connectors.models import DocumentSource
+from sambaai.connectors.models import TextSection
+from sambaai.indexing.contextual_rag_cache import ContextualRAGCache
+from sambaai.indexing.indexing_pipeline import add_contextual_summaries
+from sambaai.indexing.models import DocAwareChunk
+from sambaai.natural_language_processing.utils import BaseTokenizer
+
+
+class _CharTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [ord(char) for char in string]
+
+    def tokenize(self, string: str) -> list[str]:
+        return list(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+
+    def get(self, key: str) -> bytes | None:
+        value = self.data.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.data[key] = value
+
+    def delete(self, key: bytes) -> None:
+        self.data.pop(key.decode(), None)
+
+    def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key: str) -> int:
+        return len(self.sorted_sets.get(key, {}))
+
+    def zremrangebyscore(self, key: str, min: str, max: float) -> None:
+        members = self.sorted_sets.get(key, {})
+        for member in [m for m, score in members.items() if score <= max]:
+            del members[member]
+
+    def zpopmin(self, key: str, count: int) -> list[tuple[bytes, float]]:
+        members = self.sorted_sets.get(key, {})
+        popped = sorted(members.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del members[member]
+        return [(member.encode(), score) for member, score in popped]
+
+
+def _chunks(doc_text: str, chunk_texts: list[str]) -> list[DocAwareChunk]:
+    doc = Document(
+        id="doc",
+        semantic_identifier="doc",
+        sections=[TextSection(text=doc_text)],
+        source=DocumentSource.FILE,
+        metadata={},
+    )
+    return [
+        DocAwareChunk(
+            chunk_id=i,
+            blurb=text,
+            content=text,
+            source_links=None,
+            image_file_name=None,
+            section_continuation=False,
+            source_document=doc,
+            title_prefix="",
+            metadata_suffix_semantic="",
+            metadata_suffix_keyword="",
+            contextual_rag_reserved_tokens=100,
+            doc_summary="",
+            chunk_context="",
+            mini_chunk_texts=None,
+            large_chunk_id=None,
+        )
+        for i, text in enumerate(chunk_texts)
+    ]
+
+
+def _mock_llm() -> Mock:
+    llm = Mock()
+    llm.config.max_input_tokens = 10_000
+    llm.config.model_name = "gpt-4o"
+    llm.config.model_provider = "openai"
+
+    def _invoke(prompt: Any, **kwargs: Any) -> Mock:
+        response = Mock()
+        response.content = f"context {llm.invoke.call_count}"
+        return response
+
+    llm.invoke = Mock(side_effect=_invoke)
+    return llm
+
+
+@patch("sambaai.indexing.indexing_pipeline.USE_CHUNK_SUMMARY", True)
+@patch("sambaai.indexing.indexing_pipeline.USE_DOCUMENT_SUMMARY", True)
+def test_unchanged_documents_do_not_call_llm_again() -> None:
+    cache = ContextualRAGCache(
+        redis_client=_FakeRedis(), model_key="openai/gpt-4o", ttl=60  # type: ignore
+    )
+    tokenizer = _CharTokenizer()
+
+    llm = _mock_llm()
+    first = add_contextual_summaries(
+        _chunks("the document", ["a", "b"]), llm, tokenizer, 100, cache
+    )
+    # one document summary + one context per chunk
+    assert llm.invoke.call_count == 3
+
+    llm = _mock_llm()
+    second = add_contextual_summaries(
+        _chunks("the document", ["a", "b"]), llm, tokenizer, 100, cache
+    )
+    assert llm.invoke.call_count == 0
+    assert [(c.doc_summary, c.chunk_context) for c in second] == [
+        (c.doc_summary, c.chunk_context) for c in first
+    ]
+
+    # chunk contexts depend on the document, so a changed document is a full miss
+    llm = _mock_llm()
+    add_contextual_summaries(
+        _chunks("the document v2", ["a", "c"]), llm, tokenizer, 100, cache
+    )
+    assert llm.invoke.call_count == 3
+
+    # a new chunk in an unchanged document only needs its own context
+    llm = _mock_llm()
+    add_contextual_summaries(
+        _chunks("the document v2", ["a", "c", "d"]), llm, tokenizer, 100, cache
+    )
+    assert llm.invoke.call_count == 1
+
+    # so does a changed prompt template
+    llm = _mock_llm()
+    with patch(
+        "sambaai.indexing.contextual_rag_cache.CONTEXTUAL_RAG_PROMPT2",
+        "Changed {chunk}",
+    ):
+        add_contextual_summaries(
+            _chunks("the document v2", ["a", "c", "d"]), llm, tokenizer, 100, cache
+        )
+    assert llm.invoke.call_count == 3
+
+
+@patch("sambaai.indexing.indexing_pipeline.USE_CHUNK_SUMMARY", True)
+@patch("sambaai.indexing.indexing_pipeline.USE_DOCUMENT_SUMMARY", False)
+def test_chunk_prompts_mark_document_prefix_as_cacheable() -> None:
+    llm = _mock_llm()
+    llm.config.model_name = "claude-3-5-sonnet-20241022"
+    llm.config.model_provider = "anthropic"
+
+    chunks = add_contextual_summaries(
+        _chunks("the document", ["a", "b"]), llm, _CharTokenizer(), 100
+    )
+
+    assert [chunk.chunk_context for chunk in chunks] != ["", ""]
+    for call in llm.invoke.call_args_list:
+        (message,) = call.args[0]
+        prefix, suffix = message.content
+        assert "the document" in prefix["text"]
+        assert prefix["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in suffix
+
+
+def test_cache_is_bounded() -> None:
+    redis_client = _FakeRedis()
+    cache = ContextualRAGCache(
+        redis_client=redis_client,  # type: ignore
+        model_key="openai/gpt-4o",
+        ttl=60,
+        max_entries=2,
+        max_entry_bytes=100,
+    )
+
+    for doc in ["doc 1", "doc 2", "doc 3"]:
+        cache.set_doc_summary(doc, f"summary of {doc}")
+    # the oldest entry is evicted
+    assert cache.get_doc_summary("doc 1") is None
+    assert cache.get_doc_summary("doc 2") == "summary of doc 2"
+    assert cache.get_doc_summary("doc 3") == "summary of doc 3"
+    assert len(redis_client.data) == 2
+
+    # entries over the size limit are not cached at all
+    cache.set_doc_summary("doc 4", "x" * 101)
+    assert cache.get_doc_summary("doc 4") is None
+    assert cache.get_doc_summary("doc 2") == "summary of doc 2"
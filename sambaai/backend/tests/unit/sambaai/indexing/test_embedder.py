@@ -87,6 +87,7 @@ def test_default_indexing_embedder_embed_chunks(
         mini_chunk_embeddings=[],
     )
     assert result[0].title_embedding == [7.0, 8.0, 9.0]
+    assert result[0].source_document is source_doc
 
     # Verify the embedding model was called exactly as follows
     mock_embedding_model.return_value.encode.assert_any_call(
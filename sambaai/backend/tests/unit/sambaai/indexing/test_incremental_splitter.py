@@ -0,0 +1,114 @@
+from importlib.metadata import version
+from pathlib import Path
+
+import pytest
+from llama_index.core.node_parser import SentenceSplitter
+
+from sambaai.indexing.incremental_splitter import IncrementalSentenceSplitter
+
+_BACKEND_DIR = Path(__file__).parents[4]
+# real documents with paragraphs, lists, tables and code
+_DOCUMENTS = [
+    ["sambaai/connectors/README.md"],
+    ["tests/integration/README.md"],
+    ["tests/unit/sambaai/connectors/cross_connector_utils/test_table.html"],
+    ["sambaai/indexing/chunker.py"],
+    # the documents as paragraphs of a single text
+    [
+        "sambaai/connectors/README.md",
+        "tests/integration/README.md",
+        "tests/unit/sambaai/connectors/cross_connector_utils/test_table.html",
+    ],
+]
+
+
+def test_llama_index_is_pinned() -> None:
+    # IncrementalSentenceSplitter mirrors private SentenceSplitter methods. When
+    # upgrading, check the comparisons below still pass before moving the pin.
+    assert version("llama-index-core") == "0.12.28"
+
+
+@pytest.mark.parametrize("document", _DOCUMENTS)
+@pytest.mark.parametrize(
+    "chunk_size,chunk_overlap", [(16, 0), (64, 0), (128, 16), (512, 32)]
+)
+def test_split_text_matches_sentence_splitter(
+    document: list[str], chunk_size: int, chunk_overlap: int
+) -> None:
+    splitter = SentenceSplitter(
+        tokenizer=str.split, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    incremental = IncrementalSentenceSplitter(splitter)
+    text = splitter.paragraph_separator.join(
+        (_BACKEND_DIR / path).read_text() for path in document
+    )
+
+    expected = splitter.split_text(text)
+    assert list(incremental.split_text(text)) == expected
+    assert incremental.first_chunk(text) == expected[0]
+
+
+@pytest.mark.parametrize("chunk_overlap", [0, 5])
+def test_split_text_matches_across_paragraphs(chunk_overlap: int) -> None:
+    splitter = SentenceSplitter(
+        tokenizer=str.split, chunk_size=20, chunk_overlap=chunk_overlap
+    )
+    paragraphs = [
+        "A short paragraph.",
+        "A longer paragraph that goes on. And on, and on; until it is longer "
+        "than a chunk by itself, which makes the splitter split it into sentences.",
+        "\n\n\n",
+        "Another one.\n\nWith a page break in it.",
+        " ".join(f"word{ind}" for ind in range(45)),
+        "The end.",
+    ]
+    text = "\n\n\n".join(paragraphs)
+
+    incremental = IncrementalSentenceSplitter(splitter)
+    assert list(incremental.split_text(text)) == splitter.split_text(text)
+
+
+def test_short_and_unbroken_texts_are_split_as_a_whole() -> None:
+    splitter = SentenceSplitter(tokenizer=str.split, chunk_size=10, chunk_overlap=0)
+    incremental = IncrementalSentenceSplitter(splitter)
+
+    assert list(incremental.split_text("")) == splitter.split_text("")
+    unbroken = "One sentence here. " * 20
+    assert list(incremental.split_text(unbroken)) == splitter.split_text(unbroken)
+
+
+def test_count_tokens_up_to_stops_early() -> None:
+    counted: list[str] = []
+
+    def count_tokens(text: str) -> int:
+        counted.append(text)
+        return len(text.split())
+
+    splitter = SentenceSplitter(tokenizer=str.split, chunk_size=10, chunk_overlap=0)
+    incremental = IncrementalSentenceSplitter(splitter, count_tokens=count_tokens)
+
+    long_text = "\n\n\n".join(["word " * 600] * 10)
+    assert incremental.count_tokens_up_to(long_text, 10) > 10
+    assert len(counted) == 1
+
+    assert incremental.count_tokens_up_to("a few words", 10) == 3
+
+
+def test_first_chunk_only_measures_the_start() -> None:
+    measured: list[str] = []
+
+    def tokenize(text: str) -> list[str]:
+        measured.append(text)
+        return text.split()
+
+    splitter = SentenceSplitter(tokenizer=tokenize, chunk_size=12, chunk_overlap=0)
+    incremental = IncrementalSentenceSplitter(splitter)
+    text = " ".join(f"Sentence number {ind} is here." for ind in range(50))
+
+    expected = splitter.split_text(text)[0]
+    measured.clear()
+    assert incremental.first_chunk(text) == expected
+    assert len(measured) < 10
+
+    assert incremental.first_chunk("") == ""
+    assert incremental.first_chunk(" \n ") == ""
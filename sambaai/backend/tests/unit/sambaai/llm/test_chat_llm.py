@@ -11,6 +11,7 @@ from litellm.types.utils import Function as LiteLLMFunction
 
 from sambaai.configs.app_configs import MOCK_LLM_RESPONSE
 from sambaai.llm.chat_llm import DefaultMultiLLM
+from sambaai.llm.http_client import get_litellm_client
 from sambaai.llm.utils import get_max_input_tokens
 
 
@@ -154,6 +155,7 @@ def test_multiple_tool_calls(default_multi_llm: DefaultMultiLLM) -> None:
             timeout=30,
             parallel_tool_calls=False,
             mock_response=MOCK_LLM_RESPONSE,
+            client=get_litellm_client("openai", None, "test_key"),
         )
 
 
@@ -300,4 +302,5 @@ def test_multiple_tool_calls_streaming(default_multi_llm: DefaultMultiLLM) -> No
             timeout=30,
             parallel_tool_calls=False,
             mock_response=MOCK_LLM_RESPONSE,
+            client=get_litellm_client("openai", None, "test_key"),
         )
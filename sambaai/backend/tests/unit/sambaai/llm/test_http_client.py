@@ -0,0 +1,101 @@
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from litellm.llms.custom_httpx.http_handler import HTTPHandler  # type: ignore
+from openai import OpenAI
+
+from sambaai.llm.chat_llm import DefaultMultiLLM
+from sambaai.llm.factory import get_llm
+from sambaai.llm.http_client import get_litellm_client
+from sambaai.llm.http_client import get_llm_http_client_stats
+from sambaai.utils.long_term_log import LongTermLogger
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_clients_are_shared_per_provider_and_api_base() -> None:
+    client = get_litellm_client("openai", "https://a.example.com/v1", "key-1")
+    assert isinstance(client, OpenAI)
+    assert get_litellm_client("openai", "https://a.example.com/v1", "key-1") is client
+
+    # different keys share the connection pool, not the OpenAI client
+    other_key = get_litellm_client("openai", "https://a.example.com/v1", "key-2")
+    assert isinstance(other_key, OpenAI)
+    assert other_key is not client
+    assert other_key._client is client._client
+
+    other_base = get_litellm_client("openai", "https://b.example.com/v1", "key-1")
+    assert isinstance(other_base, OpenAI)
+    assert other_base._client is not client._client
+
+    assert isinstance(get_litellm_client("anthropic", None, "key"), HTTPHandler)
+    assert get_litellm_client("bedrock", None, None) is None
+
+
+def test_requests_reuse_pooled_connections(server_url: str) -> None:
+    handler = get_litellm_client("anthropic", server_url, "key")
+    assert isinstance(handler, HTTPHandler)
+
+    for _ in range(3):
+        handler.post(f"{server_url}/v1/messages", json={})
+
+    stats = get_llm_http_client_stats()[f"anthropic|{server_url}"]
+    assert stats.requests == 3
+    assert stats.connections_opened == 1
+    assert stats.reused_requests == 2
+    assert stats.tls_handshakes == 0
+
+
+def test_llms_are_cached_per_config() -> None:
+    def _get_llm(
+        temperature: float, long_term_logger: LongTermLogger | None = None
+    ) -> DefaultMultiLLM:
+        llm = get_llm(
+            provider="openai",
+            model="gpt-4o",
+            max_input_tokens=1000,
+            deployment_name=None,
+            api_key="key",
+            temperature=temperature,
+            long_term_logger=long_term_logger,
+        )
+        assert isinstance(llm, DefaultMultiLLM)
+        return llm
+
+    llm = _get_llm(0.0)
+    assert _get_llm(0.0) is llm
+    assert _get_llm(0.5) is not llm
+
+    # a per request logger doesn't rebuild the LLM or leak into the cached one
+    long_term_logger = LongTermLogger()
+    with_logger = _get_llm(0.0, long_term_logger)
+    assert with_logger is not llm
+    assert with_logger._long_term_logger is long_term_logger
+    assert with_logger._model_kwargs is llm._model_kwargs
+    assert llm._long_term_logger is None
@@ -0,0 +1,131 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.messages import HumanMessage
+
+from sambaai.llm import work_executor
+from sambaai.llm.chat_llm import LLMRateLimitError
+from sambaai.llm.work_executor import estimate_prompt_tokens
+from sambaai.llm.work_executor import LLMRateLimiter
+from sambaai.llm.work_executor import LLMWorkExecutor
+
+_MODULE = "sambaai.llm.work_executor"
+
+
+def _mock_llm(side_effect: Any) -> Mock:
+    llm = Mock()
+    llm.config.model_provider = "test-provider"
+    llm.config.model_name = "test-model"
+    llm.invoke = Mock(side_effect=side_effect)
+    return llm
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limiters() -> Iterator[None]:
+    # limiters are process wide, don't leak pauses between tests
+    yield
+    work_executor._rate_limiters.clear()
+
+
+@pytest.fixture
+def clock() -> Iterator[_FakeClock]:
+    fake_clock = _FakeClock()
+    with patch(f"{_MODULE}.time.monotonic", side_effect=fake_clock.monotonic), patch(
+        f"{_MODULE}.time.sleep", side_effect=fake_clock.sleep
+    ):
+        yield fake_clock
+
+
+def test_estimate_prompt_tokens() -> None:
+    assert estimate_prompt_tokens("a" * 400) == 100
+    assert (
+        estimate_prompt_tokens(
+            [
+                HumanMessage(
+                    content=[
+                        {"type": "text", "text": "a" * 40},
+                        {"type": "image_url", "image_url": {"url": "b" * 10_000}},
+                    ]
+                )
+            ]
+        )
+        == 10 + 85
+    )
+
+
+def test_rate_limiter_waits_for_request_and_token_budgets(clock: _FakeClock) -> None:
+    limiter = LLMRateLimiter(
+        requests_per_minute=60, tokens_per_minute=600, max_in_flight=1
+    )
+
+    # the bucket starts full
+    assert limiter.acquire(500) == 0.0
+    # 100 tokens left, 400 more refill in 40s
+    assert limiter.acquire(500) == pytest.approx(40.0)
+
+    # a pause applies to every caller
+    limiter.pause(30.0)
+    assert limiter.acquire(1) == pytest.approx(30.0)
+
+
+def test_executor_retries_rate_limits_with_backoff(clock: _FakeClock) -> None:
+    llm = _mock_llm(
+        [LLMRateLimitError("429"), LLMRateLimitError("429"), AIMessage(content="ok")]
+    )
+    executor = LLMWorkExecutor(llm, max_retries=3)
+
+    assert executor.invoke("prompt", max_tokens=10).content == "ok"
+
+    assert llm.invoke.call_count == 3
+    assert executor.stats.retries == 2
+    assert executor.stats.failures == 0
+    # the backoff also pauses the shared limiter, which has already expired by the
+    # time the retry acquires it
+    backoffs = clock.sleeps
+    assert len(backoffs) == 2
+    # exponential with jitter: base 2s, then 4s, each at least half the delay
+    assert 1.0 <= backoffs[0] <= 2.0
+    assert 2.0 <= backoffs[1] <= 4.0
+
+
+def test_executor_gives_up_after_max_retries(clock: _FakeClock) -> None:
+    llm = _mock_llm(LLMRateLimitError("429"))
+    executor = LLMWorkExecutor(llm, max_retries=2)
+
+    with pytest.raises(LLMRateLimitError):
+        executor.invoke("prompt")
+
+    assert llm.invoke.call_count == 3
+    assert executor.stats.failures == 1
+
+
+def test_executor_run_reports_progress() -> None:
+    llm = _mock_llm(lambda prompt, max_tokens: AIMessage(content=prompt))
+    progress: list[tuple[int, int]] = []
+    executor = LLMWorkExecutor(
+        llm, progress_callback=lambda done, total: progress.append((done, total))
+    )
+
+    results = executor.run(
+        [(lambda i: executor.invoke(str(i)).content, (i,)) for i in range(5)]
+    )
+
+    assert results == ["0", "1", "2", "3", "4"]
+    assert sorted(progress) == [(i, 5) for i in range(1, 6)]
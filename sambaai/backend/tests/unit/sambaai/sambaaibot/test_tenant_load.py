@@ -0,0 +1,93 @@
+import threading
+import time
+
+from sambaai.sambaaibot.slack.tenant_load import pick_tenant_to_shed
+from sambaai.sambaaibot.slack.tenant_load import PodLoad
+from sambaai.sambaaibot.slack.tenant_load import should_acquire_tenant
+from sambaai.sambaaibot.slack.tenant_load import TenantLoadTracker
+
+
+def test_answers_per_tenant_are_limited() -> None:
+    tracker = TenantLoadTracker(window=60, max_concurrent_answers=2)
+    release = threading.Event()
+    running: list[str] = []
+    lock = threading.Lock()
+
+    def _answer(tenant_id: str) -> None:
+        with tracker.track_answer(tenant_id):
+            with lock:
+                running.append(tenant_id)
+            release.wait(timeout=5)
+
+    threads = [
+        threading.Thread(target=_answer, args=(tenant_id,))
+        for tenant_id in ["busy", "busy", "busy", "quiet"]
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+
+    # the third answer of the busy tenant waits, the quiet tenant isn't affected
+    assert sorted(running) == ["busy", "busy", "quiet"]
+    load = tracker.get_load("busy")
+    assert load.in_flight == 3
+    assert load.messages_per_minute == 3
+    assert not tracker.wait_until_idle({"busy"}, timeout=0.05)
+
+    release.set()
+    assert tracker.wait_until_idle({"busy", "quiet"}, timeout=5)
+    for thread in threads:
+        thread.join()
+    assert len(running) == 4
+    assert tracker.get_load("busy").in_flight == 0
+
+
+def test_least_loaded_pod_acquires_tenants() -> None:
+    assert should_acquire_tenant(50, [], tenant_score=10, threshold=0.25)
+    assert should_acquire_tenant(10, [20, 30], tenant_score=100, threshold=0.25)
+    # average 20, 25 is within the threshold
+    assert should_acquire_tenant(20, [10, 30], tenant_score=5, threshold=0.25)
+    assert not should_acquire_tenant(20, [10, 30], tenant_score=10, threshold=0.25)
+
+
+def _pods(*scores: float, num_tenants: int = 1) -> list[PodLoad]:
+    return [
+        PodLoad(pod_id=f"pod_{ind}", score=score, num_tenants=num_tenants)
+        for ind, score in enumerate(scores)
+    ]
+
+
+def _shed(
+    tenant_scores: dict[str, float],
+    other_pods: list[PodLoad],
+    keep: set[str] | None = None,
+) -> str | None:
+    return pick_tenant_to_shed(
+        tenant_scores,
+        other_pods,
+        max_tenants_per_pod=2,
+        threshold=0.25,
+        min_score=5,
+        keep=keep,
+    )
+
+
+def test_overloaded_pod_sheds_the_tenant_that_evens_out_the_load() -> None:
+    tenant_scores = {"a": 30.0, "b": 18.0, "c": 2.0}
+    # 50 vs 10, moving b leaves 32 vs 28
+    assert _shed(tenant_scores, _pods(10)) == "b"
+    # balanced enough
+    assert _shed(tenant_scores, _pods(45)) is None
+    # too little load to bother
+    assert _shed({"a": 3.0}, _pods(0)) is None
+    # a single hot tenant would just move the problem
+    assert _shed({"a": 40.0}, _pods(0)) is None
+    # a tenant that was taken back after nobody else took it stays
+    assert _shed(tenant_scores, _pods(10), keep={"b"}) == "a"
+
+
+def test_tenants_are_only_shed_to_pods_with_room() -> None:
+    tenant_scores = {"a": 30.0, "b": 18.0, "c": 2.0}
+    assert _shed(tenant_scores, _pods(10, num_tenants=2)) is None
+    # the least loaded pod with room is the one that evens out the load
+    assert _shed(tenant_scores, _pods(10, num_tenants=2) + _pods(40)) == "c"
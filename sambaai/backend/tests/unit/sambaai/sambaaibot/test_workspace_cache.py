@@ -0,0 +1,91 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+from sambaai.sambaaibot.slack.workspace_cache import SlackWorkspaceCache
+
+
+def _response(data: dict[str, Any]) -> MagicMock:
+    response = MagicMock()
+    response.data = data
+    response.__getitem__.side_effect = lambda key: data[key]
+    return response
+
+
+def test_channels_are_cached_until_renamed() -> None:
+    cache = SlackWorkspaceCache(ttl=600)
+    client = MagicMock()
+    client.conversations_info.return_value = _response(
+        {"ok": True, "channel": {"id": "C1", "name": "general"}}
+    )
+
+    assert cache.get_channel(client, "C1")["name"] == "general"
+    assert cache.get_channel(client, "C1")["name"] == "general"
+    assert client.conversations_info.call_count == 1
+
+    cache.handle_event(
+        {"type": "channel_rename", "channel": {"id": "C1", "name": "renamed"}}
+    )
+    cache.get_channel(client, "C1")
+    assert client.conversations_info.call_count == 2
+
+
+def test_email_lookups_fill_the_user_cache() -> None:
+    cache = SlackWorkspaceCache(ttl=600)
+    client = MagicMock()
+    client.users_lookupByEmail.return_value = _response(
+        {"ok": True, "user": {"id": "U1", "real_name": "Jo"}}
+    )
+
+    assert cache.lookup_user_id_by_email(client, "jo@example.com") == "U1"
+    assert cache.lookup_user_id_by_email(client, "jo@example.com") == "U1"
+    user = cache.get_user(client, "U1")
+    assert user is not None and user["real_name"] == "Jo"
+    assert client.users_lookupByEmail.call_count == 1
+    client.users_info.assert_not_called()
+
+    cache.handle_event({"type": "user_change", "user": {"id": "U1"}})
+    assert cache.email_to_user_id.get_fresh("jo@example.com") is None
+    assert cache.users.get_fresh("U1") is None
+
+
+def test_expired_entries_are_refetched() -> None:
+    cache = SlackWorkspaceCache(ttl=600)
+    client = MagicMock()
+    client.usergroups_users_list.return_value = _response({"users": ["U1"]})
+
+    assert cache.get_usergroup_members(client, "S1") == ["U1"]
+    cache.usergroup_members.put("S1", ["U1"], ttl=-1)
+    assert cache.get_usergroup_members(client, "S1") == ["U1"]
+    assert client.usergroups_users_list.call_count == 2
+
+
+def test_threads_are_read_incrementally() -> None:
+    cache = SlackWorkspaceCache(ttl=600)
+    client = MagicMock()
+    root = {"ts": "100.000001", "text": "question"}
+    reply = {"ts": "100.000002", "text": "answer"}
+    follow_up = {"ts": "100.000003", "text": "follow up"}
+
+    client.conversations_replies.return_value = _response({"messages": [root, reply]})
+    assert cache.get_thread_messages(client, "C1", "100.000001") == [root, reply]
+
+    client.conversations_replies.return_value = _response(
+        {"messages": [root, follow_up]}
+    )
+    assert cache.get_thread_messages(client, "C1", "100.000001") == [
+        root,
+        reply,
+        follow_up,
+    ]
+    assert client.conversations_replies.call_args.kwargs["oldest"] == "100.000002"
+
+    # an edited reply invalidates the whole thread
+    cache.handle_event(
+        {
+            "type": "message",
+            "subtype": "message_changed",
+            "channel": "C1",
+            "message": {"ts": "100.000002", "thread_ts": "100.000001"},
+        }
+    )
+    assert cache.threads.get_fresh(("C1", "100.000001")) is None